@@ -2,6 +2,7 @@ import re
 
 from django.apps import AppConfig
 from django.conf import settings
+from django.db.models import signals
 from django.dispatch import receiver
 from django.utils.translation import gettext_lazy as _
 
@@ -18,6 +19,32 @@ class CoreConfig(AppConfig):
     verbose_name = _("Hosting Service Core")
 
     def ready(self):
+        # The account flags kept in the sessions must follow the changes of
+        # the users' profiles and agreements, and of the policies.
+        from .flags import (
+            bump_account_flags_version, forget_effective_policies,
+        )
+        for model in ('hosting.Profile', 'core.Agreement'):
+            signals.post_save.connect(bump_account_flags_version, sender=model)
+            signals.post_delete.connect(bump_account_flags_version, sender=model)
+        signals.post_save.connect(forget_effective_policies, sender='core.Policy')
+        signals.post_delete.connect(forget_effective_policies, sender='core.Policy')
+
+        # The cached sets of the supervised countries and of the countries of
+        # the profiles' places must follow the changes of the data.
+        from django.contrib.auth import get_user_model
+
+        from . import supervision
+        signals.m2m_changed.connect(
+            supervision.user_groups_changed, sender=get_user_model().groups.through)
+        signals.post_save.connect(supervision.group_changed, sender='auth.Group')
+        signals.post_delete.connect(supervision.group_changed, sender='auth.Group')
+        signals.post_save.connect(supervision.user_changed, sender=settings.AUTH_USER_MODEL)
+        signals.post_save.connect(supervision.profile_created, sender='hosting.Profile')
+        signals.pre_save.connect(supervision.place_pre_save, sender='hosting.Place')
+        signals.post_save.connect(supervision.place_changed, sender='hosting.Place')
+        signals.post_delete.connect(supervision.place_changed, sender='hosting.Place')
+
         if getattr(settings, 'GITHUB_DISABLE_PREFETCH', False):
             return
 
@@ -2,14 +2,14 @@ import logging
 import re
 import types
 import warnings
+from collections import namedtuple
 from enum import Enum
 from functools import total_ordering
-from typing import Literal, Union
+from typing import Iterable, Literal, Optional, Union
 
 from django.conf import settings
 from django.contrib.auth.backends import ModelBackend
 from django.contrib.auth.mixins import AccessMixin
-from django.contrib.auth.models import Group
 from django.core.exceptions import ImproperlyConfigured, PermissionDenied
 from django.http import Http404, HttpResponseNotAllowed
 from django.utils.functional import SimpleLazyObject
@@ -21,6 +21,9 @@ from django_countries.fields import Country
 
 from hosting.models import Place, Profile
 
+from .supervision import (
+    profile_place_countries, profiles_place_countries, supervised_countries,
+)
 from .utils import camel_case_split, join_lazy
 
 auth_log = logging.getLogger('PasportaServo.auth')
@@ -124,8 +127,7 @@ class SupervisorAuthBackend(ModelBackend):
         cache_name = '_countrygroup_cache'
         if not hasattr(user_obj, cache_name):
             auth_log.debug("\t\t ... storing in cache %s ... ", cache_name)
-            user_groups = user_obj.groups.all() if not user_obj.is_superuser else Group.objects.all()
-            user_countries = frozenset(Country(g.name) for g in user_groups if len(g.name) == 2)
+            user_countries = frozenset(Country(code) for code in supervised_countries(user_obj))
             setattr(user_obj, cache_name, user_countries)
         supervised = getattr(user_obj, cache_name)
         if auth_log.getEffectiveLevel() == logging.DEBUG:
@@ -135,7 +137,7 @@ class SupervisorAuthBackend(ModelBackend):
                 countries = [obj]
                 auth_log.debug("\t\tGot a Country, %s", countries)
             elif isinstance(obj, Profile):
-                countries = obj.owned_places.filter(deleted=False).values_list('country', flat=True)
+                countries = profile_place_countries(obj)
                 auth_log.debug("\t\tGot a Profile, %s", countries)
             elif isinstance(obj, Place):
                 countries = [obj.country]
@@ -219,9 +221,67 @@ class SupervisorAuthBackend(ModelBackend):
         return perms
 
 
+PrecomputedAuth = namedtuple('PrecomputedAuth', 'role, is_supervisor')
+
+
+def authorize_in_bulk(user, objects: Iterable[Profile | Place]):
+    """
+    Determine, for a whole list of profiles and places, the role of the user in
+    the context of each object and whether the user supervises it, using at
+    most two queries (none when the countries of the profiles are cached).
+    The results are kept on the objects and consulted by get_role_in_context
+    and by the supervision template filters, instead of a check per object.
+    A place is considered in the context of its owner.
+    """
+    if not user.is_authenticated:
+        return
+    objects = [obj for obj in objects if isinstance(obj, (Profile, Place))]
+    if not objects:
+        return
+    profiles_countries = profiles_place_countries(
+        {obj.pk for obj in objects if isinstance(obj, Profile)})
+    owners_missing = {
+        obj.owner_id for obj in objects
+        if isinstance(obj, Place) and not Place.owner.is_cached(obj)
+    }
+    owners_users = dict(
+        Profile.all_objects.filter(pk__in=owners_missing).values_list('pk', 'user_id')
+    ) if owners_missing else {}
+    supervised = supervised_countries(user) if user.is_active else frozenset()
+
+    for obj in objects:
+        if isinstance(obj, Profile):
+            owner_user_id, countries = obj.user_id, profiles_countries[obj.pk]
+        else:
+            owner_user_id = (
+                obj.owner.user_id if obj.owner_id not in owners_missing
+                else owners_users.get(obj.owner_id))
+            countries = {str(obj.country)}
+        is_supervisor = user.is_active and (user.is_superuser or not supervised.isdisjoint(countries))
+        if user.pk == owner_user_id:
+            role = AuthRole.OWNER
+        elif user.is_superuser:
+            role = AuthRole.ADMIN
+        elif is_supervisor:
+            role = AuthRole.SUPERVISOR
+        else:
+            role = AuthRole.VISITOR
+        obj.__dict__.setdefault('_precomputed_auth', {})[user.pk] = PrecomputedAuth(role, is_supervisor)
+
+
+def get_precomputed_auth(user, obj) -> Optional[PrecomputedAuth]:
+    """
+    Return the role and the supervision of the user for the object, when these
+    were determined in advance by authorize_in_bulk.
+    """
+    return getattr(obj, '__dict__', {}).get('_precomputed_auth', {}).get(user.pk)
+
+
 def get_role_in_context(request, profile=None, place=None, no_obj_context=False):
     user = request.user
     context = place or profile or object
+    if not no_obj_context and (precomputed := get_precomputed_auth(user, context)):
+        return precomputed.role
     if profile and user.pk == profile.user_id:
         return AuthRole.OWNER
     if user.is_superuser:
@@ -0,0 +1,150 @@
+"""
+Recording of the browsers and devices the users employ, and of where they are
+connecting from.
+
+The request only enqueues a connection event (a `ConnectionEvent` row); the
+`record_connections` worker then deduplicates the events, geolocates the IP
+addresses, parses the user agent strings (which is slow, thus the results are
+kept in a LRU cache keyed by the hash of the string), and records the newly
+seen combinations of browser and location in bulk, as `UserBrowser` rows.
+
+Since the events hold the IP addresses and the user agent strings, they are
+kept only until processed, and at most for `ConnectionEvent.RETENTION` (one
+day): the older ones are discarded by the worker and, when the worker is not
+running, by `record_connections --prune` (expected to be run periodically).
+"""
+
+import threading
+from collections import OrderedDict
+from hashlib import md5
+from typing import Optional
+
+from django.conf import settings
+from django.db import transaction
+from django.http import HttpRequest
+
+import user_agents
+from user_agents.parsers import UserAgent
+
+from maps.geoip import geolocate_ip
+
+from .models import ConnectionEvent, UserBrowser
+
+PARSED_USER_AGENTS_CACHE_SIZE = 1000
+
+_parsed_user_agents: 'OrderedDict[str, UserAgent]' = OrderedDict()
+_parsed_user_agents_lock = threading.Lock()
+
+
+def user_agent_hash(ua_string: str) -> str:
+    return md5(ua_string.encode('utf-8')).hexdigest()
+
+
+def parse_user_agent(ua_string: str, ua_hash: Optional[str] = None) -> UserAgent:
+    """
+    Parses the user agent string, consulting the cache of the recently parsed
+    strings first.
+    """
+    ua_hash = ua_hash or user_agent_hash(ua_string)
+    with _parsed_user_agents_lock:
+        if ua_hash in _parsed_user_agents:
+            _parsed_user_agents.move_to_end(ua_hash)
+            return _parsed_user_agents[ua_hash]
+    ua = user_agents.parse(ua_string)
+    with _parsed_user_agents_lock:
+        _parsed_user_agents[ua_hash] = ua
+        while len(_parsed_user_agents) > PARSED_USER_AGENTS_CACHE_SIZE:
+            _parsed_user_agents.popitem(last=False)
+    return ua
+
+
+def request_user_agent(request: HttpRequest) -> str:
+    ua_string = request.META.get('HTTP_USER_AGENT', '')
+    if not isinstance(ua_string, str):
+        ua_string = ua_string.decode('utf-8', 'ignore')
+    return ua_string
+
+
+def enqueue_connection(request: HttpRequest):
+    """
+    Enqueues the connection of the current user, to be recorded by the worker.
+    """
+    ua_string = request_user_agent(request)
+    ConnectionEvent.objects.create(
+        user=request.user,
+        user_agent_string=ua_string,
+        user_agent_hash=user_agent_hash(ua_string),
+        ip_address=(
+            request.META.get('HTTP_X_REAL_IP')
+            if settings.ENVIRONMENT not in ('DEV', 'TEST')
+            else "188.166.58.162"
+        ) or None,
+    )
+
+
+def _ip_geolocation(ip_address: Optional[str]) -> str:
+    position = geolocate_ip(ip_address) if ip_address else None
+    if not position:
+        # When the IP geodata is unavailable or the user's IP cannot be found
+        # in it, we proceed as if the location is unknown.
+        return ''
+    return (f'{position.state}, ' if position.state else '') + position.country
+
+
+def process_connection_events(batch_size: int = 500) -> int:
+    """
+    Records the browsers and locations of a batch of the enqueued connections
+    which are not known yet, and removes the processed events. Returns the
+    number of the events processed.
+    """
+    with transaction.atomic():
+        events = list(
+            ConnectionEvent.objects
+            .select_for_update(skip_locked=True)
+            .order_by('pk')
+            [:batch_size]
+        )
+        if not events:
+            return 0
+
+        # Deduplicate the connections by user, browser, and location.
+        locations: dict[Optional[str], str] = {}
+        connections: dict[tuple[int, str, str], ConnectionEvent] = {}
+        for event in events:
+            if event.ip_address not in locations:
+                locations[event.ip_address] = _ip_geolocation(event.ip_address)
+            connections.setdefault(
+                (event.user_id, event.user_agent_hash, locations[event.ip_address]), event)
+
+        # A connection is known when the user used the same browser from the same
+        # location; when the location is unknown, the same browser suffices.
+        known_connections = set()
+        for user_id, ua_hash, geolocation in (
+                UserBrowser.objects
+                .filter(
+                    user_id__in={user_id for user_id, _, _ in connections},
+                    user_agent_hash__in={ua_hash for _, ua_hash, _ in connections})
+                .values_list('user_id', 'user_agent_hash', 'geolocation')):
+            known_connections.add((user_id, ua_hash, geolocation))
+            known_connections.add((user_id, ua_hash, ''))
+
+        new_connections = []
+        for (user_id, ua_hash, geolocation), event in connections.items():
+            if (user_id, ua_hash, geolocation) in known_connections:
+                continue
+            ua = parse_user_agent(event.user_agent_string, ua_hash)
+            new_connections.append(UserBrowser(
+                user_id=user_id,
+                user_agent_string=event.user_agent_string[:250],
+                user_agent_hash=ua_hash,
+                os_name=ua.os.family[:30],
+                os_version=ua.os.version_string[:15],
+                browser_name=ua.browser.family[:30],
+                browser_version=ua.browser.version_string[:15],
+                device_type=ua.get_device()[:30],
+                geolocation=geolocation,
+            ))
+            known_connections.update({(user_id, ua_hash, geolocation), (user_id, ua_hash, '')})
+        UserBrowser.objects.bulk_create(new_connections)
+        ConnectionEvent.objects.filter(pk__in=[event.pk for event in events]).delete()
+    return len(events)
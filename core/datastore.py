@@ -0,0 +1,135 @@
+"""
+Compact stores of static data, such as the metadata and the geodata of the
+countries of the world, read lazily from memory-mapped files instead of being
+built as large Python literals by every process at import time.
+
+Both stores behave as read-only mappings. A value is decoded from the file
+upon each access (thus a new object is returned every time), and nothing is
+read before the first access.
+"""
+
+import json
+import mmap
+import os
+import struct
+import threading
+from abc import ABC, abstractmethod
+from collections.abc import Mapping
+from math import isnan, nan
+from typing import Any, Callable, Iterator, Optional, Sequence
+
+from .utils import write_file_atomically
+
+
+class _MemoryMappedFile(Mapping, ABC):
+    def __init__(self, file_path: str):
+        self.file_path = file_path
+        self._data: Optional[mmap.mmap] = None
+        self._index: dict[str, Any] = {}
+        self._lock = threading.Lock()
+
+    def _load(self):
+        if self._data is not None:
+            return
+        with self._lock:
+            if self._data is not None:
+                return
+            with open(self.file_path, 'rb') as f:
+                data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            self._index = self._build_index(data)
+            self._data = data
+
+    @abstractmethod
+    def _build_index(self, data: mmap.mmap) -> dict[str, Any]:
+        ...
+
+    @abstractmethod
+    def _decode(self, entry: Any) -> Any:
+        ...
+
+    def __getitem__(self, key):
+        self._load()
+        return self._decode(self._index[key])
+
+    def __contains__(self, key):
+        self._load()
+        return key in self._index
+
+    def __iter__(self) -> Iterator[str]:
+        self._load()
+        return iter(self._index)
+
+    def __len__(self):
+        self._load()
+        return len(self._index)
+
+    def __repr__(self):
+        return f'<{self.__class__.__name__}: {os.path.basename(self.file_path)}>'
+
+
+class RecordsFile(_MemoryMappedFile):
+    """
+    A mapping of keys to JSON-compatible values, stored as JSON Lines; each
+    line is an object with the key as its only member. The index of the lines
+    is built upon the first access, without decoding the values.
+    """
+    def _build_index(self, data):
+        index, start = {}, 0
+        while start < len(data):
+            end = data.find(b'\n', start)
+            end = len(data) if end < 0 else end
+            if end > start:
+                key_end = data.find(b'"', start + 2)
+                index[data[start+2:key_end].decode()] = (start, end)
+            start = end + 1
+        return index
+
+    def _decode(self, entry):
+        start, end = entry
+        return next(iter(json.loads(self._data[start:end]).values()))
+
+    @staticmethod
+    def write(file_path: str, values: Mapping[str, Any]):
+        write_file_atomically(file_path, ''.join(
+            json.dumps({key: value}, ensure_ascii=False) + '\n'
+            for key, value in values.items()
+        ).encode())
+
+
+class FloatRowsFile(_MemoryMappedFile):
+    """
+    A mapping of keys to rows of floating-point numbers of a fixed width,
+    stored as a binary array of doubles preceded by the keys. Missing numbers
+    (None) are stored as NaN. The rows are converted to the values of the
+    mapping by the `decode` function.
+    """
+    MAGIC = b'PSFR'
+    HEADER = struct.Struct('<4sIII')  # Magic, number of rows, width, length of keys.
+
+    def __init__(self, file_path: str, decode: Callable[[list[Optional[float]]], Any] = list):
+        super().__init__(file_path)
+        self.decode = decode
+
+    def _build_index(self, data):
+        magic, count, self.width, keys_length = self.HEADER.unpack_from(data)
+        if magic != self.MAGIC:
+            raise ValueError(f"{self.file_path} is not a file of rows of floats.")
+        keys = data[self.HEADER.size:self.HEADER.size + keys_length].decode().split('\n')
+        offset = -(-(self.HEADER.size + keys_length) // 8) * 8
+        self._numbers = memoryview(data)[offset:offset + count * self.width * 8].cast('d')
+        return {key: row for row, key in enumerate(keys)}
+
+    def _decode(self, row):
+        numbers = self._numbers[row * self.width:(row + 1) * self.width]
+        return self.decode([None if isnan(number) else number for number in numbers])
+
+    @classmethod
+    def write(cls, file_path: str, rows: Mapping[str, Sequence[Optional[float]]], width: int):
+        keys = '\n'.join(rows.keys()).encode()
+        content = bytearray(cls.HEADER.pack(cls.MAGIC, len(rows), width, len(keys)) + keys)
+        content += bytes(-len(content) % 8)
+        for key, row in rows.items():
+            if len(row) != width:
+                raise ValueError(f"The row of {key} does not consist of {width} numbers.")
+            content += struct.pack(f'<{width}d', *(nan if number is None else number for number in row))
+        write_file_atomically(file_path, bytes(content))
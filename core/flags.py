@@ -0,0 +1,61 @@
+"""
+Versions of the account flags of the users.
+
+The AccountFlagsMiddleware keeps the facts about the user's account which it
+needs on every request (whether the user has a profile, their birth date, and
+the policies they agreed to) in the session, stamped with the version of the
+user's flags. The version is a counter in the cache, incremented whenever any
+of these facts changes, so that the sessions of the user (on all devices)
+compute the facts anew upon their next request.
+"""
+
+import time
+from typing import Optional
+
+from django.core.cache import cache
+
+
+def _version_key(user_id: int) -> str:
+    return f'account-flags-version.{user_id}'
+
+
+def get_account_flags_version(user_id: int) -> Optional[int]:
+    """
+    Returns the current version of the user's flags; None when the versions
+    are not available (with a dummy cache).
+    """
+    key = _version_key(user_id)
+    version = cache.get(key)
+    if version is None:
+        # A new counter starts from the current time, so that the versions
+        # issued before the counter was evicted are not repeated.
+        cache.add(key, time.time_ns() // 1000, timeout=None)
+        version = cache.get(key)
+    return version
+
+
+def invalidate_account_flags(user_id: int):
+    try:
+        cache.incr(_version_key(user_id))
+    except ValueError:
+        # A missing counter will start anew from a never issued value.
+        pass
+
+
+def bump_account_flags_version(sender, instance, **kwargs):
+    """
+    Increments the version of the flags of the user the instance (a profile
+    or an agreement) belongs to. To be used as a signal receiver.
+    """
+    if kwargs.get('raw') or not instance.user_id:
+        return
+    invalidate_account_flags(instance.user_id)
+
+
+def forget_effective_policies(sender, **kwargs):
+    """
+    Discards the cached list of the currently effective policies. To be used
+    as a signal receiver for the changes of the policies.
+    """
+    from .models import Policy
+    Policy.objects.forget_effective()
@@ -0,0 +1,63 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from core.connections import process_connection_events
+from core.models import ConnectionEvent
+
+# How often (in seconds) the worker discards the expired events.
+PRUNE_INTERVAL = 60 * 60
+
+
+class Command(BaseCommand):
+    help = """
+        Records the browsers and the locations of the users' connections,
+        enqueued by the website. Runs continuously, unless asked to process
+        only the events waiting at the moment, or only to discard the events
+        older than the retention period.
+        """
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--once', action='store_true',
+            help="process the waiting events and exit.")
+        parser.add_argument(
+            '--prune', action='store_true',
+            help="discard the expired events and exit.")
+        parser.add_argument(
+            '--interval', type=float, default=10,
+            help="seconds to wait when no events are waiting (default: %(default)s).")
+        parser.add_argument(
+            '--batch-size', type=int, default=500,
+            help="number of events processed at a time (default: %(default)s).")
+
+    def handle(self, *args, **options):
+        self.verbosity = options['verbosity']
+        if options['prune']:
+            deleted_count = ConnectionEvent.prune()
+            if self.verbosity >= 1:
+                self.stdout.write(f"{deleted_count} expired connection events deleted.")
+            return
+        total = 0
+        pruned_at = None
+        try:
+            while True:
+                close_old_connections()
+                if pruned_at is None or time.monotonic() - pruned_at > PRUNE_INTERVAL:
+                    deleted_count = ConnectionEvent.prune()
+                    pruned_at = time.monotonic()
+                    if deleted_count and self.verbosity >= 2:
+                        self.stdout.write(f"Deleted {deleted_count} expired connection events.")
+                processed = process_connection_events(batch_size=options['batch_size'])
+                total += processed
+                if processed and self.verbosity >= 2:
+                    self.stdout.write(f"Processed {processed} connection events.")
+                if not processed:
+                    if options['once']:
+                        break
+                    time.sleep(options['interval'])
+        except KeyboardInterrupt:
+            pass
+        if self.verbosity >= 1:
+            self.stdout.write(self.style.SUCCESS(f"** {total} connection events processed."))
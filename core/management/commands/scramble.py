@@ -624,7 +624,7 @@ class Command(BaseCommand):
             place.latitude, place.longitude = None, None
             updated = True
         if place.location:
-            country = place.country or self.faker.random_element(COUNTRIES_GEO.keys())
+            country = place.country or self.faker.random_element(list(COUNTRIES_GEO))
             place.location = Point(
                 [
                     self.faker.random.uniform(a, b)
@@ -0,0 +1,45 @@
+from django.core.management.base import BaseCommand
+
+from hosting.models import Profile
+
+
+class Command(BaseCommand):
+    help = """
+        Records anew the presence and the dimensions of the avatars of all
+        profiles, and their URLs (of the uploaded picture or the Gravatar),
+        as used when displaying the avatars.
+        Usage: ./manage.py update_avatar_metadata [--only-missing]
+        """
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--only-missing', action='store_true',
+            help="Process only the profiles whose metadata was never recorded.")
+
+    def handle(self, *args, **options):
+        profiles = Profile.all_objects.select_related('user').only(
+            'avatar', 'avatar_present', 'avatar_width', 'avatar_height', 'stored_avatar_url',
+            'user__email',
+        )
+        if options['only_missing']:
+            profiles = profiles.filter(stored_avatar_url='')
+        metadata_fields = ['avatar_present', 'avatar_width', 'avatar_height', 'stored_avatar_url']
+        batch, updated = [], 0
+        for profile in profiles.order_by('pk').iterator():
+            current_values = [getattr(profile, field) for field in metadata_fields]
+            if profile.avatar:
+                profile.update_avatar_metadata()
+            else:
+                profile.avatar_present, profile.avatar_width, profile.avatar_height = False, None, None
+            profile.stored_avatar_url = profile.compute_avatar_url()
+            if [getattr(profile, field) for field in metadata_fields] != current_values:
+                batch.append(profile)
+            if len(batch) >= 500:
+                Profile.all_objects.bulk_update(batch, metadata_fields)
+                updated, batch = updated + len(batch), []
+        if batch:
+            Profile.all_objects.bulk_update(batch, metadata_fields)
+            updated += len(batch)
+
+        if options['verbosity'] >= 1:
+            self.stdout.write(f"Avatar metadata updated for {updated} profiles.")
@@ -8,9 +8,9 @@ from django.core.management.base import BaseCommand
 
 import requests
 
-from hosting.countries import COUNTRIES_DATA
+from core.datastore import RecordsFile
+from hosting.countries import COUNTRIES_DATA, COUNTRIES_METADATA_FILE
 
-COUNTRIES_METADATA_FILE = 'hosting/countries.py'
 GEONAMES_SOURCE_URL = 'http://download.geonames.org/export/dump/countryInfo.txt'
 COMMERCEGUYS_SOURCE_URL = (
     'https://raw.githubusercontent.com/commerceguys/addressing'
@@ -27,12 +27,6 @@ class Command(BaseCommand):
     def handle(self, *args, **options):
         self.verbosity = options['verbosity']
 
-        # Read existing local database file.
-        with open(COUNTRIES_METADATA_FILE, 'r') as source_file:
-            file_old_contents = source_file.read()
-        bits = re.match(
-            '(.*\nCOUNTRIES_DATA = )(?:\{\n.*?\n\})(.*)', file_old_contents, re.DOTALL).groups()
-
         # Update countries dict with the new metadata obtained from CommerceGuys and GeoNames.
         country_list = OrderedDict(COUNTRIES_DATA)
         try:
@@ -135,11 +129,7 @@ class Command(BaseCommand):
             )
 
         # Generate new local database file.
-        file_new_contents = bits[0]
-        file_new_contents += json.dumps(country_list, indent=4, ensure_ascii=False).replace('null', str(None))
-        file_new_contents += bits[1]
-        with open(COUNTRIES_METADATA_FILE, 'w', encoding='utf-8') as output_file:
-            output_file.write(file_new_contents)
+        RecordsFile.write(COUNTRIES_METADATA_FILE, country_list)
 
         # Print command execution summary.
         if self.verbosity >= 1:
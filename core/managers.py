@@ -19,9 +19,13 @@ class PoliciesManager(models.Manager):
             policy_filter['requires_consent'] = True
         return self.filter(**policy_filter).latest()
 
+    @staticmethod
+    def _effective_cache_key(day) -> str:
+        return f'all-effective-policies_{day:%Y-%m-%d}'
+
     def all_effective(self) -> tuple[list[str], 'PoliciesManager']:
         today = timezone.now()
-        cache_key = f'all-effective-policies_{today:%Y-%m-%d}'
+        cache_key = self._effective_cache_key(today)
         cached_policy_ids = cache.get(cache_key)
         if cached_policy_ids is not None:
             policies = self.filter(version__in=cached_policy_ids)
@@ -41,3 +45,6 @@ class PoliciesManager(models.Manager):
             cached_policy_ids = list(policies.values_list('version', flat=True))
             cache.set(cache_key, cached_policy_ids, int(24.5 * 60 * 60))
         return (cached_policy_ids, policies.order_by('-effective_date'))
+
+    def forget_effective(self):
+        cache.delete(self._effective_cache_key(timezone.now()))
@@ -1,5 +1,6 @@
-from hashlib import md5
-from typing import cast
+from datetime import date
+from functools import lru_cache
+from typing import TypedDict, cast
 
 from django.conf import settings
 from django.contrib.auth.views import (
@@ -16,10 +17,9 @@ from django.utils.text import format_lazy
 from django.utils.translation import gettext_lazy as _
 from django.views import View
 
-import geocoder
-import user_agents
-
-from core.models import Agreement, Policy, SiteConfiguration, UserBrowser
+from core.connections import enqueue_connection
+from core.flags import get_account_flags_version
+from core.models import Agreement, Policy, SiteConfiguration
 from core.views import AgreementRejectView, AgreementView, HomeView
 from hosting.models import Preferences, Profile
 from hosting.validators import TooNearPastValidator
@@ -28,6 +28,39 @@ from pasportaservo.urls import (
 )
 
 
+class AccountFlags(TypedDict):
+    version: int | None
+    has_profile: bool
+    birth_date: str | None
+    agreements: list[str]
+
+
+@lru_cache(maxsize=1024)
+def classify_view(path: str) -> type[View] | None:
+    """
+    Returns the class of the view which the path resolves to, when this view
+    is subject to the checks of the user's age and consent to the policies;
+    otherwise None. The login, logout, home, and agreement rejection views,
+    the general pages, and the non-existent pages are not checked.
+    """
+    try:
+        view = resolve(path)
+    except Resolver404:
+        # A non-existent page is ok.
+        return None
+    if (not hasattr(view.func, 'view_class')
+            or view.func.view_class in [LoginView, LogoutView, HomeView, AgreementRejectView]):
+        return None
+    try:
+        resolve(path, 'pages.urls')
+    except Resolver404:
+        # The URL accessed is not one of the general pages.
+        return view.func.view_class
+    else:
+        # A general page is ok.
+        return None
+
+
 class AccountFlagsMiddleware(MiddlewareMixin):
     """
     Updates any flags and settings related to the user's account, whose value
@@ -58,40 +91,24 @@ class AccountFlagsMiddleware(MiddlewareMixin):
         if not request.user.is_authenticated:
             # Only relevant to logged in users.
             return
-        profile = Profile.all_objects.filter(user=request.user)[0:1]
         if 'flag_analytics_setup' not in request.session:
             # Update user's analytics consent according to the DNT setting in the browser, first time
             # when the user logs in (DNT==True => opt out). Prior to that the consent is undefined.
-            pref = Preferences.objects.filter(profile=profile, site_analytics_consent__isnull=True)
+            pref = Preferences.objects.filter(
+                profile__in=Profile.all_objects.filter(user=request.user)[0:1],
+                site_analytics_consent__isnull=True)
             pref.update(site_analytics_consent=not request.DNT)
             request.session['flag_analytics_setup'] = str(timezone.now())
 
         self._update_connection_info(request)
 
-        birth_date = profile.values_list('birth_date', flat=True)
-        request.user_has_profile = len(birth_date) > 0
+        flags = self._get_account_flags(request)
+        request.user_has_profile = flags['has_profile']
 
         # Is user's age above the legally required minimum?
-        trouble_view = None
-        try:
-            trouble_view = resolve(request.path)
-            if (hasattr(trouble_view.func, 'view_class') and trouble_view.func.view_class not in
-                    [LoginView, LogoutView, HomeView, AgreementRejectView]):
-                try:
-                    resolve(request.path, 'pages.urls')
-                except Resolver404:
-                    # The URL accessed is not one of the general pages.
-                    pass
-                else:
-                    # A general page is ok.
-                    trouble_view = None
-            else:
-                trouble_view = None
-        except Resolver404:
-            # A non-existent page is ok.
-            pass
-        if trouble_view is not None and len(birth_date) != 0 and birth_date[0]:
-            birth_date_value = birth_date[0]  # Returned as a list from the query.
+        trouble_view = classify_view(request.path)
+        if trouble_view is not None and flags['birth_date']:
+            birth_date_value = date.fromisoformat(flags['birth_date'])
             try:
                 TooNearPastValidator(SiteConfiguration.USER_MIN_AGE)(birth_date_value)
             except ValidationError:
@@ -104,7 +121,7 @@ class AccountFlagsMiddleware(MiddlewareMixin):
         # Has the user consented to the most up-to-date usage policy?
         if trouble_view is not None:
             redirect_response = (
-                self._verify_usage_policy_consent(request, trouble_view.func.view_class)
+                self._verify_usage_policy_consent(request, trouble_view, flags['agreements'])
             )
             if redirect_response is not None:
                 return redirect_response
@@ -113,9 +130,6 @@ class AccountFlagsMiddleware(MiddlewareMixin):
         # properly configured profile?
         if (request.path.startswith(str(url_index_postman))
                 and not request.user_has_profile and not request.user.is_superuser):
-            # We can reuse the birth date query result to avoid an additional
-            # query in the DB.  For users with a profile, the result will not
-            # be empty and hold some value (either datetime or None).
             t = TemplateResponse(
                     request, 'registration/profile_create.html', status=403,
                     context={
@@ -128,17 +142,42 @@ class AccountFlagsMiddleware(MiddlewareMixin):
             t.render()
             return t
 
-    def _verify_usage_policy_consent(self, request: HttpRequest, requested_view: type[View]):
-        policy_versions, policies = Policy.objects.all_effective()
-        agreement = (
-            Agreement.objects
-            .filter(
-                user=request.user,
-                withdrawn__isnull=True,
+    def _get_account_flags(self, request: HttpRequest) -> AccountFlags:
+        """
+        Returns the facts about the user's account needed for the checks,
+        kept in the session as long as the version of the user's flags does
+        not change; normally, no queries of the database are made.
+        """
+        version = get_account_flags_version(request.user.pk)
+        flags = request.session.get('account_flags')
+        if flags is None or version is None or flags['version'] != version:
+            birth_date = (
+                Profile.all_objects
+                .filter(user=request.user)
+                .values_list('birth_date', flat=True)
+            )[0:1]
+            agreements = (
+                Agreement.objects
+                .filter(
+                    user=request.user,
+                    withdrawn__isnull=True,
+                )
+                .order_by('-created')
+                .values_list('policy_version', flat=True)
             )
-            .order_by('-created')
-            .values_list('policy_version', flat=True)
-        )
+            flags = {
+                'version': version,
+                'has_profile': len(birth_date) > 0,
+                'birth_date': birth_date[0].isoformat() if birth_date and birth_date[0] else None,
+                'agreements': list(agreements),
+            }
+            request.session['account_flags'] = flags
+        return flags
+
+    def _verify_usage_policy_consent(
+            self, request: HttpRequest, requested_view: type[View], agreement: list[str],
+    ):
+        policy_versions, policies = Policy.objects.all_effective()
 
         if not set(agreement) & set(policy_versions):
             if requested_view != AgreementView:
@@ -152,7 +191,7 @@ class AccountFlagsMiddleware(MiddlewareMixin):
             # from the database.
             current_policy = list(policies)[0] if policies else None
             setattr(request.user, 'consent_required', {
-                'given_for': agreement.first(),
+                'given_for': agreement[0] if agreement else None,
                 'current': [current_policy],
                 'summary': [
                     (p.effective_date, p.changes_summary)
@@ -171,15 +210,16 @@ class AccountFlagsMiddleware(MiddlewareMixin):
                 if p.changes_summary
             ])
             setattr(request.user, 'consent_obtained', {
-                'given_for': agreement.first(),
+                'given_for': agreement[0] if agreement else None,
                 'current': current_policy,
                 'summary': policy_summary,
             })
 
     def _update_connection_info(self, request: HttpRequest):
         """
-        Store information about the browser and device the user is employing and
-        where the user is connecting from.
+        Enqueue the information about the browser and device the user is employing
+        and where the user is connecting from; the connection is recorded by the
+        `record_connections` worker.
         """
         last_connection_check = request.session.get('flag_connection_logged')
         if last_connection_check is None:
@@ -195,54 +235,5 @@ class AccountFlagsMiddleware(MiddlewareMixin):
             # No information about browser in the request.
             return
 
-        # Decode the UA from the request and retrieve the already known connections
-        # of the user with this browser (database records are filtered by UA's hash
-        # for quicker comparison).
-        ua_string = request.META.get('HTTP_USER_AGENT', '')
-        if not isinstance(ua_string, str):
-            ua_string = ua_string.decode('utf-8', 'ignore')
-        ua_hash = md5(ua_string.encode('utf-8')).hexdigest()
-        locations = (
-            UserBrowser.objects
-            .filter(user=request.user, user_agent_hash=ua_hash)
-            .order_by('-pk')
-        )
-        # Attempt retrieving the user's current geographical location. If it can be
-        # found, use it to futher filter the known connections.
-        position = geocoder.ip(request.META['HTTP_X_REAL_IP']
-                               if settings.ENVIRONMENT not in ('DEV', 'TEST')
-                               else "188.166.58.162")
-        if position.ok and position.current_result.ok:
-            current_location = (f'{position.state}, ' if position.state else '') + position.country
-            locations = locations.filter(geolocation=current_location)
-        else:
-            # When the IPInfo service is unavailable or information about the user's
-            # IP cannot be retrieved, we proceed as if the location is unknown.
-            current_location = ''
-        position.session.close()
-
-        # Verify if the user is connecting with a browser and from a geographical
-        # location already known by us.
-        connection_data = locations.values_list('pk', 'browser_name').first()
-        if connection_data is None:
-            # Parse the UA (slow) and create new record only if one does not exist yet.
-            ua = user_agents.parse(ua_string)
-            conn = UserBrowser(
-                user=request.user,
-                user_agent_string=ua_string[:250],
-                user_agent_hash=ua_hash,
-                os_name=ua.os.family[:30],
-                os_version=ua.os.version_string[:15],
-                browser_name=ua.browser.family[:30],
-                browser_version=ua.browser.version_string[:15],
-                device_type=ua.get_device()[:30],
-                geolocation=current_location,
-            )
-            conn.save()
-            connection_id = conn.pk
-            connection_browser = conn.browser_name
-        else:
-            connection_id, connection_browser = connection_data
-        request.session['connection_id'] = connection_id
-        request.session['connection_browser'] = connection_browser
+        enqueue_connection(request)
         request.session['flag_connection_logged'] = str(timezone.now())
@@ -0,0 +1,32 @@
+# Generated by Django 3.2.25 on 2026-10-18 23:40
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('core', '0013_policy_model'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ConnectionEvent',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('user_agent_string', models.TextField(verbose_name='user agent string')),
+                ('user_agent_hash', models.CharField(max_length=32, verbose_name='user agent hash')),
+                ('ip_address', models.GenericIPAddressField(null=True, verbose_name='IP address')),
+                ('connected_on', models.DateTimeField(auto_now_add=True, verbose_name='connected on')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL, verbose_name='user')),
+            ],
+            options={
+                'verbose_name': 'connection event',
+                'verbose_name_plural': 'connection events',
+                'default_permissions': (),
+            },
+        ),
+    ]
@@ -1,9 +1,12 @@
+import time
 from collections import namedtuple
 from datetime import timedelta
-from typing import TYPE_CHECKING, cast
+from typing import TYPE_CHECKING, ClassVar, Optional, cast
 
 from django.conf import settings
+from django.core.cache import cache
 from django.db import models
+from django.utils import timezone
 from django.utils.translation import gettext, gettext_lazy as _
 
 from django_extensions.db.models import TimeStampedModel
@@ -26,6 +29,9 @@ def default_api_keys():  # pragma: no cover
     )
 
 
+LocalConfiguration = namedtuple('LocalConfiguration', 'config, version, verified_on')
+
+
 class SiteConfiguration(SingletonModel):
     # Legal requirement of GDPR Article 8(1): [...] in relation to the offer
     # of information society services directly to a child, the processing of
@@ -69,15 +75,75 @@ class SiteConfiguration(SingletonModel):
         _("API keys for mapping services"),
         default=default_api_keys)
 
+    # The configuration is consulted on many hot paths (for example, by every
+    # queryset of the tracked models), thus each process keeps its own copy.
+    # The copy is verified against the version shared by all processes at most
+    # once in LOCAL_COPY_TTL seconds; saving the configuration bumps the version.
+    LOCAL_COPY_TTL = 5
+    VERSION_CACHE_KEY = 'site-configuration-version'
+    _local_copy: ClassVar[Optional[LocalConfiguration]] = None
+
     class Meta:
         verbose_name = _("Site Configuration")
 
     def __str__(self):  # pragma: no cover
         return str(_("Site Configuration"))
 
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        self.forget_local_copies()
+
+    def delete(self, *args, **kwargs):
+        result = super().delete(*args, **kwargs)
+        self.forget_local_copies()
+        return result
+
+    @classmethod
+    def get_version(cls) -> Optional[int]:
+        """
+        Returns the current version of the configuration; None when the versions
+        are not available (with a dummy cache).
+        """
+        version = cache.get(cls.VERSION_CACHE_KEY)
+        if version is None:
+            # A new counter starts from the current time, so that the versions
+            # issued before the counter was evicted are not repeated.
+            cache.add(cls.VERSION_CACHE_KEY, time.time_ns() // 1000, timeout=None)
+            version = cache.get(cls.VERSION_CACHE_KEY)
+        return version
+
+    @classmethod
+    def forget_local_copies(cls):
+        """
+        Discards the copy of the configuration kept by this process and makes
+        the other processes discard theirs upon their next verification.
+        """
+        cls._local_copy = None
+        try:
+            cache.incr(cls.VERSION_CACHE_KEY)
+        except ValueError:
+            # A missing counter will start anew from a never issued value.
+            pass
+
     @classmethod
     def get_solo(cls):
-        return cast(SiteConfiguration, super().get_solo())
+        """
+        Returns the configuration, preferably the copy kept by this process.
+        The returned object is shared and is not to be modified unless saved.
+        """
+        local_copy, now = cls._local_copy, time.monotonic()
+        if local_copy and now - local_copy.verified_on < cls.LOCAL_COPY_TTL:
+            return local_copy.config
+        version = cls.get_version()
+        if version is None:
+            cls._local_copy = None
+            return cast(SiteConfiguration, super().get_solo())
+        if local_copy and local_copy.version == version:
+            cls._local_copy = local_copy._replace(verified_on=now)
+            return local_copy.config
+        config = cast(SiteConfiguration, super().get_solo())
+        cls._local_copy = LocalConfiguration(config, version, now)
+        return config
 
 
 class Policy(models.Model):
@@ -196,6 +262,46 @@ class UserBrowser(models.Model):
                 + ">")
 
 
+class ConnectionEvent(models.Model):
+    """
+    A connection of a user to the website, waiting to be recorded as a known
+    browser of the user (`UserBrowser`) by the `record_connections` worker.
+    """
+    user: 'ForeignKey[PasportaServoUser]' = models.ForeignKey(
+        settings.AUTH_USER_MODEL, verbose_name=_("user"),
+        related_name='+', on_delete=models.CASCADE)
+    user_agent_string = models.TextField(
+        _("user agent string"))
+    user_agent_hash = models.CharField(
+        _("user agent hash"),
+        max_length=32)
+    ip_address = models.GenericIPAddressField(
+        _("IP address"),
+        null=True)
+    connected_on = models.DateTimeField(
+        _("connected on"),
+        auto_now_add=True)
+
+    # The events hold the IP addresses and the user agent strings; those not
+    # processed within this period are discarded (by the worker, or by the
+    # `record_connections --prune` management command when it is not running).
+    RETENTION = timedelta(days=1)
+
+    class Meta:
+        verbose_name = _("connection event")
+        verbose_name_plural = _("connection events")
+        default_permissions = ()
+
+    @classmethod
+    def prune(cls) -> int:
+        """
+        Discards the events older than the retention period. Returns the
+        number of the events deleted.
+        """
+        deleted_count, _ = cls.objects.filter(connected_on__lt=timezone.now() - cls.RETENTION).delete()
+        return deleted_count
+
+
 # TODO: Fetch from feature flags.
 FeedbackType = namedtuple('FeedbackType', 'key, name, esperanto_name, foreign_id, url')
 FEEDBACK_TYPES = {
@@ -0,0 +1,160 @@
+"""
+Cross-request caches of the data the checks of the supervisors' permissions
+rely on: the countries each user supervises (via the groups named by country
+codes) and the countries of each profile's places.
+
+The sets are kept in the cache, and removed when the data they derive from
+changes: the membership of the user in the groups, the user's superuser flag,
+and the places of the profile (including those given to another profile).
+The keys of the supervised countries include a global version, incremented
+when the groups themselves change, since the superusers supervise all the
+countries having a group.
+"""
+
+import time
+from typing import Iterable
+
+from django.contrib.auth.models import Group
+from django.core.cache import cache
+
+from hosting.models import Place
+
+SUPERVISION_CACHE_TIMEOUT = 24 * 60 * 60
+_GROUPS_VERSION_KEY = 'supervised-countries-version'
+
+
+def _groups_version() -> int:
+    version = cache.get(_GROUPS_VERSION_KEY)
+    if version is None:
+        cache.add(_GROUPS_VERSION_KEY, time.time_ns() // 1000, timeout=None)
+        version = cache.get(_GROUPS_VERSION_KEY)
+    return version
+
+
+def _supervised_countries_key(user_id: int) -> str:
+    return f'supervised-countries.{_groups_version()}.{user_id}'
+
+
+def _place_countries_key(profile_id: int) -> str:
+    return f'profile-place-countries.{profile_id}'
+
+
+def supervised_countries(user) -> frozenset[str]:
+    """
+    Returns the codes of the countries the user supervises; a superuser
+    supervises all countries.
+    """
+    key = _supervised_countries_key(user.pk)
+    countries = cache.get(key)
+    if countries is None:
+        user_groups = user.groups.all() if not user.is_superuser else Group.objects.all()
+        countries = frozenset(g.name for g in user_groups.only('name') if len(g.name) == 2)
+        cache.set(key, countries, SUPERVISION_CACHE_TIMEOUT)
+    return countries
+
+
+def profile_place_countries(profile) -> frozenset[str]:
+    """
+    Returns the codes of the countries of the profile's (non-deleted) places.
+    """
+    return profiles_place_countries([profile.pk])[profile.pk]
+
+
+def profiles_place_countries(profile_ids: Iterable[int]) -> dict[int, frozenset[str]]:
+    """
+    Returns the codes of the countries of the (non-deleted) places of each of
+    the profiles, querying the database at most once for all the profiles not
+    found in the cache.
+    """
+    keys = {profile_id: _place_countries_key(profile_id) for profile_id in profile_ids}
+    cached = cache.get_many(keys.values())
+    result = {
+        profile_id: cached[key] for profile_id, key in keys.items() if key in cached
+    }
+    missing = keys.keys() - result.keys()
+    if missing:
+        countries = {profile_id: set() for profile_id in missing}
+        for profile_id, country in (
+                Place.all_objects
+                .filter(owner_id__in=missing, deleted=False)
+                .values_list('owner_id', 'country')):
+            countries[profile_id].add(str(country))
+        fetched = {profile_id: frozenset(codes) for profile_id, codes in countries.items()}
+        cache.set_many(
+            {keys[profile_id]: codes for profile_id, codes in fetched.items()},
+            SUPERVISION_CACHE_TIMEOUT)
+        result.update(fetched)
+    return result
+
+
+def forget_supervised_countries(user_ids: Iterable[int]):
+    cache.delete_many([_supervised_countries_key(user_id) for user_id in user_ids])
+
+
+def forget_profile_place_countries(profile_ids: Iterable[int]):
+    cache.delete_many([_place_countries_key(profile_id) for profile_id in profile_ids])
+
+
+def forget_all_supervised_countries():
+    try:
+        cache.incr(_GROUPS_VERSION_KEY)
+    except ValueError:
+        # A missing counter will start anew from a never issued value.
+        pass
+
+
+# Signal receivers.
+
+def user_groups_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    if not reverse:
+        forget_supervised_countries([instance.pk])
+    elif pk_set is not None:
+        forget_supervised_countries(pk_set)
+    else:
+        # All the users were removed from the group.
+        forget_all_supervised_countries()
+
+
+def group_changed(sender, instance, **kwargs):
+    if not kwargs.get('raw'):
+        forget_all_supervised_countries()
+
+
+def user_changed(sender, instance, **kwargs):
+    update_fields = kwargs.get('update_fields')
+    if kwargs.get('raw') or update_fields is not None and 'is_superuser' not in update_fields:
+        return
+    forget_supervised_countries([instance.pk])
+
+
+def profile_created(sender, instance, created, **kwargs):
+    if created and not kwargs.get('raw'):
+        forget_profile_place_countries([instance.pk])
+
+
+def place_pre_save(sender, instance, **kwargs):
+    """
+    Notes the previous owner of the place, when it is being given to another
+    profile, so that the previous owner's countries are forgotten as well.
+    """
+    update_fields = kwargs.get('update_fields')
+    if kwargs.get('raw') or instance.pk is None or update_fields is not None and 'owner' not in update_fields:
+        return
+    instance._supervision_previous_owner_ids = list(
+        Place.all_objects
+        .filter(pk=instance.pk)
+        .exclude(owner_id=instance.owner_id)
+        .values_list('owner_id', flat=True)
+    )
+
+
+def place_changed(sender, instance, **kwargs):
+    if kwargs.get('raw'):
+        return
+    profile_ids = instance.__dict__.pop('_supervision_previous_owner_ids', [])
+    if instance.owner_id:
+        profile_ids.append(instance.owner_id)
+    if profile_ids:
+        forget_profile_place_countries(profile_ids)
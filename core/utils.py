@@ -1,7 +1,9 @@
 import hashlib
 import locale
 import operator
+import os
 import re
+import tempfile
 from functools import reduce
 from typing import Optional, Sequence, Tuple
 
@@ -152,3 +154,19 @@ def is_password_compromised(pwdvalue: str, full_list: bool = False):
                 return (True, count) if not full_list else (True, count, result.text)
             break
     return (False, 0) if not full_list else (False, 0, result.text)
+
+
+def write_file_atomically(file_path, content: bytes):
+    """
+    Writes the content to a temporary file in the same directory, then moves
+    it into place; the readers thus never encounter a partially written file.
+    """
+    fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(file_path), prefix='.tmp-')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(content)
+        os.chmod(temp_path, 0o644)
+        os.replace(temp_path, file_path)
+    except BaseException:
+        os.unlink(temp_path)
+        raise
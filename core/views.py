@@ -58,9 +58,11 @@ from hosting.views.mixins import (
     ProfileIsUserMixin, ProfileMixin, ProfileModifyMixin,
 )
 from links.utils import create_unique_url
+from maps.snapshots import schedule_rebuild
 from shop.models import Reservation
 
 from .auth import AuthMixin, AuthRole
+from .flags import invalidate_account_flags
 from .forms import (
     EmailStaffUpdateForm, EmailUpdateForm, FeedbackForm, MassMailForm,
     SystemPasswordChangeForm, UserAuthenticationForm,
@@ -71,6 +73,7 @@ from .mixins import (
     UserModifyMixin, flatpages_as_templates,
 )
 from .models import FEEDBACK_TYPES, Agreement, SiteConfiguration
+from .supervision import forget_profile_place_countries
 from .utils import sanitize_next, send_mass_html_mail
 
 User = get_user_model()
@@ -355,6 +358,11 @@ class AgreementRejectView(LoginRequiredMixin, generic.TemplateView):
             agreement = Agreement.objects.filter(
                 user=request.user, policy_version=agreement, withdrawn__isnull=True)
             agreement.update(withdrawn=now)
+            # Bulk updates do not send signals; the map is thus rebuilt explicitly.
+            transaction.on_commit(schedule_rebuild)
+        invalidate_account_flags(request.user.pk)
+        forget_profile_place_countries(
+            Profile.all_objects.filter(user=request.user).values_list('pk', flat=True))
         logout(request)
         messages.info(request, _("Farewell !"))
         return HttpResponseRedirect(reverse_lazy('home'))
@@ -116,6 +116,7 @@ def updatestatic(conn):
         " | grep -v 'Found another file with the destination path' "
     )
     conn.run("./manage.py compress --verbosity 0 --force")
+    conn.run("./manage.py map_styles --verbosity 0")
 
 
 @task
@@ -149,5 +150,6 @@ def deploy(conn, mode="full", remote="origin"):
             migrate(conn)
     if mode != "html":
         site_ctl(conn, command="restart")
+        site_ctl(conn, command="restart", service_name="pasportaservo-connections")
         site_ctl(conn, command="status", service_name="memcached-ps", needs_su=False)
         site_ctl(conn, command="status", needs_su=False)
@@ -1,5 +1,6 @@
 from django.apps import AppConfig
-from django.db.models import signals
+from django.conf import settings
+from django.db.models import F, signals
 from django.dispatch import receiver
 from django.utils.translation import gettext_lazy as _
 
@@ -25,6 +26,53 @@ class HostingConfig(AppConfig):
                 self.get_model('VisibilitySettingsFor' + asset_type)
             )
         signals.post_save.connect(profile_post_save, sender='hosting.Profile')
+        # The stored Gravatar URL depends on the email address of the user.
+        signals.post_save.connect(user_post_save, sender=settings.AUTH_USER_MODEL)
+
+        # The flat copies of the places, used by the search and the public map,
+        # must follow any change in the data they are derived from.
+        searchable_place_sources = [
+            ('hosting.Place', 'pk'),
+            ('hosting.VisibilitySettingsForPlace', 'visibility'),
+            ('hosting.Profile', 'owner'),
+            ('hosting.Preferences', 'owner__pref'),
+            (settings.AUTH_USER_MODEL, 'owner__user'),
+        ]
+        for model, lookup in searchable_place_sources:
+            signals.post_save.connect(
+                make_searchable_place_receiver(lookup), sender=model,
+                weak=False, dispatch_uid=f'{model}--searchable')
+
+        # The changes of the places on the maps which do not update the places
+        # themselves are logged, for the feeds of changes of the region maps.
+        place_map_change_sources = [
+            ('hosting.VisibilitySettingsForPlace', 'visibility'),
+            ('hosting.Profile', 'owner'),
+            (settings.AUTH_USER_MODEL, 'owner__user'),
+        ]
+        for model, lookup in place_map_change_sources:
+            signals.post_save.connect(
+                make_place_map_change_receiver(lookup), sender=model,
+                weak=False, dispatch_uid=f'{model}--map-change')
+        signals.pre_save.connect(place_pre_save_map_change, sender='hosting.Place')
+        signals.post_save.connect(place_post_save_map_change, sender='hosting.Place')
+        signals.post_delete.connect(place_post_delete_map_change, sender='hosting.Place')
+
+        # The conditions masks of the places must follow the changes of their
+        # conditions; the registry of conditions, the changes of any condition.
+        from .conditions import reset_condition_registry
+        signals.m2m_changed.connect(
+            place_conditions_changed, sender=self.get_model('Place').conditions.through)
+        signals.post_save.connect(reset_condition_registry, sender='hosting.Condition')
+        signals.post_delete.connect(reset_condition_registry, sender='hosting.Condition')
+        signals.post_delete.connect(condition_post_delete, sender='hosting.Condition')
+
+        # The local index of geographical names must be rebuilt whenever the
+        # localities it is based on change.
+        from .gazetteer import reset_gazetteer
+        for model in ('Whereabouts', 'CountryRegion'):
+            signals.post_save.connect(reset_gazetteer, sender='hosting.' + model)
+            signals.post_delete.connect(reset_gazetteer, sender='hosting.' + model)
 
 
 def make_visibility_receivers(for_sender, field_name, visibility_model):
@@ -71,6 +119,105 @@ def make_visibility_receivers(for_sender, field_name, visibility_model):
         ).delete()
 
 
+def make_searchable_place_receiver(lookup):
+    """
+    Creates a signal receiver which refreshes the flat copies of the places
+    related to the saved instance via the lookup.
+    """
+    def searchable_place_post_save(sender, **kwargs):
+        from .models import SearchablePlace
+        if kwargs['raw']:
+            return
+        SearchablePlace.refresh(**{lookup: kwargs['instance'].pk})
+    return searchable_place_post_save
+
+
+def make_place_map_change_receiver(lookup):
+    """
+    Creates a signal receiver which logs a change of the places related to the
+    saved instance via the lookup.
+    """
+    def place_map_change_post_save(sender, **kwargs):
+        from .models import PlaceMapChange
+        if kwargs['raw'] or kwargs['update_fields'] == frozenset(['last_login']):
+            return
+        PlaceMapChange.record_for(**{lookup: kwargs['instance'].pk})
+    return place_map_change_post_save
+
+
+def place_pre_save_map_change(sender, **kwargs):
+    """
+    Logs the removal of the place from the map of its previous country, when
+    it is moved to another country.
+    """
+    from .models import Place, PlaceMapChange
+    instance = kwargs['instance']
+    if kwargs['raw'] or instance.pk is None:
+        return
+    PlaceMapChange.record(
+        Place.all_objects
+        .filter(pk=instance.pk)
+        .exclude(country=instance.country.code)
+        .values_list('pk', 'country')
+    )
+
+
+def place_post_save_map_change(sender, **kwargs):
+    """
+    Logs a change of the place when it was saved without updating its
+    modification time (for example, upon a check by a supervisor).
+    """
+    from .models import PlaceMapChange
+    update_fields = kwargs['update_fields']
+    if kwargs['raw'] or update_fields is None or 'modified' in update_fields:
+        return
+    PlaceMapChange.record([(kwargs['instance'].pk, kwargs['instance'].country.code)])
+
+
+def place_post_delete_map_change(sender, **kwargs):
+    """
+    Logs the removal of the deleted place from the map of its country.
+    """
+    from .models import PlaceMapChange
+    PlaceMapChange.record([(kwargs['instance'].pk, kwargs['instance'].country.code)])
+
+
+def place_conditions_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    """
+    Updates the conditions masks of the places whose conditions were modified.
+    """
+    from .conditions import conditions_mask
+    from .models import Place
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    if not reverse:
+        # The conditions of a single place were modified.
+        instance.conditions_mask = conditions_mask(instance.conditions.values_list('mask_bit', flat=True))
+        Place.all_objects.filter(pk=instance.pk).update(conditions_mask=instance.conditions_mask)
+        return
+    # A single condition was added to or removed from some places.
+    if instance.mask_bit is None:
+        return
+    bit = 1 << instance.mask_bit
+    if action == 'post_add':
+        Place.all_objects.filter(pk__in=pk_set).update(conditions_mask=F('conditions_mask').bitor(bit))
+    else:
+        places = (
+            Place.all_objects.filter(pk__in=pk_set) if action == 'post_remove'
+            else Place.all_objects.alias(condition_set=F('conditions_mask').bitand(bit)).filter(condition_set=bit)
+        )
+        places.update(conditions_mask=F('conditions_mask').bitand(~bit))
+
+
+def condition_post_delete(sender, **kwargs):
+    """
+    Clears the bit of the deleted condition in the conditions masks of places.
+    The links to the places are deleted without sending the m2m_changed signal.
+    """
+    place_conditions_changed(
+        sender, instance=kwargs['instance'], action='post_clear', reverse=True, pk_set=None)
+
+
 def profile_post_save(sender, **kwargs):
     """
     Creates a new preferences object for the newly created profile, in database.
@@ -81,3 +228,21 @@ def profile_post_save(sender, **kwargs):
         return
     if instance.user_id and not Preferences.objects.filter(profile_id=instance.pk).exists():
         Preferences.objects.create(profile=instance)
+
+
+def user_post_save(sender, **kwargs):
+    """
+    Updates the stored avatar URL of the user's profile when it is the Gravatar
+    of the user's email address, which might have changed.
+    """
+    from .models import Profile
+    update_fields = kwargs['update_fields']
+    if kwargs['raw'] or update_fields is not None and 'email' not in update_fields:
+        return
+    avatar_url = Profile.gravatar_url(kwargs['instance'].email)
+    (
+        Profile.all_objects
+        .filter(user_id=kwargs['instance'].pk, avatar_present=False)
+        .exclude(stored_avatar_url=avatar_url)
+        .update(stored_avatar_url=avatar_url)
+    )
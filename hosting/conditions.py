@@ -0,0 +1,138 @@
+"""
+A process-wide registry of the hosting conditions, and their representation
+as bits of the `conditions_mask` of the places.
+
+There are only a few dozens of conditions and they change rarely, while they
+are displayed for almost every place listed. Instead of fetching the same rows
+over and over, the places refer to their conditions via a bitmask, which is
+resolved using the registry; the mask also permits to filter the places by
+their conditions without joining the M2M table.
+
+Each process keeps its own registry. A version counter in the cache, bumped
+whenever a condition is saved or deleted, tells the processes when to rebuild
+theirs.
+"""
+
+import threading
+import time
+from typing import Iterable, Optional
+
+from django.core.cache import cache
+from django.db import transaction
+
+# Each condition is represented by the bit at the position of its `mask_bit`.
+# A bigint holds 63 bits apart from the sign.
+CONDITIONS_MASK_CAPACITY = 63
+# The version of the conditions is verified at most once in this many seconds.
+CONDITIONS_VERIFY_PERIOD = 5
+# How often each process re-reads the conditions when the versions are not
+# available (with a dummy cache).
+CONDITIONS_REFRESH_PERIOD = 60 * 60
+CONDITIONS_VERSION_CACHE_KEY = 'hosting-conditions-version'
+
+
+def conditions_mask(mask_bits: Iterable[Optional[int]]) -> int:
+    mask = 0
+    for bit_position in mask_bits:
+        if bit_position is not None:
+            mask |= 1 << bit_position
+    return mask
+
+
+class ConditionRegistry:
+    """
+    An immutable snapshot of all hosting conditions, ordered by their IDs
+    (only the moment of its last verification is updated).
+    """
+    def __init__(self, conditions, version: Optional[int] = None):
+        self.conditions = tuple(conditions)
+        self.version = version
+        self.by_id = {condition.pk: condition for condition in self.conditions}
+        self.by_mask = {
+            1 << condition.mask_bit: condition
+            for condition in self.conditions if condition.mask_bit is not None
+        }
+        self.built_at = self.verified_at = time.monotonic()
+
+    @classmethod
+    def build(cls, version: Optional[int] = None):
+        from .models import Condition
+        return cls(Condition.objects.order_by('pk'), version)
+
+    def for_mask(self, mask: int) -> tuple:
+        """
+        Returns the conditions represented by the bits of the mask.
+        """
+        return tuple(condition for bit, condition in self.by_mask.items() if mask & bit)
+
+    def mask_for_ids(self, condition_ids: Iterable[int]) -> int:
+        """
+        Returns the mask representing the conditions with the given IDs.
+        Raises KeyError for a condition unknown to the registry.
+        """
+        return conditions_mask(self.by_id[condition_id].mask_bit for condition_id in condition_ids)
+
+
+_registry: Optional[ConditionRegistry] = None
+_registry_lock = threading.Lock()
+
+
+def get_conditions_version() -> Optional[int]:
+    """
+    Returns the current version of the conditions; None when the versions are
+    not available (with a dummy cache).
+    """
+    version = cache.get(CONDITIONS_VERSION_CACHE_KEY)
+    if version is None:
+        # A new counter starts from the current time, so that the versions
+        # issued before the counter was evicted are not repeated.
+        cache.add(CONDITIONS_VERSION_CACHE_KEY, time.time_ns() // 1000, timeout=None)
+        version = cache.get(CONDITIONS_VERSION_CACHE_KEY)
+    return version
+
+
+def _is_up_to_date(registry: ConditionRegistry, now: float) -> bool:
+    if now - registry.verified_at < CONDITIONS_VERIFY_PERIOD:
+        return True
+    version = get_conditions_version()
+    if version is None:
+        return registry.version is None and now - registry.built_at < CONDITIONS_REFRESH_PERIOD
+    if version == registry.version:
+        registry.verified_at = now
+        return True
+    return False
+
+
+def get_condition_registry(required_ids: Iterable[int] = ()) -> ConditionRegistry:
+    """
+    Returns the registry of the current process, rebuilt when the conditions
+    were changed since it was built, or when some of the required conditions
+    are unknown to it (they might have been created only moments ago).
+    """
+    global _registry
+    with _registry_lock:
+        now = time.monotonic()
+        if (_registry is None or not _is_up_to_date(_registry, now)
+                or not _registry.by_id.keys() >= set(required_ids)):
+            _registry = ConditionRegistry.build(get_conditions_version())
+        return _registry
+
+
+def reset_condition_registry(*args, **kwargs):
+    """
+    Discards the registry of the current process, so that it is rebuilt upon
+    next use, and makes the other processes rebuild theirs once the change is
+    committed. Can be used as a signal receiver.
+    """
+    global _registry
+    with _registry_lock:
+        _registry = None
+    transaction.on_commit(_bump_conditions_version)
+
+
+def _bump_conditions_version():
+    try:
+        cache.incr(CONDITIONS_VERSION_CACHE_KEY)
+    except ValueError:
+        # A missing counter will start anew from a never issued value.
+        pass
@@ -1,12 +1,15 @@
 from django import forms
+from django.contrib.postgres.search import SearchRank
 from django.db import models
 from django.utils.translation import pgettext_lazy
 
 import django_filters as filters
 
+from ..conditions import get_condition_registry
 from ..fields import MultiNullBooleanFormField
 from ..forms import SearchForm
-from ..models import Condition, Place
+from ..models import Condition, Place, SearchablePlace
+from ..search import TRIGRAM_MIN_LENGTH, text_search_query
 
 
 class NumberOrNoneFilter(filters.NumberFilter):
@@ -42,10 +45,19 @@ class ModelMultipleChoiceExcludeFilter(filters.ModelMultipleChoiceFilter):
 
 
 class ModelMultipleChoiceIncludeExcludeFilter(filters.ModelMultipleChoiceFilter):
-    def __init__(self, boolean_choices, *args, label_prefix=lambda choice: None, **kwargs):
+    def __init__(
+            self, boolean_choices, *args,
+            label_prefix=lambda choice: None, mask_field_name=None, choices_mask=None,
+            **kwargs,
+    ):
         super().__init__(*args, **kwargs)
         self.field_boolean_choices = boolean_choices
         self.option_label_prefix = label_prefix
+        # When the choices are represented as bits of a bitmask field, the
+        # filtering is done by bitwise operations on this field; `choices_mask`
+        # converts a collection of choice values to the corresponding bitmask.
+        self.mask_field_name = mask_field_name
+        self.choices_mask = choices_mask
 
     @property
     def field(self):
@@ -65,6 +77,8 @@ class ModelMultipleChoiceIncludeExcludeFilter(filters.ModelMultipleChoiceFilter)
         value = list(value)
         include = tuple(choice_value for choice_value, decision in value if decision is True)
         exclude = tuple(choice_value for choice_value, decision in value if decision is False)
+        if self.mask_field_name:
+            return self.filter_mask(qs, include, exclude)
         base_lookup_expr = self.lookup_expr
 
         self.exclude = True
@@ -80,6 +94,27 @@ class ModelMultipleChoiceIncludeExcludeFilter(filters.ModelMultipleChoiceFilter)
 
         return qs
 
+    def filter_mask(self, qs, include, exclude):
+        try:
+            include_mask = self.choices_mask(include)
+            exclude_mask = self.choices_mask(exclude)
+        except KeyError:
+            # A choice removed since the form was validated cannot be represented
+            # by the mask; it is not ignored, so as not to widen the results.
+            return qs.none()
+        mask = models.F(self.mask_field_name)
+        if include_mask:
+            qs = (
+                qs.alias(**{f'{self.field_name}_included': mask.bitand(include_mask)})
+                .filter(**{f'{self.field_name}_included': include_mask})
+            )
+        if exclude_mask:
+            qs = (
+                qs.alias(**{f'{self.field_name}_excluded': mask.bitand(exclude_mask)})
+                .filter(**{f'{self.field_name}_excluded': 0})
+            )
+        return qs
+
 
 class SearchFilterSet(filters.FilterSet):
     class Meta:
@@ -103,7 +138,7 @@ class SearchFilterSet(filters.FilterSet):
                 # Applicable to 'first_name' and 'last_name'.
                 'filter_class': filters.CharFilter,
                 'extra': lambda f: {
-                    'lookup_expr': 'unaccent__icontains',
+                    'lookup_expr': 'unaccented_contains',
                 },
             },
             models.IntegerField: {
@@ -122,8 +157,13 @@ class SearchFilterSet(filters.FilterSet):
             },
         }
 
+    text = filters.CharFilter(method='filter_text')
     conditions = ModelMultipleChoiceIncludeExcludeFilter(
         field_name='conditions',
+        mask_field_name='conditions_mask',
+        choices_mask=lambda condition_ids: (
+            get_condition_registry(required_ids=condition_ids).mask_for_ids(condition_ids)
+        ),
         queryset=(
             Condition.objects.order_by('restriction', Condition.active_name_field())
         ),
@@ -144,6 +184,25 @@ class SearchFilterSet(filters.FilterSet):
             # By default, available places are looked up.
             data = {'available': True}
         super().__init__(data, *args, **kwargs)
+        if self.queryset.model is SearchablePlace:
+            # The search is done on the flat copies of the places; the attributes
+            # which are not copied are looked up via the relation to the place.
+            for filter_ in self.filters.values():
+                if getattr(filter_, 'mask_field_name', None):
+                    filter_.mask_field_name = self.place_field(filter_.mask_field_name)
+                elif not filter_.method:
+                    filter_.field_name = self.place_field(filter_.field_name)
+
+    def place_field(self, name):
+        """
+        Returns the lookup of the place's field `name`, relative to the model
+        of the filtered queryset.
+        """
+        if self.queryset.model is SearchablePlace:
+            searchable_fields = {field.name for field in SearchablePlace._meta.get_fields()}
+            if name.split('__')[0] not in searchable_fields:
+                return f'place__{name}'
+        return name
 
     def get_form_class(self):
         # Inject the model reference into the form, because it lacks an
@@ -155,3 +214,28 @@ class SearchFilterSet(filters.FilterSet):
     def filter_queryset(self, queryset):
         # TODO filter usernames by fname or lname...
         return super().filter_queryset(queryset)
+
+    def filter_text(self, queryset, name, value):
+        """
+        Looks up the words of the text in the names of the hosts and in the
+        localities and descriptions of the places. The relevance of each
+        place is available as `text_rank`.
+        """
+        search_query = text_search_query(value)
+        if search_query is None:
+            return queryset
+        search_vector = self.place_field('search_vector')
+        condition = models.Q(**{search_vector: search_query})
+        if len(value.strip()) >= TRIGRAM_MIN_LENGTH:
+            # Parts of words, such as "dam" in Rotterdam, are found via the trigram indexes.
+            value = value.strip()
+            condition |= (
+                models.Q(**{f'{self.place_field("city")}__unaccented_contains': value})
+                | models.Q(**{f'{self.place_field("closest_city")}__unaccented_contains': value})
+                | models.Q(**{f'{self.place_field("short_description")}__unaccented_contains': value})
+            )
+        return (
+            queryset
+            .filter(condition)
+            .annotate(text_rank=SearchRank(models.F(search_vector), search_query))
+        )
@@ -12,6 +12,7 @@ class SearchForm(forms.Form):
 
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
+        self.order_fields(['text'])
 
         self.helper = FormHelper(self)
         self.helper.label_class = 'col-xs-12 col-sm-3'
@@ -20,6 +21,7 @@ class SearchForm(forms.Form):
         # Do not render the CSRF Middleware token hidden input tag.
         self.helper.disable_csrf = True
 
+        self.fields['text'].label = _("Name or locality")
         self.fields['owner__first_name'].label = _("First name")
         self.fields['owner__last_name'].label = _("Last name")
         self.fields['max_guest'].widget.attrs['min'] = 0
@@ -0,0 +1,306 @@
+"""
+An in-process gazetteer: a local index of the names of the countries, regions
+and cities known to Pasporta Servo, allowing free-text locality queries to be
+resolved without a round trip to the geocoding service.
+
+The index is built from the `Whereabouts` and `CountryRegion` records, the
+geodata of the countries, and the names of the countries in each of the UI
+languages. Names are normalized (transliterated to latin letters, lowercased,
+stripped of punctuation) and kept in a sorted array, which allows both exact
+and prefix lookups via bisection.
+"""
+
+import logging
+import re
+import threading
+import time
+from bisect import bisect_left
+from collections import Counter, defaultdict
+from os import listdir, path
+from typing import NamedTuple, Optional
+
+from django.conf import settings
+from django.contrib.gis.geos import Point
+from django.db.models import Count
+from django.db.models.functions import Upper
+from django.utils import translation
+
+from django_countries import countries
+from geocoder.opencage import OpenCageResult
+from unidecode import unidecode
+
+from maps import SRID
+from maps.data import COUNTRIES_GEO
+
+from .countries import COUNTRIES_DATA
+
+# How long (in seconds) a built index is considered up-to-date. Changes made
+# in the current process reset the index immediately; this period bounds the
+# staleness of the index in the other worker processes.
+GAZETTEER_REFRESH_PERIOD = 6 * 60 * 60
+# The minimal length of a (normalized) query for attempting to complete it
+# as a prefix of a known name.
+GAZETTEER_MIN_PREFIX_LENGTH = 4
+
+
+class GazetteerEntry(NamedTuple):
+    type: str               # 'country', 'state', or 'city'.
+    name: str               # Display name.
+    country_code: str
+    state: str              # Display name of the region, if known.
+    center: tuple[float, float]
+    bbox: tuple[tuple[float, float], tuple[float, float]]  # Southwest, northeast.
+    weight: int             # Number of hosts; used to rank homonyms.
+
+
+# Precedence of types of localities among homonyms: a country is preferred
+# over a region, and a region is preferred over a city.
+TYPE_PRECEDENCE = {'country': 0, 'state': 1, 'city': 2}
+
+
+def normalize_name(value: str) -> str:
+    """
+    Converts a name of a locality to the form used as the key in the index:
+    transliterated to latin letters without diacritics, in lowercase, with
+    all punctuation replaced by single spaces.
+    """
+    return " ".join(re.split(r'[\W_]+', unidecode(str(value)).lower())).strip()
+
+
+def ui_languages() -> list[str]:
+    """
+    Returns the codes of the languages in which the interface of the website
+    is available (the source language and all translations).
+    """
+    languages = {'en', settings.LANGUAGE_CODE}
+    for locale_path in settings.LOCALE_PATHS:
+        if path.isdir(locale_path):
+            languages.update(
+                lang for lang in listdir(locale_path)
+                if path.isdir(path.join(locale_path, lang, 'LC_MESSAGES'))
+            )
+    return sorted(languages)
+
+
+class Gazetteer:
+    def __init__(self):
+        self._names: dict[str, list[GazetteerEntry]] = defaultdict(list)
+        self.keys: tuple[str, ...] = ()
+        self.built_at = time.monotonic()
+
+    def add(self, name: str, entry: GazetteerEntry):
+        key = normalize_name(name)
+        if key and entry not in self._names[key]:
+            self._names[key].append(entry)
+
+    def freeze(self):
+        self._names = dict(self._names)
+        for entries in self._names.values():
+            entries.sort(key=lambda e: (TYPE_PRECEDENCE[e.type], -e.weight))
+        self.keys = tuple(sorted(self._names))
+
+    @classmethod
+    def build(cls) -> 'Gazetteer':
+        from .models import CountryRegion, LocationType, Place, Whereabouts
+
+        index = cls()
+
+        # Countries: the names in all UI languages, the local names, and the
+        # alternative names configured for the website.
+        country_entries = {}
+        for country_code, name in countries:
+            if country_code not in COUNTRIES_GEO:
+                continue
+            geodata = COUNTRIES_GEO[country_code]
+            country_entries[country_code] = entry = GazetteerEntry(
+                'country', str(name), country_code, "",
+                tuple(geodata['center']),
+                (tuple(geodata['bbox']['southwest']), tuple(geodata['bbox']['northeast'])),
+                0,
+            )
+            for local_name in COUNTRIES_DATA.get(country_code, {}).get('local_name', "").split(" / "):
+                index.add(local_name, entry)
+            for alt_name in getattr(settings, 'COUNTRIES_OVERRIDE', {}).get(country_code, {}).get('names', []):
+                index.add(alt_name, entry)
+        for lang in ui_languages():
+            with translation.override(lang):
+                for country_code, name in countries:
+                    if country_code in country_entries:
+                        index.add(name, country_entries[country_code])
+
+        # Regions and cities: the geodata of the Whereabouts records, named
+        # (in case of regions) by all known names of the region. The number of
+        # hosts in each locality is used to rank localities with equal names.
+        region_names = defaultdict(list)
+        for region in CountryRegion.objects.all():
+            region_names[(region.country.code, region.iso_code.upper())].extend(
+                filter(None, [
+                    region.latin_name, region.latin_code,
+                    region.local_name, region.local_code, region.esperanto_name,
+                ])
+            )
+        city_weight, city_in_state_weight, state_weight = Counter(), Counter(), Counter()
+        hosts_count = (
+            Place.objects_raw
+            .exclude(city='')
+            .annotate(city_upper=Upper('city'), state_upper=Upper('state_province'))
+            .values_list('city_upper', 'state_upper', 'country')
+            .annotate(count=Count('pk'))
+            .order_by()
+        )
+        for city, state, country_code, count in hosts_count:
+            city_weight[(city, country_code)] += count
+            city_in_state_weight[(city, state, country_code)] += count
+            state_weight[(state, country_code)] += count
+
+        for whereabouts in Whereabouts.objects.all():
+            country_code = whereabouts.country.code
+            state = whereabouts.state.upper()
+            names = region_names.get((country_code, state), [])
+            region_display = next(iter(names), whereabouts.state)
+            if whereabouts.type == LocationType.REGION.value:
+                entry_type, display_name = 'state', region_display
+                weight = state_weight[(state, country_code)]
+            else:
+                entry_type, display_name = 'city', whereabouts.name.title()
+                weight = (
+                    city_in_state_weight[(whereabouts.name.upper(), state, country_code)] if state
+                    else city_weight[(whereabouts.name.upper(), country_code)]
+                )
+            entry = GazetteerEntry(
+                entry_type, display_name, country_code, region_display,
+                tuple(whereabouts.center.coords),
+                (tuple(whereabouts.bbox.coords[0]), tuple(whereabouts.bbox.coords[1])),
+                weight,
+            )
+            index.add(whereabouts.name, entry)
+            if entry_type == 'state':
+                for name in names:
+                    index.add(name, entry)
+
+        index.freeze()
+        logging.getLogger('PasportaServo.geo').debug(
+            "Gazetteer built with %d names", len(index.keys))
+        return index
+
+    def candidates(self, query: str, country: Optional[str] = None) -> list[GazetteerEntry]:
+        """
+        Returns the entries matching the query exactly or, if there are none
+        and the query is long enough, the entries of the single known name for
+        which the query is a prefix.
+        """
+        key = normalize_name(query)
+        if not key:
+            return []
+        entries = self._names.get(key)
+        if entries is None and len(key) >= GAZETTEER_MIN_PREFIX_LENGTH:
+            position = bisect_left(self.keys, key)
+            completions = []
+            for candidate_key in self.keys[position:position+2]:
+                if candidate_key.startswith(key):
+                    completions.append(candidate_key)
+            if len(completions) == 1:
+                entries = self._names[completions[0]]
+        if country:
+            entries = [e for e in entries or [] if e.country_code == country.upper()]
+        return entries or []
+
+    def lookup(self, query: str, country: Optional[str] = None) -> Optional[GazetteerEntry]:
+        """
+        Resolves a free-text query of the form "locality" or "locality,
+        qualifier" (where the qualifier is a region or a country) to a single
+        known entry. When the query cannot be resolved unambiguously, None is
+        returned.
+        """
+        parts = [part for part in query.split(",") if part.strip()]
+        if not parts:
+            return None
+        if len(parts) > 1:
+            qualifiers = self.candidates(parts[-1], country)
+            qualifiers = [e for e in qualifiers if e.type != 'city']
+            if not qualifiers:
+                return None
+            entries = [
+                e for e in self.candidates(",".join(parts[:-1]), country)
+                if any(
+                    e.country_code == q.country_code and (q.type == 'country' or e.state == q.state)
+                    for q in qualifiers
+                )
+            ]
+        else:
+            entries = self.candidates(parts[0], country)
+        if not entries:
+            return None
+        best = entries[0]
+        if len(entries) > 1:
+            runner_up = entries[1]
+            if TYPE_PRECEDENCE[runner_up.type] == TYPE_PRECEDENCE[best.type] and runner_up.weight == best.weight:
+                # Ambiguous homonyms; the geocoding service might know better.
+                return None
+        return best
+
+
+_gazetteer: Optional[Gazetteer] = None
+_gazetteer_lock = threading.Lock()
+
+
+def get_gazetteer() -> Gazetteer:
+    global _gazetteer
+    with _gazetteer_lock:
+        if _gazetteer is None or time.monotonic() - _gazetteer.built_at > GAZETTEER_REFRESH_PERIOD:
+            _gazetteer = Gazetteer.build()
+        return _gazetteer
+
+
+def reset_gazetteer(*args, **kwargs):
+    """
+    Discards the index of the current process, so that it is rebuilt upon
+    next lookup. Can be used as a signal receiver.
+    """
+    global _gazetteer
+    with _gazetteer_lock:
+        _gazetteer = None
+
+
+def geocode_locally(query: str, country: Optional[str] = None) -> Optional[OpenCageResult]:
+    """
+    Attempts to resolve the provided locality query using the local index,
+    with an optional restriction to a specific country (a 2-letter code).
+
+    Returns:
+        OpenCageResult (with a Geo Point), emulating a result of the forward
+        geocoding via OpenCage, or None when the query cannot be resolved.
+    """
+    if not query:
+        return None
+    entry = get_gazetteer().lookup(query, country)
+    if entry is None:
+        return None
+    country_name = countries.name(entry.country_code)
+    components = {
+        '_category': 'place',
+        '_type': entry.type,
+        'country': country_name,
+        'country_code': entry.country_code,
+    }
+    if entry.type != 'country':
+        components['state'] = entry.state
+    if entry.type == 'city':
+        components['city'] = entry.name
+    southwest, northeast = entry.bbox
+    data = {
+        'components': components,
+        'formatted': ", ".join(filter(None, [
+            entry.name if entry.type == 'city' else '',
+            entry.state,
+            country_name,
+        ])),
+        'geometry': {'lat': entry.center[1], 'lng': entry.center[0]},
+        'bounds': {
+            'southwest': {'lat': southwest[1], 'lng': southwest[0]},
+            'northeast': {'lat': northeast[1], 'lng': northeast[0]},
+        },
+    }
+    result = OpenCageResult(data)
+    result.point = Point(result.xy, srid=SRID) if result.xy else None
+    return result
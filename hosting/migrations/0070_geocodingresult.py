@@ -0,0 +1,34 @@
+# Generated by Django 3.2.25 on 2026-10-18 09:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('hosting', '0069_change_place_option_fields_desc'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='GeocodingResult',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('lookup_key', models.CharField(max_length=40, unique=True, verbose_name='lookup key')),
+                ('query', models.TextField(verbose_name='query')),
+                ('country', models.CharField(blank=True, max_length=2, verbose_name='country')),
+                ('language', models.CharField(max_length=15, verbose_name='language')),
+                ('multiple', models.BooleanField(default=False, verbose_name='multiple results')),
+                ('annotations', models.BooleanField(default=False, verbose_name='with annotations')),
+                ('private', models.BooleanField(default=False, verbose_name='private query')),
+                ('response', models.JSONField(verbose_name='response')),
+                ('negative', models.BooleanField(default=False, verbose_name='no results')),
+                ('created_on', models.DateTimeField(auto_now_add=True, verbose_name='created on')),
+                ('expires_on', models.DateTimeField(db_index=True, verbose_name='expires on')),
+            ],
+            options={
+                'verbose_name': 'geocoding result',
+                'verbose_name_plural': 'geocoding results',
+            },
+        ),
+    ]
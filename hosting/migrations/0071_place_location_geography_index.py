@@ -0,0 +1,21 @@
+# Generated by Django 3.2.25 on 2026-10-18 10:03
+
+import django.contrib.postgres.indexes
+from django.db import migrations
+
+import maps.functions
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('hosting', '0070_geocodingresult'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='place',
+            index=django.contrib.postgres.indexes.GistIndex(
+                maps.functions.AsGeography('location'), name='hosting_place_location_geog'),
+        ),
+    ]
@@ -0,0 +1,108 @@
+# Generated by Django 3.2.25 on 2026-10-18 20:15
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations
+
+# unaccent() is only stable (the dictionary may change), so it cannot be used
+# in the indexes; the dictionary is thus fixed by this immutable wrapper.
+UNACCENT_FUNCTION_SQL = """
+    CREATE OR REPLACE FUNCTION hosting_unaccent(text) RETURNS text
+        LANGUAGE sql IMMUTABLE PARALLEL SAFE STRICT
+        AS $$ SELECT public.unaccent('public.unaccent'::regdictionary, $1) $$;
+"""
+
+SEARCH_VECTOR_TRIGGERS_SQL = """
+    CREATE OR REPLACE FUNCTION hosting_place_search_vector_update() RETURNS trigger
+        LANGUAGE plpgsql
+        AS $$
+        BEGIN
+            NEW.search_vector :=
+                coalesce((
+                    SELECT setweight(to_tsvector('simple', hosting_unaccent(
+                        concat_ws(' ', profile.first_name, profile.last_name))), 'A')
+                    FROM hosting_profile profile WHERE profile.id = NEW.owner_id
+                ), ''::tsvector)
+                || setweight(to_tsvector('simple', hosting_unaccent(coalesce(NEW.city, ''))), 'B')
+                || setweight(to_tsvector('simple', hosting_unaccent(coalesce(NEW.closest_city, ''))), 'C')
+                || setweight(to_tsvector('simple', hosting_unaccent(coalesce(NEW.short_description, ''))), 'D');
+            RETURN NEW;
+        END;
+        $$;
+    CREATE TRIGGER hosting_place_search_vector
+        BEFORE INSERT OR UPDATE OF owner_id, city, closest_city, short_description, search_vector
+        ON hosting_place
+        FOR EACH ROW EXECUTE PROCEDURE hosting_place_search_vector_update();
+
+    CREATE OR REPLACE FUNCTION hosting_profile_search_vector_update() RETURNS trigger
+        LANGUAGE plpgsql
+        AS $$
+        BEGIN
+            -- Resetting the vector triggers its recalculation for each place.
+            UPDATE hosting_place SET search_vector = NULL WHERE owner_id = NEW.id;
+            RETURN NULL;
+        END;
+        $$;
+    CREATE TRIGGER hosting_profile_search_vector
+        AFTER UPDATE OF first_name, last_name
+        ON hosting_profile
+        FOR EACH ROW
+        WHEN (OLD.first_name IS DISTINCT FROM NEW.first_name OR OLD.last_name IS DISTINCT FROM NEW.last_name)
+        EXECUTE PROCEDURE hosting_profile_search_vector_update();
+
+    UPDATE hosting_place SET search_vector = NULL;
+"""
+
+REVERSE_SEARCH_VECTOR_TRIGGERS_SQL = """
+    DROP TRIGGER IF EXISTS hosting_profile_search_vector ON hosting_profile;
+    DROP FUNCTION IF EXISTS hosting_profile_search_vector_update();
+    DROP TRIGGER IF EXISTS hosting_place_search_vector ON hosting_place;
+    DROP FUNCTION IF EXISTS hosting_place_search_vector_update();
+"""
+
+# Django does not support operator classes for expression indexes, thus the
+# trigram indexes are not declared on the models.
+TRIGRAM_INDEXES = [
+    ('hosting_profile', 'first_name'),
+    ('hosting_profile', 'last_name'),
+    ('hosting_place', 'city'),
+    ('hosting_place', 'closest_city'),
+    ('hosting_place', 'short_description'),
+]
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('hosting', '0071_place_location_geography_index'),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        migrations.RunSQL(
+            UNACCENT_FUNCTION_SQL,
+            reverse_sql="DROP FUNCTION IF EXISTS hosting_unaccent(text);",
+        ),
+        migrations.AddField(
+            model_name='place',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='place',
+            index=django.contrib.postgres.indexes.GinIndex(
+                fields=['search_vector'], name='hosting_place_search_vector'),
+        ),
+        migrations.RunSQL(
+            SEARCH_VECTOR_TRIGGERS_SQL,
+            reverse_sql=REVERSE_SEARCH_VECTOR_TRIGGERS_SQL,
+        ),
+    ] + [
+        migrations.RunSQL(
+            f"CREATE INDEX {table}_{column}_trgm ON {table} "
+            f"USING gin (hosting_unaccent({column}) gin_trgm_ops);",
+            reverse_sql=f"DROP INDEX IF EXISTS {table}_{column}_trgm;",
+        )
+        for table, column in TRIGRAM_INDEXES
+    ]
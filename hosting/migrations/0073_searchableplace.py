@@ -0,0 +1,83 @@
+# Generated by Django 3.2.25 on 2026-10-18 20:40
+
+import django.contrib.gis.db.models.fields
+import django.contrib.postgres.indexes
+import django.db.models.deletion
+from django.db import migrations, models
+
+import django_countries.fields
+
+import maps.functions
+
+
+def populate_searchable_places(apps, schema_editor):
+    Place = apps.get_model('hosting', 'Place')
+    SearchablePlace = apps.get_model('hosting', 'SearchablePlace')
+    places = (
+        Place.objects
+        .filter(deleted_on__isnull=True)
+        .values(
+            'pk', 'owner_id', 'country', 'city', 'location', 'available',
+            'visibility__visible_online_public',
+            'owner__pref__public_listing', 'owner__death_date', 'owner__deleted_on',
+            'owner__user__last_login',
+        )
+    )
+    SearchablePlace.objects.bulk_create(
+        (
+            SearchablePlace(
+                place_id=place['pk'],
+                owner_id=place['owner_id'],
+                country=place['country'],
+                city=place['city'],
+                location=place['location'],
+                available=place['available'],
+                visible_online_public=place['visibility__visible_online_public'],
+                owner_public_listing=place['owner__pref__public_listing'],
+                owner_deceased=place['owner__death_date'] is not None,
+                owner_deleted=place['owner__deleted_on'] is not None,
+                owner_last_login=place['owner__user__last_login'],
+            )
+            for place in places.iterator()
+        ),
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('hosting', '0072_place_search_vector'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SearchablePlace',
+            fields=[
+                ('place', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='searchable', serialize=False, to='hosting.place', verbose_name='place')),
+                ('country', django_countries.fields.CountryField(max_length=2, verbose_name='country')),
+                ('city', models.CharField(blank=True, max_length=255, verbose_name='city')),
+                ('location', django.contrib.gis.db.models.fields.PointField(blank=True, null=True, srid=4326, verbose_name='location')),
+                ('available', models.BooleanField(verbose_name='willing to host')),
+                ('visible_online_public', models.BooleanField(verbose_name='visible online for all')),
+                ('owner_public_listing', models.BooleanField(null=True, verbose_name='listed in public search results')),
+                ('owner_deceased', models.BooleanField(verbose_name='owner is deceased')),
+                ('owner_deleted', models.BooleanField(verbose_name='owner is deleted')),
+                ('owner_last_login', models.DateTimeField(null=True, verbose_name="owner's last login")),
+                ('owner', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='hosting.profile', verbose_name='owner')),
+            ],
+            options={
+                'verbose_name': 'searchable place',
+                'verbose_name_plural': 'searchable places',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='searchableplace',
+            index=models.Index(fields=['country', 'available', 'visible_online_public'], name='hosting_searchplace_country'),
+        ),
+        migrations.AddIndex(
+            model_name='searchableplace',
+            index=django.contrib.postgres.indexes.GistIndex(maps.functions.AsGeography('location'), name='hosting_searchplace_location'),
+        ),
+        migrations.RunPython(populate_searchable_places, reverse_code=migrations.RunPython.noop),
+    ]
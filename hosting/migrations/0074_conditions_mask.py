@@ -0,0 +1,42 @@
+# Generated by Django 3.2.25 on 2026-10-18 21:05
+
+from django.db import migrations, models
+
+
+def assign_mask_bits(apps, schema_editor):
+    Condition = apps.get_model('hosting', 'Condition')
+    for position, condition in enumerate(Condition.objects.order_by('pk')[:63]):
+        condition.mask_bit = position
+        condition.save(update_fields=['mask_bit'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('hosting', '0073_searchableplace'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='condition',
+            name='mask_bit',
+            field=models.PositiveSmallIntegerField(editable=False, null=True, unique=True, verbose_name='bit in conditions mask'),
+        ),
+        migrations.AddField(
+            model_name='place',
+            name='conditions_mask',
+            field=models.BigIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(assign_mask_bits, reverse_code=migrations.RunPython.noop),
+        migrations.RunSQL(
+            """
+            UPDATE hosting_place SET conditions_mask = coalesce((
+                SELECT bit_or(1::bigint << hosting_condition.mask_bit)
+                FROM hosting_place_conditions
+                    INNER JOIN hosting_condition ON hosting_condition.id = hosting_place_conditions.condition_id
+                WHERE hosting_place_conditions.place_id = hosting_place.id
+            ), 0);
+            """,
+            reverse_sql=migrations.RunSQL.noop,
+        ),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 3.2.25 on 2026-10-18 23:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('hosting', '0074_conditions_mask'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='profile',
+            name='avatar_present',
+            field=models.BooleanField(default=False, editable=False, verbose_name='avatar is present'),
+        ),
+        migrations.AddField(
+            model_name='profile',
+            name='avatar_width',
+            field=models.PositiveIntegerField(editable=False, null=True, verbose_name='avatar width'),
+        ),
+        migrations.AddField(
+            model_name='profile',
+            name='avatar_height',
+            field=models.PositiveIntegerField(editable=False, null=True, verbose_name='avatar height'),
+        ),
+        migrations.AddField(
+            model_name='profile',
+            name='stored_avatar_url',
+            field=models.CharField(blank=True, editable=False, max_length=255, verbose_name='avatar URL'),
+        ),
+        # The dimensions and the URLs are filled in by the `update_avatar_metadata`
+        # management command; until then, the uploaded avatars are assumed present.
+        migrations.RunSQL(
+            "UPDATE hosting_profile SET avatar_present = true WHERE avatar <> '';",
+            reverse_sql=migrations.RunSQL.noop,
+        ),
+    ]
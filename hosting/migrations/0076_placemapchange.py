@@ -0,0 +1,33 @@
+# Generated by Django 3.2.25 on 2026-10-18 21:55
+
+import django.utils.timezone
+from django.db import migrations, models
+
+import django_countries.fields
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('hosting', '0075_profile_avatar_metadata'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PlaceMapChange',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('place_id', models.PositiveIntegerField(verbose_name='place')),
+                ('country', django_countries.fields.CountryField(max_length=2, verbose_name='country')),
+                ('changed_on', models.DateTimeField(db_index=True, default=django.utils.timezone.now, verbose_name='changed on')),
+            ],
+            options={
+                'verbose_name': 'change of place on map',
+                'verbose_name_plural': 'changes of places on map',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='placemapchange',
+            index=models.Index(fields=['country', 'changed_on'], name='hosting_placemapchange_since'),
+        ),
+    ]
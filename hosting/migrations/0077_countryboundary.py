@@ -0,0 +1,28 @@
+# Generated by Django 3.2.25 on 2026-10-18 23:10
+
+import django.contrib.gis.db.models.fields
+from django.db import migrations, models
+
+import django_countries.fields
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('hosting', '0076_placemapchange'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CountryBoundary',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('country', django_countries.fields.CountryField(max_length=2, unique=True, verbose_name='country')),
+                ('geom', django.contrib.gis.db.models.fields.MultiPolygonField(srid=4326, verbose_name='boundary')),
+            ],
+            options={
+                'verbose_name': 'country boundary',
+                'verbose_name_plural': 'country boundaries',
+            },
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 3.2.25 on 2026-10-19 09:12
+
+from django.db import migrations
+
+
+def delete_private_results(apps, schema_editor):
+    GeocodingResult = apps.get_model('hosting', 'GeocodingResult')
+    GeocodingResult.objects.filter(private=True).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('hosting', '0077_countryboundary'),
+    ]
+
+    operations = [
+        migrations.RunPython(delete_private_results, migrations.RunPython.noop),
+        migrations.RemoveField(
+            model_name='geocodingresult',
+            name='private',
+        ),
+    ]
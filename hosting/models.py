@@ -1,16 +1,20 @@
 import re
 from collections import namedtuple
-from datetime import date, datetime
+from datetime import date, datetime, timedelta
 from enum import Enum, IntEnum
 from functools import partial, partialmethod
-from typing import TYPE_CHECKING, Iterable, Optional, TypedDict
+from typing import TYPE_CHECKING, Callable, Iterable, Optional, TypedDict
 
 from django.apps import apps
 from django.conf import settings
 from django.contrib.auth import get_user_model
 from django.contrib.contenttypes.fields import GenericForeignKey
 from django.contrib.contenttypes.models import ContentType
-from django.contrib.gis.db.models import LineStringField, PointField
+from django.contrib.gis.db.models import (
+    LineStringField, MultiPolygonField, PointField,
+)
+from django.contrib.postgres.indexes import GinIndex, GistIndex
+from django.contrib.postgres.search import SearchVectorField
 from django.db import models, transaction
 from django.db.models import F, Q, Value as V
 from django.db.models.functions import Concat, Substr
@@ -36,7 +40,9 @@ from unidecode import unidecode
 
 from core.utils import camel_case_split
 from maps import SRID
+from maps.functions import AsGeography
 
+from .conditions import CONDITIONS_MASK_CAPACITY, get_condition_registry
 from .countries import COUNTRIES_DATA
 from .fields import (
     PhoneNumberField, RangeIntegerField, StyledEmailField, SuggestiveField,
@@ -470,6 +476,20 @@ class Profile(TrackingModel, TimeStampedModel):
         upload_to=RenameAndPrefixAvatar("avatars"),
         validators=[validate_image, validate_size],
         help_text=_("Small image under 100kB. Ideal size: 140x140 px."))
+    # Metadata of the avatar, recorded when it is uploaded, so that displaying
+    # the avatars requires no access to the storage.
+    avatar_present = models.BooleanField(
+        _("avatar is present"),
+        default=False, editable=False)
+    avatar_width = models.PositiveIntegerField(
+        _("avatar width"),
+        null=True, editable=False)
+    avatar_height = models.PositiveIntegerField(
+        _("avatar height"),
+        null=True, editable=False)
+    stored_avatar_url = models.CharField(
+        _("avatar URL"),
+        max_length=255, blank=True, editable=False)
 
     if TYPE_CHECKING:
         pref: 'Preferences'
@@ -507,15 +527,52 @@ class Profile(TrackingModel, TimeStampedModel):
 
     @property
     def avatar_url(self):
+        return self.stored_avatar_url or self.compute_avatar_url()
+
+    def compute_avatar_url(self):
         if self.avatar and hasattr(self.avatar, 'url') and self.avatar_exists():
             return self.avatar.url
         else:
-            email = self.user.email if self.user_id else "family.member@pasportaservo.org"
-            email = value_without_invalid_marker(email)
-            return email_to_gravatar(email, settings.DEFAULT_AVATAR_URL)
+            return self.gravatar_url(self.user.email if self.user_id else None)
+
+    @staticmethod
+    def gravatar_url(email: Optional[str]) -> str:
+        email = value_without_invalid_marker(email or "family.member@pasportaservo.org")
+        return email_to_gravatar(email, settings.DEFAULT_AVATAR_URL)
 
     def avatar_exists(self):
-        return self.avatar and self.avatar.storage.exists(self.avatar.name)
+        return bool(self.avatar) and self.avatar_present
+
+    def update_avatar_metadata(self):
+        """
+        Records the presence and the dimensions of the avatar's image. Reads the
+        image, thus is expected to be used only when the avatar changes.
+        """
+        width = height = None
+        if self.avatar:
+            try:
+                width, height = self.avatar.width, self.avatar.height
+            except (OSError, ValueError, TypeError):
+                pass
+        self.avatar_present = width is not None
+        self.avatar_width, self.avatar_height = width, height
+    update_avatar_metadata.alters_data = True
+
+    def save(self, *args, **kwargs):
+        update_fields = kwargs.get('update_fields')
+        with_avatar = update_fields is None or 'avatar' in update_fields
+        if with_avatar and (bool(self.avatar) != self.avatar_present or not self.avatar._committed):
+            # The dimensions are read from the uploaded file, before it is stored.
+            self.update_avatar_metadata()
+            if update_fields is not None:
+                kwargs['update_fields'] = {*update_fields, 'avatar_present', 'avatar_width', 'avatar_height'}
+        super().save(*args, **kwargs)
+        if with_avatar:
+            # The URL of an uploaded file is known only once it is stored.
+            avatar_url = self.compute_avatar_url()
+            if avatar_url != self.stored_avatar_url:
+                self.stored_avatar_url = avatar_url
+                Profile.all_objects.filter(pk=self.pk).update(stored_avatar_url=avatar_url)
 
     @property
     def icon(self):
@@ -529,21 +586,38 @@ class Profile(TrackingModel, TimeStampedModel):
         HTML pages. The `non_empty` flag ensures that something is output also
         for profiles without a user account (i.e., family members).
         """
+        return self.format_fullname(
+            self.first_name, self.last_name, self.names_inversed,
+            lambda: self.user.username if self.user_id else None,
+            quote, non_empty)
+
+    @staticmethod
+    def format_fullname(
+            first_name: str, last_name: str, names_inversed: bool,
+            username: Optional[str] | Callable[[], Optional[str]] = None,
+            quote='"', non_empty=False,
+    ):
+        """
+        Implementation of `get_fullname_display`, usable without an instance.
+        The username may be given as a callable, evaluated only when needed.
+        """
         template_first_name = '<bdi class={q}first-name{q}>{name}</bdi>'
         template_last_name = '<bdi class={q}last-name{q}>{name}</bdi>'
         template_username = '<bdi class={q}profile-noname{q}>{name}</bdi>'
         template = []
-        if self.first_name.strip():
-            template.append((template_first_name, self.first_name))
-        if self.last_name.strip():
-            template.append((template_last_name, self.last_name))
+        if first_name.strip():
+            template.append((template_first_name, first_name))
+        if last_name.strip():
+            template.append((template_last_name, last_name))
         if not template:
+            if callable(username):
+                username = username()
             template.append((
                 template_username,
-                self.user.username.title() if self.user_id else ('--' if non_empty else " ")
+                username.title() if username else ('--' if non_empty else " ")
             ))
         output = [format_html(t, q=mark_safe(quote), name=n) for (t, n) in template]
-        if self.names_inversed:
+        if names_inversed:
             output.reverse()
         return mark_safe('&ensp;'.join(output))
 
@@ -851,6 +925,9 @@ class Place(TrackingModel, TimeStampedModel):
         blank=True,
         help_text=_("You are welcome to expand on the conditions "
                     "in your home in the description."))
+    # The IDs of the conditions, as bits (see hosting.conditions).
+    conditions_mask = models.BigIntegerField(
+        default=0, editable=False)
     family_members: 'M2MField[Profile, models.Model]' = models.ManyToManyField(
         'hosting.Profile', verbose_name=_("family members"),
         blank=True)
@@ -872,6 +949,9 @@ class Place(TrackingModel, TimeStampedModel):
     visibility = models.OneToOneField(
         'hosting.VisibilitySettingsForPlace',
         related_name='%(class)s', on_delete=models.PROTECT)
+    # Maintained by the database (see hosting.search).
+    search_vector = SearchVectorField(
+        null=True, editable=False)
 
     available_objects = AvailableManager()
 
@@ -879,6 +959,13 @@ class Place(TrackingModel, TimeStampedModel):
         verbose_name = _("place")
         verbose_name_plural = _("places")
         default_manager_name = 'all_objects'
+        indexes = [
+            # Used for the nearest-neighbour ordering of places by distance.
+            GistIndex(AsGeography('location'), name='hosting_place_location_geog'),
+            # Used for the text search over the owner's names and the place.
+            # The trigram indexes are created directly by migration 0072.
+            GinIndex(fields=['search_vector'], name='hosting_place_search_vector'),
+        ]
 
     @property
     def profile(self):
@@ -949,10 +1036,12 @@ class Place(TrackingModel, TimeStampedModel):
 
     def conditions_cache(self):
         """
-        Cached QuerySet of place conditions.
+        Cached list of place conditions, resolved from the conditions mask.
         (Direct access to the field in templates re-queries the database.)
         """
-        return self.__dict__.setdefault('_conditions_cache', self.conditions.all())
+        if '_conditions_cache' not in self.__dict__:
+            self._conditions_cache = get_condition_registry().for_mask(self.conditions_mask)
+        return self._conditions_cache
 
     @property
     def owner_available(self):
@@ -1005,6 +1094,20 @@ class Place(TrackingModel, TimeStampedModel):
                 pass
         super().__setattr__(name, value)
 
+    def save(self, *args, **kwargs):
+        if not self._state.adding and kwargs.get('update_fields') is None and not kwargs.get('force_insert'):
+            # The conditions mask is updated in bulk whenever the conditions change
+            # (see hosting.apps); the in-memory value might be stale and must not
+            # overwrite the one in the database.
+            deferred_fields = self.get_deferred_fields()
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key
+                and field.attname not in deferred_fields
+                and field.name != 'conditions_mask'
+            ]
+        super().save(*args, **kwargs)
+
     def __str__(self):
         return ", ".join([self.city, str(self.country.name)]) if self.city else str(self.country.name)
 
@@ -1019,6 +1122,166 @@ class Place(TrackingModel, TimeStampedModel):
         return ", ".join(c.__str__() for c in self.conditions.all())
 
 
+class SearchablePlace(models.Model):
+    """
+    A flat copy of the attributes which determine whether a place is listed
+    in the search results and on the public map, so that these listings do
+    not need to join the visibility, profile, preferences and user tables.
+    Kept in sync by the signal receivers set up in `hosting.apps`; deleted
+    places have no copy.
+    """
+    place = models.OneToOneField(
+        'hosting.Place', verbose_name=_("place"),
+        primary_key=True,
+        related_name='searchable', on_delete=models.CASCADE)
+    owner = models.ForeignKey(
+        'hosting.Profile', verbose_name=_("owner"),
+        related_name='+', on_delete=models.CASCADE)
+    country = CountryField(
+        _("country"))
+    city = models.CharField(
+        _("city"),
+        blank=True,
+        max_length=255)
+    location = PointField(
+        _("location"), srid=SRID,
+        null=True, blank=True)
+    available = models.BooleanField(
+        _("willing to host"))
+    visible_online_public = models.BooleanField(
+        _("visible online for all"))
+    owner_public_listing = models.BooleanField(
+        _("listed in public search results"),
+        null=True)
+    owner_deceased = models.BooleanField(
+        _("owner is deceased"))
+    owner_deleted = models.BooleanField(
+        _("owner is deleted"))
+    owner_last_login = models.DateTimeField(
+        _("owner's last login"),
+        null=True)
+
+    class Meta:
+        verbose_name = _("searchable place")
+        verbose_name_plural = _("searchable places")
+        indexes = [
+            models.Index(
+                fields=['country', 'available', 'visible_online_public'],
+                name='hosting_searchplace_country'),
+            GistIndex(AsGeography('location'), name='hosting_searchplace_location'),
+        ]
+
+    @classmethod
+    def refresh(cls, **lookups):
+        """
+        Brings up to date the copies of the places selected by the lookups
+        (which are applied to the Place model).
+        """
+        with transaction.atomic():
+            # The places are locked, so that the concurrent refreshes of the same
+            # places (for example, upon saving a profile and its preferences in
+            # parallel) do not attempt to insert the same copies.
+            locked_ids = list(
+                Place.all_objects.filter(**lookups)
+                .select_for_update(of=('self',))
+                .order_by('pk')
+                .values_list('pk', flat=True)
+            )
+            if not locked_ids:
+                return
+            places = list(
+                Place.all_objects.filter(pk__in=locked_ids).values(
+                    'pk', 'deleted_on', 'owner_id', 'country', 'city', 'location', 'available',
+                    'visibility__visible_online_public',
+                    'owner__pref__public_listing', 'owner__death_date', 'owner__deleted_on',
+                    'owner__user__last_login',
+                )
+            )
+            cls.objects.filter(place_id__in=[place['pk'] for place in places]).delete()
+            cls.objects.bulk_create([
+                cls(
+                    place_id=place['pk'],
+                    owner_id=place['owner_id'],
+                    country=place['country'],
+                    city=place['city'],
+                    location=place['location'],
+                    available=place['available'],
+                    visible_online_public=place['visibility__visible_online_public'],
+                    owner_public_listing=place['owner__pref__public_listing'],
+                    owner_deceased=place['owner__death_date'] is not None,
+                    owner_deleted=place['owner__deleted_on'] is not None,
+                    owner_last_login=place['owner__user__last_login'],
+                )
+                for place in places
+                if place['deleted_on'] is None
+            ])
+
+    def __str__(self):
+        return str(self.place_id)
+
+
+class PlaceMapChange(models.Model):
+    """
+    A change of a place on the map of a country which is not reflected by the
+    modification time of the place: a change of its visibility or of its
+    owner's names, its move to another country, or its deletion from the
+    database. For the places removed from the country's map, the entry serves
+    as a tombstone. Recorded by the signal receivers set up in `hosting.apps`.
+    """
+    place_id = models.PositiveIntegerField(
+        _("place"))
+    country = CountryField(
+        _("country"))
+    changed_on = models.DateTimeField(
+        _("changed on"),
+        default=timezone.now, db_index=True)
+
+    # The entries are kept for this long (the older ones are removed by the
+    # `map_changes --prune` management command); the feeds of changes since an
+    # earlier moment start over from the complete data.
+    RETENTION = timedelta(days=30)
+
+    class Meta:
+        verbose_name = _("change of place on map")
+        verbose_name_plural = _("changes of places on map")
+        indexes = [
+            models.Index(fields=['country', 'changed_on'], name='hosting_placemapchange_since'),
+        ]
+
+    @classmethod
+    def record(cls, places: Iterable[tuple[int, str]]):
+        """
+        Logs a change of each of the places (given by their ID and country).
+        """
+        now = timezone.now()
+        changes = [
+            cls(place_id=place_id, country=country, changed_on=now)
+            for place_id, country in places if country
+        ]
+        if changes:
+            cls.objects.bulk_create(changes)
+
+    @classmethod
+    def record_for(cls, **lookups):
+        """
+        Logs a change of the places selected by the lookups (which are applied
+        to the Place model).
+        """
+        cls.record(Place.all_objects.filter(**lookups).values_list('pk', 'country'))
+
+    @classmethod
+    def prune(cls) -> int:
+        """
+        Discards the entries older than the retention period. Returns the
+        number of the entries deleted.
+        """
+        deleted_count, _ = cls.objects.filter(changed_on__lt=timezone.now() - cls.RETENTION).delete()
+        return deleted_count
+
+    def __str__(self):
+        return str(self.place_id)
+
+
 class Phone(TrackingModel, TimeStampedModel):
 
     class PhoneType(models.TextChoices):
@@ -1288,6 +1551,72 @@ class Whereabouts(models.Model):
         )
 
 
+class CountryBoundary(models.Model):
+    """
+    The simplified boundary of a country, for exact checks whether a location
+    lies within the country. Loaded by the `update_country_boundaries`
+    management command; see `maps.boundaries`.
+    """
+    country = CountryField(
+        _("country"),
+        unique=True)
+    geom = MultiPolygonField(
+        _("boundary"), srid=SRID)
+
+    class Meta:
+        verbose_name = _("country boundary")
+        verbose_name_plural = _("country boundaries")
+
+    def __str__(self):
+        return str(self.country.name)
+
+
+class GeocodingResult(models.Model):
+    """
+    A response of the geocoding service, kept for answering the subsequent
+    identical queries without a round trip to the service. Responses with no
+    results are kept as well (negative entries), for a shorter period.
+    """
+    lookup_key = models.CharField(
+        _("lookup key"),
+        max_length=40,
+        unique=True)
+    query = models.TextField(
+        _("query"))
+    country = models.CharField(
+        _("country"),
+        blank=True,
+        max_length=2)
+    language = models.CharField(
+        _("language"),
+        max_length=15)
+    multiple = models.BooleanField(
+        _("multiple results"),
+        default=False)
+    annotations = models.BooleanField(
+        _("with annotations"),
+        default=False)
+    response = models.JSONField(
+        _("response"))
+    negative = models.BooleanField(
+        _("no results"),
+        default=False)
+    created_on = models.DateTimeField(
+        _("created on"),
+        auto_now_add=True)
+    expires_on = models.DateTimeField(
+        _("expires on"),
+        db_index=True)
+
+    class Meta:
+        verbose_name = _("geocoding result")
+        verbose_name_plural = _("geocoding results")
+
+    def __str__(self):
+        return "{} ({})".format(
+            self.query, ", ".join(filter(None, [self.country, self.language])))
+
+
 class Condition(models.Model):
     """
     Hosting condition in a place (e.g. bringing sleeping bag, no smoking...).
@@ -1332,11 +1661,27 @@ class Condition(models.Model):
         default=True,
         help_text=_("Marked = restriction for the guests, "
                     "unmarked = facilitation for the guests."))
+    # The position of the bit representing the condition in conditions masks.
+    mask_bit = models.PositiveSmallIntegerField(
+        _("bit in conditions mask"),
+        unique=True, null=True, editable=False)
 
     class Meta:
         verbose_name = _("condition")
         verbose_name_plural = _("conditions")
 
+    def save(self, *args, **kwargs):
+        if self.mask_bit is None:
+            # The first position not taken by the other conditions is used.
+            taken = set(Condition.objects.exclude(mask_bit=None).values_list('mask_bit', flat=True))
+            self.mask_bit = next(
+                (position for position in range(CONDITIONS_MASK_CAPACITY) if position not in taken),
+                None)
+            if self.mask_bit is None:
+                raise ValueError(
+                    f"No more than {CONDITIONS_MASK_CAPACITY} conditions can be represented in conditions masks.")
+        super().save(*args, **kwargs)
+
     @classmethod
     def active_name_field(cls):
         return 'name' if str(get_language()).startswith('eo') else 'name_en'
@@ -0,0 +1,149 @@
+"""
+Keyset (a.k.a. seek) pagination for the lazy paginator of el_pagination.
+
+Instead of skipping the rows of the preceding pages via OFFSET, the rows of
+the next page are selected by their position in the ordering relative to the
+last row of the previous page ("the cursor"), which is passed to the client
+as an opaque signed token. The cost of retrieving a page thus does not depend
+on how deep into the results the page is.
+
+When the ordered IDs of the results were stored beforehand ("the snapshot"),
+the rows of a page are instead fetched by their primary keys.
+"""
+
+from array import array
+from typing import Any, Callable, Optional
+
+from django.core import signing
+from django.db.models import F, OrderBy, Q, QuerySet
+from django.utils.dateparse import parse_datetime
+
+CURSOR_SIGNING_SALT = 'hosting.pagination.cursor'
+
+
+def dump_cursor(values: list[Any], scope: str = '') -> str:
+    """
+    Encodes the cursor as a signed token, valid only within the given scope
+    (such as the identifier of a specific list of results).
+    """
+    return signing.dumps(
+        values, salt=f'{CURSOR_SIGNING_SALT}:{scope}', compress=True, serializer=CursorSerializer)
+
+
+def load_cursor(token: Optional[str], scope: str = '') -> Optional[list[Any]]:
+    """
+    Decodes the cursor token. Returns None when the token is missing, was
+    tampered with, or belongs to a different scope.
+    """
+    if not token:
+        return None
+    try:
+        values = signing.loads(token, salt=f'{CURSOR_SIGNING_SALT}:{scope}', serializer=CursorSerializer)
+    except signing.BadSignature:
+        return None
+    return values if isinstance(values, list) else None
+
+
+class CursorSerializer(signing.JSONSerializer):
+    """
+    Serializes the values of the ordering keys; date-times are encoded as
+    ISO 8601 strings and are restored on loading.
+    """
+    def dumps(self, obj):
+        return super().dumps([v.isoformat() if hasattr(v, 'isoformat') else v for v in obj])
+
+    def loads(self, data):
+        values = super().loads(data)
+        if isinstance(values, list):
+            values = [(parse_datetime(v) or v) if isinstance(v, str) else v for v in values]
+        return values
+
+
+class KeysetSequence:
+    """
+    A wrapper of a queryset, to be paginated by el_pagination's LazyPaginator.
+    Without a cursor, slicing behaves as usual. With a cursor, the start of
+    the slice is ignored and the rows following the cursor are returned.
+    The ordering of the queryset must end with a unique key (such as `id`).
+    With a snapshot of the ordered IDs, the slice is taken from the snapshot;
+    an incomplete snapshot falls back to the queryset beyond its end.
+    The `loader`, if given, converts the rows of each slice to the objects
+    to display (for example, fetches the full models of the rows).
+    """
+    def __init__(self, queryset: QuerySet, cursor: Optional[list[Any]] = None, orphans: int = 0,
+                 snapshot: Optional[array] = None, snapshot_complete: bool = False,
+                 loader: Optional[Callable[[list[Any]], list[Any]]] = None):
+        self.queryset = queryset
+        self.loader = loader
+        self.cursor = cursor
+        self.orphans = orphans
+        self.snapshot = snapshot
+        self.snapshot_complete = snapshot_complete
+        self.keys = []
+        for i, order_item in enumerate(queryset.query.order_by):
+            if isinstance(order_item, str):
+                descending = order_item.startswith('-')
+                order_item = OrderBy(F(order_item.lstrip('-')), descending=descending)
+            elif not isinstance(order_item, OrderBy):
+                order_item = OrderBy(order_item)
+            # PostgreSQL places the NULLs last in ascending order and first in
+            # descending order, unless specified otherwise.
+            nulls_last = (
+                order_item.nulls_last
+                or (not order_item.nulls_first and not order_item.descending)
+            )
+            self.keys.append((f'_keyset_{i}', order_item.expression, order_item.descending, nulls_last))
+        if cursor is not None and len(cursor) != len(self.keys):
+            self.cursor = None
+        self.next_cursor: Optional[list[Any]] = None
+
+    def _following_cursor(self) -> Q:
+        condition, preceding_equal = Q(pk__in=[]), Q()
+        for (alias, _, descending, nulls_last), value in zip(self.keys, self.cursor):
+            if value is None:
+                if not nulls_last:
+                    # The NULLs come first; all non-NULL values follow them.
+                    condition |= preceding_equal & Q(**{f'{alias}__isnull': False})
+                preceding_equal &= Q(**{f'{alias}__isnull': True})
+            else:
+                after = Q(**{f'{alias}__{"lt" if descending else "gt"}': value})
+                if nulls_last:
+                    after |= Q(**{f'{alias}__isnull': True})
+                condition |= preceding_equal & after
+                preceding_equal &= Q(**{alias: value})
+        return condition
+
+    def __getitem__(self, key):
+        if not isinstance(key, slice):
+            raise TypeError("KeysetSequence supports only slicing.")
+        queryset = self.queryset.annotate(**{alias: expr for alias, expr, *_ in self.keys})
+        limit = key.stop - (key.start or 0)
+        if self.snapshot is not None and (self.snapshot_complete or key.stop <= len(self.snapshot)):
+            ids = self.snapshot[key].tolist()
+            objects = queryset.in_bulk(ids)
+            # Places removed since the snapshot was taken are skipped.
+            items = [objects[pk] for pk in ids if pk in objects]
+        elif self.cursor is not None:
+            items = list(queryset.filter(self._following_cursor())[:limit])
+        else:
+            items = list(queryset[key])
+        # The paginator requests the rows of the page, the orphans, and one
+        # more row to determine whether there is a next page; in such case
+        # only the page's rows are displayed.
+        displayed_count = limit - self.orphans - 1
+        if len(items) > displayed_count + self.orphans and displayed_count > 0 and self.keys:
+            last_item = items[displayed_count - 1]
+            self.next_cursor = [getattr(last_item, alias) for alias, *_ in self.keys]
+        if self.loader is not None:
+            items = self.loader(items)
+        return items
+
+    def exists(self) -> bool:
+        if self.snapshot is not None:
+            return len(self.snapshot) > 0
+        return self.queryset.exists()
+
+    def count(self) -> int:
+        if self.snapshot is not None and self.snapshot_complete:
+            return len(self.snapshot)
+        return self.queryset.count()
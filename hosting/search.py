@@ -0,0 +1,61 @@
+"""
+Database-level text search over the places and the names of their owners.
+
+Each place keeps a `search_vector`, maintained by PostgreSQL triggers (see the
+migration `0072_place_search_vector`), which combines the unaccented names of
+the owner with the city, the closest city, and the short description of the
+place. In addition, trigram indexes over the unaccented values of these same
+columns serve the substring (ILIKE) matching.
+"""
+
+import re
+from typing import Optional
+
+from django.contrib.postgres.search import SearchQuery
+from django.db.models import CharField, Func, Lookup, TextField, Value
+
+# Configuration of the text search: the names are in any language, thus no
+# stemming or stop-words are applicable.
+SEARCH_CONFIG = 'simple'
+# The shortest text for which the trigram indexes are of use.
+TRIGRAM_MIN_LENGTH = 3
+
+
+class Unaccented(Func):
+    """
+    The unaccented value of a text expression. Unlike `unaccent()`, the
+    database function is immutable, which permits its use in the indexes.
+    """
+    function = 'hosting_unaccent'
+    output_field = TextField()
+
+
+@CharField.register_lookup
+class UnaccentedContains(Lookup):
+    """
+    Case- and accent-insensitive containment, served by the trigram indexes
+    over `hosting_unaccent(column)`.
+    """
+    lookup_name = 'unaccented_contains'
+    prepare_rhs = False
+
+    def get_db_prep_lookup(self, value, connection):
+        return ('%s', [f'%{connection.ops.prep_for_like_query(value)}%'])
+
+    def as_sql(self, compiler, connection):
+        lhs, lhs_params = self.process_lhs(compiler, connection)
+        rhs, rhs_params = self.process_rhs(compiler, connection)
+        return f'hosting_unaccent({lhs}) ILIKE hosting_unaccent({rhs})', lhs_params + rhs_params
+
+
+def text_search_query(text: str) -> Optional[SearchQuery]:
+    """
+    Converts the user's text to a query matching all of its words, each one
+    also as the prefix of a longer word. Returns None if the text contains
+    no words.
+    """
+    words = re.findall(r'\w+', text)
+    if not words:
+        return None
+    raw_query = ' & '.join(f"'{word}':*" for word in words)
+    return SearchQuery(Unaccented(Value(raw_query)), config=SEARCH_CONFIG, search_type='raw')
@@ -2,12 +2,12 @@ import json
 from typing import TYPE_CHECKING, Any, cast
 
 from django import template
-from django.contrib.gis.geos import LineString, Point
+from django.contrib.gis.geos import Point
 from django.utils.safestring import SafeString, mark_safe
 
 from django_countries import Countries
 
-from maps.data import COUNTRIES_GEO
+from maps.boundaries import is_location_in_country as location_in_country
 
 from ..models import LocationConfidence
 
@@ -57,9 +57,7 @@ def is_location_in_country(place: 'Place') -> bool:
         return False
     conf = place.location_confidence
     if conf >= LocationConfidence.ACCEPTABLE and conf != LocationConfidence.CONFIRMED:
-        country_bbox = COUNTRIES_GEO[place.country]['bbox']
-        country_geom = LineString(country_bbox['northeast'], country_bbox['southwest']).envelope
-        return place.location.within(country_geom)
+        return location_in_country(place.location, place.country)
     return conf == LocationConfidence.CONFIRMED
 
 
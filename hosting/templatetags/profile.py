@@ -9,9 +9,10 @@ from django.template.defaultfilters import stringfilter
 from django.utils.html import format_html
 from django.utils.safestring import mark_safe
 
-from core.auth import PERM_SUPERVISOR, auth_log
+from core.auth import PERM_SUPERVISOR, auth_log, get_precomputed_auth
+from core.supervision import profiles_place_countries
 
-from ..models import Profile
+from ..models import Place, Profile
 from ..utils import value_without_invalid_marker
 
 register = template.Library()
@@ -42,11 +43,14 @@ def is_supervisor_of(user_or_profile, profile_or_countries):
             "* checking if object is supervised... [ %s %s] [ %s ]",
             user, "<~ '%s' " % user_or_profile if user != user_or_profile else "",
             repr(profile_or_countries))
-    if isinstance(profile_or_countries, int):
-        # Assumed pk of a profile.
-        try:
-            profile_or_countries = Profile.objects.get(pk=profile_or_countries)
-        except Profile.DoesNotExist:
+    if isinstance(profile_or_countries, (Profile, Place)):
+        precomputed = get_precomputed_auth(user, profile_or_countries)
+        if precomputed:
+            return precomputed.is_supervisor
+    elif isinstance(profile_or_countries, int):
+        # Assumed pk of a profile; only the countries of its places matter.
+        profile_or_countries = profiles_place_countries([profile_or_countries])[profile_or_countries]
+        if not profile_or_countries:
             # For consistency, superusers are treated as supervisors of non-
             # existing profiles, as they are assumed to have all permissions.
             return False if not user.is_superuser else True
@@ -124,7 +128,18 @@ def get_pronoun(profile):
 @register.filter
 def avatar_dimension(profile, size_percent=100):
     if profile and profile.avatar_exists():
-        if profile.avatar.width < profile.avatar.height:
+        return avatar_dimension_attributes(profile.avatar_width, profile.avatar_height, size_percent)
+    else:
+        return avatar_dimension_attributes(None, None, size_percent)
+
+
+def avatar_dimension_attributes(width, height, size_percent=100):
+    """
+    The HTML attributes for displaying an avatar of the given dimensions (or
+    a square one, when the dimensions are unknown).
+    """
+    if width and height:
+        if width < height:
             dimension = ["width"]
             aspect = "tall"
         else:
@@ -189,7 +189,7 @@ urlpatterns = [
 
     re_path(
         format_lazy(
-            r'^{search}(?:/(?!@@)(?P<query>.+))?(?:/@@(?P<cache>[a-f0-9]+))?/$',
+            r'^{search}(?:/(?!@@)(?P<query>.+))?(?:/@@(?P<cache>[a-f0-9]+)(?:/(?P<cursor>[\w.:-]+))?)?/$',
             search=pgettext_lazy("URL", 'search')),
         SearchView.as_view(), name='search'),
 ]
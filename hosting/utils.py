@@ -1,12 +1,15 @@
 import logging
 import os
 import re
+from datetime import timedelta
+from hashlib import sha1
 from typing import TYPE_CHECKING, Optional, cast
 from uuid import uuid4
 
 from django.conf import settings
 from django.contrib.gis.geos import Point
-from django.utils import translation
+from django.core.cache import cache
+from django.utils import timezone, translation
 from django.utils.deconstruct import deconstructible
 
 import geocoder
@@ -22,14 +25,21 @@ from .countries import countries_with_mandatory_region
 if TYPE_CHECKING:  # pragma: no cover
     from .models import Profile
 
+# How long (in seconds) a response of the geocoding service is reused for
+# identical queries; responses with no results are reused for a shorter time.
+GEOCODING_CACHE_TIMEOUT = 90 * 24 * 60 * 60
+GEOCODING_CACHE_NEGATIVE_TIMEOUT = 2 * 24 * 60 * 60
+
 
 def geocode(
         query: str, country: str = '',
         private: bool = False, annotations: bool = False, multiple: bool = False,
+        renew: bool = False,
 ) -> OpenCageQuery | None:
     """
     Utilizes the API of OpenCage to perform forward geocoding of the provided
-    address.
+    address. Successful responses are stored, and identical queries made
+    later are answered from storage without contacting the service.
 
     Args:
         `query` (str):
@@ -38,7 +48,8 @@ def geocode(
         `country` (str):
             Restrict geocoding to a specific country; a 2-letter code.
         `private` (bool):
-            Whether to instruct OpenCage to not log this request.
+            Whether to instruct OpenCage to not log this request. The
+            response to such a query is not stored either.
         `annotations` (bool):
             Whether to include additional information (such as timezone,
             w3w, sunrise & sunset, currency, etc.) in the result.
@@ -46,6 +57,9 @@ def geocode(
         `multiple` (bool):
             Whether to return just the first result, or several results
             if OpenCage has multiple hits.
+        `renew` (bool):
+            Whether to contact the service even when a stored response is
+            available; the stored response is replaced only upon success.
     Returns:
         OpenCageQuery (with a Geo Point) or None.
     """
@@ -61,14 +75,112 @@ def geocode(
         params.update({'no_record': int(private)})
     if country:
         params.update({'countrycode': country})
-    result = geocoder.opencage(query, key=key, params=params, maxRows=15 if multiple else 1)
+    lookup_key = geocoding_cache_key(query, country, lang, multiple, annotations)
+    stored_response = get_stored_geocoding(lookup_key) if not renew else None
+    if stored_response is not None:
+        result = StoredOpenCageQuery(
+            query, stored_response, key=key, params=params, maxRows=15 if multiple else 1)
+    else:
+        result = geocoder.opencage(query, key=key, params=params, maxRows=15 if multiple else 1)
+        if not result.error and not private:
+            store_geocoding(
+                lookup_key, result,
+                query=query, country=country, language=lang,
+                multiple=multiple, annotations=annotations)
     logging.getLogger('PasportaServo.geo').debug(
-        "Query: %s\n\tResult: %s\n\tConfidence: %d", query, result, result.confidence)
+        "Query: %s\n\tResult: %s\n\tConfidence: %d\n\tStored: %s",
+        query, result, result.confidence, stored_response is not None)
     result.point = Point(result.xy, srid=SRID) if result.xy else None
     result.session.close()
     return result
 
 
+class StoredOpenCageQuery(OpenCageQuery):
+    """
+    A forward geocoding query answered by a previously stored response of
+    OpenCage, instead of a request to the service.
+    """
+    def __init__(self, location, stored_response, **kwargs):
+        self.stored_response = stored_response
+        super().__init__(location, **kwargs)
+
+    def _connect(self):
+        self.status_code = 200
+        return self.stored_response
+
+
+def geocoding_cache_key(
+        query: str, country: str, language: Optional[str],
+        multiple: bool = False, annotations: bool = False,
+) -> str:
+    """
+    Returns the key identifying a geocoding query in the cache of responses:
+    a digest of the normalized query, the country, the language, and the
+    flags which influence the contents of the response.
+    """
+    normalized_query = " ".join(query.split()).casefold()
+    return sha1(
+        "|".join([
+            normalized_query, (country or '').upper(), language or '',
+            str(int(multiple)), str(int(annotations)),
+        ]).encode()
+    ).hexdigest()
+
+
+def get_stored_geocoding(lookup_key: str) -> Optional[dict]:
+    """
+    Looks up a stored response of the geocoding service, first in the shared
+    cache and then in the database. Returns the JSON of the response or None
+    when there is no valid stored response.
+    """
+    from .models import GeocodingResult
+
+    response = cache.get(f'geocoding-result:{lookup_key}')
+    if response is None:
+        now = timezone.now()
+        record = (
+            GeocodingResult.objects
+            .filter(lookup_key=lookup_key, expires_on__gt=now)
+            .values('response', 'expires_on')
+            .first()
+        )
+        if record:
+            response = record['response']
+            cache.set(
+                f'geocoding-result:{lookup_key}', response,
+                timeout=int((record['expires_on'] - now).total_seconds()))
+    return response
+
+
+def store_geocoding(
+        lookup_key: str, result: OpenCageQuery,
+        *, query: str, country: str, language: Optional[str],
+        multiple: bool, annotations: bool,
+):
+    """
+    Stores the successful response of the geocoding service (which might be
+    an empty list of results) in the database and in the shared cache.
+    """
+    from .models import GeocodingResult
+
+    response = {
+        'licenses': result.license,
+        'results': [r.raw for r in result],
+        'status': {'code': 200, 'message': "OK"},
+    }
+    timeout = GEOCODING_CACHE_TIMEOUT if result.ok else GEOCODING_CACHE_NEGATIVE_TIMEOUT
+    GeocodingResult.objects.update_or_create(
+        lookup_key=lookup_key,
+        defaults=dict(
+            query=query, country=(country or '').upper(), language=language or '',
+            multiple=multiple, annotations=annotations,
+            response=response, negative=not result.ok,
+            expires_on=timezone.now() + timedelta(seconds=timeout),
+        ),
+    )
+    cache.set(f'geocoding-result:{lookup_key}', response, timeout=timeout)
+
+
 def geocode_city(
         cityname: str, country: str, state_province: Optional[str] = None,
 ) -> OpenCageResult | None:
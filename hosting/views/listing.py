@@ -1,6 +1,7 @@
 import json
 import logging
 import re
+from array import array
 from urllib.parse import quote_plus, unquote_plus
 
 from django.conf import settings
@@ -12,23 +13,33 @@ from django.http import HttpResponseRedirect
 from django.http.response import HttpResponseRedirectBase
 from django.urls import reverse
 from django.utils.encoding import uri_to_iri
+from django.utils.functional import lazy
 from django.utils.translation import pgettext
 from django.views import generic
 
-import geocoder
 from django_countries.fields import Country
 from el_pagination.views import AjaxListView
 
 from core.auth import PERM_SUPERVISOR, AuthMixin, AuthRole
+from core.connections import parse_user_agent, request_user_agent
 from core.forms import FeedbackForm
 from core.templatetags.utils import compact
-from maps import SRID
+from maps.functions import NearestDistance
+from maps.geoip import geolocate_ip
 from maps.utils import bufferize_country_boundaries
 
 from ..filters.search import SearchFilterSet
-from ..models import Condition, LocationConfidence, Phone, Place, TravelAdvice
+from ..gazetteer import geocode_locally
+from ..models import (
+    LocationConfidence, Phone, Place, SearchablePlace, TravelAdvice,
+)
+from ..pagination import KeysetSequence, dump_cursor, load_cursor
 from ..utils import emulate_geocode_country, geocode
 
+# The number of pages of search results whose place IDs are kept in the
+# snapshot; the following pages are retrieved via the keyset cursor.
+SEARCH_SNAPSHOT_PAGES = 4
+
 
 class HttpResponseTemporaryRedirect(HttpResponseRedirectBase):
     """
@@ -150,9 +161,12 @@ class PlaceStaffListView(AuthMixin, PlaceListView):
 
 
 class SearchView(PlacePaginatedListView):
-    queryset = Place.objects.filter(
-        visibility__visible_online_public=True,
-        owner__death_date__isnull=True)
+    # The results are sought among the flat copies of the places; the places
+    # themselves are fetched only for the results being displayed.
+    queryset = SearchablePlace.objects.filter(
+        visible_online_public=True,
+        owner_deceased=False)
+    context_object_name = 'place_list'
     paginate_first_by = 25
     paginate_by = 25
     display_fair_usage_condition = True
@@ -162,12 +176,12 @@ class SearchView(PlacePaginatedListView):
             return HttpResponseRedirect(
                 self.transpose_query_to_url_kwarg(request.GET))
 
-        self.prepare_search(request, kwargs.get('query'), None, kwargs.get('cache'))
+        self.prepare_search(request, kwargs.get('query'), None, kwargs.get('cache'), kwargs.get('cursor'))
         return super().get(request, *args, **kwargs)
 
     def post(self, request, *args, **kwargs):
         if not kwargs.get('query') and request.POST.get(settings.SEARCH_FIELD_NAME):
-            if request.session.get('connection_browser') == 'Firefox':
+            if parse_user_agent(request_user_agent(request)).browser.family == 'Firefox':
                 # Ugly workaround because Firefox forgets the request data.
                 # https://bugzilla.mozilla.org/show_bug.cgi?id=1805182
                 pass
@@ -176,7 +190,7 @@ class SearchView(PlacePaginatedListView):
                     self.transpose_query_to_url_kwarg(request.POST))
 
         query = kwargs.get('query') or request.POST.get(settings.SEARCH_FIELD_NAME)
-        self.prepare_search(request, query, request.POST, kwargs.get('cache'))
+        self.prepare_search(request, query, request.POST, kwargs.get('cache'), kwargs.get('cursor'))
         return super().get(request, *args, **kwargs)
 
     def transpose_query_to_url_kwarg(self, source):
@@ -201,7 +215,7 @@ class SearchView(PlacePaginatedListView):
             request.session.cycle_key()
         return request.user.id or request.session.session_key
 
-    def prepare_search(self, request, query, extended_query=None, cached_id=None):
+    def prepare_search(self, request, query, extended_query=None, cached_id=None, cursor=None):
         # URL-decode and trim query, avoiding query=None.
         self.query = compact(unquote_plus(query or ''))
         # Allow extended querying (that is, "advanced search") only to
@@ -215,36 +229,28 @@ class SearchView(PlacePaginatedListView):
             self.extended_query = extended_query
         # Exclude places whose owner blocked unauthenticated viewing.
         if not request.user.is_authenticated:
-            self.queryset = self.queryset.exclude(owner__pref__public_listing=False)
+            self.queryset = self.queryset.exclude(owner_public_listing=False)
         # Exclude places whose owner's profile is deleted, unless the
         # viewing user is a supervisor or an administrator.
         if not request.user.has_perm(PERM_SUPERVISOR):
-            self.queryset = self.queryset.exclude(owner__deleted_on__isnull=False)
-        # Fetch the hosting conditions for all displayed places in one
-        # batch to reduce trips to the database, when the viewing user
-        # is authenticated. For unauthenticated viewing, no conditions
-        # are shown.
-        if request.user.is_authenticated:
-            conditions_prefetch = Prefetch(
-                'conditions',
-                queryset=Condition.objects.filter(restriction=False)
-            )
-            # Note: We are fetching the same Condition objects for multiple places.
-            #       Probably it would be better to retrieve references to single
-            #       cached instances instead, but this feels like over-engineering.
-            self.queryset = self.queryset.prefetch_related(conditions_prefetch)
-
+            self.queryset = self.queryset.exclude(owner_deleted=True)
         if cached_id:
             sess_id = self.get_identifier_for_cache(request)
             cached_search = cache.get(f'search-results:{sess_id}:{cached_id}', default={})
             if isinstance(cached_search, dict):
                 self._cached_db_query = cached_search.get('query')
+                if cached_search.get('snapshot') is not None:
+                    self._snapshot = array('I')
+                    self._snapshot.frombytes(cached_search['snapshot'])
+                    self._snapshot_complete = cached_search.get('snapshot-complete', False)
+                    self._snapshot_annotations = cached_search.get('annotations', {})
                 for paging_setting, how_much in cached_search.get('paging', {}).items():
                     setattr(self, f'paginate_{paging_setting}', how_much)
                 self.query = cached_search.get('search-text', '')
             else:
                 self._cached_db_query = cached_search
             self._cached_id = cached_id
+            self._cursor = load_cursor(cursor, scope=cached_id)
 
         self.place_filter = SearchFilterSet(self.extended_query, self.queryset, request=request)
 
@@ -277,6 +283,10 @@ class SearchView(PlacePaginatedListView):
                 qs = self.queryset.all()  # Clone the existing queryset.
                 qs.query = self._cached_db_query
                 qs = qs.all()  # Refresh the queryset according to the previous query.
+            elif getattr(self, '_snapshot', None) is not None:
+                # All results are listed in the snapshot; the places will be
+                # fetched by their IDs.
+                qs = self.queryset.annotate(**self._snapshot_annotations)
             else:
                 # A previously run query is requested but is no longer in cache.
                 # Or, the requested query does not belong to the current user.
@@ -284,18 +294,18 @@ class SearchView(PlacePaginatedListView):
             return qs
 
         # No cached results: perform the full query.
-        qs = (
-            self.place_filter.qs
-            .select_related('owner', 'owner__user')
-            .defer('address', 'description', 'short_description', 'owner__description')
-        )
+        qs = self.place_filter.qs
 
         parsed_query = self.parse_user_query()
         if 'country_code' in parsed_query and not parsed_query['query']:
             self.result = emulate_geocode_country(parsed_query['country_code'])
         else:
-            self.result = geocode(
-                parsed_query['query'], country=parsed_query.get('country_code'))
+            # Localities known to the gazetteer are resolved in-process; only
+            # unknown or ambiguous queries require the geocoding service.
+            self.result = (
+                geocode_locally(parsed_query['query'], country=parsed_query.get('country_code'))
+                or geocode(parsed_query['query'], country=parsed_query.get('country_code'))
+            )
         self.cleaned_query = parsed_query['query']
         if self.query and self.result.point:
             point_category = getattr(self.result, '_components', {}).get('_category')
@@ -308,10 +318,12 @@ class SearchView(PlacePaginatedListView):
             ]
             if any(locality_found_flags):
                 self.inhabited_place_search = point_category == 'place'
+                # The nearest places are retrieved via the spatial index; the exact
+                # distance is then calculated only for the rows being displayed.
                 search_queryset = (
                     qs
                     .annotate(distance=Distance('location', self.result.point))
-                    .order_by('distance')
+                    .order_by(NearestDistance('location', self.result.point), 'pk')
                 )
                 self.cache_queryset_query(search_queryset)
                 return search_queryset
@@ -322,32 +334,37 @@ class SearchView(PlacePaginatedListView):
                 search_queryset = (
                     qs
                     .filter(country=self.result.country_code.upper())
-                    .order_by(F('owner__user__last_login').desc(nulls_last=True), '-id')
+                    .order_by(F('owner_last_login').desc(nulls_last=True), '-pk')
                 )
                 self.cache_queryset_query(search_queryset)
                 return search_queryset
-        position = geocoder.ip(self.request.META['HTTP_X_REAL_IP']
-                               if settings.ENVIRONMENT not in ('DEV', 'TEST')
-                               else "188.166.58.162")
-        position.point = Point(position.xy, srid=SRID) if position.xy else None
+        if 'text_rank' in qs.query.annotations:
+            # No locality was searched for, but some text was: the places
+            # matching the text best are shown first.
+            search_queryset = qs.order_by(F('text_rank').desc(), 'pk')
+            self.cache_queryset_query(search_queryset)
+            return search_queryset
+        position = geolocate_ip(self.request.META['HTTP_X_REAL_IP']
+                                if settings.ENVIRONMENT not in ('DEV', 'TEST')
+                                else "188.166.58.162")
+        position_point = position.point if position else None
         logging.getLogger('PasportaServo.geo').debug(
             "User's position: %s, %s",
-            position.address if position.ok and position.address else "UNKNOWN",
-            position.xy if position.ok else position.error
+            ", ".join(filter(None, [position.state, position.country])) if position else "UNKNOWN",
+            position.xy if position else None
         )
-        position.session.close()
-        if position.point and not most_recent:
+        if position_point and not most_recent:
             # Results are sorted by distance from user's current location, but probably
             # it is better not to creep users out by unexpectedly using their location.
             search_queryset = (
                 qs
-                .annotate(internal_distance=Distance('location', position.point))
-                .order_by('internal_distance')
+                .annotate(internal_distance=Distance('location', position_point))
+                .order_by(NearestDistance('location', position_point), 'pk')
             )
         else:
             search_queryset = (
                 qs
-                .order_by(F('owner__user__last_login').desc(nulls_last=True), '-id')
+                .order_by(F('owner_last_login').desc(nulls_last=True), '-pk')
             )
 
         # Cache the calculated result.
@@ -357,8 +374,20 @@ class SearchView(PlacePaginatedListView):
     def cache_queryset_query(self, queryset):
         sess_id = self.get_identifier_for_cache()
         self._cached_id = hex(id(queryset))[2:]
+        # The ordered IDs of the results of the first few pages are stored, so
+        # that these pages can be fetched by primary key without re-running the
+        # search. The query is stored only when there are more results than the
+        # snapshot holds; the pages beyond it are then sought via the cursor.
+        snapshot_size = self.paginate_first_by + (SEARCH_SNAPSHOT_PAGES - 1) * self.paginate_by
+        self._snapshot = array(
+            'I', queryset.prefetch_related(None).values_list('pk', flat=True)[:snapshot_size + 1])
+        self._snapshot_complete = len(self._snapshot) <= snapshot_size
+        del self._snapshot[snapshot_size:]
         cached_search = {
-            'query': queryset.query,
+            'query': queryset.query if not self._snapshot_complete else None,
+            'snapshot': self._snapshot.tobytes(),
+            'snapshot-complete': self._snapshot_complete,
+            'annotations': dict(queryset.query.annotations),
             'paging': {
                 setting[len('paginate_'):]: getattr(self, setting)
                 for setting in set(self.__dict__.keys()) | set(self.__class__.__dict__.keys())
@@ -368,6 +397,37 @@ class SearchView(PlacePaginatedListView):
         }
         cache.set(f'search-results:{sess_id}:{self._cached_id}', cached_search, timeout=2*60*60)
 
+    def get_pagination_url(self):
+        """
+        The URL of the next page of results, including the cursor (the ordering
+        keys of the last displayed place), when it is known.
+        """
+        kwargs = {'cache': self._cached_id}
+        if self.keyset_results.next_cursor is not None:
+            kwargs['cursor'] = dump_cursor(self.keyset_results.next_cursor, scope=self._cached_id)
+        return reverse('search', kwargs=kwargs)
+
+    def load_places(self, rows):
+        """
+        Fetches the places (with their owners) of the displayed search results,
+        in the order of the results. The values computed for the results, such
+        as the distance, are carried over to the places.
+        """
+        places = (
+            Place.objects
+            .select_related('owner', 'owner__user')
+            .defer('address', 'description', 'short_description', 'search_vector',
+                   'owner__description')
+            .in_bulk([row.pk for row in rows])
+        )
+        annotations = self.object_list.query.annotation_select.keys()
+        for row in rows:
+            if row.pk in places:
+                for name in annotations:
+                    setattr(places[row.pk], name, getattr(row, name))
+        # Places removed since the search was performed are skipped.
+        return [places[row.pk] for row in rows if row.pk in places]
+
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         context['filter'] = self.place_filter
@@ -377,6 +437,14 @@ class SearchView(PlacePaginatedListView):
                 f for f, v in getattr(form, 'cleaned_data', {}).items() if v)
         ) if form.is_bound else []
         context['queryset_cache_id'] = self._cached_id
+        # The following pages are retrieved by seeking past the last displayed
+        # place, and not by skipping the places of the preceding pages.
+        context['place_list'] = self.keyset_results = KeysetSequence(
+            context['place_list'], getattr(self, '_cursor', None), orphans=settings.EL_PAGINATION_ORPHANS,
+            snapshot=getattr(self, '_snapshot', None),
+            snapshot_complete=getattr(self, '_snapshot_complete', False),
+            loader=self.load_places)
+        context['pagination_url'] = lazy(self.get_pagination_url, str)()
         context['feedback_form'] = FeedbackForm()
 
         if (getattr(self, 'country_search', False)
@@ -20,7 +20,7 @@ from django.views import generic
 
 from braces.views import FormInvalidMessageMixin
 
-from core.auth import PERM_SUPERVISOR, AuthMixin, AuthRole
+from core.auth import PERM_SUPERVISOR, AuthMixin, AuthRole, authorize_in_bulk
 from core.mixins import LoginRequiredMixin
 from core.models import SiteConfiguration
 from core.templatetags.utils import next_link
@@ -117,6 +117,7 @@ class PlaceDetailView(AuthMixin, PlaceMixin, generic.DetailView):
             for setting in ('CSS', 'CSS_INTEGRITY', 'JS', 'JS_INTEGRITY')
         })
         context['advisories'] = TravelAdvice.get_for_country(self.object.country.code)
+        authorize_in_bulk(self.request.user, self.object.family_members_cache())
         return context
 
     def calculate_position(self):
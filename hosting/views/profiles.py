@@ -18,14 +18,19 @@ from django.views.decorators.vary import vary_on_headers
 
 from braces.views import FormInvalidMessageMixin
 
-from core.auth import PERM_SUPERVISOR, AuthMixin, AuthRole
+from core.auth import PERM_SUPERVISOR, AuthMixin, AuthRole, authorize_in_bulk
 from core.mixins import LoginRequiredMixin
+from core.supervision import forget_profile_place_countries
+from maps.snapshots import schedule_rebuild
+from maps.versions import bump_data_version
 
 from ..forms import (
     PreferenceOptinsForm, ProfileCreateForm, ProfileEmailUpdateForm,
     ProfileForm, VisibilityForm, VisibilityFormSetBase,
 )
-from ..models import Profile, VisibilitySettings
+from ..models import (
+    PlaceMapChange, Profile, SearchablePlace, VisibilitySettings,
+)
 from .mixins import (
     DeleteMixin, ProfileIsUserMixin, ProfileMixin,
     ProfileModifyMixin, UpdateMixin,
@@ -160,6 +165,7 @@ class ProfileRestoreView(
         self.object = self.get_object()
         if not self.object.deleted:
             return self.get(request, *args, **kwargs)
+        restored_countries = set(self.linked_places.values_list('country', flat=True))
         with transaction.atomic():
             [qs.update(deleted_on=None) for qs in [
                 self._annotated_objects(Profile.all_objects)
@@ -171,6 +177,13 @@ class ProfileRestoreView(
                 Profile.all_objects.filter(pk=self.object.pk),
             ]]
             User.objects.filter(pk=self.object.user_id).update(is_active=True)
+            # Bulk updates do not send signals; the places are thus listed anew
+            # and shown again on the maps explicitly.
+            SearchablePlace.refresh(owner=self.object)
+            PlaceMapChange.record_for(owner=self.object)
+            forget_profile_place_countries([self.object.pk])
+            transaction.on_commit(lambda: bump_data_version(restored_countries))
+            transaction.on_commit(schedule_rebuild)
         return HttpResponseRedirect(self.object.get_edit_url())
 
 
@@ -231,7 +244,12 @@ class ProfileDetailView(
             display_places = (display_places
                               .select_related('checked_by', 'checked_by__profile')
                               .defer('checked_by__profile__description'))
-        context['places'] = display_places.select_related('visibility')
+        context['places'] = places = display_places.select_related('visibility')
+        # The supervision of the places (and of their family members, which
+        # are prefetched) is determined for all of them at once.
+        authorize_in_bulk(self.request.user, chain(
+            places,
+            *(place.family_members_cache() for place in places if not self.public_view)))
 
         display_phones = self.object.phones.filter(deleted=False)
         context['phones'] = display_phones
@@ -15,6 +15,7 @@ from django.views.decorators.vary import vary_on_headers
 
 from core.auth import PERM_SUPERVISOR, AuthMixin, AuthRole
 from core.mixins import LoginRequiredMixin
+from maps.boundaries import is_location_in_country
 
 from ..forms import PhoneForm, PlaceForm, ProfileForm
 from ..models import LocationConfidence, Place, Profile
@@ -68,6 +69,9 @@ class PlaceCheckView(AuthMixin, PlaceMixin, generic.View):
                 self.add_error('location', _("The geographical location on map is unknown."))
             elif self.initial['location_confidence'] < LocationConfidence.ACCEPTABLE:
                 self.add_error('location', _("The geographical location on map is imprecise."))
+            elif (self.initial['location_confidence'] != LocationConfidence.CONFIRMED
+                    and not is_location_in_country(self.initial['location'], self.instance.country)):
+                self.add_error('location', _("The geographical location on map is outside of the country."))
             else:
                 self.cleaned_data = {'location': self.data['location']}
 
@@ -1,5 +1,41 @@
 from django.apps import AppConfig
+from django.conf import settings
+from django.db.models import signals
 
 
 class MapConfig(AppConfig):
     name = 'maps'
+
+    def ready(self):
+        # The snapshots of the world map data must follow the changes of the
+        # places and of the settings determining which places are shown.
+        from .snapshots import schedule_rebuild
+        for model in ('Place', 'Profile', 'Preferences', 'VisibilitySettingsForPlace'):
+            signals.post_save.connect(schedule_rebuild, sender='hosting.' + model)
+            signals.post_delete.connect(schedule_rebuild, sender='hosting.' + model)
+
+        # The boundaries of the countries are kept in memory once used.
+        from .boundaries import forget_country_geometries
+        signals.post_save.connect(forget_country_geometries, sender='hosting.CountryBoundary')
+        signals.post_delete.connect(forget_country_geometries, sender='hosting.CountryBoundary')
+
+        # The pre-rendered styles include the API key of the tiles service.
+        from .styles import rebuild_styles
+        signals.post_save.connect(rebuild_styles, sender='core.SiteConfiguration')
+
+        # The versions of the map data (of the world and of the countries of
+        # the affected places) must follow the same changes; a place moved to
+        # another country affects the map of its previous country too.
+        from .versions import make_data_version_receiver
+        data_version_sources = [
+            ('hosting.Place', 'pk', [signals.pre_save, signals.post_save, signals.post_delete]),
+            ('hosting.VisibilitySettingsForPlace', 'visibility', [signals.post_save]),
+            ('hosting.Profile', 'owner', [signals.post_save]),
+            ('hosting.Preferences', 'owner__pref', [signals.post_save]),
+            (settings.AUTH_USER_MODEL, 'owner__user', [signals.post_save]),
+        ]
+        for model, lookup, model_signals in data_version_sources:
+            for signal in model_signals:
+                signal.connect(
+                    make_data_version_receiver(lookup), sender=model,
+                    weak=False, dispatch_uid=f'{model}--map-data-version')
@@ -0,0 +1,85 @@
+"""
+Boundaries of the countries, for checking whether a location lies within its
+country.
+
+The simplified polygons of the countries are kept in the database (the
+`CountryBoundary` model, loaded by the `update_country_boundaries` management
+command), and each process keeps the prepared geometries in memory upon their
+first use, so that checking many locations (e.g., all the places listed for a
+supervisor) costs one query per country. Since the simplified boundary may
+cut off the edges of the country (notably, along the coasts), the locations
+are checked against the boundary extended by a small buffer. A country
+without a polygon is approximated by its bounding box.
+"""
+
+import threading
+from typing import Optional
+
+from django.contrib.gis.geos import Point, Polygon
+from django.contrib.gis.geos.prepared import PreparedGeometry
+
+from . import SRID
+from .data import COUNTRIES_GEO
+
+# The tolerance (in degrees) of the simplification of the boundaries, and the
+# width of the buffer around them within which the locations are accepted.
+BOUNDARY_TOLERANCE = 0.005
+BOUNDARY_BUFFER = 2 * BOUNDARY_TOLERANCE
+
+_geometries: dict[str, Optional[PreparedGeometry]] = {}
+_geometries_lock = threading.Lock()
+
+
+def _bbox_polygon(country_code: str) -> Optional[Polygon]:
+    if country_code not in COUNTRIES_GEO:
+        return None
+    bbox = COUNTRIES_GEO[country_code]['bbox']
+    corners = [*bbox['southwest'], *bbox['northeast']]
+    if None in corners:
+        return None
+    polygon = Polygon.from_bbox(corners)
+    polygon.srid = SRID
+    return polygon
+
+
+def country_geometry(country_code: str) -> Optional[PreparedGeometry]:
+    """
+    Returns the prepared geometry of the country's boundary, or of its bounding
+    box when the boundary is not known; None for unknown countries.
+    """
+    try:
+        return _geometries[country_code]
+    except KeyError:
+        pass
+    from hosting.models import CountryBoundary
+    geometry = (
+        CountryBoundary.objects
+        .filter(country=country_code)
+        .values_list('geom', flat=True)
+        .first()
+    )
+    if geometry:
+        geometry = geometry.buffer(BOUNDARY_BUFFER, quadsegs=2)
+    else:
+        geometry = _bbox_polygon(country_code)
+    prepared = geometry.prepared if geometry else None
+    with _geometries_lock:
+        _geometries[country_code] = prepared
+    return prepared
+
+
+def forget_country_geometries(sender=None, **kwargs):
+    """
+    Clears the geometries kept by this process. To be used as a signal
+    receiver for the changes of the boundaries; the other processes pick up
+    the changed boundaries when restarted.
+    """
+    with _geometries_lock:
+        _geometries.clear()
+
+
+def is_location_in_country(location: Optional[Point], country_code: str) -> bool:
+    if not location or location.empty:
+        return False
+    geometry = country_geometry(str(country_code))
+    return geometry is not None and geometry.contains(location)
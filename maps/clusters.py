@@ -0,0 +1,207 @@
+"""
+Server-side clustering of the places shown on the world map.
+
+At the low zoom levels, the places close to each other are merged into
+clusters, so that the tiles contain a few hundreds of features instead of all
+the places of the area. The clusters of all zoom levels are computed at once
+(by greedy merging on a grid, from the highest zoom level to the lowest, as
+done by the Supercluster library of Mapbox) and kept in memory for each
+version of the data.
+"""
+
+import math
+import threading
+import time
+from collections import defaultdict
+from typing import Any, Callable, Iterable, Mapping, Optional
+
+# The clusters are computed for the zoom levels up to this one; the tiles of
+# the higher zoom levels show the individual places.
+CLUSTER_MAX_ZOOM = 13
+# The radius (in pixels, relative to a tile of 512 pixels) within which the
+# places are merged.
+CLUSTER_RADIUS = 50
+CLUSTER_TILE_SIZE = 512
+# How long (in seconds) an index built for unversioned data is considered
+# up-to-date.
+CLUSTER_REFRESH_PERIOD = 60 * 60
+
+MAX_LATITUDE = 85.0511287798
+
+
+def project(lon: float, lat: float) -> tuple[float, float]:
+    """
+    Converts geographical coordinates to the Web Mercator plane, scaled to the
+    range 0-1 (where the whole world is covered by the tile of zoom level 0).
+    """
+    sine = math.sin(math.radians(max(-MAX_LATITUDE, min(MAX_LATITUDE, lat))))
+    return (
+        lon / 360 + 0.5,
+        0.5 - 0.25 * math.log((1 + sine) / (1 - sine)) / math.pi,
+    )
+
+
+def unproject(x: float, y: float) -> tuple[float, float]:
+    return (
+        (x - 0.5) * 360,
+        math.degrees(math.atan(math.sinh(math.pi * (1 - 2 * y)))),
+    )
+
+
+class ClusterNode:
+    """
+    A single place, or a cluster of places with its (weighted) center.
+    """
+    __slots__ = ('x', 'y', 'count', 'expansion_zoom', 'place_id', 'properties')
+
+    def __init__(self, x, y, count=1, expansion_zoom=None, place_id=None, properties=None):
+        self.x = x
+        self.y = y
+        self.count = count
+        self.expansion_zoom = expansion_zoom
+        self.place_id = place_id
+        self.properties = properties
+
+    @property
+    def is_cluster(self):
+        return self.count > 1
+
+
+class ClusterIndex:
+    def __init__(
+            self,
+            points: Iterable[tuple[int, float, float, Mapping[str, Any]]],
+            version: Optional[str] = None,
+    ):
+        self.version = version
+        self.built_at = time.monotonic()
+        nodes = [
+            ClusterNode(*project(lon, lat), place_id=place_id, properties=properties)
+            for place_id, lon, lat, properties in points
+        ]
+        # The nodes of each zoom level, bucketed by the tile they belong to.
+        self.levels: list[dict[tuple[int, int], list[ClusterNode]]] = [
+            {} for zoom in range(CLUSTER_MAX_ZOOM + 1)
+        ]
+        for zoom in range(CLUSTER_MAX_ZOOM, -1, -1):
+            nodes = self._cluster(nodes, zoom)
+            tiles_count = 2**zoom
+            level = defaultdict(list)
+            for node in nodes:
+                level[self._tile_of(node, tiles_count)].append(node)
+            self.levels[zoom] = dict(level)
+
+    @staticmethod
+    def _tile_of(node, cells_count):
+        return (
+            max(0, min(int(node.x * cells_count), cells_count - 1)),
+            max(0, min(int(node.y * cells_count), cells_count - 1)),
+        )
+
+    def _cluster(self, nodes: list[ClusterNode], zoom: int) -> list[ClusterNode]:
+        radius = CLUSTER_RADIUS / (CLUSTER_TILE_SIZE * 2**zoom)
+        cells_count = max(1, int(1 / radius))
+        grid = defaultdict(list)
+        for node in nodes:
+            grid[self._tile_of(node, cells_count)].append(node)
+
+        merged = set()
+        clustered_nodes = []
+        for node in nodes:
+            if id(node) in merged:
+                continue
+            merged.add(id(node))
+            cell_x, cell_y = self._tile_of(node, cells_count)
+            neighbours = [
+                other
+                for dx in (-1, 0, 1) for dy in (-1, 0, 1)
+                for other in grid.get((cell_x + dx, cell_y + dy), ())
+                if id(other) not in merged
+                and (other.x - node.x)**2 + (other.y - node.y)**2 <= radius**2
+            ]
+            if not neighbours:
+                clustered_nodes.append(node)
+                continue
+            count, sum_x, sum_y = node.count, node.x * node.count, node.y * node.count
+            for other in neighbours:
+                merged.add(id(other))
+                count += other.count
+                sum_x += other.x * other.count
+                sum_y += other.y * other.count
+            clustered_nodes.append(
+                ClusterNode(sum_x / count, sum_y / count, count, expansion_zoom=zoom + 1))
+        return clustered_nodes
+
+    def get_clusters(
+            self, zoom: int, west: float, south: float, east: float, north: float,
+    ) -> list[ClusterNode]:
+        """
+        Returns the clusters and the single places within the bounding box, at
+        the zoom level (which must not exceed `CLUSTER_MAX_ZOOM`).
+        """
+        level = self.levels[zoom]
+        min_x, min_y = project(west, north)
+        max_x, max_y = project(east, south)
+        tiles_count = 2**zoom
+        first_tile, last_tile = (
+            self._tile_of(ClusterNode(min_x, min_y), tiles_count),
+            self._tile_of(ClusterNode(max_x, max_y), tiles_count),
+        )
+        return [
+            node
+            for tile_x in range(first_tile[0], last_tile[0] + 1)
+            for tile_y in range(first_tile[1], last_tile[1] + 1)
+            for node in level.get((tile_x, tile_y), ())
+            if min_x <= node.x <= max_x and min_y <= node.y <= max_y
+        ]
+
+
+_indexes: dict[str, ClusterIndex] = {}
+_indexes_lock = threading.Lock()
+# Only one index of each variant is built at a time.
+_build_locks: dict[str, threading.Lock] = defaultdict(threading.Lock)
+
+
+def _is_up_to_date(index: Optional[ClusterIndex], version: Optional[str]) -> bool:
+    return (
+        index is not None and index.version == version
+        and not (version is None and time.monotonic() - index.built_at > CLUSTER_REFRESH_PERIOD)
+    )
+
+
+def get_cluster_index(
+        variant: str, version: Optional[str],
+        points: Callable[[], Iterable[tuple[int, float, float, Mapping[str, Any]]]],
+) -> ClusterIndex:
+    """
+    Returns the index of the variant of the data, building it from the given
+    points when there is none for the version. When the data is not versioned,
+    the index is rebuilt periodically. While the index is being rebuilt, the
+    previous one keeps being served to the other threads.
+    """
+    index = _indexes.get(variant)
+    if _is_up_to_date(index, version):
+        return index
+    with _indexes_lock:
+        build_lock = _build_locks[variant]
+    if not build_lock.acquire(blocking=index is None):
+        # Another thread is already building the index.
+        return index
+    try:
+        index = _indexes.get(variant)
+        if not _is_up_to_date(index, version):
+            index = ClusterIndex(points(), version)
+            with _indexes_lock:
+                _indexes[variant] = index
+        return index
+    finally:
+        build_lock.release()
+
+
+def reset_cluster_indexes(*args, **kwargs):
+    """
+    Discards the indexes of the current process, so that they are rebuilt
+    upon next use. Can be used as a signal receiver.
+    """
+    with _indexes_lock:
+        _indexes.clear()
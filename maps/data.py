@@ -1,3995 +1,31 @@
 """
-This file contains a dictionary of bounding boxes and center points, for the countries
-defined by the django_countries module.
+This file provides the bounding boxes and center points for the countries
+defined by the django_countries module. The coordinates are kept in a compact
+binary file (`countries-geodata.bin`), memory-mapped upon the first access;
+the mapping returns for each country a dictionary of the form
+    {'bbox': {'northeast': [lng, lat], 'southwest': [lng, lat]}, 'center': [lng, lat]}
 To update the data, use the `update_countries_geodata` management command.
 """
 
-COUNTRIES_GEO = {
-    "AF": {
-        "bbox": {
-            "northeast": [
-                74.889862,
-                38.4910682
-            ],
-            "southwest": [
-                60.5176034,
-                29.3772
-            ]
-        },
-        "center": [
-            66.2385139,
-            33.7680065
-        ]
-    },
-    "AX": {
-        "bbox": {
-            "northeast": [
-                21.3456556,
-                60.87665
-            ],
-            "southwest": [
-                19.0832098,
-                59.4541578
-            ]
-        },
-        "center": [
-            19.9438638,
-            60.2166218
-        ]
-    },
-    "AL": {
-        "bbox": {
-            "northeast": [
-                21.0574335,
-                42.6610848
-            ],
-            "southwest": [
-                19.1246095,
-                39.6448625
-            ]
-        },
-        "center": [
-            19.9999619,
-            41.000028
-        ]
-    },
-    "DZ": {
-        "bbox": {
-            "northeast": [
-                11.997337,
-                37.2962055
-            ],
-            "southwest": [
-                -8.668908,
-                18.968147
-            ]
-        },
-        "center": [
-            2.9999825,
-            28.0000272
-        ]
-    },
-    "AS": {
-        "bbox": {
-            "northeast": [
-                -167.9322899,
-                -10.8449746
-            ],
-            "southwest": [
-                -171.2951296,
-                -14.7608358
-            ]
-        },
-        "center": [
-            -170.6959748,
-            -14.300631
-        ]
-    },
-    "AD": {
-        "bbox": {
-            "northeast": [
-                1.7863837,
-                42.6559357
-            ],
-            "southwest": [
-                1.4135781,
-                42.4288238
-            ]
-        },
-        "center": [
-            1.5732033,
-            42.5407167
-        ]
-    },
-    "AO": {
-        "bbox": {
-            "northeast": [
-                24.0878856,
-                -4.3880634
-            ],
-            "southwest": [
-                11.4609793,
-                -18.038945
-            ]
-        },
-        "center": [
-            17.5691241,
-            -11.8775768
-        ]
-    },
-    "AI": {
-        "bbox": {
-            "northeast": [
-                -62.7125449,
-                18.7951194
-            ],
-            "southwest": [
-                -63.6391992,
-                18.0615454
-            ]
-        },
-        "center": [
-            -63.0750234,
-            18.1954947
-        ]
-    },
-    "AQ": {
-        "bbox": {
-            "northeast": [
-                180.0,
-                -60.0
-            ],
-            "southwest": [
-                -180.0,
-                -85.0511287
-            ]
-        },
-        "center": [
-            0.3149312,
-            -79.4063075
-        ]
-    },
-    "AG": {
-        "bbox": {
-            "northeast": [
-                -61.447857,
-                17.929
-            ],
-            "southwest": [
-                -62.5536517,
-                16.7573901
-            ]
-        },
-        "center": [
-            -61.8222516,
-            17.079128
-        ]
-    },
-    "AR": {
-        "bbox": {
-            "northeast": [
-                -53.6374515,
-                -21.781168
-            ],
-            "southwest": [
-                -73.5605371,
-                -55.1850761
-            ]
-        },
-        "center": [
-            -64.9672817,
-            -34.9964963
-        ]
-    },
-    "AM": {
-        "bbox": {
-            "northeast": [
-                46.6333087,
-                41.300712
-            ],
-            "southwest": [
-                43.4471395,
-                38.8404775
-            ]
-        },
-        "center": [
-            44.6736646,
-            40.7696272
-        ]
-    },
-    "AW": {
-        "bbox": {
-            "northeast": [
-                -69.661226,
-                12.823
-            ],
-            "southwest": [
-                -70.2695876,
-                12.262778
-            ]
-        },
-        "center": [
-            -69.9618475,
-            12.5013629
-        ]
-    },
-    "AU": {
-        "bbox": {
-            "northeast": [
-                153.6116035,
-                -9.0880125
-            ],
-            "southwest": [
-                112.8656697,
-                -43.6430376
-            ]
-        },
-        "center": [
-            134.354806,
-            -25.610111
-        ]
-    },
-    "AT": {
-        "bbox": {
-            "northeast": [
-                17.160776,
-                49.0205305
-            ],
-            "southwest": [
-                9.5307487,
-                46.3722761
-            ]
-        },
-        "center": [
-            13.199959,
-            47.2000338
-        ]
-    },
-    "AZ": {
-        "bbox": {
-            "northeast": [
-                51.0090302,
-                41.9502947
-            ],
-            "southwest": [
-                44.7633701,
-                38.3929551
-            ]
-        },
-        "center": [
-            47.7872508,
-            40.3936294
-        ]
-    },
-    "BS": {
-        "bbox": {
-            "northeast": [
-                -72.4477521,
-                27.4734551
-            ],
-            "southwest": [
-                -80.7001941,
-                20.7059846
-            ]
-        },
-        "center": [
-            -78.0000547,
-            24.7736546
-        ]
-    },
-    "BH": {
-        "bbox": {
-            "northeast": [
-                50.9233693,
-                26.6872444
-            ],
-            "southwest": [
-                50.2697989,
-                25.535
-            ]
-        },
-        "center": [
-            50.5344606,
-            26.1551249
-        ]
-    },
-    "BD": {
-        "bbox": {
-            "northeast": [
-                92.6804979,
-                26.6382534
-            ],
-            "southwest": [
-                88.0075306,
-                20.3756582
-            ]
-        },
-        "center": [
-            90.2932426,
-            24.4768783
-        ]
-    },
-    "BB": {
-        "bbox": {
-            "northeast": [
-                -59.2147175,
-                13.535
-            ],
-            "southwest": [
-                -59.8562115,
-                12.845
-            ]
-        },
-        "center": [
-            -59.5334217,
-            13.19
-        ]
-    },
-    "BY": {
-        "bbox": {
-            "northeast": [
-                32.7627809,
-                56.17218
-            ],
-            "southwest": [
-                23.1783344,
-                51.2575982
-            ]
-        },
-        "center": [
-            27.6971358,
-            53.4250605
-        ]
-    },
-    "BE": {
-        "bbox": {
-            "northeast": [
-                6.408097,
-                51.5516667
-            ],
-            "southwest": [
-                2.3889137,
-                49.4969821
-            ]
-        },
-        "center": [
-            4.6667145,
-            50.6402809
-        ]
-    },
-    "BZ": {
-        "bbox": {
-            "northeast": [
-                -87.3098494,
-                18.496001
-            ],
-            "southwest": [
-                -89.2273252,
-                15.8857286
-            ]
-        },
-        "center": [
-            -88.7600927,
-            16.8259793
-        ]
-    },
-    "BJ": {
-        "bbox": {
-            "northeast": [
-                3.843343,
-                12.4092447
-            ],
-            "southwest": [
-                0.776667,
-                6.0398696
-            ]
-        },
-        "center": [
-            2.2584408,
-            9.5293472
-        ]
-    },
-    "BM": {
-        "bbox": {
-            "northeast": [
-                -64.4109842,
-                32.5913693
-            ],
-            "southwest": [
-                -65.1232222,
-                32.0469651
-            ]
-        },
-        "center": [
-            -64.7603583,
-            32.3018217
-        ]
-    },
-    "BT": {
-        "bbox": {
-            "northeast": [
-                92.1252321,
-                28.246987
-            ],
-            "southwest": [
-                88.7464724,
-                26.7016961
-            ]
-        },
-        "center": [
-            90.5119273,
-            27.549511
-        ]
-    },
-    "BO": {
-        "bbox": {
-            "northeast": [
-                -57.453,
-                -9.6689438
-            ],
-            "southwest": [
-                -69.6450073,
-                -22.8982742
-            ]
-        },
-        "center": [
-            -64.9912286,
-            -17.0568696
-        ]
-    },
-    "BQ": {
-        "bbox": {
-            "northeast": [
-                -62.7862552,
-                17.85
-            ],
-            "southwest": [
-                -68.6255319,
-                11.825
-            ]
-        },
-        "center": [
-            -63.1432236,
-            17.566
-        ]
-    },
-    "BA": {
-        "bbox": {
-            "northeast": [
-                19.6237311,
-                45.2764135
-            ],
-            "southwest": [
-                15.7287433,
-                42.5553114
-            ]
-        },
-        "center": [
-            17.5961467,
-            44.3053476
-        ]
-    },
-    "BW": {
-        "bbox": {
-            "northeast": [
-                29.375304,
-                -17.778137
-            ],
-            "southwest": [
-                19.9986474,
-                -26.9059669
-            ]
-        },
-        "center": [
-            24.5928742,
-            -23.1681782
-        ]
-    },
-    "BV": {
-        "bbox": {
-            "northeast": [
-                3.7791099,
-                -54.187
-            ],
-            "southwest": [
-                2.9345531,
-                -54.654
-            ]
-        },
-        "center": [
-            3.3574416,
-            -54.4215
-        ]
-    },
-    "BR": {
-        "bbox": {
-            "northeast": [
-                -28.6341164,
-                5.2842873
-            ],
-            "southwest": [
-                -73.9830625,
-                -33.8689056
-            ]
-        },
-        "center": [
-            -53.2,
-            -10.3333333
-        ]
-    },
-    "IO": {
-        "bbox": {
-            "northeast": [
-                72.7020157,
-                -5.037066
-            ],
-            "southwest": [
-                71.036504,
-                -7.6454079
-            ]
-        },
-        "center": [
-            72.1173961,
-            -6.4157192
-        ]
-    },
-    "BN": {
-        "bbox": {
-            "northeast": [
-                115.3635623,
-                5.1011857
-            ],
-            "southwest": [
-                114.0758734,
-                4.002508
-            ]
-        },
-        "center": [
-            114.5653908,
-            4.4137155
-        ]
-    },
-    "BG": {
-        "bbox": {
-            "northeast": [
-                28.8875409,
-                44.2167064
-            ],
-            "southwest": [
-                22.3571459,
-                41.2353929
-            ]
-        },
-        "center": [
-            25.3361996,
-            42.7257216
-        ]
-    },
-    "BF": {
-        "bbox": {
-            "northeast": [
-                2.4089717,
-                15.084
-            ],
-            "southwest": [
-                -5.5132416,
-                9.4104718
-            ]
-        },
-        "center": [
-            -1.6880314,
-            12.0753083
-        ]
-    },
-    "BI": {
-        "bbox": {
-            "northeast": [
-                30.8498462,
-                -2.3096796
-            ],
-            "southwest": [
-                29.0007401,
-                -4.4693155
-            ]
-        },
-        "center": [
-            29.8870575,
-            -3.3634357
-        ]
-    },
-    "CV": {
-        "bbox": {
-            "northeast": [
-                -22.4547752,
-                17.407117
-            ],
-            "southwest": [
-                -25.5731073,
-                14.6066229
-            ]
-        },
-        "center": [
-            -24.0083947,
-            16.0000552
-        ]
-    },
-    "KH": {
-        "bbox": {
-            "northeast": [
-                107.6276788,
-                14.6904224
-            ],
-            "southwest": [
-                102.3338282,
-                9.4752639
-            ]
-        },
-        "center": [
-            104.869423,
-            13.5066394
-        ]
-    },
-    "CM": {
-        "bbox": {
-            "northeast": [
-                16.1921476,
-                13.083333
-            ],
-            "southwest": [
-                8.3822176,
-                1.6546659
-            ]
-        },
-        "center": [
-            13.1535811,
-            4.6125522
-        ]
-    },
-    "CA": {
-        "bbox": {
-            "northeast": [
-                -52.3231981,
-                83.3362128
-            ],
-            "southwest": [
-                -141.00275,
-                41.6765556
-            ]
-        },
-        "center": [
-            -107.9917071,
-            61.0666922
-        ]
-    },
-    "KY": {
-        "bbox": {
-            "northeast": [
-                -79.5110954,
-                19.9573759
-            ],
-            "southwest": [
-                -81.6313748,
-                19.0620619
-            ]
-        },
-        "center": [
-            -80.5667132,
-            19.5417212
-        ]
-    },
-    "CF": {
-        "bbox": {
-            "northeast": [
-                27.4540764,
-                11.001389
-            ],
-            "southwest": [
-                14.4155426,
-                2.2156553
-            ]
-        },
-        "center": [
-            19.9981227,
-            7.0323598
-        ]
-    },
-    "TD": {
-        "bbox": {
-            "northeast": [
-                24.0,
-                23.4975
-            ],
-            "southwest": [
-                13.47348,
-                7.44107
-            ]
-        },
-        "center": [
-            19.0156172,
-            15.6134137
-        ]
-    },
-    "CL": {
-        "bbox": {
-            "northeast": [
-                -66.0753474,
-                -17.4983998
-            ],
-            "southwest": [
-                -76.0335251,
-                -56.725
-            ]
-        },
-        "center": [
-            -71.312389,
-            -35.697472
-        ]
-    },
-    "CN": {
-        "bbox": {
-            "northeast": [
-                134.7754563,
-                53.5608154
-            ],
-            "southwest": [
-                73.4997347,
-                8.8383436
-            ]
-        },
-        "center": [
-            104.999927,
-            35.000074
-        ]
-    },
-    "CX": {
-        "bbox": {
-            "northeast": [
-                105.9158048,
-                -10.2114751
-            ],
-            "southwest": [
-                105.330145,
-                -10.7714068
-            ]
-        },
-        "center": [
-            105.6226592,
-            -10.4913869
-        ]
-    },
-    "CC": {
-        "bbox": {
-            "northeast": [
-                97.1349614,
-                -11.6212366
-            ],
-            "southwest": [
-                96.6115772,
-                -12.4118829
-            ]
-        },
-        "center": [
-            96.8409375,
-            -12.0728315
-        ]
-    },
-    "CO": {
-        "bbox": {
-            "northeast": [
-                -66.8511907,
-                16.0571269
-            ],
-            "southwest": [
-                -82.1243666,
-                -4.2316872
-            ]
-        },
-        "center": [
-            -73.783892,
-            2.8894434
-        ]
-    },
-    "KM": {
-        "bbox": {
-            "northeast": [
-                44.7451922,
-                -11.165
-            ],
-            "southwest": [
-                43.025305,
-                -12.621
-            ]
-        },
-        "center": [
-            44.2832964,
-            -12.2045176
-        ]
-    },
-    "CD": {
-        "bbox": {
-            "northeast": [
-                31.3056758,
-                5.3920026
-            ],
-            "southwest": [
-                12.039074,
-                -13.459035
-            ]
-        },
-        "center": [
-            22.4574787,
-            -4.0324901
-        ]
-    },
-    "CG": {
-        "bbox": {
-            "northeast": [
-                18.643611,
-                3.713056
-            ],
-            "southwest": [
-                11.0048205,
-                -5.149089
-            ]
-        },
-        "center": [
-            15.6419155,
-            -0.7264327
-        ]
-    },
-    "CK": {
-        "bbox": {
-            "northeast": [
-                -157.1089329,
-                -8.7168792
-            ],
-            "southwest": [
-                -166.0856468,
-                -22.15807
-            ]
-        },
-        "center": [
-            -160.3554851,
-            -16.0492781
-        ]
-    },
-    "CR": {
-        "bbox": {
-            "northeast": [
-                -82.5060208,
-                11.2195684
-            ],
-            "southwest": [
-                -87.2722647,
-                5.3329698
-            ]
-        },
-        "center": [
-            -84.0739102,
-            10.2735633
-        ]
-    },
-    "CI": {
-        "bbox": {
-            "northeast": [
-                -2.493031,
-                10.740197
-            ],
-            "southwest": [
-                -8.601725,
-                4.1621205
-            ]
-        },
-        "center": [
-            -5.5679458,
-            7.9897371
-        ]
-    },
-    "HR": {
-        "bbox": {
-            "northeast": [
-                19.4470842,
-                46.555029
-            ],
-            "southwest": [
-                13.2104814,
-                42.1765993
-            ]
-        },
-        "center": [
-            17.0118954,
-            45.5643442
-        ]
-    },
-    "CU": {
-        "bbox": {
-            "northeast": [
-                -73.9190004,
-                23.4816972
-            ],
-            "southwest": [
-                -85.1679702,
-                19.6275294
-            ]
-        },
-        "center": [
-            -80.1142033,
-            21.5551108
-        ]
-    },
-    "CW": {
-        "bbox": {
-            "northeast": [
-                -68.4413473,
-                12.592
-            ],
-            "southwest": [
-                -69.3673493,
-                11.777
-            ]
-        },
-        "center": [
-            -68.9640919,
-            12.1845
-        ]
-    },
-    "CY": {
-        "bbox": {
-            "northeast": [
-                34.8553182,
-                35.913252
-            ],
-            "southwest": [
-                32.0227581,
-                34.4383706
-            ]
-        },
-        "center": [
-            33.1396403,
-            35.1695632
-        ]
-    },
-    "CZ": {
-        "bbox": {
-            "northeast": [
-                18.859216,
-                51.0557036
-            ],
-            "southwest": [
-                12.0905901,
-                48.5518083
-            ]
-        },
-        "center": [
-            15.4749544,
-            49.8167003
-        ]
-    },
-    "DK": {
-        "bbox": {
-            "northeast": [
-                15.5530641,
-                57.9524297
-            ],
-            "southwest": [
-                7.7153255,
-                54.4516667
-            ]
-        },
-        "center": [
-            10.3333283,
-            55.670249
-        ]
-    },
-    "DJ": {
-        "bbox": {
-            "northeast": [
-                43.6579046,
-                12.7923081
-            ],
-            "southwest": [
-                41.7713139,
-                10.9149547
-            ]
-        },
-        "center": [
-            42.7577845,
-            11.8567755
-        ]
-    },
-    "DM": {
-        "bbox": {
-            "northeast": [
-                -61.0329895,
-                15.7872222
-            ],
-            "southwest": [
-                -61.6869184,
-                15.0074207
-            ]
-        },
-        "center": [
-            -61.3653618,
-            15.4113138
-        ]
-    },
-    "DO": {
-        "bbox": {
-            "northeast": [
-                -68.1101463,
-                21.303433
-            ],
-            "southwest": [
-                -72.0574706,
-                17.2701708
-            ]
-        },
-        "center": [
-            -70.3028026,
-            19.0974031
-        ]
-    },
-    "EC": {
-        "bbox": {
-            "northeast": [
-                -75.192504,
-                1.469581
-            ],
-            "southwest": [
-                -81.0847665,
-                -5.0159314
-            ]
-        },
-        "center": [
-            -78.1386352,
-            -1.7731752
-        ]
-    },
-    "EG": {
-        "bbox": {
-            "northeast": [
-                37.1153517,
-                31.8330854
-            ],
-            "southwest": [
-                24.6499112,
-                22.0
-            ]
-        },
-        "center": [
-            29.2675469,
-            26.2540493
-        ]
-    },
-    "SV": {
-        "bbox": {
-            "northeast": [
-                -87.6351394,
-                14.4510488
-            ],
-            "southwest": [
-                -90.1790975,
-                12.976046
-            ]
-        },
-        "center": [
-            -88.9140683,
-            13.8000382
-        ]
-    },
-    "GQ": {
-        "bbox": {
-            "northeast": [
-                11.3598628,
-                3.989
-            ],
-            "southwest": [
-                5.4172943,
-                -1.6732196
-            ]
-        },
-        "center": [
-            10.5170357,
-            1.613172
-        ]
-    },
-    "ER": {
-        "bbox": {
-            "northeast": [
-                43.3001714,
-                18.0709917
-            ],
-            "southwest": [
-                36.4333653,
-                12.3548219
-            ]
-        },
-        "center": [
-            37.9999668,
-            15.9500319
-        ]
-    },
-    "EE": {
-        "bbox": {
-            "northeast": [
-                28.2100175,
-                59.9383754
-            ],
-            "southwest": [
-                21.3826069,
-                57.5092997
-            ]
-        },
-        "center": [
-            25.3319078,
-            58.7523778
-        ]
-    },
-    "ET": {
-        "bbox": {
-            "northeast": [
-                47.9823797,
-                14.8940537
-            ],
-            "southwest": [
-                32.9975838,
-                3.397448
-            ]
-        },
-        "center": [
-            38.6521203,
-            10.2116702
-        ]
-    },
-    "FK": {
-        "bbox": {
-            "northeast": [
-                -57.3662367,
-                -50.7973007
-            ],
-            "southwest": [
-                -61.7726772,
-                -53.1186766
-            ]
-        },
-        "center": [
-            -59.5500387,
-            -51.9666424
-        ]
-    },
-    "FO": {
-        "bbox": {
-            "northeast": [
-                -6.1413262,
-                62.4476162
-            ],
-            "southwest": [
-                -7.7983834,
-                61.2880991
-            ]
-        },
-        "center": [
-            -7.0322972,
-            62.0448724
-        ]
-    },
-    "FJ": {
-        "bbox": {
-            "northeast": [
-                180.0,
-                -12.2613866
-            ],
-            "southwest": [
-                -180.0,
-                -21.9434274
-            ]
-        },
-        "center": [
-            179.0122737,
-            -18.1239696
-        ]
-    },
-    "FI": {
-        "bbox": {
-            "northeast": [
-                31.5867071,
-                70.0922939
-            ],
-            "southwest": [
-                19.0832098,
-                59.4541578
-            ]
-        },
-        "center": [
-            25.9209164,
-            63.2467777
-        ]
-    },
-    "FR": {
-        "bbox": {
-            "northeast": [
-                10.125,
-                51.089517
-            ],
-            "southwest": [
-                -9.0,
-                41.310257
-            ]
-        },
-        "center": [
-            2.0,
-            46.0
-        ]
-    },
-    "GF": {
-        "bbox": {
-            "northeast": [
-                -51.62336,
-                5.749766
-            ],
-            "southwest": [
-                -54.554404,
-                2.109287
-            ]
-        },
-        "center": [
-            -53.0,
-            4.0
-        ]
-    },
-    "PF": {
-        "bbox": {
-            "northeast": [
-                -132.75,
-                -7.52413
-            ],
-            "southwest": [
-                -157.5,
-                -29.228302
-            ]
-        },
-        "center": [
-            -140.0,
-            -15.0
-        ]
-    },
-    "TF": {
-        "bbox": {
-            "northeast": [
-                77.8494974,
-                -11.3139928
-            ],
-            "southwest": [
-                39.4138676,
-                -50.2187169
-            ]
-        },
-        "center": [
-            63.8604556,
-            -44.1511785
-        ]
-    },
-    "GA": {
-        "bbox": {
-            "northeast": [
-                14.539444,
-                2.3182171
-            ],
-            "southwest": [
-                8.5002246,
-                -4.1012261
-            ]
-        },
-        "center": [
-            11.6899699,
-            -0.8999695
-        ]
-    },
-    "GM": {
-        "bbox": {
-            "northeast": [
-                -13.797778,
-                13.8253137
-            ],
-            "southwest": [
-                -17.0288254,
-                13.061
-            ]
-        },
-        "center": [
-            -15.4900464,
-            13.470062
-        ]
-    },
-    "GE": {
-        "bbox": {
-            "northeast": [
-                46.7365373,
-                43.5864294
-            ],
-            "southwest": [
-                39.8844803,
-                41.0552922
-            ]
-        },
-        "center": [
-            44.0287382,
-            41.6809707
-        ]
-    },
-    "DE": {
-        "bbox": {
-            "northeast": [
-                15.0419319,
-                55.099161
-            ],
-            "southwest": [
-                5.8663153,
-                47.2701114
-            ]
-        },
-        "center": [
-            10.4234469,
-            51.0834196
-        ]
-    },
-    "GH": {
-        "bbox": {
-            "northeast": [
-                1.2732942,
-                11.1748562
-            ],
-            "southwest": [
-                -3.260786,
-                4.5392525
-            ]
-        },
-        "center": [
-            -1.0800271,
-            8.0300284
-        ]
-    },
-    "GI": {
-        "bbox": {
-            "northeast": [
-                -5.2766611,
-                36.1550376
-            ],
-            "southwest": [
-                -5.4006553,
-                36.058755
-            ]
-        },
-        "center": [
-            -5.3352772,
-            36.106747
-        ]
-    },
-    "GR": {
-        "bbox": {
-            "northeast": [
-                29.7296986,
-                41.7488862
-            ],
-            "southwest": [
-                19.2477876,
-                34.7006096
-            ]
-        },
-        "center": [
-            21.9877132,
-            38.9953683
-        ]
-    },
-    "GL": {
-        "bbox": {
-            "northeast": [
-                -10.0288759,
-                83.875172
-            ],
-            "southwest": [
-                -74.1250416,
-                59.515387
-            ]
-        },
-        "center": [
-            -42.8125967,
-            77.6192349
-        ]
-    },
-    "GD": {
-        "bbox": {
-            "northeast": [
-                -61.1732143,
-                12.5966532
-            ],
-            "southwest": [
-                -62.0065868,
-                11.786
-            ]
-        },
-        "center": [
-            -61.6904045,
-            12.1360374
-        ]
-    },
-    "GP": {
-        "bbox": {
-            "northeast": [
-                -61.0003663,
-                16.5144664
-            ],
-            "southwest": [
-                -61.809764,
-                15.8320085
-            ]
-        },
-        "center": [
-            -61.5650444,
-            16.2490067
-        ]
-    },
-    "GU": {
-        "bbox": {
-            "northeast": [
-                145.009167,
-                13.706179
-            ],
-            "southwest": [
-                144.563426,
-                13.182335
-            ]
-        },
-        "center": [
-            144.7336264,
-            13.444138
-        ]
-    },
-    "GT": {
-        "bbox": {
-            "northeast": [
-                -88.1755849,
-                17.8165947
-            ],
-            "southwest": [
-                -92.3105242,
-                13.6345804
-            ]
-        },
-        "center": [
-            -89.8988087,
-            15.6356088
-        ]
-    },
-    "GG": {
-        "bbox": {
-            "northeast": [
-                -2.0508814,
-                49.9416066
-            ],
-            "southwest": [
-                -3.0204015,
-                49.2208333
-            ]
-        },
-        "center": [
-            -2.484854,
-            49.580437
-        ]
-    },
-    "GN": {
-        "bbox": {
-            "northeast": [
-                -7.6381993,
-                12.67563
-            ],
-            "southwest": [
-                -15.5680508,
-                7.1906045
-            ]
-        },
-        "center": [
-            -10.7083587,
-            10.7226226
-        ]
-    },
-    "GW": {
-        "bbox": {
-            "northeast": [
-                -13.6348777,
-                12.6862384
-            ],
-            "southwest": [
-                -16.894523,
-                10.6514215
-            ]
-        },
-        "center": [
-            -14.9000214,
-            12.100035
-        ]
-    },
-    "GY": {
-        "bbox": {
-            "northeast": [
-                -56.4689543,
-                8.6038842
-            ],
-            "southwest": [
-                -61.414905,
-                1.1710017
-            ]
-        },
-        "center": [
-            -58.6416891,
-            4.8417097
-        ]
-    },
-    "HT": {
-        "bbox": {
-            "northeast": [
-                -71.6217461,
-                20.2181368
-            ],
-            "southwest": [
-                -75.2384618,
-                17.9099291
-            ]
-        },
-        "center": [
-            -72.3570972,
-            19.1399952
-        ]
-    },
-    "HM": {
-        "bbox": {
-            "northeast": [
-                74.2045345,
-                -52.7031304
-            ],
-            "southwest": [
-                72.2461932,
-                -53.394703
-            ]
-        },
-        "center": [
-            72.955751,
-            -53.0166353
-        ]
-    },
-    "VA": {
-        "bbox": {
-            "northeast": [
-                12.458336,
-                41.907417
-            ],
-            "southwest": [
-                12.445908,
-                41.900275
-            ]
-        },
-        "center": [
-            12.4533,
-            41.90225
-        ]
-    },
-    "HN": {
-        "bbox": {
-            "northeast": [
-                -82.1729621,
-                17.619526
-            ],
-            "southwest": [
-                -89.3568207,
-                12.9808485
-            ]
-        },
-        "center": [
-            -86.0755145,
-            15.2572432
-        ]
-    },
-    "HK": {
-        "bbox": {
-            "northeast": [
-                114.5024444,
-                22.5683333
-            ],
-            "southwest": [
-                113.8171111,
-                22.1367222
-            ]
-        },
-        "center": [
-            114.1849161,
-            22.350627
-        ]
-    },
-    "HU": {
-        "bbox": {
-            "northeast": [
-                22.8977094,
-                48.585257
-            ],
-            "southwest": [
-                16.1138866,
-                45.737128
-            ]
-        },
-        "center": [
-            19.5060937,
-            47.1817585
-        ]
-    },
-    "IS": {
-        "bbox": {
-            "northeast": [
-                -12.8046162,
-                67.353
-            ],
-            "southwest": [
-                -25.0135069,
-                63.0859177
-            ]
-        },
-        "center": [
-            -18.1059013,
-            64.9841821
-        ]
-    },
-    "IN": {
-        "bbox": {
-            "northeast": [
-                97.395561,
-                35.6745457
-            ],
-            "southwest": [
-                68.1113787,
-                6.5546079
-            ]
-        },
-        "center": [
-            78.6677428,
-            22.3511148
-        ]
-    },
-    "ID": {
-        "bbox": {
-            "northeast": [
-                141.0200345,
-                6.2744496
-            ],
-            "southwest": [
-                94.7717124,
-                -11.2085669
-            ]
-        },
-        "center": [
-            114.5632032,
-            -4.7993356
-        ]
-    },
-    "IR": {
-        "bbox": {
-            "northeast": [
-                63.3332704,
-                39.7824624
-            ],
-            "southwest": [
-                44.0318908,
-                24.8465103
-            ]
-        },
-        "center": [
-            52.9471344,
-            32.9407495
-        ]
-    },
-    "IQ": {
-        "bbox": {
-            "northeast": [
-                48.8412702,
-                37.380932
-            ],
-            "southwest": [
-                38.7936719,
-                29.0585661
-            ]
-        },
-        "center": [
-            44.1749775,
-            33.0955793
-        ]
-    },
-    "IE": {
-        "bbox": {
-            "northeast": [
-                -5.6582363,
-                55.636
-            ],
-            "southwest": [
-                -11.0133788,
-                51.222
-            ]
-        },
-        "center": [
-            -7.9794599,
-            52.865196
-        ]
-    },
-    "IM": {
-        "bbox": {
-            "northeast": [
-                -3.9654061,
-                54.5534288
-            ],
-            "southwest": [
-                -5.1707285,
-                53.845
-            ]
-        },
-        "center": [
-            -4.5591148,
-            54.1936805
-        ]
-    },
-    "IL": {
-        "bbox": {
-            "northeast": [
-                35.8950234,
-                33.3356317
-            ],
-            "southwest": [
-                34.2674994,
-                29.4533796
-            ]
-        },
-        "center": [
-            35.0015196,
-            30.8760272
-        ]
-    },
-    "IT": {
-        "bbox": {
-            "northeast": [
-                18.7844746,
-                47.0921462
-            ],
-            "southwest": [
-                6.6272658,
-                35.2889616
-            ]
-        },
-        "center": [
-            12.674297,
-            42.6384261
-        ]
-    },
-    "JM": {
-        "bbox": {
-            "northeast": [
-                -75.7541143,
-                18.7256394
-            ],
-            "southwest": [
-                -78.5782366,
-                16.5899443
-            ]
-        },
-        "center": [
-            -77.3947693,
-            18.1850507
-        ]
-    },
-    "JP": {
-        "bbox": {
-            "northeast": [
-                154.205541,
-                45.7112046
-            ],
-            "southwest": [
-                122.7141754,
-                20.2145811
-            ]
-        },
-        "center": [
-            139.2394179,
-            36.5748441
-        ]
-    },
-    "JE": {
-        "bbox": {
-            "northeast": [
-                -1.8333333,
-                49.4605
-            ],
-            "southwest": [
-                -2.5591667,
-                48.8721667
-            ]
-        },
-        "center": [
-            -2.192616,
-            49.1245833
-        ]
-    },
-    "JO": {
-        "bbox": {
-            "northeast": [
-                39.3012981,
-                33.3750617
-            ],
-            "southwest": [
-                34.8844372,
-                29.183401
-            ]
-        },
-        "center": [
-            36.941628,
-            31.1667049
-        ]
-    },
-    "KZ": {
-        "bbox": {
-            "northeast": [
-                87.3156316,
-                55.4421701
-            ],
-            "southwest": [
-                46.4932179,
-                40.5686476
-            ]
-        },
-        "center": [
-            65.2093197,
-            47.2286086
-        ]
-    },
-    "KE": {
-        "bbox": {
-            "northeast": [
-                41.9067502,
-                4.62
-            ],
-            "southwest": [
-                33.9098987,
-                -4.8995204
-            ]
-        },
-        "center": [
-            38.4313975,
-            1.4419683
-        ]
-    },
-    "KI": {
-        "bbox": {
-            "northeast": [
-                177.0479136,
-                4.9
-            ],
-            "southwest": [
-                -174.743355,
-                -11.646
-            ]
-        },
-        "center": [
-            173.664834,
-            0.306
-        ]
-    },
-    "KP": {
-        "bbox": {
-            "northeast": [
-                130.924647,
-                43.0089642
-            ],
-            "southwest": [
-                124.0913902,
-                37.5833333
-            ]
-        },
-        "center": [
-            127.0870417,
-            40.3736611
-        ]
-    },
-    "KR": {
-        "bbox": {
-            "northeast": [
-                132.1467806,
-                38.623477
-            ],
-            "southwest": [
-                124.354847,
-                32.9104556
-            ]
-        },
-        "center": [
-            127.9408564,
-            36.5581914
-        ]
-    },
-    "KW": {
-        "bbox": {
-            "northeast": [
-                49.0046809,
-                30.1038082
-            ],
-            "southwest": [
-                46.5526837,
-                28.5243622
-            ]
-        },
-        "center": [
-            47.4979476,
-            29.2733964
-        ]
-    },
-    "KG": {
-        "bbox": {
-            "northeast": [
-                80.2295793,
-                43.2667971
-            ],
-            "southwest": [
-                69.2649523,
-                39.1727382
-            ]
-        },
-        "center": [
-            74.9773871,
-            41.2196872
-        ]
-    },
-    "LA": {
-        "bbox": {
-            "northeast": [
-                107.6349989,
-                22.5086717
-            ],
-            "southwest": [
-                100.0843247,
-                13.9096752
-            ]
-        },
-        "center": [
-            103.378253,
-            20.0171109
-        ]
-    },
-    "LV": {
-        "bbox": {
-            "northeast": [
-                28.2414904,
-                58.0855688
-            ],
-            "southwest": [
-                20.6715407,
-                55.6746505
-            ]
-        },
-        "center": [
-            24.7537645,
-            56.8406494
-        ]
-    },
-    "LB": {
-        "bbox": {
-            "northeast": [
-                36.625,
-                34.6923543
-            ],
-            "southwest": [
-                34.8825667,
-                33.0479858
-            ]
-        },
-        "center": [
-            35.843409,
-            33.8750629
-        ]
-    },
-    "LS": {
-        "bbox": {
-            "northeast": [
-                29.4557099,
-                -28.570615
-            ],
-            "southwest": [
-                27.0114632,
-                -30.6772773
-            ]
-        },
-        "center": [
-            28.1743633,
-            -29.6239638
-        ]
-    },
-    "LR": {
-        "bbox": {
-            "northeast": [
-                -7.367323,
-                8.5519861
-            ],
-            "southwest": [
-                -11.6080764,
-                4.1555907
-            ]
-        },
-        "center": [
-            -9.3658524,
-            5.7499721
-        ]
-    },
-    "LY": {
-        "bbox": {
-            "northeast": [
-                25.3770629,
-                33.3545898
-            ],
-            "southwest": [
-                9.391081,
-                19.5008138
-            ]
-        },
-        "center": [
-            18.1236723,
-            26.8234472
-        ]
-    },
-    "LI": {
-        "bbox": {
-            "northeast": [
-                9.6357143,
-                47.270581
-            ],
-            "southwest": [
-                9.4716736,
-                47.0484291
-            ]
-        },
-        "center": [
-            9.5531527,
-            47.1416307
-        ]
-    },
-    "LT": {
-        "bbox": {
-            "northeast": [
-                26.8355198,
-                56.4504213
-            ],
-            "southwest": [
-                20.653783,
-                53.8967893
-            ]
-        },
-        "center": [
-            23.7499997,
-            55.3500003
-        ]
-    },
-    "LU": {
-        "bbox": {
-            "northeast": [
-                6.5312481,
-                50.1827958
-            ],
-            "southwest": [
-                5.7357006,
-                49.4478539
-            ]
-        },
-        "center": [
-            6.1296751,
-            49.8158683
-        ]
-    },
-    "MO": {
-        "bbox": {
-            "northeast": [
-                113.6301389,
-                22.2170361
-            ],
-            "southwest": [
-                113.5281666,
-                22.0766667
-            ]
-        },
-        "center": [
-            113.5887708,
-            22.1480694
-        ]
-    },
-    "MK": {
-        "bbox": {
-            "northeast": [
-                23.034051,
-                42.3735359
-            ],
-            "southwest": [
-                20.4529023,
-                40.8536596
-            ]
-        },
-        "center": [
-            21.7168387,
-            41.6171214
-        ]
-    },
-    "MG": {
-        "bbox": {
-            "northeast": [
-                50.6727307,
-                -11.732889
-            ],
-            "southwest": [
-                42.9680076,
-                -25.784021
-            ]
-        },
-        "center": [
-            46.4416422,
-            -18.9249604
-        ]
-    },
-    "MW": {
-        "bbox": {
-            "northeast": [
-                35.9185731,
-                -9.3683261
-            ],
-            "southwest": [
-                32.6703616,
-                -17.1296031
-            ]
-        },
-        "center": [
-            33.9301963,
-            -13.2687204
-        ]
-    },
-    "MY": {
-        "bbox": {
-            "northeast": [
-                119.4390876,
-                7.5111989
-            ],
-            "southwest": [
-                98.9372144,
-                0.853821
-            ]
-        },
-        "center": [
-            102.2656823,
-            4.5693754
-        ]
-    },
-    "MV": {
-        "bbox": {
-            "northeast": [
-                73.9700962,
-                7.3106246
-            ],
-            "southwest": [
-                72.3554187,
-                -0.9074935
-            ]
-        },
-        "center": [
-            73.3287853,
-            4.7064352
-        ]
-    },
-    "ML": {
-        "bbox": {
-            "northeast": [
-                4.2673828,
-                25.001084
-            ],
-            "southwest": [
-                -12.2402835,
-                10.147811
-            ]
-        },
-        "center": [
-            -2.2900239,
-            16.3700359
-        ]
-    },
-    "MT": {
-        "bbox": {
-            "northeast": [
-                14.8267966,
-                36.2852706
-            ],
-            "southwest": [
-                13.9324226,
-                35.6029696
-            ]
-        },
-        "center": [
-            14.4476911,
-            35.8885993
-        ]
-    },
-    "MH": {
-        "bbox": {
-            "northeast": [
-                172.3737007,
-                14.873
-            ],
-            "southwest": [
-                160.594934,
-                4.374
-            ]
-        },
-        "center": [
-            166.9173974,
-            11.299
-        ]
-    },
-    "MQ": {
-        "bbox": {
-            "northeast": [
-                -60.8095833,
-                14.8787029
-            ],
-            "southwest": [
-                -61.2290815,
-                14.3887031
-            ]
-        },
-        "center": [
-            -60.9620777,
-            14.6113732
-        ]
-    },
-    "MR": {
-        "bbox": {
-            "northeast": [
-                -4.8333344,
-                27.314942
-            ],
-            "southwest": [
-                -17.068081,
-                14.7209909
-            ]
-        },
-        "center": [
-            -9.2399263,
-            20.2540382
-        ]
-    },
-    "MU": {
-        "bbox": {
-            "northeast": [
-                63.7151319,
-                -10.138
-            ],
-            "southwest": [
-                56.3825151,
-                -20.725
-            ]
-        },
-        "center": [
-            57.5703566,
-            -20.2759451
-        ]
-    },
-    "YT": {
-        "bbox": {
-            "northeast": [
-                45.2999917,
-                -12.6365902
-            ],
-            "southwest": [
-                45.0183298,
-                -13.0210119
-            ]
-        },
-        "center": [
-            45.1520755,
-            -12.823048
-        ]
-    },
-    "MX": {
-        "bbox": {
-            "northeast": [
-                -86.493266,
-                32.7186553
-            ],
-            "southwest": [
-                -118.59919,
-                14.3886243
-            ]
-        },
-        "center": [
-            -100.0000375,
-            22.5000485
-        ]
-    },
-    "FM": {
-        "bbox": {
-            "northeast": [
-                163.2364054,
-                10.291
-            ],
-            "southwest": [
-                137.2234512,
-                0.827
-            ]
-        },
-        "center": [
-            150.1982846,
-            5.5600565
-        ]
-    },
-    "MD": {
-        "bbox": {
-            "northeast": [
-                30.162538,
-                48.491944
-            ],
-            "southwest": [
-                26.616856,
-                45.466932
-            ]
-        },
-        "center": [
-            28.58333,
-            47.25
-        ]
-    },
-    "MC": {
-        "bbox": {
-            "northeast": [
-                7.4398704,
-                43.7519311
-            ],
-            "southwest": [
-                7.4090279,
-                43.7247599
-            ]
-        },
-        "center": [
-            7.4197576,
-            43.7311424
-        ]
-    },
-    "MN": {
-        "bbox": {
-            "northeast": [
-                119.931949,
-                52.1496
-            ],
-            "southwest": [
-                87.73762,
-                41.5800276
-            ]
-        },
-        "center": [
-            103.8499736,
-            46.8250388
-        ]
-    },
-    "ME": {
-        "bbox": {
-            "northeast": [
-                20.3561641,
-                43.5585061
-            ],
-            "southwest": [
-                18.4195781,
-                41.7495999
-            ]
-        },
-        "center": [
-            19.2408586,
-            42.7728491
-        ]
-    },
-    "MS": {
-        "bbox": {
-            "northeast": [
-                -61.9353818,
-                17.0152978
-            ],
-            "southwest": [
-                -62.450667,
-                16.475
-            ]
-        },
-        "center": [
-            -62.1916844,
-            16.7417041
-        ]
-    },
-    "MA": {
-        "bbox": {
-            "northeast": [
-                -0.998429,
-                36.0505269
-            ],
-            "southwest": [
-                -17.2551456,
-                21.3365321
-            ]
-        },
-        "center": [
-            -7.3362482,
-            31.1728205
-        ]
-    },
-    "MZ": {
-        "bbox": {
-            "northeast": [
-                41.0545908,
-                -10.3252149
-            ],
-            "southwest": [
-                30.2138197,
-                -26.9209427
-            ]
-        },
-        "center": [
-            34.9144977,
-            -19.302233
-        ]
-    },
-    "MM": {
-        "bbox": {
-            "northeast": [
-                101.1700796,
-                28.547835
-            ],
-            "southwest": [
-                92.1719423,
-                9.4399432
-            ]
-        },
-        "center": [
-            95.9999652,
-            17.1750495
-        ]
-    },
-    "NA": {
-        "bbox": {
-            "northeast": [
-                25.2617671,
-                -16.9634855
-            ],
-            "southwest": [
-                11.5280384,
-                -28.96945
-            ]
-        },
-        "center": [
-            17.3231107,
-            -23.2335499
-        ]
-    },
-    "NR": {
-        "bbox": {
-            "northeast": [
-                167.1597301,
-                -0.303
-            ],
-            "southwest": [
-                166.7099864,
-                -0.753
-            ]
-        },
-        "center": [
-            166.9324426,
-            -0.5252306
-        ]
-    },
-    "NP": {
-        "bbox": {
-            "northeast": [
-                88.2015257,
-                30.446945
-            ],
-            "southwest": [
-                80.0586226,
-                26.3477581
-            ]
-        },
-        "center": [
-            84.0917139,
-            28.1083929
-        ]
-    },
-    "NL": {
-        "bbox": {
-            "northeast": [
-                7.226905,
-                53.790156
-            ],
-            "southwest": [
-                2.25,
-                50.750822
-            ]
-        },
-        "center": [
-            5.75,
-            52.25
-        ]
-    },
-    "NC": {
-        "bbox": {
-            "northeast": [
-                173.25,
-                -16.205799
-            ],
-            "southwest": [
-                157.5,
-                -24.887468
-            ]
-        },
-        "center": [
-            165.5,
-            -21.5
-        ]
-    },
-    "NZ": {
-        "bbox": {
-            "northeast": [
-                179.3643594,
-                -29.0303303
-            ],
-            "southwest": [
-                -179.059153,
-                -52.8213687
-            ]
-        },
-        "center": [
-            172.8344077,
-            -41.5000831
-        ]
-    },
-    "NI": {
-        "bbox": {
-            "northeast": [
-                -82.6227023,
-                15.0331183
-            ],
-            "southwest": [
-                -87.901532,
-                10.7076565
-            ]
-        },
-        "center": [
-            -84.8700308,
-            12.3724928
-        ]
-    },
-    "NE": {
-        "bbox": {
-            "northeast": [
-                15.996667,
-                23.517178
-            ],
-            "southwest": [
-                0.1689653,
-                11.693756
-            ]
-        },
-        "center": [
-            9.3238432,
-            17.7356214
-        ]
-    },
-    "NG": {
-        "bbox": {
-            "northeast": [
-                14.678014,
-                13.885645
-            ],
-            "southwest": [
-                2.676932,
-                4.0690959
-            ]
-        },
-        "center": [
-            7.9999721,
-            9.6000359
-        ]
-    },
-    "NU": {
-        "bbox": {
-            "northeast": [
-                -169.5647229,
-                -18.7534559
-            ],
-            "southwest": [
-                -170.1595029,
-                -19.3548665
-            ]
-        },
-        "center": [
-            -169.8613411,
-            -19.0536414
-        ]
-    },
-    "NF": {
-        "bbox": {
-            "northeast": [
-                167.9965857,
-                -28.9953081
-            ],
-            "southwest": [
-                167.9147193,
-                -29.0626787
-            ]
-        },
-        "center": [
-            167.9586722,
-            -29.0290096
-        ]
-    },
-    "MP": {
-        "bbox": {
-            "northeast": [
-                146.154418,
-                20.616556
-            ],
-            "southwest": [
-                144.813338,
-                14.036565
-            ]
-        },
-        "center": [
-            145.2134525,
-            14.1490205
-        ]
-    },
-    "NO": {
-        "bbox": {
-            "northeast": [
-                31.7614911,
-                71.3848787
-            ],
-            "southwest": [
-                4.4542745,
-                57.7590052
-            ]
-        },
-        "center": [
-            12.307778,
-            63.990556
-        ]
-    },
-    "OM": {
-        "bbox": {
-            "northeast": [
-                60.054577,
-                26.7026737
-            ],
-            "southwest": [
-                52.0,
-                16.4649608
-            ]
-        },
-        "center": [
-            57.0036901,
-            21.0000287
-        ]
-    },
-    "PK": {
-        "bbox": {
-            "northeast": [
-                77.1203914,
-                37.084107
-            ],
-            "southwest": [
-                60.872855,
-                23.5393916
-            ]
-        },
-        "center": [
-            71.247499,
-            30.3308401
-        ]
-    },
-    "PW": {
-        "bbox": {
-            "northeast": [
-                134.7714735,
-                8.222
-            ],
-            "southwest": [
-                131.0685462,
-                2.748
-            ]
-        },
-        "center": [
-            133.313631,
-            6.097367
-        ]
-    },
-    "PS": {
-        "bbox": {
-            "northeast": [
-                35.5739235,
-                32.5521479
-            ],
-            "southwest": [
-                34.0689732,
-                31.2201289
-            ]
-        },
-        "center": [
-            35.162072,
-            31.649741
-        ]
-    },
-    "PA": {
-        "bbox": {
-            "northeast": [
-                -77.1393779,
-                9.8701757
-            ],
-            "southwest": [
-                -83.0517245,
-                7.0338679
-            ]
-        },
-        "center": [
-            -81.3066246,
-            8.3096067
-        ]
-    },
-    "PG": {
-        "bbox": {
-            "northeast": [
-                159.692724,
-                -0.5573576
-            ],
-            "southwest": [
-                140.8416553,
-                -11.8555739
-            ]
-        },
-        "center": [
-            144.2489081,
-            -5.6816069
-        ]
-    },
-    "PY": {
-        "bbox": {
-            "northeast": [
-                -54.258,
-                -19.2876472
-            ],
-            "southwest": [
-                -62.6442036,
-                -27.6063935
-            ]
-        },
-        "center": [
-            -58.1693445,
-            -23.3165935
-        ]
-    },
-    "PE": {
-        "bbox": {
-            "northeast": [
-                -68.6519906,
-                -0.0392818
-            ],
-            "southwest": [
-                -84.6356535,
-                -20.1984472
-            ]
-        },
-        "center": [
-            -76.2775464,
-            -10.1399415
-        ]
-    },
-    "PH": {
-        "bbox": {
-            "northeast": [
-                126.8072562,
-                21.3217806
-            ],
-            "southwest": [
-                114.0952145,
-                4.2158064
-            ]
-        },
-        "center": [
-            122.4831733,
-            12.7630931
-        ]
-    },
-    "PN": {
-        "bbox": {
-            "northeast": [
-                -130.0877383,
-                -25.05955
-            ],
-            "southwest": [
-                -130.1228696,
-                -25.0797151
-            ]
-        },
-        "center": [
-            -130.1061723,
-            -25.0696378
-        ]
-    },
-    "PL": {
-        "bbox": {
-            "northeast": [
-                24.145783,
-                55.0336963
-            ],
-            "southwest": [
-                14.1229707,
-                49.0020468
-            ]
-        },
-        "center": [
-            19.0258159,
-            52.0977181
-        ]
-    },
-    "PT": {
-        "bbox": {
-            "northeast": [
-                -6.1891593,
-                42.1543112
-            ],
-            "southwest": [
-                -9.5005266,
-                36.9617105
-            ]
-        },
-        "center": [
-            -8.130573,
-            39.694502
-        ]
-    },
-    "PR": {
-        "bbox": {
-            "northeast": [
-                -65.0913907,
-                18.6663822
-            ],
-            "southwest": [
-                -68.1109184,
-                17.7306659
-            ]
-        },
-        "center": [
-            -66.2344489,
-            18.1990856
-        ]
-    },
-    "QA": {
-        "bbox": {
-            "northeast": [
-                52.638011,
-                26.3830212
-            ],
-            "southwest": [
-                50.5675,
-                24.4707534
-            ]
-        },
-        "center": [
-            51.2295295,
-            25.3336984
-        ]
-    },
-    "RE": {
-        "bbox": {
-            "northeast": [
-                55.8366924,
-                -20.8717136
-            ],
-            "southwest": [
-                55.2164268,
-                -21.3897308
-            ]
-        },
-        "center": [
-            55.5265771,
-            -21.1309332
-        ]
-    },
-    "RO": {
-        "bbox": {
-            "northeast": [
-                30.0454257,
-                48.2653964
-            ],
-            "southwest": [
-                20.2619773,
-                43.618682
-            ]
-        },
-        "center": [
-            24.3031375,
-            45.9418906
-        ]
-    },
-    "RU": {
-        "bbox": {
-            "northeast": [
-                180.0,
-                82.0586232
-            ],
-            "southwest": [
-                -180.0,
-                41.1850968
-            ]
-        },
-        "center": [
-            97.7453061,
-            64.6863136
-        ]
-    },
-    "RW": {
-        "bbox": {
-            "northeast": [
-                30.8990738,
-                -1.0474083
-            ],
-            "southwest": [
-                28.8617546,
-                -2.8389804
-            ]
-        },
-        "center": [
-            30.0644358,
-            -1.9646631
-        ]
-    },
-    "BL": {
-        "bbox": {
-            "northeast": [
-                -62.792915,
-                17.977083
-            ],
-            "southwest": [
-                -62.951305,
-                17.872028
-            ]
-        },
-        "center": [
-            -62.8257,
-            17.9
-        ]
-    },
-    "SH": {
-        "bbox": {
-            "northeast": [
-                -5.4234153,
-                -15.704
-            ],
-            "southwest": [
-                -5.9973424,
-                -16.23
-            ]
-        },
-        "center": [
-            -5.7129557,
-            -15.9686862
-        ]
-    },
-    "KN": {
-        "bbox": {
-            "northeast": [
-                -62.3303519,
-                17.6158146
-            ],
-            "southwest": [
-                -63.051129,
-                16.895
-            ]
-        },
-        "center": [
-            -62.7687277,
-            17.3462278
-        ]
-    },
-    "LC": {
-        "bbox": {
-            "northeast": [
-                -60.6669363,
-                14.2725
-            ],
-            "southwest": [
-                -61.2853867,
-                13.508
-            ]
-        },
-        "center": [
-            -60.975036,
-            13.8250489
-        ]
-    },
-    "MF": {
-        "bbox": {
-            "northeast": [
-                -62.971249,
-                18.126278
-            ],
-            "southwest": [
-                -63.15464,
-                18.046288
-            ]
-        },
-        "center": [
-            -63.06667,
-            18.06667
-        ]
-    },
-    "PM": {
-        "bbox": {
-            "northeast": [
-                -56.082359,
-                47.278904
-            ],
-            "southwest": [
-                -57.375,
-                46.7363
-            ]
-        },
-        "center": [
-            -56.33333,
-            46.83333
-        ]
-    },
-    "VC": {
-        "bbox": {
-            "northeast": [
-                -60.9094146,
-                13.583
-            ],
-            "southwest": [
-                -61.6657471,
-                12.5166548
-            ]
-        },
-        "center": [
-            -61.2765569,
-            12.90447
-        ]
-    },
-    "WS": {
-        "bbox": {
-            "northeast": [
-                -171.1929229,
-                -13.2381892
-            ],
-            "southwest": [
-                -173.0091864,
-                -14.2770916
-            ]
-        },
-        "center": [
-            -172.1200508,
-            -13.7693895
-        ]
-    },
-    "SM": {
-        "bbox": {
-            "northeast": [
-                12.5160665,
-                43.992093
-            ],
-            "southwest": [
-                12.4033246,
-                43.8937002
-            ]
-        },
-        "center": [
-            12.458306,
-            43.9458623
-        ]
-    },
-    "ST": {
-        "bbox": {
-            "northeast": [
-                7.6704783,
-                1.9257601
-            ],
-            "southwest": [
-                6.260642,
-                -0.2135137
-            ]
-        },
-        "center": [
-            6.9648718,
-            0.8875498
-        ]
-    },
-    "SA": {
-        "bbox": {
-            "northeast": [
-                55.6666851,
-                32.1543377
-            ],
-            "southwest": [
-                34.4571718,
-                16.29
-            ]
-        },
-        "center": [
-            42.3528328,
-            25.6242618
-        ]
-    },
-    "SN": {
-        "bbox": {
-            "northeast": [
-                -11.3458996,
-                16.6919712
-            ],
-            "southwest": [
-                -17.7862419,
-                12.2372838
-            ]
-        },
-        "center": [
-            -14.4529612,
-            14.4750607
-        ]
-    },
-    "RS": {
-        "bbox": {
-            "northeast": [
-                23.006309,
-                46.1900524
-            ],
-            "southwest": [
-                18.8142875,
-                42.2322435
-            ]
-        },
-        "center": [
-            20.55144,
-            44.1534121
-        ]
-    },
-    "SC": {
-        "bbox": {
-            "northeast": [
-                56.4979396,
-                -3.512
-            ],
-            "southwest": [
-                45.9988759,
-                -10.4649258
-            ]
-        },
-        "center": [
-            55.4540146,
-            -4.6574977
-        ]
-    },
-    "SL": {
-        "bbox": {
-            "northeast": [
-                -10.271683,
-                9.999973
-            ],
-            "southwest": [
-                -13.5003389,
-                6.755
-            ]
-        },
-        "center": [
-            -12.08237,
-            8.3774516
-        ]
-    },
-    "SG": {
-        "bbox": {
-            "northeast": [
-                104.0034286,
-                1.4486352
-            ],
-            "southwest": [
-                103.6403915,
-                1.264309
-            ]
-        },
-        "center": [
-            103.8,
-            1.366667
-        ]
-    },
-    "SX": {
-        "bbox": {
-            "northeast": [
-                -63.0137596,
-                18.1266022
-            ],
-            "southwest": [
-                -63.1478691,
-                18.0295048
-            ]
-        },
-        "center": [
-            -63.06667,
-            18.04167
-        ]
-    },
-    "SK": {
-        "bbox": {
-            "northeast": [
-                22.56571,
-                49.6138162
-            ],
-            "southwest": [
-                16.8331891,
-                47.7314286
-            ]
-        },
-        "center": [
-            19.4528646,
-            48.7411522
-        ]
-    },
-    "SI": {
-        "bbox": {
-            "northeast": [
-                16.5967702,
-                46.8766816
-            ],
-            "southwest": [
-                13.3754696,
-                45.4214242
-            ]
-        },
-        "center": [
-            14.4808369,
-            45.8133113
-        ]
-    },
-    "SB": {
-        "bbox": {
-            "northeast": [
-                170.3964667,
-                -4.81085
-            ],
-            "southwest": [
-                155.3190556,
-                -13.2424298
-            ]
-        },
-        "center": [
-            162.8288542,
-            -9.7354344
-        ]
-    },
-    "SO": {
-        "bbox": {
-            "northeast": [
-                51.6177696,
-                12.1889121
-            ],
-            "southwest": [
-                40.98918,
-                -1.8031969
-            ]
-        },
-        "center": [
-            49.083416,
-            8.3676771
-        ]
-    },
-    "ZA": {
-        "bbox": {
-            "northeast": [
-                38.2898954,
-                -22.1250301
-            ],
-            "southwest": [
-                16.3335213,
-                -47.1788335
-            ]
-        },
-        "center": [
-            24.991639,
-            -28.8166236
-        ]
-    },
-    "GS": {
-        "bbox": {
-            "northeast": [
-                -25.8468303,
-                -53.3500755
-            ],
-            "southwest": [
-                -42.354739,
-                -59.684
-            ]
-        },
-        "center": [
-            -35.8090698,
-            -54.8432857
-        ]
-    },
-    "SS": {
-        "bbox": {
-            "northeast": [
-                35.948997,
-                12.236389
-            ],
-            "southwest": [
-                23.447778,
-                3.48898
-            ]
-        },
-        "center": [
-            29.6667897,
-            7.8699431
-        ]
-    },
-    "ES": {
-        "bbox": {
-            "northeast": [
-                3.3222508,
-                43.790422
-            ],
-            "southwest": [
-                -9.3015367,
-                35.9376398
-            ]
-        },
-        "center": [
-            -3.684234,
-            40.30926
-        ]
-    },
-    "LK": {
-        "bbox": {
-            "northeast": [
-                82.0810141,
-                10.035
-            ],
-            "southwest": [
-                79.3959205,
-                5.719
-            ]
-        },
-        "center": [
-            80.7137847,
-            7.5554942
-        ]
-    },
-    "SD": {
-        "bbox": {
-            "northeast": [
-                39.0576252,
-                22.224918
-            ],
-            "southwest": [
-                21.8145046,
-                8.685278
-            ]
-        },
-        "center": [
-            29.4917691,
-            14.5844444
-        ]
-    },
-    "SR": {
-        "bbox": {
-            "northeast": [
-                -53.8433358,
-                6.225
-            ],
-            "southwest": [
-                -58.070833,
-                1.8312802
-            ]
-        },
-        "center": [
-            -56.0771187,
-            4.1413025
-        ]
-    },
-    "SJ": {
-        "bbox": {
-            "northeast": [
-                36.0,
-                81.462975
-            ],
-            "southwest": [
-                9.0,
-                72.781306
-            ]
-        },
-        "center": [
-            20.0,
-            78.0
-        ]
-    },
-    "SZ": {
-        "bbox": {
-            "northeast": [
-                32.1349923,
-                -25.71876
-            ],
-            "southwest": [
-                30.7908,
-                -27.3175201
-            ]
-        },
-        "center": [
-            31.3991317,
-            -26.5624806
-        ]
-    },
-    "SE": {
-        "bbox": {
-            "northeast": [
-                24.1776819,
-                69.0599699
-            ],
-            "southwest": [
-                10.5930952,
-                55.1331192
-            ]
-        },
-        "center": [
-            14.5208584,
-            59.6749712
-        ]
-    },
-    "CH": {
-        "bbox": {
-            "northeast": [
-                10.4922941,
-                47.8084648
-            ],
-            "southwest": [
-                5.9559113,
-                45.817995
-            ]
-        },
-        "center": [
-            8.2319736,
-            46.7985624
-        ]
-    },
-    "SY": {
-        "bbox": {
-            "northeast": [
-                42.3745687,
-                37.3184589
-            ],
-            "southwest": [
-                35.4714427,
-                32.311354
-            ]
-        },
-        "center": [
-            38.4266844,
-            34.8152564
-        ]
-    },
-    "TW": {
-        "bbox": {
-            "northeast": [
-                123.75,
-                26.659941
-            ],
-            "southwest": [
-                114.75,
-                20.691294
-            ]
-        },
-        "center": [
-            121.0,
-            24.0
-        ]
-    },
-    "TJ": {
-        "bbox": {
-            "northeast": [
-                75.1539563,
-                41.0450935
-            ],
-            "southwest": [
-                67.3332775,
-                36.6711153
-            ]
-        },
-        "center": [
-            70.8156541,
-            38.6281733
-        ]
-    },
-    "TZ": {
-        "bbox": {
-            "northeast": [
-                40.6584071,
-                -0.9854812
-            ],
-            "southwest": [
-                29.3269773,
-                -11.761254
-            ]
-        },
-        "center": [
-            35.7878438,
-            -6.5247123
-        ]
-    },
-    "TH": {
-        "bbox": {
-            "northeast": [
-                105.636812,
-                20.4648337
-            ],
-            "southwest": [
-                97.3438072,
-                5.612851
-            ]
-        },
-        "center": [
-            100.83273,
-            14.8971921
-        ]
-    },
-    "TL": {
-        "bbox": {
-            "northeast": [
-                127.5335392,
-                -8.0895459
-            ],
-            "southwest": [
-                124.0415703,
-                -9.5642775
-            ]
-        },
-        "center": [
-            125.8375756,
-            -8.5151979
-        ]
-    },
-    "TG": {
-        "bbox": {
-            "northeast": [
-                1.8087605,
-                11.1395102
-            ],
-            "southwest": [
-                -0.1439746,
-                5.926547
-            ]
-        },
-        "center": [
-            1.0199765,
-            8.7800265
-        ]
-    },
-    "TK": {
-        "bbox": {
-            "northeast": [
-                -170.9797586,
-                -8.3328631
-            ],
-            "southwest": [
-                -172.7213673,
-                -9.6442499
-            ]
-        },
-        "center": [
-            -171.8196878,
-            -9.1676396
-        ]
-    },
-    "TO": {
-        "bbox": {
-            "northeast": [
-                -173.5295458,
-                -15.3655722
-            ],
-            "southwest": [
-                -179.3866055,
-                -24.1034499
-            ]
-        },
-        "center": [
-            -175.2026424,
-            -19.9160819
-        ]
-    },
-    "TT": {
-        "bbox": {
-            "northeast": [
-                -60.2895848,
-                11.5628372
-            ],
-            "southwest": [
-                -62.083056,
-                9.8732106
-            ]
-        },
-        "center": [
-            -61.1554271,
-            10.7272276
-        ]
-    },
-    "TN": {
-        "bbox": {
-            "northeast": [
-                11.8801133,
-                37.7612052
-            ],
-            "southwest": [
-                7.5219807,
-                30.230236
-            ]
-        },
-        "center": [
-            9.400138,
-            33.8439408
-        ]
-    },
-    "TR": {
-        "bbox": {
-            "northeast": [
-                44.8176638,
-                42.297
-            ],
-            "southwest": [
-                25.6212891,
-                35.8076804
-            ]
-        },
-        "center": [
-            34.9249653,
-            38.9597594
-        ]
-    },
-    "TM": {
-        "bbox": {
-            "northeast": [
-                66.6895177,
-                42.797427
-            ],
-            "southwest": [
-                52.335076,
-                35.129093
-            ]
-        },
-        "center": [
-            59.3924609,
-            39.3763807
-        ]
-    },
-    "TC": {
-        "bbox": {
-            "northeast": [
-                -70.8643591,
-                22.1630989
-            ],
-            "southwest": [
-                -72.6799046,
-                20.9553418
-            ]
-        },
-        "center": [
-            -71.7995256,
-            21.5538668
-        ]
-    },
-    "TV": {
-        "bbox": {
-            "northeast": [
-                179.871061,
-                -5.64223
-            ],
-            "southwest": [
-                176.078332,
-                -10.791658
-            ]
-        },
-        "center": [
-            179.198333,
-            -8.521111
-        ]
-    },
-    "UG": {
-        "bbox": {
-            "northeast": [
-                35.000308,
-                4.2340766
-            ],
-            "southwest": [
-                29.573433,
-                -1.4823179
-            ]
-        },
-        "center": [
-            32.2166578,
-            1.5333554
-        ]
-    },
-    "UA": {
-        "bbox": {
-            "northeast": [
-                40.2275801,
-                52.3791473
-            ],
-            "southwest": [
-                22.137059,
-                44.184598
-            ]
-        },
-        "center": [
-            31.2718321,
-            49.4871968
-        ]
-    },
-    "AE": {
-        "bbox": {
-            "northeast": [
-                56.6024458,
-                26.1517219
-            ],
-            "southwest": [
-                51.4160714,
-                22.6316214
-            ]
-        },
-        "center": [
-            53.9994829,
-            24.0002488
-        ]
-    },
-    "GB": {
-        "bbox": {
-            "northeast": [
-                2.0919117,
-                61.061
-            ],
-            "southwest": [
-                -14.015517,
-                49.674
-            ]
-        },
-        "center": [
-            -3.2765753,
-            54.7023545
-        ]
-    },
-    "UM": {
-        "bbox": {
-            "northeast": [
-                -162.1339885,
-                6.6514388
-            ],
-            "southwest": [
-                -162.6816297,
-                6.1779744
-            ]
-        },
-        "center": [
-            -162.40731,
-            6.4295092
-        ]
-    },
-    "US": {
-        "bbox": {
-            "northeast": [
-                -66.8854162,
-                49.3844901
-            ],
-            "southwest": [
-                -124.482003,
-                24.396308
-            ]
-        },
-        "center": [
-            -98.583333,
-            39.833333
-        ]
-    },
-    "UY": {
-        "bbox": {
-            "northeast": [
-                -53.0755833,
-                -30.0853962
-            ],
-            "southwest": [
-                -58.4947729,
-                -35.7824481
-            ]
-        },
-        "center": [
-            -56.0201525,
-            -32.8755548
-        ]
-    },
-    "UZ": {
-        "bbox": {
-            "northeast": [
-                73.1397362,
-                45.590118
-            ],
-            "southwest": [
-                55.9977865,
-                37.1821164
-            ]
-        },
-        "center": [
-            63.9528098,
-            41.32373
-        ]
-    },
-    "VU": {
-        "bbox": {
-            "northeast": [
-                170.449982,
-                -12.8713777
-            ],
-            "southwest": [
-                166.3355255,
-                -20.4627425
-            ]
-        },
-        "center": [
-            168.1069154,
-            -16.5255069
-        ]
-    },
-    "VE": {
-        "bbox": {
-            "northeast": [
-                -59.5427079,
-                15.9158431
-            ],
-            "southwest": [
-                -73.3529632,
-                0.647529
-            ]
-        },
-        "center": [
-            -66.1109318,
-            8.0018709
-        ]
-    },
-    "VN": {
-        "bbox": {
-            "northeast": [
-                112.9217855,
-                23.393395
-            ],
-            "southwest": [
-                102.14441,
-                8.1790665
-            ]
-        },
-        "center": [
-            107.579167,
-            16.466667
-        ]
-    },
-    "VG": {
-        "bbox": {
-            "northeast": [
-                -64.0597294,
-                18.9503802
-            ],
-            "southwest": [
-                -64.9559611,
-                18.1055311
-            ]
-        },
-        "center": [
-            -64.5661642,
-            18.4024395
-        ]
-    },
-    "VI": {
-        "bbox": {
-            "northeast": [
-                -64.125,
-                18.415362
-            ],
-            "southwest": [
-                -65.25,
-                17.435668
-            ]
-        },
-        "center": [
-            -64.98348,
-            18.34829
-        ]
-    },
-    "WF": {
-        "bbox": {
-            "northeast": [
-                -175.5,
-                -11.864964
-            ],
-            "southwest": [
-                -180.0,
-                -15.12059
-            ]
-        },
-        "center": [
-            -176.2,
-            -13.3
-        ]
-    },
-    "EH": {
-        "bbox": {
-            "northeast": [
-                -8.666389,
-                27.6666834
-            ],
-            "southwest": [
-                -17.3494721,
-                20.556883
-            ]
-        },
-        "center": [
-            -13.7667848,
-            24.1797324
-        ]
-    },
-    "YE": {
-        "bbox": {
-            "northeast": [
-                54.7389375,
-                19.0
-            ],
-            "southwest": [
-                41.60825,
-                11.9084802
-            ]
-        },
-        "center": [
-            47.8915271,
-            16.3471243
-        ]
-    },
-    "ZM": {
-        "bbox": {
-            "northeast": [
-                33.7010986,
-                -8.2712822
-            ],
-            "southwest": [
-                21.9993509,
-                -18.0765945
-            ]
-        },
-        "center": [
-            27.5599164,
-            -14.5186239
-        ]
-    },
-    "ZW": {
-        "bbox": {
-            "northeast": [
-                33.0683413,
-                -15.6097033
-            ],
-            "southwest": [
-                25.2373,
-                -22.4241096
-            ]
-        },
-        "center": [
-            29.7468414,
-            -18.4554963
-        ]
+from os import path
+
+from core.datastore import FloatRowsFile
+
+COUNTRIES_GEODATA_FILE = path.join(path.dirname(__file__), 'countries-geodata.bin')
+
+
+def geodata_from_row(row):
+    return {
+        'bbox': {'northeast': row[0:2], 'southwest': row[2:4]},
+        'center': row[4:6],
     }
-}
+
+
+def geodata_to_row(geodata):
+    return [*geodata['bbox']['northeast'], *geodata['bbox']['southwest'], *geodata['center']]
+
+
+COUNTRIES_GEO = FloatRowsFile(COUNTRIES_GEODATA_FILE, decode=geodata_from_row)
 
 COUNTRIES_TINIEST = (
     'AD', 'BL', 'GI', 'LI', 'MC', 'MF', 'NR', 'SM', 'SX', 'UM', 'VA',
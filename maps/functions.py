@@ -0,0 +1,30 @@
+from django.contrib.gis.db.models import GeometryField
+from django.db.models import FloatField, Func, Value
+
+
+class AsGeography(Func):
+    """
+    The geometry converted to PostGIS's geography type, whose operations are
+    performed on the sphere and measured in meters.
+    """
+    template = '(%(expressions)s)::geography'
+    output_field = GeometryField(geography=True)
+
+
+class NearestDistance(Func):
+    """
+    The distance in meters between a geometry column and a point, computed
+    via PostGIS's `<->` operator on the geography of both.
+    When used for ordering, allows PostgreSQL to retrieve the rows nearest to
+    the point directly from a GiST index on `AsGeography(column)` (a
+    K-nearest-neighbours scan), instead of computing the distance to every
+    row and sorting all of them.
+    """
+    arg_joiner = ' <-> '
+    template = '%(expressions)s'
+    output_field = FloatField()
+
+    def __init__(self, expression, point, **extra):
+        if not hasattr(point, 'resolve_expression'):
+            point = Value(point, output_field=GeometryField(srid=point.srid))
+        super().__init__(AsGeography(expression), AsGeography(point), **extra)
@@ -0,0 +1,258 @@
+"""
+A local database of the geographical locations of IP address ranges, used to
+estimate the position of a visitor without querying a third-party service.
+
+The database is a single binary file, generated by the `update_ip_geodata`
+management command from a CSV file in the layout of DB-IP's "IP to City Lite"
+(start address, end address, continent, country, region, city, latitude,
+longitude) or "IP to Country Lite" (start address, end address, country).
+The file contains sorted arrays of the starts and the ends of the ranges (IPv6
+ranges are represented by the 64-bit network prefixes) and the indices of the
+locations; it is memory-mapped, so that it is shared between the processes,
+and the lookups are done via bisection directly on the mapped arrays.
+"""
+
+import ipaddress
+import logging
+import math
+import mmap
+import os
+import struct
+import sys
+import threading
+import time
+from array import array
+from bisect import bisect_right
+from typing import Iterable, NamedTuple, Optional
+
+from django.conf import settings
+from django.contrib.gis.geos import Point
+
+from . import SRID
+
+GEOIP_FILE_SIGNATURE = b'PSGEOIP1'
+# Signature, byte order of the arrays, number of IPv4 ranges, number of IPv6
+# ranges, number of distinct locations, length of the names of regions.
+GEOIP_HEADER = struct.Struct('<8s4sIIII')
+# Country code, offset of the name of the region, latitude, longitude.
+GEOIP_LOCATION = struct.Struct('<2sxxIff')
+# How often (in seconds) the file is checked for replacement by a newer one.
+GEOIP_RELOAD_CHECK_PERIOD = 5 * 60
+
+
+class IPLocation(NamedTuple):
+    country: str            # 2-letter code.
+    state: str              # Name of the region, if known.
+    latitude: Optional[float]
+    longitude: Optional[float]
+
+    @property
+    def xy(self) -> list[float]:
+        if self.latitude is None or self.longitude is None:
+            return []
+        return [self.longitude, self.latitude]
+
+    @property
+    def point(self) -> Optional[Point]:
+        return Point(self.xy, srid=SRID) if self.xy else None
+
+
+def _aligned(offset: int) -> int:
+    return (offset + 7) // 8 * 8
+
+
+def _ip_key(address: str) -> tuple[int, int]:
+    """
+    Converts the textual IP address to the pair (version, key), where the key
+    is the numeric address for IPv4 and the 64-bit network prefix for IPv6.
+    """
+    ip = ipaddress.ip_address(address.strip())
+    if ip.version == 6 and ip.ipv4_mapped:
+        ip = ip.ipv4_mapped
+    if ip.version == 4:
+        return 4, int(ip)
+    return 6, int(ip) >> 64
+
+
+def write_database(
+        ranges: Iterable[tuple[str, str, str, str, Optional[float], Optional[float]]],
+        target_path: str,
+) -> tuple[int, int]:
+    """
+    Builds the binary database from the provided ranges of IP addresses, in
+    the form (start address, end address, country code, region, latitude,
+    longitude), and atomically replaces the file at the target path.
+    Adjacent ranges with the same location are merged.
+    Returns the number of IPv4 and IPv6 ranges written.
+    """
+    locations: dict[tuple, int] = {}
+    region_offsets: dict[str, int] = {}
+    regions_blob = bytearray()
+    tables = {4: [], 6: []}
+
+    for start, end, country, region, latitude, longitude in ranges:
+        version, start_key = _ip_key(start)
+        end_version, end_key = _ip_key(end)
+        if version != end_version or len(country or "") != 2 or country.upper() == 'ZZ':
+            # Mismatched ranges and ranges with an unknown country ('ZZ').
+            continue
+        region = region or ""
+        if region not in region_offsets:
+            region_offsets[region] = len(regions_blob)
+            regions_blob.extend(region.encode('utf-8') + b'\x00')
+        location = (country.upper(), region_offsets[region], latitude, longitude)
+        if location not in locations:
+            locations[location] = len(locations)
+        tables[version].append((start_key, end_key, locations[location]))
+
+    arrays = {}
+    for version, table in tables.items():
+        table.sort()
+        starts, ends, indices = (
+            array('I' if version == 4 else 'Q'), array('I' if version == 4 else 'Q'), array('I'))
+        for start_key, end_key, index in table:
+            if ends and start_key <= ends[-1]:
+                # Overlapping ranges (in IPv6 this results from the truncation
+                # of the addresses to the network prefix); the first one wins.
+                if end_key <= ends[-1]:
+                    continue
+                start_key = ends[-1] + 1
+            if ends and start_key == ends[-1] + 1 and indices[-1] == index:
+                ends[-1] = end_key
+                continue
+            starts.append(start_key)
+            ends.append(end_key)
+            indices.append(index)
+        arrays[version] = (starts, ends, indices)
+
+    location_records = bytearray()
+    for (country, region_offset, latitude, longitude) in locations:
+        location_records.extend(GEOIP_LOCATION.pack(
+            country.encode('ascii'), region_offset,
+            math.nan if latitude is None else latitude,
+            math.nan if longitude is None else longitude,
+        ))
+
+    os.makedirs(os.path.dirname(target_path) or '.', exist_ok=True)
+    temp_path = f'{target_path}.{os.getpid()}.tmp'
+    with open(temp_path, 'wb') as f:
+        f.write(GEOIP_HEADER.pack(
+            GEOIP_FILE_SIGNATURE, sys.byteorder[:4].encode(),
+            len(arrays[4][0]), len(arrays[6][0]), len(locations), len(regions_blob),
+        ))
+        sections = [*arrays[4], *arrays[6], location_records, regions_blob]
+        for section in sections:
+            f.write(b'\x00' * (_aligned(f.tell()) - f.tell()))
+            f.write(section if isinstance(section, bytearray) else section.tobytes())
+    os.replace(temp_path, target_path)
+    return len(arrays[4][0]), len(arrays[6][0])
+
+
+class GeoIPDatabase:
+    def __init__(self, file_path: str):
+        self.file_path = file_path
+        with open(file_path, 'rb') as f:
+            self.stat = os.fstat(f.fileno())
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        (
+            signature, byteorder, count_v4, count_v6, count_locations, regions_length,
+        ) = GEOIP_HEADER.unpack_from(self._map, 0)
+        if signature != GEOIP_FILE_SIGNATURE or byteorder != sys.byteorder[:4].encode():
+            self._map.close()
+            raise ValueError(f"{file_path} is not a compatible IP geodata file")
+
+        self._view = view = memoryview(self._map)
+        offset = GEOIP_HEADER.size
+
+        def section(length, item_format=None):
+            nonlocal offset
+            offset = _aligned(offset)
+            data = view[offset:offset+length]
+            offset += length
+            return data.cast(item_format) if item_format else data
+
+        self.tables = {
+            4: (section(count_v4 * 4, 'I'), section(count_v4 * 4, 'I'), section(count_v4 * 4, 'I')),
+            6: (section(count_v6 * 8, 'Q'), section(count_v6 * 8, 'Q'), section(count_v6 * 4, 'I')),
+        }
+        self.locations = section(count_locations * GEOIP_LOCATION.size)
+        self.regions_start = _aligned(offset)
+
+    def lookup(self, address: str) -> Optional[IPLocation]:
+        try:
+            version, key = _ip_key(address)
+        except ValueError:
+            return None
+        starts, ends, indices = self.tables[version]
+        position = bisect_right(starts, key) - 1
+        if position < 0 or key > ends[position]:
+            return None
+        country, region_offset, latitude, longitude = GEOIP_LOCATION.unpack_from(
+            self.locations, indices[position] * GEOIP_LOCATION.size)
+        region_start = self.regions_start + region_offset
+        region = self._map[region_start:self._map.find(b'\x00', region_start)].decode('utf-8')
+        return IPLocation(
+            country.decode('ascii'), region,
+            None if math.isnan(latitude) else round(latitude, 5),
+            None if math.isnan(longitude) else round(longitude, 5),
+        )
+
+    def close(self):
+        for table in self.tables.values():
+            for section in table:
+                section.release()
+        self.locations.release()
+        self._view.release()
+        self._map.close()
+
+
+_database: Optional[GeoIPDatabase] = None
+_database_checked_at: float = -math.inf
+_database_lock = threading.Lock()
+
+
+def get_database() -> Optional[GeoIPDatabase]:
+    """
+    Returns the (memory-mapped) database of the current process, reopening it
+    when the file was replaced. When there is no usable file, None is returned.
+    """
+    global _database, _database_checked_at
+    if time.monotonic() - _database_checked_at < GEOIP_RELOAD_CHECK_PERIOD:
+        return _database
+    with _database_lock:
+        _database_checked_at = time.monotonic()
+        file_path = settings.GEOIP_DATABASE_PATH
+        try:
+            stat = os.stat(file_path)
+        except OSError:
+            _database = None
+            return None
+        if _database is None or (stat.st_ino, stat.st_mtime_ns) != (_database.stat.st_ino, _database.stat.st_mtime_ns):
+            try:
+                _database = GeoIPDatabase(file_path)
+            except (OSError, ValueError, struct.error) as e:
+                logging.getLogger('PasportaServo.geo').error("Cannot load the IP geodata: %s", e)
+                _database = None
+        return _database
+
+
+def reset_database():
+    """
+    Makes the next lookup check the file of the database, regardless of when
+    it was checked last time.
+    """
+    global _database, _database_checked_at
+    with _database_lock:
+        _database, _database_checked_at = None, -math.inf
+
+
+def geolocate_ip(address: str) -> Optional[IPLocation]:
+    """
+    Estimates the geographical location of the provided IP address (v4 or v6)
+    using the local database. Returns None when the address is not found or
+    the database is unavailable.
+    """
+    database = get_database()
+    if database is None or not address:
+        return None
+    return database.lookup(address)
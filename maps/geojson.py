@@ -0,0 +1,80 @@
+"""
+Row-based serialization of the places to GeoJSON.
+
+The map data views iterate over plain rows (from `QuerySet.values()`, read
+from the database in chunks) instead of model instances, compute the
+properties of each feature directly from the values of the row, and stream
+the document piece by piece, so that the memory used does not depend on the
+number of places.
+"""
+
+from typing import Any, Callable, Iterable, Iterator, Mapping, Optional
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.urls import reverse
+
+from . import SRID
+
+# The number of features serialized together into one piece of the response.
+GEOJSON_CHUNK_SIZE = 500
+
+
+def url_template(view_name: str, **kwargs) -> str:
+    """
+    Returns the URL of the view with a `{pk}` placeholder for the primary key,
+    so that the URLs of many objects can be built without resolving each one.
+    """
+    sentinel = 918273645
+    url = reverse(view_name, kwargs={**kwargs, 'pk': sentinel})
+    return url.replace(str(sentinel), '{pk}')
+
+
+def make_feature(
+        row: Mapping[str, Any],
+        geometry_field: str,
+        properties: Callable[[Mapping[str, Any]], dict],
+        precision: Optional[int] = None,
+) -> dict:
+    """
+    Returns the GeoJSON point feature corresponding to the row.
+    """
+    point = row[geometry_field]
+    coordinates = (
+        [point.x, point.y] if precision is None
+        else [round(point.x, precision), round(point.y, precision)]
+    )
+    return {
+        'type': 'Feature',
+        'id': row['id'],
+        'geometry': {'type': 'Point', 'coordinates': coordinates},
+        'properties': properties(row),
+    }
+
+
+def iter_feature_collection(
+        rows: Iterable[Mapping[str, Any]],
+        geometry_field: str,
+        properties: Callable[[Mapping[str, Any]], dict],
+        precision: Optional[int] = None,
+        chunk_size: int = GEOJSON_CHUNK_SIZE,
+) -> Iterator[bytes]:
+    """
+    Yields the pieces of a GeoJSON FeatureCollection of the point features
+    corresponding to the rows, which are expected to include the `id` and
+    the geometry field.
+    """
+    encoder = DjangoJSONEncoder(ensure_ascii=False, separators=(',', ':'))
+    yield (
+        '{"type":"FeatureCollection",'
+        f'"crs":{{"type":"name","properties":{{"name":"EPSG:{SRID}"}}}},'
+        '"features":['
+    ).encode()
+    features, separator = [], ''
+    for row in rows:
+        features.append(encoder.encode(make_feature(row, geometry_field, properties, precision)))
+        if len(features) >= chunk_size:
+            yield (separator + ','.join(features)).encode()
+            features, separator = [], ','
+    if features:
+        yield (separator + ','.join(features)).encode()
+    yield b']}'
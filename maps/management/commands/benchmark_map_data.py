@@ -0,0 +1,68 @@
+import time
+import tracemalloc
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import translation
+
+from django_countries import countries
+from django_countries.fields import Country
+
+from ...views import CountryDataView, PublicDataView
+
+
+class Command(BaseCommand):
+    help = """
+        Measures the time and the peak memory needed for serializing the data
+        of the world map (and optionally of a country's map) to GeoJSON or to
+        the compact format, using the places currently in the database. The
+        results are also given per 10 000 features, for comparison between
+        databases of different sizes.
+        Usage: ./manage.py benchmark_map_data [--country NL] [--repeat 3] [--format compact]
+        """
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--country', action='append', default=[],
+            help="Also measure the map of this country (may be repeated).")
+        parser.add_argument(
+            '--repeat', type=int, default=3,
+            help="Number of measurements of each map; the best is reported (default: 3).")
+        parser.add_argument(
+            '--format', choices=['geojson', 'compact'], default='geojson',
+            help="The format of the data (default: geojson).")
+
+    def handle(self, *args, **options):
+        views = [
+            ("world (anonymous)", PublicDataView.for_user_type(authenticated=False)),
+            ("world (authenticated)", PublicDataView.for_user_type(authenticated=True)),
+        ]
+        for country_code in options['country']:
+            if country_code not in countries:
+                raise CommandError(f"Unknown country {country_code}")
+            view = CountryDataView()
+            view.country, view.in_book_status = Country(country_code), None
+            views.append((f"country {country_code}", view))
+
+        with translation.override('eo'):
+            for label, view in views:
+                features_count = view.get_queryset().count()
+                elapsed, peak, size = min(
+                    self.measure(view, options['format']) for _ in range(max(1, options['repeat'])))
+                per_10k = 10_000 / features_count if features_count else 0
+                self.stdout.write(
+                    f"{label}: {features_count} features, {size / 1024:.0f} kB; "
+                    f"{elapsed * 1000:.0f} ms, peak memory {peak / 1024:.0f} kB; "
+                    f"per 10k features: {elapsed * 1000 * per_10k:.0f} ms, "
+                    f"{peak / 1024 * per_10k:.0f} kB, {size / 1024 * per_10k:.0f} kB of data"
+                )
+
+    def measure(self, view, data_format):
+        tracemalloc.start()
+        start = time.perf_counter()
+        size = 0
+        for chunk in view.iter_data(data_format):
+            size += len(chunk)
+        elapsed = time.perf_counter() - start
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        return elapsed, peak, size
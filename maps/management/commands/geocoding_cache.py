@@ -0,0 +1,74 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone, translation
+
+from hosting.models import GeocodingResult
+from hosting.utils import geocode
+
+
+class Command(BaseCommand):
+    help = """
+        Maintains the stored responses of the geocoding service.  Removes the
+        expired responses (--prune) and/or renews the responses which are about
+        to expire (--warm),  so that the frequent queries continue to be
+        answered without contacting the geocoding service.
+        """
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--prune', action='store_true',
+            help="Delete the expired responses.")
+        parser.add_argument(
+            '--warm', action='store_true',
+            help="Renew the responses with results, expiring within the given number of days.")
+        parser.add_argument(
+            '--days', type=int, default=7,
+            help="The number of days for --warm (default: 7).")
+        parser.add_argument(
+            '--limit', type=int, default=500,
+            help="The maximal number of geocoding requests for --warm (default: 500).")
+
+    def handle(self, *args, **options):
+        self.verbosity = options['verbosity']
+        if not options['prune'] and not options['warm']:
+            self.stdout.write("Nothing to do; specify --prune and/or --warm.")
+            return
+
+        if options['warm']:
+            self.warm(options['days'], options['limit'])
+        if options['prune']:
+            self.prune()
+
+    def warm(self, days, limit):
+        expiring = (
+            GeocodingResult.objects
+            .filter(negative=False)
+            .filter(expires_on__lte=timezone.now() + timedelta(days=days))
+            .order_by('expires_on')
+            [:limit]
+        )
+        renewed_counter = 0
+        for record in expiring:
+            # The stored response is replaced only when the service responds;
+            # otherwise it remains valid until its expiry.
+            with translation.override(record.language or None):
+                result = geocode(
+                    record.query, record.country,
+                    annotations=record.annotations, multiple=record.multiple, renew=True)
+            if result is None or result.error:
+                if self.verbosity >= 1:
+                    self.stderr.write(f"Could not renew '{record.query}': {getattr(result, 'status', '')}")
+                continue
+            renewed_counter += 1
+            if self.verbosity >= 2:
+                self.stdout.write(f"Renewed '{record.query}' ({record.country or '-'}, {record.language})")
+            if result.remaining_api_calls < 100:
+                break
+        if self.verbosity >= 1:
+            self.stdout.write(f"{renewed_counter} geocoding responses renewed.")
+
+    def prune(self):
+        deleted_count, _ = GeocodingResult.objects.filter(expires_on__lte=timezone.now()).delete()
+        if self.verbosity >= 1:
+            self.stdout.write(f"{deleted_count} expired geocoding responses deleted.")
@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand
+
+from hosting.models import PlaceMapChange
+
+
+class Command(BaseCommand):
+    help = """
+        Maintains the log of the changes of the places on the maps of the
+        countries, used by the feeds of changes of the region maps.  Removes
+        the entries older than the retention period (--prune); to be run
+        periodically.
+        """
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--prune', action='store_true',
+            help="Delete the entries older than the retention period.")
+
+    def handle(self, *args, **options):
+        self.verbosity = options['verbosity']
+        if not options['prune']:
+            self.stdout.write("Nothing to do; specify --prune.")
+            return
+
+        deleted_count = PlaceMapChange.prune()
+        if self.verbosity >= 1:
+            self.stdout.write(f"{deleted_count} outdated changes of places on map deleted.")
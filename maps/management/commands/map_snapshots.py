@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+
+from ...snapshots import build_snapshots
+
+
+class Command(BaseCommand):
+    help = """
+        Renders the data of the world map ahead of time and writes it to
+        pre-compressed files in settings.MAP_SNAPSHOTS_ROOT. Once the files
+        exist, they are rebuilt automatically when the places change; the
+        command should nevertheless be run periodically (e.g., daily), to
+        account for changes which do not trigger signals.
+        Usage: ./manage.py map_snapshots
+        """
+
+    def handle(self, *args, **options):
+        manifest = build_snapshots()
+        if options['verbosity'] >= 1:
+            for variant, info in manifest.items():
+                self.stdout.write(f"{variant}: {info['name']} ({info['size']} bytes)")
@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+
+from ...styles import build_styles
+
+
+class Command(BaseCommand):
+    help = """
+        Renders the styles of the maps in all configured languages and writes
+        them to fingerprinted, pre-compressed files in settings.MAP_STYLES_ROOT,
+        to be served by the web server. Should be run upon deployment; once the
+        files exist, they are rebuilt automatically when the API key of the
+        tiles service changes.
+        Usage: ./manage.py map_styles
+        """
+
+    def handle(self, *args, **options):
+        manifest = build_styles()
+        if options['verbosity'] >= 1:
+            for style, file_name in manifest.items():
+                self.stdout.write(f"{style}: {file_name}")
@@ -0,0 +1,80 @@
+"""
+This management command loads the boundaries of the countries defined by the
+django_countries module, from a vector data source readable by GDAL, such as
+the "Admin 0 – Countries" dataset of Natural Earth (public domain), and stores
+them simplified in the database, for the checks whether the locations of the
+places lie within their countries.
+"""
+
+from django.contrib.gis.gdal import DataSource
+from django.contrib.gis.geos import MultiPolygon, Polygon
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from hosting.models import CountryBoundary
+
+from ... import SRID
+from ...boundaries import BOUNDARY_TOLERANCE
+from ...data import COUNTRIES_GEO
+
+
+class Command(BaseCommand):
+    help = """
+        Loads the (simplified) boundaries of the countries of the world from
+        a vector data file, such as a GeoJSON or a shapefile.
+        """
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'source',
+            help="path to the data file; each feature is expected to be a country.")
+        parser.add_argument(
+            '--code-field', default='ISO_A2_EH',
+            help="name of the field holding the ISO code of the country (default: %(default)s).")
+        parser.add_argument(
+            '--tolerance', type=float, default=BOUNDARY_TOLERANCE,
+            help="tolerance of the simplification, in degrees (default: %(default)s).")
+
+    def handle(self, *args, **options):
+        self.verbosity = options['verbosity']
+        try:
+            layer = DataSource(options['source'])[0]
+        except Exception as err:
+            raise CommandError(f"Cannot read the data source: {err}")
+        if options['code_field'] not in layer.fields:
+            raise CommandError(f"The field {options['code_field']} is not present in the data source.")
+
+        # A country may consist of several features.
+        polygons: dict[str, list[Polygon]] = {}
+        for feature in layer:
+            country_code = str(feature.get(options['code_field']) or '').upper()
+            if country_code not in COUNTRIES_GEO:
+                if self.verbosity >= 2:
+                    self.stdout.write(f"- Skipped feature {feature.fid} ({country_code or 'no code'})")
+                continue
+            geometry = feature.geom.geos
+            if geometry.srid and geometry.srid != SRID:
+                geometry.transform(SRID)
+            geometry = geometry.simplify(options['tolerance'], preserve_topology=True)
+            polygons.setdefault(country_code, []).extend(
+                [geometry] if isinstance(geometry, Polygon) else
+                [part for part in geometry if isinstance(part, Polygon) and not part.empty]
+            )
+
+        with transaction.atomic():
+            for country_code, country_polygons in polygons.items():
+                CountryBoundary.objects.update_or_create(
+                    country=country_code,
+                    defaults={'geom': MultiPolygon(*country_polygons, srid=SRID)})
+                if self.verbosity >= 2:
+                    self.stdout.write(f"+ {country_code}: {len(country_polygons)} polygon(s)")
+
+        if self.verbosity >= 1:
+            missing = sorted(set(COUNTRIES_GEO.keys()) - set(polygons.keys()))
+            self.stdout.write(self.style.SUCCESS(
+                f"** Boundaries of {len(polygons)} countries updated."
+            ))
+            if missing:
+                self.stdout.write(self.style.NOTICE(
+                    f"   Without boundaries (bounding box is used): {', '.join(missing)}"
+                ))
@@ -0,0 +1,75 @@
+import csv
+import gzip
+import io
+import os
+import tempfile
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+import requests
+
+from ...geoip import reset_database, write_database
+
+
+class Command(BaseCommand):
+    help = """
+        Regenerates the local database of locations of IP address ranges
+        from a CSV file (optionally gzipped),  given as a path or as a URL.
+        The expected layout is that of DB-IP's "IP to City Lite" or "IP to
+        Country Lite" files.
+        Usage: ./manage.py update_ip_geodata dbip-city-lite-2024-07.csv.gz
+        """
+
+    def add_arguments(self, parser):
+        parser.add_argument('source', help="Path or URL of the CSV file.")
+        parser.add_argument(
+            '--output', default=settings.GEOIP_DATABASE_PATH,
+            help="Path of the generated database (default: settings.GEOIP_DATABASE_PATH).")
+
+    def handle(self, *args, **options):
+        self.verbosity = options['verbosity']
+        source = options['source']
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            if source.startswith(('http://', 'https://')):
+                local_path = os.path.join(temp_dir, 'ranges.csv')
+                try:
+                    with requests.get(source, stream=True, timeout=60) as response:
+                        response.raise_for_status()
+                        with open(local_path, 'wb') as f:
+                            for chunk in response.iter_content(chunk_size=1024*1024):
+                                f.write(chunk)
+                except requests.exceptions.RequestException as e:
+                    raise CommandError(f"Could not download {source}: {e}")
+            else:
+                local_path = source
+            try:
+                with open(local_path, 'rb') as f:
+                    compressed = f.read(2) == b'\x1f\x8b'
+                opener = gzip.open if compressed else open
+                with opener(local_path, 'rb') as raw_file:
+                    text_file = io.TextIOWrapper(raw_file, encoding='utf-8', newline='')
+                    counts = write_database(self.parse_ranges(text_file), options['output'])
+            except FileNotFoundError:
+                raise CommandError(f"The file {source} was not found")
+            except (csv.Error, ValueError, OSError) as e:
+                raise CommandError(f"Could not process {source}: {e}")
+
+        reset_database()
+        if self.verbosity >= 1:
+            self.stdout.write(
+                "{} IPv4 and {} IPv6 ranges written to {}".format(*counts, options['output']))
+
+    def parse_ranges(self, csv_file):
+        for row in csv.reader(csv_file):
+            if len(row) >= 8:
+                # IP to City: start, end, continent, country, region, city, latitude, longitude.
+                start, end, _, country, region, _, latitude, longitude = row[:8]
+                yield (
+                    start, end, country, region,
+                    float(latitude) if latitude else None, float(longitude) if longitude else None,
+                )
+            elif len(row) >= 3:
+                # IP to Country: start, end, country.
+                yield (row[0], row[1], row[2], "", None, None)
@@ -0,0 +1,168 @@
+"""
+Pre-rendered snapshots of the data of the world map.
+
+Rendering the GeoJSON of all the places of the world is the slowest response
+the website produces, thus it is done ahead of time: by the `map_snapshots`
+management command and, once snapshots exist, in the background shortly after
+the underlying data changes. For each variant (for anonymous visitors and for
+authenticated users) and each data format (GeoJSON and the compact format) a
+gzip and a brotli file are written, named by the hash of their content, and a
+manifest points to the current ones. The vector tiles of the lowest zoom
+levels are rendered at the same time, into the cache.
+"""
+
+import gzip
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from typing import Optional, TypedDict
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection
+from django.utils import timezone, translation
+
+import brotli
+
+from core.utils import write_file_atomically
+
+from .tiles import TILE_CACHE_TIMEOUT, TILE_PRECOMPUTED_ZOOM, tile_cache_key
+
+# Name of the variant -> whether the viewing user is authenticated.
+SNAPSHOT_VARIANTS = {
+    'anonymous': False,
+    'authenticated': True,
+}
+# Name of the data format -> extension of the snapshot's files.
+SNAPSHOT_FORMATS = {
+    'geojson': '.geojson',
+    'compact': '.psmd',
+}
+SNAPSHOT_ENCODINGS = {
+    'br': ('.br', brotli.compress),
+    'gzip': ('.gz', lambda content: gzip.compress(content, compresslevel=9, mtime=0)),
+}
+MANIFEST_NAME = 'world-map.json'
+# Outdated snapshots are kept for a while, for the responses already underway.
+OUTDATED_SNAPSHOT_RETENTION = 60 * 60
+
+
+class SnapshotInfo(TypedDict):
+    name: str
+    etag: str
+    size: int
+    built_on: str
+
+
+def snapshot_path(file_name: str) -> str:
+    return os.path.join(settings.MAP_SNAPSHOTS_ROOT, file_name)
+
+
+def manifest_key(variant: str, data_format: str = 'geojson') -> str:
+    return variant if data_format == 'geojson' else f'{variant}.{data_format}'
+
+
+def build_snapshots() -> dict[str, SnapshotInfo]:
+    """
+    Renders the data of the world map in all variants, writes the compressed
+    files and the manifest, and removes the outdated snapshots.
+    """
+    from .views import PublicDataView
+
+    os.makedirs(settings.MAP_SNAPSHOTS_ROOT, exist_ok=True)
+    manifest: dict[str, SnapshotInfo] = {}
+    with translation.override(settings.LANGUAGE_CODE):
+        for variant, authenticated in SNAPSHOT_VARIANTS.items():
+            for data_format, extension in SNAPSHOT_FORMATS.items():
+                content = PublicDataView.render_data(authenticated=authenticated, data_format=data_format)
+                digest = hashlib.sha256(content).hexdigest()[:16]
+                name = f'world-{variant}.{digest}{extension}'
+                for suffix, compress in SNAPSHOT_ENCODINGS.values():
+                    if not os.path.exists(snapshot_path(name + suffix)):
+                        write_file_atomically(snapshot_path(name + suffix), compress(content))
+                manifest[manifest_key(variant, data_format)] = {
+                    'name': name,
+                    'etag': f'"{digest}"',
+                    'size': len(content),
+                    'built_on': timezone.now().isoformat(),
+                }
+            _precompute_tiles(manifest[variant]['name'], authenticated)
+    write_file_atomically(snapshot_path(MANIFEST_NAME), json.dumps(manifest, indent=2).encode())
+
+    current_files = {
+        info['name'] + suffix
+        for info in manifest.values() for suffix, _ in SNAPSHOT_ENCODINGS.values()
+    }
+    for entry in os.scandir(settings.MAP_SNAPSHOTS_ROOT):
+        if (entry.name.startswith('world-') and entry.name not in current_files
+                and entry.name != MANIFEST_NAME
+                and entry.stat().st_mtime < time.time() - OUTDATED_SNAPSHOT_RETENTION):
+            os.unlink(entry.path)
+    return manifest
+
+
+def _precompute_tiles(version: str, authenticated: bool):
+    from .views import PublicTileView
+
+    view = PublicTileView.for_user_type(authenticated)
+    view.data_version = version
+    for z in range(TILE_PRECOMPUTED_ZOOM + 1):
+        for x in range(2**z):
+            for y in range(2**z):
+                cache.set(tile_cache_key(version, z, x, y), view.render_tile(z, x, y), TILE_CACHE_TIMEOUT)
+
+
+_manifest: tuple[tuple[str, int], Optional[dict[str, SnapshotInfo]]] = (('', 0), None)
+_manifest_lock = threading.Lock()
+
+
+def get_snapshot(variant: str, data_format: str = 'geojson') -> Optional[SnapshotInfo]:
+    """
+    Returns the information about the current snapshot of the variant in the
+    data format, or None when no such snapshot was built. The manifest is
+    re-read when modified.
+    """
+    global _manifest
+    manifest_path = snapshot_path(MANIFEST_NAME)
+    try:
+        version = (manifest_path, os.stat(manifest_path).st_mtime_ns)
+    except OSError:
+        return None
+    with _manifest_lock:
+        if _manifest[0] != version:
+            try:
+                with open(manifest_path, 'rb') as f:
+                    _manifest = (version, json.load(f))
+            except (OSError, ValueError):
+                _manifest = (version, None)
+        manifest = _manifest[1]
+    return manifest.get(manifest_key(variant, data_format)) if manifest else None
+
+
+def schedule_rebuild(*args, **kwargs):
+    """
+    Schedules the rebuilding of the snapshots, to take place after a delay so
+    that the changes made in the meantime are included as well. Only one
+    rebuilding is scheduled at a time, across all processes. Can be used as a
+    signal receiver.
+    """
+    delay = settings.MAP_SNAPSHOTS_REBUILD_DELAY
+    if kwargs.get('raw') or not delay or get_snapshot('anonymous') is None:
+        return
+    if not cache.add('map-snapshots-rebuild-scheduled', True, timeout=delay):
+        return
+    timer = threading.Timer(delay, _rebuild_in_background)
+    timer.daemon = True
+    timer.start()
+
+
+def _rebuild_in_background():
+    try:
+        build_snapshots()
+    except Exception:
+        logging.getLogger('PasportaServo.geo').exception("Rebuilding of the map snapshots failed")
+    finally:
+        connection.close()
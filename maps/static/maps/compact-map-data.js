@@ -0,0 +1,81 @@
+// @source: https://github.com/tejo-esperanto/pasportaservo/blob/master/maps/static/maps/compact-map-data.js
+// @license magnet:?xt=urn:btih:0b31508aeb0634b347b8270c7bee4d411b5d4109&dn=agpl-3.0.txt AGPL v3
+
+
+// Decodes the map data in the compact format (as returned by the data endpoints
+// with `?format=compact`, and described in maps/compact.py) to a GeoJSON object.
+function decodeCompactMapData(buffer) {
+    var data = new Uint8Array(buffer);
+    var position = 0;
+    var textDecoder = new TextDecoder('utf-8');
+
+    function readVarint() {
+        var value = 0, factor = 1, byte;
+        do {
+            byte = data[position++];
+            // Multiplication instead of bit shifts keeps values beyond 32 bits intact.
+            value += (byte & 0x7F) * factor;
+            factor *= 128;
+        } while (byte >= 0x80);
+        return value;
+    }
+    function readSigned() {
+        var value = readVarint();
+        return value % 2 ? -(value + 1) / 2 : value / 2;
+    }
+    function readString() {
+        var length = readVarint();
+        position += length;
+        return textDecoder.decode(data.subarray(position - length, position));
+    }
+
+    if (textDecoder.decode(data.subarray(0, 4)) !== 'PSMD') {
+        throw new Error("Not map data in the compact format.");
+    }
+    position = 4;
+    if (readVarint() !== 1) {
+        throw new Error("Unsupported version of the compact format.");
+    }
+    var factor = Math.pow(10, readVarint());
+    var header = [];
+    for (var count = readVarint(), n = 0; n < count; n++) {
+        header.push({name: readString(), template: readString()});
+    }
+
+    var features = [], strings = [];
+    var id = 0, x = 0, y = 0;
+    while (position < data.length) {
+        id += readSigned();
+        x += readSigned();
+        y += readSigned();
+        var properties = {};
+        for (var i = 0; i < header.length; i++) {
+            var name = header[i].name;
+            if (header[i].template) {
+                properties[name] = header[i].template.replace('{pk}', id);
+                continue;
+            }
+            var tag = readVarint();
+            if (tag === 3) {
+                strings.push(readString());
+                properties[name] = strings[strings.length - 1];
+            }
+            else if (tag > 3) {
+                properties[name] = strings[tag - 4];
+            }
+            else {
+                properties[name] = [null, false, true][tag];
+            }
+        }
+        features.push({
+            type: "Feature",
+            id: id,
+            geometry: {type: "Point", coordinates: [x / factor, y / factor]},
+            properties: properties
+        });
+    }
+    return {type: "FeatureCollection", features: features};
+}
+
+
+// @license-end
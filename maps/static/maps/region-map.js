@@ -47,7 +47,10 @@ window.addEventListener('load', function() {
 
         map.addSource("region_hosts", {
             type: "geojson",
-            data: GIS_ENDPOINTS['region_map_data'],
+            data: {type: "FeatureCollection", features: []},
+        });
+        loadRegionPlaces(function(collection) {
+            map.getSource("region_hosts").setData(collection);
         });
 
         map.addLayer({
@@ -105,4 +108,108 @@ window.addEventListener('load', function() {
 });
 
 
+// The places of the region are first loaded in the compact format, and are kept
+// in the session storage together with the version of the data; upon the next
+// visits, only the changes since that version are requested and applied to the
+// stored places.
+function loadRegionPlaces(callback) {
+    var changesUrl = GIS_ENDPOINTS['region_map_changes'];
+    var storageKey = 'region-map:' + changesUrl;
+    var stored = null;
+    try {
+        stored = JSON.parse(window.sessionStorage.getItem(storageKey));
+    }
+    catch (e) {
+        stored = null;
+    }
+    if (!stored || !stored.version || !stored.features) {
+        stored = {version: null, features: {}};
+    }
+
+    function toCollection() {
+        return {
+            type: "FeatureCollection",
+            features: Object.keys(stored.features).map(function(id) { return stored.features[id]; }),
+        };
+    }
+
+    function store() {
+        try {
+            window.sessionStorage.setItem(storageKey, JSON.stringify(stored));
+        }
+        catch (e) {
+            // The storage is full or unavailable; the data will be requested anew next time.
+        }
+    }
+
+    function loadChanges() {
+        var request = new XMLHttpRequest();
+        request.open('GET', changesUrl + (stored.version ? '?since=' + encodeURIComponent(stored.version) : ''));
+        request.responseType = 'json';
+        request.onload = function() {
+            var changes = request.response;
+            if (request.status != 200 || !changes) {
+                callback(toCollection());
+                return;
+            }
+            if (changes.complete) {
+                stored.features = {};
+            }
+            changes.added.concat(changes.updated).forEach(function(feature) {
+                stored.features[feature.id] = feature;
+            });
+            changes.removed.forEach(function(id) {
+                delete stored.features[id];
+            });
+            stored.version = changes.version;
+            store();
+            callback(toCollection());
+        };
+        request.onerror = function() {
+            callback(toCollection());
+        };
+        request.send();
+    }
+
+    function loadAll() {
+        var dataUrl = GIS_ENDPOINTS['region_map_data'];
+        var request = new XMLHttpRequest();
+        request.open('GET', dataUrl + (dataUrl.indexOf('?') < 0 ? '?' : '&') + 'format=compact');
+        request.responseType = 'arraybuffer';
+        request.onload = function() {
+            var collection = null;
+            if (request.status == 200 && request.getResponseHeader('X-Changes-Version')) {
+                try {
+                    collection = decodeCompactMapData(request.response);
+                }
+                catch (e) {
+                    collection = null;
+                }
+            }
+            if (!collection) {
+                // The changes since the beginning include all the places.
+                loadChanges();
+                return;
+            }
+            stored.features = {};
+            collection.features.forEach(function(feature) {
+                stored.features[feature.id] = feature;
+            });
+            stored.version = request.getResponseHeader('X-Changes-Version');
+            store();
+            callback(collection);
+        };
+        request.onerror = loadChanges;
+        request.send();
+    }
+
+    if (stored.version) {
+        loadChanges();
+    }
+    else {
+        loadAll();
+    }
+}
+
+
 // @license-end
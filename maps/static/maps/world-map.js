@@ -70,17 +70,16 @@ window.addEventListener('load', function() {
         map.addControl(loc, 'top-left');
 
         map.addSource("lokoj", {
-            type: "geojson",
-            data: GIS_ENDPOINTS['world_map_data'],
-            cluster: true,
-            clusterMaxZoom: 14, // Max zoom to cluster points on
-            clusterRadius: 50 // Radius of each cluster when clustering points (defaults to 50)
+            type: "vector",
+            tiles: [GIS_ENDPOINTS['world_map_tiles']],
+            maxzoom: 14 // Beyond this zoom, the tiles of the zoom level 14 are scaled
         });
 
         map.addLayer({
             id: "clusters",
             type: "circle",
             source: "lokoj",
+            "source-layer": "places",
             filter: ["has", "point_count"],
             paint: {
                 "circle-color": {
@@ -108,6 +107,7 @@ window.addEventListener('load', function() {
             id: "cluster-count",
             type: "symbol",
             source: "lokoj",
+            "source-layer": "places",
             filter: ["has", "point_count"],
             layout: {
                 "text-field": "{point_count}",
@@ -120,6 +120,7 @@ window.addEventListener('load', function() {
             id: "places",
             type: "circle",
             source: "lokoj",
+            "source-layer": "places",
             filter: ["!has", "point_count"],
             paint: {
                 "circle-color": "#ff7711",
@@ -169,8 +170,8 @@ window.addEventListener('load', function() {
 
         map.on('click', 'clusters', function(e) {
             map.flyTo({
-                center: e.lngLat,
-                zoom: map.getZoom() + 2,
+                center: e.features[0].geometry.coordinates,
+                zoom: e.features[0].properties.expansion_zoom || map.getZoom() + 2,
             });
         });
 
@@ -0,0 +1,130 @@
+"""
+Pre-rendered styles of the maps.
+
+The style documents (`maps/styles/<style>-gl-style.json` templates) depend
+only on the language and on the API key of the tiles service, so they are
+rendered ahead of time, by the `map_styles` management command (run upon
+deployment) and whenever the API key changes, for every style and each of
+the languages in settings.MAP_STYLES_LANGUAGES. Each document is written as
+is and pre-compressed, named by the hash of its content, so that the web
+server can serve it as an immutable static file. A manifest points to the
+current files; when a style is missing in it, the `map_style` view renders
+the document on request.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Optional
+
+from django.conf import settings
+from django.template.loader import get_template
+from django.utils import translation
+
+from core.utils import write_file_atomically
+
+from .snapshots import SNAPSHOT_ENCODINGS
+
+STYLES_TEMPLATES_DIR = Path(__file__).parent / 'templates' / 'maps' / 'styles'
+STYLE_TEMPLATE_SUFFIX = '-gl-style.json'
+MANIFEST_NAME = 'styles.json'
+# Outdated styles are kept for a while, for the pages already loaded.
+OUTDATED_STYLE_RETENTION = 7 * 24 * 60 * 60
+
+
+def style_names() -> list[str]:
+    return sorted(
+        template.name[:-len(STYLE_TEMPLATE_SUFFIX)]
+        for template in STYLES_TEMPLATES_DIR.glob('*' + STYLE_TEMPLATE_SUFFIX)
+    )
+
+
+def render_style(style: str, language: str, api_key: str) -> bytes:
+    with translation.override(language):
+        return get_template(f'maps/styles/{style}{STYLE_TEMPLATE_SUFFIX}').render({
+            'key': api_key,
+            'lang': language,
+        }).encode()
+
+
+def _style_path(file_name: str) -> str:
+    return os.path.join(settings.MAP_STYLES_ROOT, file_name)
+
+
+def build_styles(api_key: Optional[str] = None) -> dict[str, str]:
+    """
+    Renders all the styles in all languages, writes the files and the
+    manifest, and removes the outdated files. When no API key is given, the
+    one of the site configuration is used.
+    """
+    if api_key is None:
+        from core.models import SiteConfiguration
+        config = SiteConfiguration.get_solo()
+        api_key = config.mapping_services_api_keys.get('openmaptiles', '')
+
+    os.makedirs(settings.MAP_STYLES_ROOT, exist_ok=True)
+    manifest: dict[str, str] = {}
+    for style in style_names():
+        for language in settings.MAP_STYLES_LANGUAGES:
+            content = render_style(style, language, api_key)
+            digest = hashlib.sha256(content).hexdigest()[:16]
+            name = f'{style}.{language}.{digest}.json'
+            if not os.path.exists(_style_path(name)):
+                write_file_atomically(_style_path(name), content)
+                for suffix, compress in SNAPSHOT_ENCODINGS.values():
+                    write_file_atomically(_style_path(name + suffix), compress(content))
+            manifest[f'{style}.{language}'] = name
+    write_file_atomically(_style_path(MANIFEST_NAME), json.dumps(manifest, indent=2).encode())
+
+    current_names = set(manifest.values())
+    for entry in os.scandir(settings.MAP_STYLES_ROOT):
+        if (entry.name != MANIFEST_NAME and not entry.name.startswith('.')
+                and entry.name.split('.json')[0] + '.json' not in current_names
+                and entry.stat().st_mtime < time.time() - OUTDATED_STYLE_RETENTION):
+            os.unlink(entry.path)
+    return manifest
+
+
+_manifest: tuple[tuple[str, int], Optional[dict[str, str]]] = (('', 0), None)
+_manifest_lock = threading.Lock()
+
+
+def get_style_url(style: str, language: str) -> Optional[str]:
+    """
+    Returns the URL of the pre-rendered style in the language, or None when it
+    was not built. The manifest is re-read when modified.
+    """
+    global _manifest
+    manifest_path = _style_path(MANIFEST_NAME)
+    try:
+        version = (manifest_path, os.stat(manifest_path).st_mtime_ns)
+    except OSError:
+        return None
+    with _manifest_lock:
+        if _manifest[0] != version:
+            try:
+                with open(manifest_path, 'rb') as f:
+                    _manifest = (version, json.load(f))
+            except (OSError, ValueError):
+                _manifest = (version, None)
+        manifest = _manifest[1]
+    name = manifest.get(f'{style}.{language}') if manifest else None
+    return settings.MAP_STYLES_URL + name if name else None
+
+
+def rebuild_styles(sender, instance, **kwargs):
+    """
+    Renders the styles anew upon a change of the site configuration, if the
+    styles were built before; only a changed API key of the tiles service
+    results in new files. To be used as a signal receiver.
+    """
+    if kwargs.get('raw') or not os.path.exists(_style_path(MANIFEST_NAME)):
+        return
+    try:
+        build_styles(api_key=instance.mapping_services_api_keys.get('openmaptiles', ''))
+    except OSError:
+        logging.getLogger('PasportaServo.geo').exception("Rebuilding of the map styles failed")
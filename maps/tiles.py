@@ -0,0 +1,154 @@
+"""
+Encoding of the places as Mapbox Vector Tiles.
+
+Instead of downloading the data of all the places at once, the maps request
+only the tiles of the area in view, at the current zoom level. The places of
+a tile are selected via the spatial index of their location, and the tile
+is encoded by PostGIS (`ST_AsMVT`) directly from the rows of the query, with
+the properties shown on the map computed by SQL expressions. Only the
+clusters, computed in Python (see `maps.clusters`), are passed to the
+database as records.
+"""
+
+import json
+import math
+from typing import Any, Iterable, Mapping, Optional
+
+from django.contrib.gis.geos import Polygon
+from django.db import connection
+from django.db.models import F, QuerySet
+
+from . import SRID
+
+# The resolution of the coordinates within a tile, and the width of the margin
+# around it (in the same units) whose points are still included, so that the
+# markers at the edges of adjacent tiles are not cut off.
+TILE_EXTENT = 4096
+TILE_BUFFER = 64
+TILE_LAYER = 'places'
+# The maps request the tiles up to this zoom level, and scale them beyond it.
+TILE_MAX_ZOOM = 14
+TILE_CONTENT_TYPE = 'application/vnd.mapbox-vector-tile'
+# The tiles up to this zoom level (85 of them) are rendered for each version
+# of the data of the world map, and cached for the given time in seconds.
+TILE_PRECOMPUTED_ZOOM = 3
+TILE_CACHE_TIMEOUT = 7 * 24 * 60 * 60
+
+
+def is_valid_tile(z: int, x: int, y: int) -> bool:
+    return 0 <= z <= TILE_MAX_ZOOM and 0 <= x < 2**z and 0 <= y < 2**z
+
+
+def tile_cache_key(version: str, z: int, x: int, y: int) -> str:
+    return f'map-tile.{version}.{z}.{x}.{y}'
+
+
+def tile_bounds(z: int, x: int, y: int, buffer: int = TILE_BUFFER) -> Polygon:
+    """
+    Returns the area covered by the tile (including the buffer around it), in
+    geographical coordinates.
+    """
+    tiles_count = 2**z
+    margin = buffer / TILE_EXTENT
+
+    def longitude(tile_x):
+        return max(-180.0, min(180.0, tile_x / tiles_count * 360 - 180))
+
+    def latitude(tile_y):
+        tile_y = max(0.0, min(tiles_count, tile_y))
+        return math.degrees(math.atan(math.sinh(math.pi * (1 - 2 * tile_y / tiles_count))))
+
+    bounds = Polygon.from_bbox((
+        longitude(x - margin), latitude(y + 1 + margin),
+        longitude(x + 1 + margin), latitude(y - margin),
+    ))
+    bounds.srid = SRID
+    return bounds
+
+
+def _property_value(value):
+    if value is None or isinstance(value, (bool, int, float)):
+        return value
+    return str(value)
+
+
+def encode_queryset_tile(
+        z: int, x: int, y: int,
+        queryset: QuerySet, geometry_field: str, properties: Mapping[str, Any],
+        precision: Optional[int] = None,
+) -> bytes:
+    """
+    Encodes the rows of the queryset as a vector tile with one layer, the
+    properties of each feature being given as expressions over the rows.
+    When the precision (the number of decimal places) is given, the locations
+    are rounded before being encoded.
+    """
+    qn = connection.ops.quote_name
+    # The annotations are prefixed, to avoid conflicts with the model's fields.
+    rows = (
+        queryset
+        .order_by()
+        .values(
+            mvt_id=F('id'), mvt_geom=F(geometry_field),
+            **{f'mvt_{name}': expression for name, expression in properties.items()})
+    )
+    rows_sql, rows_params = rows.query.sql_with_params()
+    columns = ''.join(f', feature.{qn("mvt_" + name)} AS {qn(name)}' for name in properties)
+    geometry = 'feature.mvt_geom' if precision is None else f'ST_SnapToGrid(feature.mvt_geom, {10**-precision!r})'
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"""
+            SELECT ST_AsMVT(tile, %s, %s, 'geom', 'id') FROM (
+                SELECT
+                    feature.mvt_id AS id{columns},
+                    ST_AsMVTGeom(
+                        ST_Transform({geometry}, 3857),
+                        ST_TileEnvelope(%s, %s, %s), %s, %s, true
+                    ) AS geom
+                FROM ({rows_sql}) AS feature
+            ) AS tile
+            """,
+            [TILE_LAYER, TILE_EXTENT, z, x, y, TILE_EXTENT, TILE_BUFFER, *rows_params]
+        )
+        return bytes(cursor.fetchone()[0] or b'')
+
+
+def encode_tile(
+        z: int, x: int, y: int,
+        features: Iterable[tuple[int, float, float, Mapping[str, Any]]],
+        property_types: Mapping[str, str],
+) -> bytes:
+    """
+    Encodes the features (ID, longitude, latitude, properties) as a vector
+    tile with one layer. The SQL types of the properties are expected to be
+    given in `property_types`. Used for the features computed in Python.
+    """
+    records = [
+        dict(
+            {name: _property_value(value) for name, value in properties.items()},
+            id=feature_id, lon=lon, lat=lat,
+        )
+        for feature_id, lon, lat, properties in features
+    ]
+    if not records:
+        return b''
+    qn = connection.ops.quote_name
+    columns = ''.join(f', feature.{qn(name)}' for name in property_types)
+    definitions = ''.join(f', {qn(name)} {sql_type}' for name, sql_type in property_types.items())
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"""
+            SELECT ST_AsMVT(tile, %s, %s, 'geom', 'id') FROM (
+                SELECT
+                    feature.id{columns},
+                    ST_AsMVTGeom(
+                        ST_Transform(ST_SetSRID(ST_MakePoint(feature.lon, feature.lat), {SRID}), 3857),
+                        ST_TileEnvelope(%s, %s, %s), %s, %s, true
+                    ) AS geom
+                FROM jsonb_to_recordset(%s::jsonb)
+                    AS feature(id integer, lon double precision, lat double precision{definitions})
+            ) AS tile
+            """,
+            [TILE_LAYER, TILE_EXTENT, z, x, y, TILE_EXTENT, TILE_BUFFER, json.dumps(records)]
+        )
+        return bytes(cursor.fetchone()[0] or b'')
@@ -3,8 +3,9 @@ from django.utils.text import format_lazy
 from django.utils.translation import pgettext_lazy
 
 from .views import (
-    CountryDataView, EndpointsView, MapStyleView,
-    MapTypeConfigureView, PublicDataView, WorldMapView,
+    CountryChangesView, CountryDataView, CountryTileView,
+    EndpointsView, MapStyleView, MapTypeConfigureView,
+    PublicDataView, PublicTileView, WorldMapView,
 )
 
 
@@ -35,6 +36,23 @@ urlpatterns = [
             + r'/{places}\.geojson$',
             book=pgettext_lazy("URL", 'book'), places=pgettext_lazy("URL", 'locations')),
         CountryDataView.as_view(), name='country_map_data'),
+    re_path(
+        format_lazy(
+            r'^(?P<country_code>[A-Z]{{2}})'
+            + r'(?:/{book}\:(?P<in_book>(0|1)))?'
+            + r'/{changes}\.json$',
+            book=pgettext_lazy("URL", 'book'), changes=pgettext_lazy("URL", 'changes')),
+        CountryChangesView.as_view(), name='country_map_changes'),
+    path(
+        format_lazy('{tiles}/<int:z>/<int:x>/<int:y>.pbf', tiles=pgettext_lazy("URL", 'tiles')),
+        PublicTileView.as_view(), name='world_map_tile'),
+    re_path(
+        format_lazy(
+            r'^(?P<country_code>[A-Z]{{2}})'
+            + r'(?:/{book}\:(?P<in_book>(0|1)))?'
+            + r'/{tiles}/(?P<z>\d+)/(?P<x>\d+)/(?P<y>\d+)\.pbf$',
+            book=pgettext_lazy("URL", 'book'), tiles=pgettext_lazy("URL", 'tiles')),
+        CountryTileView.as_view(), name='country_map_tile'),
     path(
         '<slug:style>-gl-style.json',
         MapStyleView.as_view(), name='map_style'),
@@ -0,0 +1,73 @@
+"""
+Versions of the data plotted on the maps.
+
+A counter is kept in the cache for the whole world and for each country, and
+incremented whenever a place, or the data determining how and whether it is
+shown, changes. The map data endpoints derive their ETags from the counters,
+so that a client holding the current data is answered without querying for
+the places at all.
+"""
+
+import time
+from typing import Iterable, Optional
+
+from django.core.cache import cache
+from django.db import transaction
+
+WORLD_SCOPE = 'world'
+
+
+def _version_key(scope: str) -> str:
+    return f'map-data-version.{scope}'
+
+
+def get_data_version(country_code: Optional[str] = None) -> Optional[int]:
+    """
+    Returns the current version of the data of the country, or of the whole
+    world when no country is given; None when the versions are not available.
+    """
+    key = _version_key(country_code or WORLD_SCOPE)
+    version = cache.get(key)
+    if version is None:
+        # A new counter starts from the current time, so that the versions
+        # issued before the counter was evicted are not repeated.
+        cache.add(key, time.time_ns() // 1000, timeout=None)
+        version = cache.get(key)
+    return version
+
+
+def bump_data_version(country_codes: Iterable[str] = ()):
+    """
+    Increments the version of the data of the whole world and of each of the
+    given countries.
+    """
+    for scope in {WORLD_SCOPE, *filter(None, country_codes)}:
+        try:
+            cache.incr(_version_key(scope))
+        except ValueError:
+            # The counter does not exist; it will be started anew upon next use.
+            pass
+
+
+def make_data_version_receiver(lookup: str):
+    """
+    Creates a signal receiver which increments the versions of the data of
+    the countries of the places related to the saved or deleted instance via
+    the lookup, once the transaction of the change is committed.
+    """
+    def data_version_receiver(sender, **kwargs):
+        from hosting.models import Place
+        instance = kwargs['instance']
+        if kwargs.get('raw') or kwargs.get('update_fields') == frozenset(['last_login']):
+            return
+        country_codes = set(
+            Place.all_objects.filter(**{lookup: instance.pk}).values_list('country', flat=True)
+        )
+        if isinstance(instance, Place):
+            country_codes.add(instance.country.code)
+        # The instances not related to any place do not affect the maps.
+        if country_codes:
+            # A client given the new version before the change is committed
+            # would keep the previous data under the new version.
+            transaction.on_commit(lambda: bump_data_version(country_codes))
+    return data_version_receiver
@@ -1,27 +1,55 @@
-from typing import cast
+import gzip
+from datetime import datetime, timedelta, timezone as dt_timezone
+from typing import Optional, cast
 
 from django.conf import settings
 from django.contrib.gis.geos import Point
-from django.db.models import Q
-from django.http import HttpResponse, HttpResponseRedirect, JsonResponse
+from django.core.cache import cache
+from django.db.models import Case, CharField, F, Func, Q, Value, When
+from django.db.models.functions import (
+    MD5, Cast, Coalesce, Concat, Lower, NullIf, Replace, Substr,
+)
+from django.http import (
+    FileResponse, Http404, HttpResponse,
+    HttpResponseBadRequest, HttpResponseNotModified,
+    HttpResponseRedirect, JsonResponse, StreamingHttpResponse,
+)
 from django.urls import reverse
-from django.utils import translation
+from django.utils import timezone, translation
+from django.utils.cache import patch_cache_control, patch_vary_headers
 from django.utils.decorators import method_decorator
 from django.utils.functional import cached_property
+from django.utils.http import parse_etags
 from django.views import generic
 from django.views.decorators.cache import cache_control, cache_page
-from django.views.decorators.vary import vary_on_headers
 
 from django_countries.fields import Country
-from djgeojson.views import GeoJSONLayerView
 
 from core.auth import AuthMixin, AuthRole
 from core.models import SiteConfiguration
 from core.utils import sanitize_next
-from hosting.models import Place
-from hosting.templatetags.profile import avatar_dimension
+from hosting.gravatar import email_to_gravatar
+from hosting.models import Place, PlaceMapChange, Profile
+from hosting.templatetags.profile import avatar_dimension_attributes
+
+from .clusters import CLUSTER_MAX_ZOOM, get_cluster_index, unproject
+from .compact import (
+    COMPACT_CONTENT_TYPE, COMPACT_DEFAULT_PRECISION, iter_compact_collection,
+)
+from .geojson import iter_feature_collection, make_feature, url_template
+from .snapshots import (
+    SNAPSHOT_ENCODINGS, SnapshotInfo, get_snapshot, snapshot_path,
+)
+from .styles import get_style_url
+from .tiles import (
+    TILE_CACHE_TIMEOUT, TILE_CONTENT_TYPE,
+    TILE_PRECOMPUTED_ZOOM, encode_queryset_tile,
+    encode_tile, is_valid_tile, tile_bounds, tile_cache_key,
+)
+from .versions import get_data_version
 
-HOURS = 3600
+MINUTES = 60
+HOURS = 60 * MINUTES
 DAYS = 24 * HOURS
 
 
@@ -61,6 +89,26 @@ class MapTypeConfigureView(generic.View):
         return response
 
 
+def tile_url_template(request, view_name: str, **kwargs) -> str:
+    """
+    Returns the absolute URL of the tiles of the view, with placeholders for
+    the zoom level and the coordinates as expected by Mapbox GL.
+    """
+    url = request.build_absolute_uri(reverse(view_name, kwargs={**kwargs, 'z': 1, 'x': 2, 'y': 3}))
+    return url.replace('/1/2/3.pbf', '/{z}/{x}/{y}.pbf')
+
+
+def style_url(style: str) -> str:
+    """
+    Returns the URL of the pre-rendered style in the current language, or of
+    the view rendering it when it was not built.
+    """
+    return (
+        get_style_url(style, translation.get_language())
+        or reverse('map_style', kwargs={'style': style})
+    )
+
+
 class EndpointsView(generic.View):
     def get(self, request, *args, **kwargs):
         data_format = request.GET.get('format', None)
@@ -70,8 +118,9 @@ class EndpointsView(generic.View):
         }
         if map_type == 'world':
             endpoints.update({
-                'world_map_style': reverse('map_style', kwargs={'style': 'positron'}),
+                'world_map_style': style_url('positron'),
                 'world_map_data': reverse('world_map_public_data'),
+                'world_map_tiles': tile_url_template(request, 'world_map_tile'),
             })
         if map_type == 'region':
             # This usage of GET params is safe, because the values are restricted by the
@@ -81,21 +130,22 @@ class EndpointsView(generic.View):
             if 'in_book' in request.GET:
                 region_kwargs.update({'in_book': request.GET['in_book']})
             endpoints.update({
-                'region_map_style': reverse('map_style', kwargs={'style': 'klokantech'}),
+                'region_map_style': style_url('klokantech'),
                 'region_map_data': reverse('country_map_data', kwargs=region_kwargs),
+                'region_map_changes': reverse('country_map_changes', kwargs=region_kwargs),
             })
         if map_type == 'place':
             endpoints.update({
-                'place_map_style': reverse('map_style', kwargs={'style': 'klokantech'}),
+                'place_map_style': style_url('klokantech'),
             })
         if map_type == 'place-printed':
             endpoints.update({
-                'place_map_style': reverse('map_style', kwargs={'style': 'toner'}),
+                'place_map_style': style_url('toner'),
                 'place_map_attrib': 0,
             })
         if map_type == 'widget':
             endpoints.update({
-                'widget_style': reverse('map_style', kwargs={'style': 'positron'}),
+                'widget_style': style_url('positron'),
             })
         if data_format == 'js':
             return HttpResponse(
@@ -129,88 +179,252 @@ class MapStyleView(generic.TemplateView):
 
 class PlottablePlace(Place):
     """
-    Wrapper around the Place to provide additional properties we want to show on map.
+    The places as plotted on the maps.
     """
     class Meta:
         proxy = True
 
-    @property
-    def url(self):
-        return self.get_absolute_url()
 
-    @property
-    def owner_name(self):
-        return self.owner.name or self.owner.INCOGNITO
+def snapshot_response(request, snapshot: SnapshotInfo, content_type: str = 'application/json') -> HttpResponse:
+    """
+    Serves the pre-compressed snapshot of the map data, in the encoding the
+    client accepts; via the web server when so configured.
+    """
+    if snapshot['etag'] in parse_etags(request.META.get('HTTP_IF_NONE_MATCH', '')):
+        response = HttpResponseNotModified()
+    else:
+        accepted = {
+            encoding.split(';')[0].strip()
+            for encoding in request.META.get('HTTP_ACCEPT_ENCODING', '').split(',')
+        }
+        encoding = next((e for e in SNAPSHOT_ENCODINGS if e in accepted), None)
+        file_name = snapshot['name'] + SNAPSHOT_ENCODINGS[encoding or 'gzip'][0]
+        if not encoding:
+            with open(snapshot_path(file_name), 'rb') as f:
+                response = HttpResponse(gzip.decompress(f.read()), content_type=content_type)
+        elif settings.MAP_SNAPSHOTS_ACCEL_PREFIX:
+            response = HttpResponse(content_type=content_type)
+            response['X-Accel-Redirect'] = settings.MAP_SNAPSHOTS_ACCEL_PREFIX + file_name
+        else:
+            response = FileResponse(open(snapshot_path(file_name), 'rb'), content_type=content_type)
+        if encoding:
+            response['Content-Encoding'] = encoding
+    response['ETag'] = snapshot['etag']
+    patch_cache_control(response, private=True, no_cache=True)
+    patch_vary_headers(response, ['Accept-Encoding', 'Cookie'])
+    return response
 
-    @property
-    def owner_full_name(self):
-        return self.owner.get_fullname_display(non_empty=True)
 
-    @property
-    def owner_url(self):
-        return self.owner.get_absolute_url()
+def strip_expression(expression):
+    """
+    The SQL equivalent of Python's `str.strip()`.
+    """
+    return Func(
+        expression, Value(r'^\s+|\s+$'), Value(''), Value('g'),
+        function='REGEXP_REPLACE', output_field=CharField())
 
-    @property
-    def owner_avatar(self):
-        return self.owner.avatar_url
 
-    @cached_property
-    def owner_avatar_params(self):
-        return avatar_dimension(self.owner)
+def escape_html_expression(expression):
+    """
+    The SQL equivalent of Django's `escape()`.
+    """
+    for character, entity in (('&', '&amp;'), ('<', '&lt;'), ('>', '&gt;'), ('"', '&quot;'), ("'", '&#x27;')):
+        expression = Replace(expression, Value(character), Value(entity))
+    return expression
 
 
-@method_decorator(
-    [cache_control(private=True, max_age=12 * HOURS), cache_page(12 * HOURS)],
-    name='genuine_dispatch'
-)
-class PublicDataView(GeoJSONLayerView):
+class PlacesDataMixin:
+    """
+    The data of the places plotted on a map, computed from plain rows of
+    values instead of model instances. The vector tiles are computed by the
+    database, with the same properties given as SQL expressions.
+    """
     geometry_field = 'location'
-    precision = 2  # 0.01
+    properties: list[str]
+    # The fields of the rows, in addition to the ID and the geometry.
+    row_fields: list[str]
+    # The number of decimal places of the coordinates, if rounded.
+    precision: Optional[int] = None
+
+    def get_rows(self, queryset, *extra_fields):
+        return (
+            queryset
+            .values('id', self.geometry_field, *self.row_fields, *extra_fields)
+            .iterator(chunk_size=2000)
+        )
+
+    def get_row_properties(self, row) -> dict:
+        raise NotImplementedError
+
+    def get_property_expressions(self) -> dict:
+        """
+        The SQL expressions computing the same values as `get_row_properties`.
+        """
+        raise NotImplementedError
+
+    def get_url_templates(self) -> dict[str, str]:
+        """
+        The properties whose values are URLs built from the ID of the place,
+        with their templates.
+        """
+        return {}
+
+    def get_current_version(self) -> Optional[int]:
+        """
+        The version of the data of the places, if available.
+        """
+        raise NotImplementedError
+
+    def get_data_variant(self) -> list:
+        """
+        The values (other than the version) which the data depends on.
+        """
+        return []
+
+
+class PublicPlacesMixin(PlacesDataMixin):
+    """
+    The places shown on the world map. Authenticated users see in addition
+    the city of each place.
+    """
     properties = [
         'url',
         'owner_name',
         'owner_avatar',
         'owner_avatar_params',
     ]
+    row_fields = [
+        'city',
+        'owner__first_name', 'owner__user__email',
+        'owner__avatar', 'owner__avatar_present', 'owner__avatar_width', 'owner__avatar_height',
+        'owner__stored_avatar_url',
+    ]
+    # The locations of the hosts are public only approximately.
+    precision = 2  # 0.01
+    authenticated = False
 
-    def dispatch(self, request, *args, **kwargs):
-        request.META['HTTP_X_USER_STATUS'] = (
-            'Authenticated' if request.user.is_authenticated
-            else 'Anonymous')
-        return self.genuine_dispatch(request, *args, **kwargs)
-
-    @vary_on_headers('X-User-Status')
-    def genuine_dispatch(self, request, *args, **kwargs):
-        # Caching will take into account the header (via the Vary instruction), but
-        # it must be added before the cache framework calculates the hashmap key.
-        if request.user.is_authenticated:
+    def setup(self, request, *args, **kwargs):
+        super().setup(request, *args, **kwargs)
+        self.authenticated = request.user.is_authenticated
+        if self.authenticated:
             self.properties = ['city'] + self.properties
-        return super().dispatch(request, *args, **kwargs)
+
+    @property
+    def variant(self):
+        return 'authenticated' if self.authenticated else 'anonymous'
+
+    def get_current_version(self):
+        return get_data_version()
+
+    def get_data_variant(self):
+        return [self.variant]
+
+    @classmethod
+    def for_user_type(cls, authenticated: bool):
+        """
+        Returns an instance of the view for an anonymous or an authenticated
+        user, usable outside of a request.
+        """
+        view = cls(authenticated=authenticated)
+        if authenticated:
+            view.properties = ['city'] + view.properties
+        return view
 
     def get_queryset(self):
-        by_visibility = Q(visibility__visible_online_public=True)
-        if not self.request.user.is_authenticated:
-            by_visibility &= Q(owner__pref__public_listing=True)
+        by_visibility = Q(searchable__visible_online_public=True)
+        if not self.authenticated:
+            by_visibility &= Q(searchable__owner_public_listing=True)
         return (
             PlottablePlace.objects_raw
-            .filter(available=True)
+            .filter(searchable__available=True, searchable__owner_deceased=False)
             .exclude(
-                Q(location__isnull=True)
-                | Q(location=Point([]))
-                | Q(owner__death_date__isnull=False))
+                Q(searchable__location__isnull=True)
+                | Q(searchable__location=Point([])))
             .filter(by_visibility)
-            .select_related('owner')
-            .defer('address', 'description', 'short_description', 'owner__description')
         )
 
+    @cached_property
+    def _row_formatting(self):
+        return {
+            'url': url_template('place_detail'),
+            'incognito': str(Profile.INCOGNITO),
+            'avatar_storage': Profile._meta.get_field('avatar').storage,
+        }
 
-class CountryDataView(AuthMixin, GeoJSONLayerView):
-    geometry_field = 'location'
+    def get_row_properties(self, row):
+        formatting = self._row_formatting
+        if row['owner__stored_avatar_url']:
+            avatar_url = row['owner__stored_avatar_url']
+        elif row['owner__avatar_present'] and row['owner__avatar']:
+            avatar_url = formatting['avatar_storage'].url(row['owner__avatar'])
+        else:
+            avatar_url = Profile.gravatar_url(row['owner__user__email'])
+        values = {
+            'city': row['city'],
+            'url': formatting['url'].format(pk=row['id']),
+            'owner_name': row['owner__first_name'].strip() or formatting['incognito'],
+            'owner_avatar': avatar_url,
+            'owner_avatar_params': (
+                avatar_dimension_attributes(row['owner__avatar_width'], row['owner__avatar_height'])
+                if row['owner__avatar_present'] else avatar_dimension_attributes(None, None)
+            ),
+        }
+        return {name: values[name] for name in self.properties}
+
+    def get_property_expressions(self):
+        formatting = self._row_formatting
+        url_prefix, url_suffix = formatting['url'].split('{pk}')
+        email = Case(
+            When(owner__user__email__startswith=settings.INVALID_PREFIX,
+                 then=Substr('owner__user__email', len(settings.INVALID_PREFIX) + 1)),
+            default=F('owner__user__email'))
+        # The Gravatar URL of some address, split around the hash of the address.
+        sample_address = 'sample@pasportaservo.org'
+        gravatar_prefix, gravatar_suffix = (
+            Profile.gravatar_url(sample_address).split(email_to_gravatar(sample_address)[-32:]))
+        has_dimensions = Q(owner__avatar_present=True, owner__avatar_width__gt=0, owner__avatar_height__gt=0)
+        values = {
+            'city': F('city'),
+            'url': Concat(Value(url_prefix), Cast('id', CharField()), Value(url_suffix)),
+            'owner_name': Coalesce(
+                NullIf(strip_expression(F('owner__first_name')), Value('')),
+                Value(formatting['incognito'])),
+            'owner_avatar': Case(
+                When(~Q(owner__stored_avatar_url=''), then=F('owner__stored_avatar_url')),
+                When(owner__avatar_present=True, owner__avatar__gt='', then=Concat(
+                    Value(formatting['avatar_storage'].base_url), F('owner__avatar'))),
+                When(Q(owner__user__email__isnull=True) | Q(owner__user__email=''),
+                     then=Value(Profile.gravatar_url(None))),
+                default=Concat(
+                    Value(gravatar_prefix), MD5(Lower(strip_expression(email))), Value(gravatar_suffix)),
+                output_field=CharField()),
+            'owner_avatar_params': Case(
+                When(has_dimensions & Q(owner__avatar_width__lt=F('owner__avatar_height')),
+                     then=Value(str(avatar_dimension_attributes(1, 2)))),
+                When(has_dimensions, then=Value(str(avatar_dimension_attributes(2, 1)))),
+                default=Value(str(avatar_dimension_attributes(None, None))),
+                output_field=CharField()),
+        }
+        return {name: values[name] for name in self.properties}
+
+    def get_url_templates(self):
+        return {'url': self._row_formatting['url']}
+
+
+class CountryPlacesMixin(PlacesDataMixin):
+    """
+    The places of one country, shown to its supervisors on the region map;
+    optionally only those in (or not in) the printed edition.
+    """
     properties = [
         'owner_full_name',
         'checked', 'confirmed',
         'in_book',
     ]
+    row_fields = [
+        'checked', 'confirmed', 'in_book',
+        'owner__first_name', 'owner__last_name', 'owner__names_inversed', 'owner__user__username',
+    ]
     minimum_role = AuthRole.SUPERVISOR
 
     def dispatch(self, request, *args, **kwargs):
@@ -222,6 +436,12 @@ class CountryDataView(AuthMixin, GeoJSONLayerView):
     def get_owner(self, object):
         return None
 
+    def get_current_version(self):
+        return get_data_version(self.country.code)
+
+    def get_data_variant(self):
+        return [self.in_book_status]
+
     def get_location(self, object):
         return object
 
@@ -240,9 +460,276 @@ class CountryDataView(AuthMixin, GeoJSONLayerView):
                 'filter' if self.in_book_status else 'exclude'
             )
             queryset = narrowing_func(in_book=True, visibility__visible_in_book=True)
-        return (
-            queryset
-            .exclude(Q(location__isnull=True) | Q(location=Point([])))
-            .select_related('owner')
-            .defer('address', 'description', 'short_description', 'owner__description')
+        return queryset.exclude(Q(location__isnull=True) | Q(location=Point([])))
+
+    def get_row_properties(self, row):
+        return {
+            'owner_full_name': Profile.format_fullname(
+                row['owner__first_name'], row['owner__last_name'], row['owner__names_inversed'],
+                row['owner__user__username'], non_empty=True),
+            'checked': row['checked'],
+            'confirmed': row['confirmed'],
+            'in_book': row['in_book'],
+        }
+
+    def get_property_expressions(self):
+        has_first_name = Q(owner__first_name__regex=r'\S')
+        has_last_name = Q(owner__last_name__regex=r'\S')
+
+        def name_part(field, css_class):
+            return Case(
+                When(**{f'{field}__regex': r'\S'}, then=Concat(
+                    Value(f'<bdi class="{css_class}">'), escape_html_expression(F(field)), Value('</bdi>'))),
+                default=Value(''),
+                output_field=CharField())
+
+        first_name = name_part('owner__first_name', 'first-name')
+        last_name = name_part('owner__last_name', 'last-name')
+        separator = Case(When(has_first_name & has_last_name, then=Value('&ensp;')), default=Value(''))
+        username = Coalesce(
+            NullIf(Func(F('owner__user__username'), function='INITCAP', output_field=CharField()), Value('')),
+            Value('--'))
+        return {
+            'owner_full_name': Case(
+                When(~has_first_name & ~has_last_name, then=Concat(
+                    Value('<bdi class="profile-noname">'), escape_html_expression(username), Value('</bdi>'))),
+                When(owner__names_inversed=True, then=Concat(last_name, separator, first_name)),
+                default=Concat(first_name, separator, last_name),
+                output_field=CharField()),
+            'checked': F('checked'),
+            'confirmed': F('confirmed'),
+            'in_book': F('in_book'),
+        }
+
+
+class MapDataView(generic.View):
+    """
+    Streams the places of the view's queryset as a GeoJSON FeatureCollection
+    or, when requested via the `format` parameter, in the compact binary
+    format (see `maps.compact`). The ETag is derived from the version of the
+    data, so that a client holding the current data is answered before the
+    places are queried; the clients are expected to revalidate on each use.
+    """
+    data_formats = {
+        'geojson': 'application/json',
+        'compact': COMPACT_CONTENT_TYPE,
+    }
+    # The number of decimal places of the coordinates, if rounded.
+    precision: Optional[int] = None
+
+    def get_data_format(self):
+        return self.request.GET.get('format', 'geojson')
+
+    def get(self, request, *args, **kwargs):
+        data_format = self.get_data_format()
+        if data_format not in self.data_formats:
+            return HttpResponseBadRequest("Unknown data format.")
+        etag = self.get_etag(data_format)
+        if etag and etag in parse_etags(request.META.get('HTTP_IF_NONE_MATCH', '')):
+            response = HttpResponseNotModified()
+        else:
+            response = StreamingHttpResponse(
+                self.iter_data(data_format), content_type=self.data_formats[data_format])
+        if etag:
+            response['ETag'] = etag
+        patch_cache_control(response, private=True, no_cache=True)
+        return response
+
+    def get_etag(self, data_format) -> Optional[str]:
+        version = self.get_current_version()
+        if version is None:
+            return None
+        parts = [version, translation.get_language(), data_format, *self.get_data_variant()]
+        return '"{}"'.format('-'.join(str(part) for part in parts))
+
+    def iter_data(self, data_format='geojson'):
+        if data_format == 'compact':
+            return iter_compact_collection(
+                # The differences between the consecutive IDs are kept small.
+                self.get_rows(self.get_queryset().order_by('id')),
+                self.geometry_field, self.get_row_properties, self.properties,
+                url_templates=self.get_url_templates(),
+                precision=self.precision if self.precision is not None else COMPACT_DEFAULT_PRECISION)
+        return iter_feature_collection(
+            self.get_rows(self.get_queryset()), self.geometry_field, self.get_row_properties,
+            precision=self.precision)
+
+
+class PublicDataView(PublicPlacesMixin, MapDataView):
+    def dispatch(self, request, *args, **kwargs):
+        # When the data was rendered ahead of time, the current snapshot is served.
+        data_format = self.get_data_format()
+        snapshot = get_snapshot(self.variant, data_format) if data_format in self.data_formats else None
+        if snapshot:
+            return snapshot_response(request, snapshot, self.data_formats[data_format])
+        return super().dispatch(request, *args, **kwargs)
+
+    @classmethod
+    def render_data(cls, authenticated: bool, data_format: str = 'geojson') -> bytes:
+        """
+        Renders the data (GeoJSON by default) for an anonymous or an
+        authenticated user, outside of a request.
+        """
+        return b''.join(cls.for_user_type(authenticated).iter_data(data_format))
+
+
+class CountryDataView(CountryPlacesMixin, AuthMixin, MapDataView):
+    def get(self, request, *args, **kwargs):
+        version = CountryChangesView.version_at(timezone.now())
+        response = super().get(request, *args, **kwargs)
+        # The data can serve as the base for the changes since this version.
+        response['X-Changes-Version'] = version
+        return response
+
+
+class CountryChangesView(CountryPlacesMixin, AuthMixin, generic.View):
+    """
+    The changes of the places on the map of a country since the moment given
+    in the `since` parameter (the `version` of an earlier response, or the
+    `X-Changes-Version` header of the country's data): the features added and
+    updated since then, and the IDs of those removed. The changes are found
+    by the modification time of the places and by the log of the other changes
+    (`PlaceMapChange`). Without the parameter, or when it precedes the
+    retention period of the log, all the places are returned as added and
+    `complete` is set; the client is expected to discard its data.
+    """
+    # The changes made shortly before a response might be committed after it;
+    # the next response includes them (again) to be sure.
+    safety_margin = timedelta(minutes=1)
+
+    @classmethod
+    def version_at(cls, moment: datetime) -> str:
+        """
+        The version of the data as of the given moment, that is, the starting
+        point of the changes to be requested next.
+        """
+        return str(int((moment - cls.safety_margin).timestamp() * 10**6))
+
+    def get(self, request, *args, **kwargs):
+        now = timezone.now()
+        try:
+            since = (
+                datetime.fromtimestamp(int(request.GET['since']) / 10**6, tz=dt_timezone.utc)
+                if 'since' in request.GET else None
+            )
+        except (ValueError, OverflowError, OSError):
+            return HttpResponseBadRequest("Invalid version.")
+        complete = since is None or since < now - PlaceMapChange.RETENTION
+        queryset = self.get_queryset()
+        added, updated, removed = [], [], []
+        if complete:
+            rows = self.get_rows(queryset, 'created')
+        else:
+            changed_ids = set(
+                Place.all_objects
+                .filter(country=self.country.code, modified__gt=since)
+                .values_list('pk', flat=True)
+            ) | set(
+                PlaceMapChange.objects
+                .filter(country=self.country.code, changed_on__gt=since)
+                .values_list('place_id', flat=True)
+            )
+            rows = self.get_rows(queryset.filter(pk__in=changed_ids), 'created')
+        for row in rows:
+            feature = make_feature(row, self.geometry_field, self.get_row_properties)
+            (added if complete or row['created'] > since else updated).append(feature)
+        if not complete:
+            # The places changed but not present on the map anymore were removed.
+            removed = sorted(changed_ids - {feature['id'] for feature in added + updated})
+        response = JsonResponse({
+            'version': self.version_at(now),
+            'complete': complete,
+            'added': added,
+            'updated': updated,
+            'removed': removed,
+        })
+        patch_cache_control(response, private=True, no_cache=True)
+        return response
+
+
+class VectorTileView(generic.View):
+    """
+    Serves one tile of the places of the view's queryset, in the Mapbox
+    Vector Tile format. The tile's zoom level and coordinates are given in
+    the `z`, `x`, and `y` keyword arguments.
+    """
+    # The SQL types of the properties which are not text, for the tiles of
+    # features computed in Python.
+    property_types: dict[str, str] = {}
+
+    def get(self, request, *args, **kwargs):
+        z, x, y = (int(kwargs[coordinate]) for coordinate in ('z', 'x', 'y'))
+        if not is_valid_tile(z, x, y):
+            raise Http404("No such tile.")
+        return HttpResponse(self.get_tile(z, x, y), content_type=TILE_CONTENT_TYPE)
+
+    def get_tile(self, z: int, x: int, y: int) -> bytes:
+        return self.render_tile(z, x, y)
+
+    def render_tile(self, z: int, x: int, y: int) -> bytes:
+        places = (
+            self.get_queryset()
+            .filter(**{f'{self.geometry_field}__bboverlaps': tile_bounds(z, x, y)})
+        )
+        return encode_queryset_tile(
+            z, x, y, places, self.geometry_field, self.get_property_expressions(), precision=self.precision)
+
+    def get_features(self, places):
+        """
+        Yields the ID, the longitude, the latitude (rounded to the precision
+        of the view, if any), and the properties of each of the places.
+        """
+        for row in self.get_rows(places):
+            location = row[self.geometry_field]
+            lon, lat = location.x, location.y
+            if self.precision is not None:
+                lon, lat = round(lon, self.precision), round(lat, self.precision)
+            yield (row['id'], lon, lat, self.get_row_properties(row))
+
+    def get_property_types(self):
+        return {name: self.property_types.get(name, 'text') for name in self.properties}
+
+
+@method_decorator(cache_control(private=True, max_age=HOURS), name='get')
+class PublicTileView(PublicPlacesMixin, VectorTileView):
+    # The version of the data (the name of the current snapshot), if known.
+    data_version: Optional[str] = None
+
+    def get_tile(self, z, x, y):
+        snapshot = get_snapshot(self.variant)
+        self.data_version = snapshot['name'] if snapshot else None
+        # The tiles of the lowest zoom levels include the largest number of
+        # places; they are rendered together with the snapshots of the data.
+        if z > TILE_PRECOMPUTED_ZOOM or not snapshot:
+            return super().get_tile(z, x, y)
+        cache_key = tile_cache_key(snapshot['name'], z, x, y)
+        tile = cache.get(cache_key)
+        if tile is None:
+            tile = self.render_tile(z, x, y)
+            cache.set(cache_key, tile, TILE_CACHE_TIMEOUT)
+        return tile
+
+    def render_tile(self, z, x, y):
+        # At the lower zoom levels, the tiles contain the clusters of places.
+        if z > CLUSTER_MAX_ZOOM:
+            return super().render_tile(z, x, y)
+        index = get_cluster_index(
+            self.variant, self.data_version, lambda: self.get_features(self.get_queryset()))
+        features = (
+            (
+                node.place_id, *unproject(node.x, node.y),
+                node.properties if not node.is_cluster
+                else {'point_count': node.count, 'expansion_zoom': node.expansion_zoom},
+            )
+            for node in index.get_clusters(z, *tile_bounds(z, x, y).extent)
         )
+        return encode_tile(z, x, y, features, {
+            **self.get_property_types(),
+            'point_count': 'integer',
+            'expansion_zoom': 'integer',
+        })
+
+
+@method_decorator(cache_control(private=True, max_age=10 * MINUTES), name='get')
+class CountryTileView(CountryPlacesMixin, AuthMixin, VectorTileView):
+    pass
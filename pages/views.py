@@ -17,7 +17,7 @@ from core.auth import PERM_SUPERVISOR
 from core.mixins import FlatpageAsTemplateMixin, flatpages_as_templates
 from core.models import Policy
 from core.utils import sort_by
-from hosting.models import Place, Profile
+from hosting.models import Place, Profile, SearchablePlace
 
 
 class AboutView(generic.TemplateView):
@@ -25,7 +25,7 @@ class AboutView(generic.TemplateView):
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        all_places = Place.available_objects.filter(visibility__visible_online_public=True)
+        all_places = SearchablePlace.objects.filter(available=True, visible_online_public=True)
         context['num_of_hosts'] = SimpleLazyObject(
             lambda: all_places.values('owner').distinct().count()
         )
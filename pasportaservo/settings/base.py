@@ -365,6 +365,26 @@ MAPBOX_GL_JS_INTEGRITY = 'sha256-JPvw84fpnPKHLBR/JVkIVj11zvi4lYU+Hx0qF+141lo='
 del MAPBOX_GL_BASE_STATIC
 MAPBOX_GL_RTL_PLUGIN = 'https://api.mapbox.com/mapbox-gl-js/plugins/mapbox-gl-rtl-text/v0.2.3/mapbox-gl-rtl-text.js'
 
+# The local database of locations of IP address ranges, generated by the
+# `update_ip_geodata` management command
+GEOIP_DATABASE_PATH = path.join(path.dirname(BASE_DIR), 'geodata', 'ip_locations.bin')
+
+# The pre-rendered data of the world map, generated by the `map_snapshots`
+# management command and rebuilt after a delay (in seconds) when the places
+# change. When the web server can serve the files directly, the prefix of the
+# internal location (for X-Accel-Redirect) is configured. The snapshot for
+# the authenticated users includes the places not visible publicly, thus the
+# files must not be placed in any directory served by the web server as is.
+MAP_SNAPSHOTS_ROOT = path.join(WWW_DIR, 'map-snapshots')
+MAP_SNAPSHOTS_REBUILD_DELAY = 5 * 60
+MAP_SNAPSHOTS_ACCEL_PREFIX = None
+
+# The pre-rendered styles of the maps, generated by the `map_styles` management
+# command upon deployment and served by the web server as immutable files.
+MAP_STYLES_ROOT = path.join(STATIC_ROOT, 'map-styles')
+MAP_STYLES_URL = STATIC_URL + 'map-styles/'
+MAP_STYLES_LANGUAGES = [LANGUAGE_CODE]
+
 GITHUB_GRAPHQL_HOST = 'https://api.github.com/graphql'
 GITHUB_ACCESS_TOKEN = ('Bearer', environ.get('GITHUB_ACCESS_TOKEN', "personal.access.token"))
 GITHUB_DISCUSSION_BASE_URL = 'https://github.com/tejoesperanto/pasportaservo/discussions/'
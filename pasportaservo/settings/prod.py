@@ -40,6 +40,8 @@ SESSION_COOKIE_SECURE = True
 CSRF_COOKIE_SECURE = True
 CSRF_COOKIE_SAMESITE = 'Strict'
 
+MAP_SNAPSHOTS_ACCEL_PREFIX = '/internal/maps/'
+
 GITHUB_ACCESS_TOKEN = ('Bearer', get_env_setting('GITHUB_ACCESS_TOKEN'))
 
 sentry_init(env=ENVIRONMENT)
@@ -20,3 +20,5 @@ DATABASES['default'] = {     # noqa: F405
 }
 
 GITHUB_DISABLE_PREFETCH = True
+
+MAP_SNAPSHOTS_REBUILD_DELAY = None
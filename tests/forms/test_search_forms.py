@@ -24,7 +24,7 @@ class SearchFormTests(WebTest):
         # Verify that the expected fields are part of the form.
         expected_fields = """
             max_guest max_night contact_before tour_guide have_a_drink
-            owner__first_name owner__last_name available conditions
+            owner__first_name owner__last_name available conditions text
         """.split()
         self.assertEqual(set(expected_fields), set(form.fields))
 
@@ -56,6 +56,7 @@ class SearchFormTests(WebTest):
         self.assertEqual(form.fields['have_a_drink'].extra_label, "Happy to have a drink")
         self.assertEqual(form.fields['conditions'].label, "Conditions")
 
+        self.assertEqual(form.fields['text'].label, "Name or locality")
         self.assertEqual(form.fields['owner__first_name'].label, "First name")
         self.assertEqual(form.fields['owner__last_name'].label, "Last name")
 
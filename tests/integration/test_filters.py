@@ -1,16 +1,19 @@
+from unittest.mock import patch
+
 from django.test import TestCase, tag
 from django.utils import timezone
 
 from django_filters import BooleanFilter, CharFilter
 
+from hosting.conditions import CONDITIONS_VERIFY_PERIOD, get_condition_registry
 from hosting.filters.search import (
     ModelMultipleChoiceIncludeExcludeFilter,
     NumberOrNoneFilter, SearchFilterSet,
 )
 from hosting.forms.listing import SearchForm
-from hosting.models import Place
+from hosting.models import Place, SearchablePlace
 
-from ..factories import PlaceFactory, ProfileFactory
+from ..factories import ConditionFactory, PlaceFactory, ProfileFactory
 
 
 @tag('integration')
@@ -21,7 +24,7 @@ class SearchFilterSetTests(TestCase):
         # Verify that the expected filters are part of the filterset.
         expected_filters = """
             max_guest max_night contact_before tour_guide have_a_drink
-            owner__first_name owner__last_name available conditions
+            owner__first_name owner__last_name available conditions text
         """.split()
         self.assertEqual(set(expected_filters), set(filterset.filters))
 
@@ -34,12 +37,16 @@ class SearchFilterSetTests(TestCase):
         self.assertIs(type(filterset.filters['owner__first_name']), CharFilter)
         self.assertIs(type(filterset.filters['owner__last_name']), CharFilter)
         self.assertIs(type(filterset.filters['available']), BooleanFilter)
+        self.assertIs(type(filterset.filters['text']), CharFilter)
         self.assertIs(type(filterset.filters['conditions']), ModelMultipleChoiceIncludeExcludeFilter)
 
         # Verify the comparison operations performed by numeric filters.
         self.assertEqual(filterset.filters['max_guest'].lookup_expr, 'gte')
         self.assertEqual(filterset.filters['max_night'].lookup_expr, 'gte')
         self.assertEqual(filterset.filters['contact_before'].lookup_expr, 'lte')
+        # Verify the comparison operations performed by textual filters.
+        self.assertEqual(filterset.filters['owner__first_name'].lookup_expr, 'unaccented_contains')
+        self.assertEqual(filterset.filters['owner__last_name'].lookup_expr, 'unaccented_contains')
 
         # Verify defaults.
         self.assertIsNotNone(filterset.data)
@@ -68,6 +75,132 @@ class SearchFilterSetTests(TestCase):
         f = SearchFilterSet({'max_night': 5}, queryset=qs)
         self.assertQuerysetEqual(f.qs, [p4.pk, p5.pk, p1.pk], lambda o: o.pk, ordered=False)
 
+    def test_conditions_filtering(self):
+        c1, c2, c3 = ConditionFactory(), ConditionFactory(), ConditionFactory()
+        p1 = PlaceFactory()
+        p1.conditions.add(c1, c2)
+        p2 = PlaceFactory()
+        p2.conditions.add(c2)
+        p3 = PlaceFactory()
+        p3.conditions.add(c1, c2, c3)
+        p3.conditions.remove(c1)
+        p4 = PlaceFactory()
+        c3.place_set.add(p4)
+        qs = Place.objects.all()
+
+        self.assertEqual(
+            [place.conditions_mask for place in qs.filter(pk__in=[p1.pk, p2.pk, p3.pk, p4.pk]).order_by('pk')],
+            [
+                (1 << c1.mask_bit) | (1 << c2.mask_bit),
+                1 << c2.mask_bit,
+                (1 << c2.mask_bit) | (1 << c3.mask_bit),
+                1 << c3.mask_bit,
+            ])
+        f = SearchFilterSet({f'conditions_{c2.pk}': 'true'}, queryset=qs)
+        self.assertQuerysetEqual(f.qs, [p1.pk, p2.pk, p3.pk], lambda o: o.pk, ordered=False)
+        f = SearchFilterSet({f'conditions_{c2.pk}': 'true', f'conditions_{c3.pk}': 'false'}, queryset=qs)
+        self.assertQuerysetEqual(f.qs, [p1.pk, p2.pk], lambda o: o.pk, ordered=False)
+        f = SearchFilterSet({f'conditions_{c1.pk}': 'false', f'conditions_{c3.pk}': 'false'}, queryset=qs)
+        self.assertQuerysetEqual(f.qs, [p2.pk], lambda o: o.pk, ordered=False)
+
+        # Saving a place with a stale in-memory mask is expected to keep the mask
+        # which is stored in the database.
+        c1.place_set.add(p4)
+        p4.max_guest = 3
+        p4.save()
+        self.assertEqual(
+            Place.objects.get(pk=p4.pk).conditions_mask,
+            (1 << c1.mask_bit) | (1 << c3.mask_bit))
+
+        # The deletion of a condition is expected to be reflected in the masks.
+        c2.delete()
+        self.assertEqual(Place.objects.get(pk=p2.pk).conditions_mask, 0)
+
+    def test_conditions_filtering_stale_registry(self):
+        p1, p2 = PlaceFactory(), PlaceFactory()
+        registry = get_condition_registry()
+        with self.captureOnCommitCallbacks(execute=True):
+            condition = ConditionFactory()
+        p1.conditions.add(condition)
+        data = {f'conditions_{condition.pk}': 'true'}
+
+        # The registry of another process, built before the condition was
+        # created, is expected to be rebuilt upon the verification of the
+        # version of the conditions.
+        with patch('hosting.conditions._registry', registry):
+            registry.verified_at -= CONDITIONS_VERIFY_PERIOD
+            self.assertIn(condition.pk, get_condition_registry().by_id)
+        # Even before the verification, the unknown condition is expected to
+        # be looked up instead of being ignored (widening the results).
+        registry.verified_at += CONDITIONS_VERIFY_PERIOD
+        with patch('hosting.conditions._registry', registry):
+            self.assertNotIn(condition.pk, get_condition_registry().by_id)
+            f = SearchFilterSet(data, queryset=Place.objects.all())
+            self.assertQuerysetEqual(f.qs, [p1.pk], lambda o: o.pk)
+        f = SearchFilterSet({f'conditions_{condition.pk}': 'false'}, queryset=Place.objects.all())
+        self.assertQuerysetEqual(f.qs, [p2.pk], lambda o: o.pk)
+
+    def test_text_filtering(self):
+        p1 = PlaceFactory(
+            owner=ProfileFactory(first_name="Zamenhof", last_name="Ludoviko"),
+            city="Białystok", closest_city="", short_description="")
+        p2 = PlaceFactory(
+            owner=ProfileFactory(first_name="Ĉefa", last_name="Gastiganto"),
+            city="Rotterdam", closest_city="", short_description="Apud la haveno")
+        p3 = PlaceFactory(
+            owner=ProfileFactory(first_name="Janka", last_name="Kowalska"),
+            city="Schiedam", closest_city="Rotterdam", short_description="")
+        qs = Place.objects.all()
+
+        # Words are expected to be matched irrespective of accents and as prefixes.
+        f = SearchFilterSet({'text': "bialy"}, queryset=qs)
+        self.assertQuerysetEqual(f.qs, [p1.pk], lambda o: o.pk, ordered=False)
+        f = SearchFilterSet({'text': "cefa"}, queryset=qs)
+        self.assertQuerysetEqual(f.qs, [p2.pk], lambda o: o.pk, ordered=False)
+        f = SearchFilterSet({'text': "haven"}, queryset=qs)
+        self.assertQuerysetEqual(f.qs, [p2.pk], lambda o: o.pk, ordered=False)
+        # Parts of words are expected to be matched as well.
+        f = SearchFilterSet({'text': "dam"}, queryset=qs)
+        self.assertQuerysetEqual(f.qs, [p2.pk, p3.pk], lambda o: o.pk, ordered=False)
+        # The place in the city itself is expected to rank above the one near it.
+        f = SearchFilterSet({'text': "Rotterdam"}, queryset=qs)
+        self.assertQuerysetEqual(
+            f.qs.order_by('-text_rank'), [p2.pk, p3.pk], lambda o: o.pk)
+
+        # A change of the owner's name is expected to be reflected in the search.
+        p3.owner.first_name = "Joanna"
+        p3.owner.save()
+        f = SearchFilterSet({'text': "joanna"}, queryset=qs)
+        self.assertQuerysetEqual(f.qs, [p3.pk], lambda o: o.pk, ordered=False)
+        f = SearchFilterSet({'owner__first_name': "oann"}, queryset=qs)
+        self.assertQuerysetEqual(f.qs, [p3.pk], lambda o: o.pk, ordered=False)
+
+    def test_filtering_searchable_places(self):
+        condition = ConditionFactory()
+        p1 = PlaceFactory(
+            owner=ProfileFactory(first_name="Zamenhof"), city="Rotterdam", max_night=10, tour_guide=True)
+        p1.conditions.add(condition)
+        PlaceFactory(city="Schiedam", closest_city="Rotterdam", max_night=4, have_a_drink=True)
+        PlaceFactory(city="Białystok", max_night=None, available=False)
+
+        # Filtering the flat copies of the places is expected to give the same
+        # results as filtering the places themselves.
+        for data in [
+                None,
+                {'max_night': 5},
+                {'tour_guide': True, 'available': True},
+                {'owner__first_name': "amen"},
+                {f'conditions_{condition.pk}': 'true'},
+                {f'conditions_{condition.pk}': 'false', 'available': True},
+                {'text': "dam"},
+        ]:
+            with self.subTest(data=data):
+                f = SearchFilterSet(data, queryset=SearchablePlace.objects.all())
+                self.assertQuerysetEqual(
+                    f.qs,
+                    list(SearchFilterSet(data, queryset=Place.objects.all()).qs.values_list('pk', flat=True)),
+                    lambda o: o.pk, ordered=False)
+
 
 @tag('integration')
 class PlaceFilterTests(TestCase):
@@ -3,16 +3,23 @@ from unittest.mock import patch
 
 from django.conf import settings
 from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache
+from django.db import connection
 from django.test import override_settings, tag
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from django.utils import timezone
 
 from django_webtest import WebTest
 
-from core.models import Policy, UserBrowser
+from core.connections import process_connection_events
+from core.models import ConnectionEvent, Policy, UserBrowser
+from maps.geoip import IPLocation
 
 from ..assertions import AdditionalAsserts
-from ..factories import PolicyFactory, UserFactory
+from ..factories import (
+    AgreementFactory, PolicyFactory, ProfileFactory, UserFactory,
+)
 
 
 @tag('integration', 'middleware')
@@ -71,6 +78,43 @@ class MiddlewareTests(AdditionalAsserts, WebTest):
         self.assertEqual(page.status_code, 302)
         self.assertStartsWith(page.location, reverse('agreement'))
 
+    def test_account_flags_kept_in_session(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        Policy.objects.all().delete()
+        PolicyFactory.create(from_past_date=True, with_summary=False)
+        user = UserFactory(profile=None)
+        self.app.get(self.protected_url, user=user)
+        self.assertIn('account_flags', self.app.session)
+        self.assertIs(self.app.session['account_flags']['has_profile'], False)
+
+        # The subsequent requests are expected not to query the user's data.
+        with CaptureQueriesContext(connection) as context:
+            page = self.app.get(self.protected_url, user=user, status='*')
+        self.assertEqual(page.status_code, 200)
+        self.assertFalse([
+            q for q in context.captured_queries
+            if 'core_agreement' in q['sql'] or 'core_policy' in q['sql']
+        ])
+
+        # A new binding policy is expected to take effect immediately.
+        policy = PolicyFactory.create(
+            effective_date=timezone.now() - timezone.timedelta(days=10),
+            with_summary=False, requires_consent=True)
+        page = self.app.get(self.protected_url, user=user, status='*')
+        self.assertEqual(page.status_code, 302)
+        self.assertStartsWith(page.location, reverse('agreement'))
+        # So is the user's agreement to the new policy.
+        AgreementFactory(user=user, policy_version=policy.version)
+        page = self.app.get(self.protected_url, user=user, status='*')
+        self.assertEqual(page.status_code, 200)
+
+        # A new profile of a too young user is expected to be taken into account.
+        ProfileFactory(user=user, birth_date=timezone.now().date() - timezone.timedelta(days=365))
+        page = self.app.get(self.protected_url, user=user, status='*')
+        self.assertEqual(page.status_code, 403)
+        self.assertIs(self.app.session['account_flags']['has_profile'], True)
+
 
 @tag('integration', 'middleware')
 class ConnectionInfoTests(WebTest):
@@ -80,130 +124,138 @@ class ConnectionInfoTests(WebTest):
         cls.general_url = reverse('about')
 
     def test_anonymous_user(self):
-        self.app.get(self.general_url, user=AnonymousUser())
-        self.assertNotIn('connection_id', self.app.session, msg=self.app.session.items())
-        self.assertNotIn('connection_browser', self.app.session, msg=self.app.session.items())
+        self.app.get(self.general_url, user=AnonymousUser(), headers={'User-Agent': 'Mozilla/5.0'})
+        self.assertNotIn('flag_connection_logged', self.app.session, msg=self.app.session.items())
+        self.assertEqual(ConnectionEvent.objects.count(), 0)
 
     def test_missing_user_agent_info(self):
         self.app.get(self.general_url, user=self.user)
-        self.assertNotIn('connection_id', self.app.session, msg=self.app.session.items())
-        self.assertNotIn('connection_browser', self.app.session, msg=self.app.session.items())
+        self.assertNotIn('flag_connection_logged', self.app.session, msg=self.app.session.items())
+        self.assertEqual(ConnectionEvent.objects.count(), 0)
 
-    @patch('core.middleware.geocoder.ip')
+    @patch('core.connections.geolocate_ip')
     def test_connection_logged(self, mock_geoip):
         number_existing_conn_objects = UserBrowser.objects.count()
-        mock_geoip.return_value.ok = mock_geoip.return_value.current_result.ok = True
 
         # Accessing the website from a browser (that sends a user agent string)
-        # is expected to log a new connection.
-        mock_geoip.return_value.state = None
-        mock_geoip.return_value.country = 'AQ'
+        # is expected to enqueue the connection, and not to log it immediately.
         self.app.get(
             self.general_url,
             user=self.user,
             headers={'User-Agent': 'Mozilla/5.0'})
+        mock_geoip.assert_not_called()
+        self.assertIn('flag_connection_logged', self.app.session, msg=self.app.session.items())
+        self.assertEqual(ConnectionEvent.objects.filter(user=self.user).count(), 1)
+        self.assertEqual(UserBrowser.objects.count(), number_existing_conn_objects)
+
+        # Processing the enqueued connection is expected to log a new connection.
+        mock_geoip.return_value = IPLocation('AQ', "", None, None)
+        self.assertEqual(process_connection_events(), 1)
         mock_geoip.assert_called_once()
-        self.assertIn('connection_id', self.app.session, msg=self.app.session.items())
-        user_conn_id = self.app.session['connection_id']
-        self.assertIn('connection_browser', self.app.session, msg=self.app.session.items())
-        self.assertEqual(self.app.session['connection_browser'], "Other")
+        self.assertEqual(ConnectionEvent.objects.count(), 0)
         self.assertEqual(UserBrowser.objects.count(), number_existing_conn_objects + 1)
+        connection = UserBrowser.objects.filter(user=self.user).get()
+        self.assertEqual(connection.browser_name, "Other")
+        self.assertEqual(connection.geolocation, "AQ")
 
         self.app.reset()
         mock_geoip.reset_mock()
 
         # Accessing the website from the same browser and a different location
         # is expected to log a new connection.
-        mock_geoip.return_value.state = None
-        mock_geoip.return_value.country = 'GL'
+        mock_geoip.return_value = IPLocation('GL', "", 72.0, -40.0)
         self.app.get(
             self.general_url,
             user=self.user,
             headers={'User-Agent': 'Mozilla/5.0'})
+        self.assertEqual(process_connection_events(), 1)
         mock_geoip.assert_called_once()
-        self.assertIn('connection_id', self.app.session, msg=self.app.session.items())
-        self.assertNotEqual(self.app.session['connection_id'], user_conn_id)
-        self.assertIn('connection_browser', self.app.session, msg=self.app.session.items())
-        self.assertEqual(self.app.session['connection_browser'], "Other")
         self.assertEqual(UserBrowser.objects.count(), number_existing_conn_objects + 2)
 
-    @patch('core.middleware.geocoder.ip')
+    @patch('core.connections.geolocate_ip')
     def test_connection_not_logged(self, mock_geoip):
-        mock_geoip.return_value.ok = mock_geoip.return_value.current_result.ok = True
-        mock_geoip.return_value.state = 'Saskatchewan'
-        mock_geoip.return_value.country = 'CA'
+        mock_geoip.return_value = IPLocation('CA', "Saskatchewan", 52.13, -106.67)
         self.app.get(
             self.general_url,
             user=self.user,
             headers={'User-Agent': 'Mozilla/5.0'})
-        user_conn_id = self.app.session['connection_id']
+        process_connection_events()
         number_existing_conn_objects = UserBrowser.objects.count()
 
-        self.app.reset()
-        mock_geoip.reset_mock()
+        # Accessing the website from the same browser and location, or from the
+        # same browser and an unknown location, is not expected to log a new
+        # connection.
+        for location in (IPLocation('CA', "Saskatchewan", 52.13, -106.67), None):
+            with self.subTest(location=location):
+                self.app.reset()
+                mock_geoip.reset_mock()
+                mock_geoip.return_value = location
+                self.app.get(
+                    self.general_url,
+                    user=self.user,
+                    headers={'User-Agent': 'Mozilla/5.0'})
+                self.assertEqual(process_connection_events(), 1)
+                mock_geoip.assert_called_once()
+                self.assertEqual(UserBrowser.objects.count(), number_existing_conn_objects)
 
-        # Accessing the website from the same browser and location is not expected
-        # to log a new connection.
-        self.app.get(
-            self.general_url,
-            user=self.user,
-            headers={'User-Agent': 'Mozilla/5.0'})
-        mock_geoip.assert_called_once()
-        self.assertIn('connection_id', self.app.session, msg=self.app.session.items())
-        self.assertEqual(self.app.session['connection_id'], user_conn_id)
-        self.assertEqual(UserBrowser.objects.count(), number_existing_conn_objects)
-
-        self.app.reset()
-        mock_geoip.reset_mock()
+    @patch('core.connections.geolocate_ip')
+    def test_connections_deduplicated(self, mock_geoip):
+        mock_geoip.return_value = IPLocation('CA', "Nunavut", 63.75, -68.52)
+        number_existing_conn_objects = UserBrowser.objects.count()
+        other_user = UserFactory(profile=None)
+        for user in (self.user, self.user, other_user):
+            self.app.reset()
+            self.app.get(
+                self.general_url,
+                user=user,
+                headers={'User-Agent': 'Mozilla/5.0'})
+        self.assertEqual(ConnectionEvent.objects.count(), 3)
 
-        # Accessing the website from the same browser and an unknown location is
-        # not expected to log a new connection.
-        mock_geoip.return_value.current_result.ok = False
-        self.app.get(
-            self.general_url,
-            user=self.user,
-            headers={'User-Agent': 'Mozilla/5.0'})
+        self.assertEqual(process_connection_events(), 3)
+        # The IP address is expected to be geolocated only once.
         mock_geoip.assert_called_once()
-        self.assertIn('connection_id', self.app.session, msg=self.app.session.items())
-        self.assertEqual(self.app.session['connection_id'], user_conn_id)
-        self.assertEqual(UserBrowser.objects.count(), number_existing_conn_objects)
+        self.assertEqual(UserBrowser.objects.count(), number_existing_conn_objects + 2)
+        self.assertEqual(process_connection_events(), 0)
 
-    @patch('core.middleware.geocoder.ip')
-    def test_connection_reuse(self, mock_geoip):
-        mock_geoip.return_value.ok = mock_geoip.return_value.current_result.ok = False
+    def test_connection_reuse(self):
         self.app.get(
             self.general_url,
             user=self.user,
             headers={'User-Agent': 'Mozilla/5.0'})
-        user_conn_id = self.app.session['connection_id']
-        number_existing_conn_objects = UserBrowser.objects.count()
-
-        mock_geoip.reset_mock()
+        self.assertEqual(ConnectionEvent.objects.count(), 1)
         time.sleep(0.250)
 
         # Accessing the website again in a short period of time through the
         # same session, even if the browser and/or the location differ, is
-        # expected to reuse the existing connection.
-        mock_geoip.return_value.ok = mock_geoip.return_value.current_result.ok = True
-        mock_geoip.return_value.state = 'Nunavut'
-        mock_geoip.return_value.country = 'CA'
+        # not expected to enqueue the connection again.
         self.app.get(
             self.general_url,
             headers={'User-Agent': 'Mozilla/5.５'.encode('utf-8')})
-        mock_geoip.assert_not_called()
-        self.assertEqual(self.app.session['connection_id'], user_conn_id)
-        self.assertEqual(UserBrowser.objects.count(), number_existing_conn_objects)
-
-        mock_geoip.reset_mock()
+        self.assertEqual(ConnectionEvent.objects.count(), 1)
 
         # Accessing the website again after more than 24 hours through the
-        # same session is expected to log a new connection.
+        # same session is expected to enqueue the connection.
         session = self.app.session
         session['flag_connection_logged'] = timezone.now() - timezone.timedelta(hours=25)
         session.save()
         self.app.get(
             self.general_url,
             headers={'User-Agent': 'Mozilla/5.５'.encode('utf-8')})
-        mock_geoip.assert_called_once()
-        self.assertNotEqual(self.app.session['connection_id'], user_conn_id)
-        self.assertEqual(UserBrowser.objects.count(), number_existing_conn_objects + 1)
+        self.assertEqual(ConnectionEvent.objects.count(), 2)
+
+    def test_expired_connections_pruned(self):
+        for user in (self.user, UserFactory(profile=None)):
+            self.app.reset()
+            self.app.get(
+                self.general_url,
+                user=user,
+                headers={'User-Agent': 'Mozilla/5.0'})
+        self.assertEqual(ConnectionEvent.objects.count(), 2)
+        self.assertEqual(ConnectionEvent.prune(), 0)
+
+        # The events not processed within the retention period are expected
+        # to be discarded.
+        ConnectionEvent.objects.filter(user=self.user).update(
+            connected_on=timezone.now() - ConnectionEvent.RETENTION - timezone.timedelta(minutes=1))
+        self.assertEqual(ConnectionEvent.prune(), 1)
+        self.assertEqual(list(ConnectionEvent.objects.values_list('user_id', flat=True)), [user.pk])
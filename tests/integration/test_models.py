@@ -8,6 +8,7 @@ from django.utils import timezone
 
 from factory import Faker
 
+from hosting.conditions import reset_condition_registry
 from hosting.models import CountryRegion, FamilyMember, Place, Profile
 
 from ..factories import (
@@ -482,12 +483,18 @@ class PlaceModelIntegrationTests(TestCase):
     def test_conditions_cache(self):
         # The cache is expected to contain all hosting conditions defined for the place.
         conditions = [c.pk for c in self.place.conditions.order_by('pk')]
+        # The conditions are expected to be fetched only once for the process.
+        reset_condition_registry()
         with self.assertNumQueries(1):
             cache = self.place.conditions_cache()
             self.assertQuerysetEqual(cache, conditions, lambda c: c.pk, ordered=False)
         with self.assertNumQueries(0):
             cache = self.place.conditions_cache()
             self.assertQuerysetEqual(cache, conditions, lambda c: c.pk, ordered=False)
+        place = Place.all_objects.get(pk=self.place.pk)
+        with self.assertNumQueries(0):
+            cache = place.conditions_cache()
+            self.assertQuerysetEqual(cache, conditions, lambda c: c.pk, ordered=False)
 
     @tag('subregions')
     def test_subregion(self):
@@ -1,14 +1,17 @@
+from io import StringIO
 from unittest.mock import patch
 
 from django.conf import settings
 from django.core.exceptions import ObjectDoesNotExist
 from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
 from django.test import RequestFactory, TestCase, override_settings, tag
 from django.utils.html import format_html
 
 from factory import Faker
 
 from hosting.gravatar import email_to_gravatar
+from hosting.models import Profile
 
 from ..assertions import AdditionalAsserts
 from ..factories import ProfileFactory, ProfileSansAccountFactory, UserFactory
@@ -220,17 +223,65 @@ class ProfileModelTests(AdditionalAsserts, TrackingManagersTests, TestCase):
         profile = ProfileFactory()
         self.assertFalse(profile.avatar_exists())
 
-        # Profile with uploaded profile picture not saved on disk is expected to return False.
+        # Profile with uploaded profile picture is expected to return True, without
+        # consulting the storage.
         fake = Faker._get_faker()
-        upfile = SimpleUploadedFile(fake.file_name(extension='png'), fake.image(image_format='png'), 'image/png')
+        upfile = SimpleUploadedFile(
+            fake.file_name(extension='png'), fake.image(size=(60, 40), image_format='png'), 'image/png')
         mock_storage_save.return_value = "test_avatars/xyz.png"
-        mock_storage_exists.return_value = False
         profile = ProfileFactory(avatar=upfile)
+        mock_storage_exists.reset_mock()
+        self.assertTrue(profile.avatar_exists())
+        mock_storage_exists.assert_not_called()
+        self.assertEqual((profile.avatar_width, profile.avatar_height), (60, 40))
+        profile.refresh_from_db()
+        self.assertTrue(profile.avatar_present)
+        self.assertEqual(profile.stored_avatar_url, f"{settings.MEDIA_URL}test_avatars/xyz.png")
+
+        # Profile with uploaded profile picture not saved on disk is expected to return
+        # False once the metadata is updated.
+        profile.update_avatar_metadata()
         self.assertFalse(profile.avatar_exists())
+        self.assertIsNone(profile.avatar_width)
 
-        # Profile with uploaded profile picture properly saved on disk is expected to return True.
-        mock_storage_exists.return_value = True
-        self.assertTrue(profile.avatar_exists())
+        # Profile with removed profile picture is expected to return False.
+        profile = ProfileFactory(avatar=upfile)
+        profile.avatar = None
+        profile.save()
+        self.assertFalse(profile.avatar_exists())
+        self.assertEqual(
+            profile.avatar_url,
+            email_to_gravatar(profile.user.email, settings.DEFAULT_AVATAR_URL))
+
+    @tag('avatar')
+    @override_settings(MEDIA_ROOT='tests/assets/')
+    def test_update_avatar_metadata_command(self):
+        profile = ProfileFactory()
+        Profile.all_objects.filter(pk=profile.pk).update(
+            avatar='b7044569.gif', avatar_present=False, stored_avatar_url="")
+        call_command('update_avatar_metadata', stdout=StringIO())
+        profile.refresh_from_db()
+        self.assertTrue(profile.avatar_present)
+        self.assertIsNotNone(profile.avatar_width)
+        self.assertLess(profile.avatar_width, profile.avatar_height)
+        self.assertEqual(profile.stored_avatar_url, f"{settings.MEDIA_URL}b7044569.gif")
+
+        Profile.all_objects.filter(pk=profile.pk).update(avatar='missing.gif')
+        call_command('update_avatar_metadata', stdout=StringIO())
+        profile.refresh_from_db()
+        self.assertFalse(profile.avatar_present)
+        self.assertIsNone(profile.avatar_width)
+        self.assertIn("gravatar.com", profile.stored_avatar_url)
+
+    @tag('avatar')
+    def test_avatar_url_follows_email(self):
+        profile = ProfileFactory(with_email=True)
+        profile.user.email = "ehxo.sxangxo@cxiu.jxauxde.org"
+        profile.user.save()
+        profile.refresh_from_db()
+        self.assertEqual(
+            profile.stored_avatar_url,
+            email_to_gravatar("ehxo.sxangxo@cxiu.jxauxde.org", settings.DEFAULT_AVATAR_URL))
 
     def test_icon(self):
         profile = self.basic_profile
@@ -0,0 +1,75 @@
+from django.test import TestCase, tag
+from django.utils import timezone
+
+from hosting.models import Place, SearchablePlace
+
+from ..factories import PlaceFactory, ProfileFactory
+
+
+@tag('models', 'search')
+class SearchablePlaceModelTests(TestCase):
+    def test_copy_of_place(self):
+        place = PlaceFactory(available=True)
+        copy = SearchablePlace.objects.get(place=place)
+        self.assertEqual(copy.owner_id, place.owner_id)
+        self.assertEqual(copy.country, place.country)
+        self.assertEqual(copy.city, place.city)
+        self.assertEqual(copy.location, place.location)
+        self.assertTrue(copy.available)
+        self.assertFalse(copy.owner_deceased)
+        self.assertFalse(copy.owner_deleted)
+
+        place.available = False
+        place.city = "Bydgoszcz"
+        place.save()
+        copy.refresh_from_db()
+        self.assertFalse(copy.available)
+        self.assertEqual(copy.city, "Bydgoszcz")
+
+    def test_sync_with_related_objects(self):
+        place = PlaceFactory()
+        place.visibility.refresh_from_db()
+        place.visibility['online_public'] = not place.visibility.visible_online_public
+        place.visibility.save()
+        self.assertEqual(
+            SearchablePlace.objects.get(place=place).visible_online_public,
+            place.visibility.visible_online_public)
+
+        place.owner.pref.public_listing = False
+        place.owner.pref.save()
+        self.assertIs(SearchablePlace.objects.get(place=place).owner_public_listing, False)
+
+        place.owner.death_date = timezone.now().date()
+        place.owner.save()
+        self.assertTrue(SearchablePlace.objects.get(place=place).owner_deceased)
+
+        last_login = timezone.now()
+        place.owner.user.last_login = last_login
+        place.owner.user.save(update_fields=['last_login'])
+        self.assertEqual(SearchablePlace.objects.get(place=place).owner_last_login, last_login)
+
+    def test_deleted_place(self):
+        place = PlaceFactory()
+        place.deleted_on = timezone.now()
+        place.save()
+        self.assertFalse(SearchablePlace.objects.filter(place=place).exists())
+
+        place.deleted_on = None
+        place.save()
+        self.assertTrue(SearchablePlace.objects.filter(place=place).exists())
+
+        Place.all_objects.filter(pk=place.pk).delete()
+        self.assertFalse(SearchablePlace.objects.filter(place_id=place.pk).exists())
+
+    def test_refresh(self):
+        profile = ProfileFactory()
+        places = [PlaceFactory(owner=profile), PlaceFactory(owner=profile)]
+        # Bulk updates do not send signals; the copies are expected to be
+        # brought up to date explicitly.
+        Place.all_objects.filter(owner=profile).update(available=False)
+        self.assertEqual(SearchablePlace.objects.filter(owner=profile, available=True).count(), 2)
+        SearchablePlace.refresh(owner=profile)
+        self.assertEqual(SearchablePlace.objects.filter(owner=profile, available=True).count(), 0)
+        self.assertEqual(
+            set(SearchablePlace.objects.filter(owner=profile).values_list('place_id', flat=True)),
+            {place.pk for place in places})
@@ -0,0 +1,51 @@
+from unittest.mock import patch
+
+from django.conf import settings
+from django.core.cache import cache
+from django.test import TestCase, override_settings, tag
+
+from core.models import SiteConfiguration
+
+
+@tag('models')
+class SiteConfigurationModelTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        SiteConfiguration._local_copy = None
+        self.addCleanup(cache.clear)
+        self.addCleanup(setattr, SiteConfiguration, '_local_copy', None)
+
+    def test_local_copy(self):
+        config = SiteConfiguration.get_solo()
+        with patch.object(SiteConfiguration, 'get_version') as mock_get_version:
+            with self.assertNumQueries(0):
+                self.assertIs(SiteConfiguration.get_solo(), config)
+            mock_get_version.assert_not_called()
+
+    @patch.object(SiteConfiguration, 'LOCAL_COPY_TTL', 0)
+    def test_local_copy_verification(self):
+        config = SiteConfiguration.get_solo()
+        # When the version did not change, the local copy is expected to be kept.
+        self.assertIs(SiteConfiguration.get_solo(), config)
+        # When the version was changed by another process, a fresh copy
+        # is expected to be obtained.
+        cache.incr(SiteConfiguration.VERSION_CACHE_KEY)
+        fresh_config = SiteConfiguration.get_solo()
+        self.assertIsNot(fresh_config, config)
+        self.assertEqual(fresh_config.pk, config.pk)
+        self.assertIs(SiteConfiguration.get_solo(), fresh_config)
+
+    def test_save(self):
+        config = SiteConfiguration.get_solo()
+        version = SiteConfiguration.get_version()
+        config.site_name = "Test Servo"
+        config.save()
+        self.assertGreater(SiteConfiguration.get_version(), version)
+        self.assertEqual(SiteConfiguration.get_solo().site_name, "Test Servo")
+
+    @override_settings(CACHES=settings.TEST_CACHES)
+    def test_no_cache(self):
+        self.assertIsNone(SiteConfiguration.get_version())
+        config = SiteConfiguration.get_solo()
+        self.assertIsNot(SiteConfiguration.get_solo(), config)
+        self.assertIsNone(SiteConfiguration._local_copy)
@@ -3,14 +3,15 @@ import string
 from collections import namedtuple
 from typing import TypedDict
 
-from django.contrib.gis.geos import Point
+from django.contrib.gis.geos import MultiPolygon, Point, Polygon
 from django.template import Context, Template, TemplateSyntaxError
 from django.test import TestCase, tag
 
 from djgeojson.templatetags.geojson_tags import geojsonfeature
 
-from hosting.models import LocationConfidence
+from hosting.models import CountryBoundary, LocationConfidence
 from maps import SRID
+from maps.boundaries import forget_country_geometries
 
 MockResult = namedtuple('MockResult', 'address, country, country_code, city, lat, lng, latlng')
 
@@ -198,6 +199,28 @@ class IsLocationInCountryFilterTests(TestCase):
             }))
             self.assertEqual(page, str(True))
 
+    def test_location_with_country_boundary(self):
+        self.addCleanup(forget_country_geometries)
+        # A point in the sea, within the bounding box of the Netherlands.
+        sea_loc = Point(3.5, 53.5, srid=SRID)
+        page = self.template.render(Context({
+            'place': self.MockPlace('NL', sea_loc, LocationConfidence.EXACT),
+        }))
+        self.assertEqual(page, str(True))
+
+        CountryBoundary.objects.create(
+            country='NL',
+            geom=MultiPolygon(Polygon.from_bbox((3.9, 51.5, 5.0, 52.5)), srid=SRID))
+        # A point just outside of the boundary, such as on a coast cut off by the
+        # simplification of the boundary.
+        coast_loc = Point(3.895, 52.0, srid=SRID)
+        for loc, expected_result in [(self.loc, True), (coast_loc, True), (sea_loc, False)]:
+            with self.subTest(location=loc):
+                page = self.template.render(Context({
+                    'place': self.MockPlace('NL', loc, LocationConfidence.EXACT),
+                }))
+                self.assertEqual(page, str(expected_result))
+
 
 @tag('templatetags')
 class GeoURLHashFilterTests(TestCase):
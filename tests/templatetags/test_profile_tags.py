@@ -19,6 +19,7 @@ from django_countries.fields import Country
 from django_webtest import WebTest
 from factory import Faker
 
+from core.auth import AuthRole, authorize_in_bulk, get_precomputed_auth
 from hosting.models import Profile
 
 from ..factories import (
@@ -334,12 +335,14 @@ class AvatarDimensionFilterTests(TestCase):
         context = Context({'obj': profile})
 
         profile.avatar = 'b7044568.gif'
+        profile.update_avatar_metadata()
         page = self.template.render(context)
         self.assertEqual(page, "[height=\"100.00%\" data-wide]")
         page = self.template_with_size.render(context)
         self.assertEqual(page, "[height=\"76.54%\" data-wide]")
 
         profile.avatar = 'b7044569.gif'
+        profile.update_avatar_metadata()
         page = self.template.render(context)
         self.assertEqual(page, "[width=\"100.00%\" data-tall]")
         page = self.template_with_size.render(context)
@@ -698,6 +701,35 @@ class IsSupervisorOfFilterTests(TestCase):
             unsupervised_countries,
             f'list {unsupervised_countries}', {'sv': False, 'su': True})
 
+    def test_via_precomputed_authorization(self):
+        place = self.profile_complex_active.owned_places.first()
+        objects = [self.profile_simple, self.profile_complex_active, self.family_member, place]
+        test_data = [
+            (self.regular_user, 'regular', [False, False, False, False]),
+            (self.supervisor_user, 'NL supervisor', [False, True, False, True]),
+            (self.inactive_supervisor_user, 'inactive NL supervisor', [False, False, False, False]),
+            (self.supervisor_3c_user, 'not NL supervisor', [False, False, False, False]),
+            (self.admin_user, 'superuser', [True, True, True, True]),
+        ]
+        for user, user_tag, expected_results in test_data:
+            authorize_in_bulk(user, objects)
+            for obj, expected_result in zip(objects, expected_results):
+                with self.subTest(user=user_tag, obj=repr(obj)):
+                    with self.assertNumQueries(0):
+                        page = self.template.render(Context({'person': user, 'obj': obj}))
+                    self.assertEqual(page, str(expected_result))
+        self.assertEqual(
+            get_precomputed_auth(self.supervisor_user, self.profile_complex_active).role,
+            AuthRole.SUPERVISOR)
+        self.assertEqual(get_precomputed_auth(self.admin_user, place).role, AuthRole.ADMIN)
+        self.assertEqual(
+            get_precomputed_auth(self.profile_complex_active.user, place),
+            None)
+        authorize_in_bulk(self.profile_complex_active.user, objects)
+        self.assertEqual(
+            get_precomputed_auth(self.profile_complex_active.user, place).role,
+            AuthRole.OWNER)
+
     def test_list_of_invalid_objects(self):
         # The expected result for any user (including supervisor) is False.
         # This is because when a list is given, it should contain country
@@ -0,0 +1,103 @@
+import json
+
+from django.contrib.auth.models import Group
+from django.contrib.gis.geos import Point
+from django.test import SimpleTestCase, TestCase, tag
+from django.urls import reverse
+from django.utils import timezone
+
+from maps import SRID
+from maps.compact import (
+    COMPACT_CONTENT_TYPE, decode_compact_collection, iter_compact_collection,
+)
+from maps.geojson import iter_feature_collection
+
+from .factories import PlaceFactory, UserFactory
+
+
+@tag('utils', 'geo')
+class CompactEncodingTests(SimpleTestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.rows = [
+            {
+                'id': 1000 + i * 7,
+                'location': Point(-70.5 + i * 3.25, 12.125 - i * 30, srid=SRID),
+                'city': ["Ĉikago", "Zagreb", None][i % 3],
+                'checked': i % 2 == 0,
+            }
+            for i in range(9)
+        ]
+
+    @staticmethod
+    def properties(row):
+        return {'url': f"/ejo/{row['id']}/", 'city': row['city'], 'checked': row['checked']}
+
+    def test_round_trip(self):
+        for chunk_size in (1, 4, 100):
+            with self.subTest(chunk_size=chunk_size):
+                data = b''.join(iter_compact_collection(
+                    self.rows, 'location', self.properties, ['url', 'city', 'checked'],
+                    url_templates={'url': "/ejo/{pk}/"}, precision=3, chunk_size=chunk_size))
+                # The result is expected to be the same as the equivalent GeoJSON.
+                expected = json.loads(b''.join(iter_feature_collection(
+                    self.rows, 'location', self.properties, precision=3)))
+                del expected['crs']
+                self.assertEqual(decode_compact_collection(data), expected)
+
+    def test_size(self):
+        rows = self.rows * 50
+        compact = b''.join(iter_compact_collection(
+            rows, 'location', self.properties, ['url', 'city', 'checked'],
+            url_templates={'url': "/ejo/{pk}/"}, precision=2))
+        geojson = b''.join(iter_feature_collection(rows, 'location', self.properties, precision=2))
+        self.assertLess(len(compact) * 10, len(geojson))
+
+    def test_invalid_data(self):
+        with self.assertRaises(ValueError):
+            decode_compact_collection(b'{"type":"FeatureCollection"}')
+
+
+@tag('views', 'geo')
+class CompactMapDataViewsTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.place = PlaceFactory(country='NL', available=True)
+        cls.place.visibility['online_public'] = True
+        cls.place.visibility.save()
+
+    def test_world_map_data(self):
+        self.client.force_login(UserFactory(profile=None))
+        url = reverse('world_map_public_data')
+        response = self.client.get(url, {'format': 'compact'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], COMPACT_CONTENT_TYPE)
+        data = decode_compact_collection(b''.join(response.streaming_content))
+        geojson = json.loads(b''.join(self.client.get(url).streaming_content))
+        self.assertEqual(len(data['features']), 1)
+        self.assertEqual(data['features'], geojson['features'])
+
+        response = self.client.get(url, {'format': 'xml'})
+        self.assertEqual(response.status_code, 400)
+
+    def test_country_map_data(self):
+        user = UserFactory(profile=None)
+        Group.objects.get_or_create(name='NL')[0].user_set.add(user)
+        self.client.force_login(user)
+        response = self.client.get(
+            reverse('country_map_data', kwargs={'country_code': 'NL'}), {'format': 'compact'})
+        self.assertEqual(response.status_code, 200)
+        # The version of the data is expected to be given for the requests of
+        # the changes since then.
+        self.assertLess(int(response['X-Changes-Version']), timezone.now().timestamp() * 10**6)
+        data = decode_compact_collection(b''.join(response.streaming_content))
+        self.assertEqual(len(data['features']), 1)
+        feature = data['features'][0]
+        self.assertEqual(feature['id'], self.place.pk)
+        self.assertAlmostEqual(feature['geometry']['coordinates'][0], self.place.location.x, places=6)
+        self.assertAlmostEqual(feature['geometry']['coordinates'][1], self.place.location.y, places=6)
+        self.assertEqual(feature['properties']['checked'], False)
+        self.assertEqual(
+            feature['properties']['owner_full_name'],
+            self.place.owner.get_fullname_display(non_empty=True))
@@ -0,0 +1,131 @@
+from django.contrib.auth.models import Group
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, tag
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from maps.versions import bump_data_version, get_data_version
+
+from .factories import PlaceFactory, UserFactory
+
+
+@tag('geo')
+class DataVersionTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.place = PlaceFactory(country='NL', available=True)
+        cls.place.visibility['online_public'] = True
+        cls.place.visibility.save()
+
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+
+    def test_bump(self):
+        versions = {code: get_data_version(code) for code in (None, 'NL', 'FR')}
+        self.assertIsNotNone(versions[None])
+        self.assertEqual(get_data_version('NL'), versions['NL'])
+        bump_data_version(['NL'])
+        self.assertEqual(get_data_version(), versions[None] + 1)
+        self.assertEqual(get_data_version('NL'), versions['NL'] + 1)
+        self.assertEqual(get_data_version('FR'), versions['FR'])
+
+    def test_signals(self):
+        versions = {code: get_data_version(code) for code in (None, 'NL', 'FR')}
+        with self.captureOnCommitCallbacks(execute=True):
+            self.place.city = "Utrecht"
+            self.place.save()
+            # The versions are expected to be kept until the change is committed.
+            self.assertEqual(get_data_version(), versions[None])
+            self.assertEqual(get_data_version('NL'), versions['NL'])
+        self.assertGreater(get_data_version(), versions[None])
+        self.assertGreater(get_data_version('NL'), versions['NL'])
+        self.assertEqual(get_data_version('FR'), versions['FR'])
+
+        # The change of the owner's data is expected to affect the place's country.
+        versions = {code: get_data_version(code) for code in (None, 'NL')}
+        with self.captureOnCommitCallbacks(execute=True):
+            self.place.owner.first_name = "Klara"
+            self.place.owner.save()
+        self.assertGreater(get_data_version('NL'), versions['NL'])
+
+        versions = {code: get_data_version(code) for code in ('NL', 'FR')}
+        with self.captureOnCommitCallbacks(execute=True):
+            self.place.visibility['online_public'] = False
+            self.place.visibility.save()
+        self.assertGreater(get_data_version('NL'), versions['NL'])
+        self.assertEqual(get_data_version('FR'), versions['FR'])
+
+        # A place moved to another country is expected to affect both countries.
+        versions = {code: get_data_version(code) for code in ('NL', 'FR')}
+        with self.captureOnCommitCallbacks(execute=True):
+            self.place.country = 'FR'
+            self.place.save()
+        self.assertGreater(get_data_version('NL'), versions['NL'])
+        self.assertGreater(get_data_version('FR'), versions['FR'])
+
+        # A change which is not committed (for example, rolled back) is expected
+        # to keep the versions.
+        versions = {code: get_data_version(code) for code in (None, 'FR')}
+        with self.captureOnCommitCallbacks(execute=False) as callbacks:
+            self.place.city = "Lille"
+            self.place.save()
+        self.assertTrue(callbacks)
+        self.assertEqual(get_data_version(), versions[None])
+        self.assertEqual(get_data_version('FR'), versions['FR'])
+
+    def test_conditional_world_map_data(self):
+        user = UserFactory(profile=None)
+        self.client.force_login(user)
+        url = reverse('world_map_public_data')
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('no-cache', response['Cache-Control'])
+        etag = response['ETag']
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['ETag'], etag)
+        # The data in the compact format is expected to have its own ETag.
+        response = self.client.get(url, {'format': 'compact'}, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        # The anonymous visitors are expected to see different data.
+        self.client.logout()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+        self.client.force_login(user)
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.place.save()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_conditional_country_map_data(self):
+        user = UserFactory(profile=None)
+        Group.objects.get_or_create(name='NL')[0].user_set.add(user)
+        self.client.force_login(user)
+        url = reverse('country_map_data', kwargs={'country_code': 'NL'})
+        etag = self.client.get(url)['ETag']
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        # The places are expected not to be queried at all.
+        self.assertFalse([q for q in context.captured_queries if 'hosting_place' in q['sql']])
+
+        # A change in another country is expected to keep the data current.
+        with self.captureOnCommitCallbacks(execute=True):
+            PlaceFactory(country='FR')
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        with self.captureOnCommitCallbacks(execute=True):
+            PlaceFactory(country='NL')
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+        # Users who are not supervisors of the country are expected to be refused.
+        self.client.force_login(UserFactory(profile=None))
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertNotEqual(response.status_code, 304)
@@ -0,0 +1,67 @@
+import os
+import tempfile
+
+from django.test import SimpleTestCase, tag
+
+from core.datastore import FloatRowsFile, RecordsFile
+from hosting.countries import COUNTRIES_DATA
+from maps.data import COUNTRIES_GEO, geodata_from_row, geodata_to_row
+
+
+@tag('utils')
+class DataStoreTests(SimpleTestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.temp_dir.cleanup)
+
+    def test_records_file(self):
+        file_path = os.path.join(self.temp_dir.name, 'records.jsonl')
+        values = {
+            'NL': {'local_name': "Nederland", 'languages': ["nl-NL", "fy-NL"], 'population': 17231017},
+            'EO': {'local_name': "Esperantujo \"\\n\"", 'population': None},
+        }
+        RecordsFile.write(file_path, values)
+        records = RecordsFile(file_path)
+        self.assertEqual(list(records), ['NL', 'EO'])
+        self.assertEqual(len(records), 2)
+        self.assertEqual(records['EO'], values['EO'])
+        self.assertEqual(dict(records), values)
+        self.assertNotIn('ZZ', records)
+        self.assertEqual(records.get('ZZ', {}), {})
+        # Each access is expected to result in a new object.
+        records['NL']['population'] = 0
+        self.assertEqual(records['NL']['population'], 17231017)
+
+    def test_float_rows_file(self):
+        file_path = os.path.join(self.temp_dir.name, 'rows.bin')
+        geodata = {
+            'NL': {'bbox': {'northeast': [7.2275102, 53.7253321], 'southwest': [3.3316001, 50.7503838]},
+                   'center': [5.6343227, 52.2434979]},
+            'AQ': {'bbox': {'northeast': [180.0, -60.1086999], 'southwest': [-180.0, -90.0]},
+                   'center': [None, None]},
+            'UY': {'bbox': {'northeast': [-53.0779286, -30.0852149], 'southwest': [-58.4947351, -35.7824481]},
+                   'center': [-56.0180553, -32.8755548]},
+        }
+        FloatRowsFile.write(
+            file_path, {code: geodata_to_row(data) for code, data in geodata.items()}, width=6)
+        rows = FloatRowsFile(file_path, decode=geodata_from_row)
+        self.assertEqual(list(rows), ['NL', 'AQ', 'UY'])
+        self.assertEqual(dict(rows), geodata)
+        self.assertIn('AQ', rows)
+        self.assertNotIn('ZZ', rows)
+        with self.assertRaises(KeyError):
+            rows['ZZ']
+        self.assertEqual(list(FloatRowsFile(file_path)['NL']), geodata_to_row(geodata['NL']))
+
+        with self.assertRaises(ValueError):
+            FloatRowsFile.write(file_path, {'NL': [1.0, 2.0]}, width=6)
+        RecordsFile.write(file_path, {'NL': [1.0, 2.0]})
+        with self.assertRaises(ValueError):
+            len(FloatRowsFile(file_path))
+
+    def test_countries_data(self):
+        self.assertGreater(len(COUNTRIES_GEO), 240)
+        self.assertEqual(set(COUNTRIES_GEO.keys()), set(COUNTRIES_DATA.keys()))
+        self.assertEqual(list(COUNTRIES_GEO['NL']['bbox'].keys()), ['northeast', 'southwest'])
+        self.assertEqual(len(COUNTRIES_GEO['NL']['center']), 2)
+        self.assertEqual(COUNTRIES_DATA['NL']['local_name'], "Nederland")
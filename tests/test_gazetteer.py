@@ -0,0 +1,121 @@
+from unittest.mock import patch
+
+from django.contrib.gis.geos import Point as GeoPoint
+from django.test import TestCase, override_settings, tag
+from django.utils import translation
+
+from geocoder.opencage import OpenCageResult
+
+from hosting import gazetteer
+from hosting.gazetteer import (
+    Gazetteer, geocode_locally, normalize_name, reset_gazetteer,
+)
+from hosting.models import LocationType
+
+from .assertions import AdditionalAsserts
+from .factories import CountryRegionFactory, PlaceFactory, WhereaboutsFactory
+
+
+@tag('utils', 'geo')
+class GazetteerTests(AdditionalAsserts, TestCase):
+    def setUp(self):
+        reset_gazetteer()
+
+    def tearDown(self):
+        reset_gazetteer()
+
+    def test_normalize_name(self):
+        test_data = (
+            ("Kraków", "krakow"),
+            ("KRAKÓW", "krakow"),
+            ("  São   Paulo ", "sao paulo"),
+            ("Saint-Étienne", "saint etienne"),
+            ("Ĉeĥio", "cehio"),
+            ("Xi'an", "xi an"),
+            ("", ""),
+        )
+        for name, expected_value in test_data:
+            with self.subTest(name=name):
+                self.assertEqual(normalize_name(name), expected_value)
+
+    def test_country_names(self):
+        index = Gazetteer.build()
+        for name in ("Nederlando", "Netherlands", "nederlando", "Nederland"):
+            with self.subTest(name=name):
+                entry = index.lookup(name)
+                self.assertIsNotNone(entry)
+                self.assertEqual(entry.type, 'country')
+                self.assertEqual(entry.country_code, 'NL')
+        # Alternative names configured for the website are expected to be known.
+        entry = index.lookup("Great Britain")
+        self.assertIsNotNone(entry)
+        self.assertEqual(entry.country_code, 'GB')
+
+    def test_cities_and_regions(self):
+        region = CountryRegionFactory(
+            country='PL', iso_code='12', latin_code="Małopolskie", latin_name="")
+        WhereaboutsFactory(type=LocationType.REGION, name="MAŁOPOLSKIE", state='12', country='PL')
+        city = WhereaboutsFactory(type=LocationType.CITY, name="KRAKÓW", state='', country='PL')
+        index = Gazetteer.build()
+
+        entry = index.lookup("krakow")
+        self.assertIsNotNone(entry)
+        self.assertEqual(entry.type, 'city')
+        self.assertEqual(entry.name, "Kraków")
+        self.assertEqual(entry.center, tuple(city.center.coords))
+        # The restriction by country is expected to be respected.
+        self.assertIsNotNone(index.lookup("Kraków", 'PL'))
+        self.assertIsNone(index.lookup("Kraków", 'NL'))
+        # A qualified name is expected to be resolved.
+        self.assertEqual(index.lookup("Kraków, Pollando"), entry)
+        self.assertIsNone(index.lookup("Kraków, Nederlando"))
+        # A sufficiently long prefix of a single name is expected to be completed.
+        self.assertEqual(index.lookup("Krako"), entry)
+        self.assertIsNone(index.lookup("Kra"))
+
+        entry = index.lookup("Malopolskie")
+        self.assertIsNotNone(entry)
+        self.assertEqual(entry.type, 'state')
+        self.assertEqual(entry.name, region.latin_code)
+
+    def test_homonyms(self):
+        WhereaboutsFactory(type=LocationType.CITY, name="VARSOVIA", state='', country='CO')
+        WhereaboutsFactory(type=LocationType.CITY, name="VARSOVIA", state='', country='ES')
+        index = Gazetteer.build()
+        # Equally-ranked homonyms cannot be resolved locally.
+        self.assertIsNone(index.lookup("Varsovia"))
+        self.assertEqual(index.lookup("Varsovia", 'ES').country_code, 'ES')
+
+        PlaceFactory(city="Varsovia", country='CO', state_province="")
+        index = Gazetteer.build()
+        # The locality with more hosts is expected to win.
+        self.assertEqual(index.lookup("Varsovia").country_code, 'CO')
+
+    @patch('geocoder.base.requests.Session.get')
+    def test_geocode_locally(self, mock_get):
+        self.assertIsNone(geocode_locally(""))
+        WhereaboutsFactory(type=LocationType.CITY, name="ROTTERDAM", state='', country='NL')
+        with translation.override('eo'):
+            result = geocode_locally("Roterdam")
+            self.assertIsNone(result)
+            result = geocode_locally("Rotterdam")
+        mock_get.assert_not_called()
+        self.assertIs(type(result), OpenCageResult)
+        self.assertEqual(result.status, 'OK')
+        self.assertEqual(result.city, "Rotterdam")
+        self.assertEqual(result.country_code, 'NL')
+        self.assertEqual(result.address, "Rotterdam, Nederlando")
+        self.assertIsNotNone(result.bbox)
+        self.assertIs(type(result.point), GeoPoint)
+
+    @override_settings(LANGUAGE_CODE='eo')
+    def test_index_reset(self):
+        with patch.object(Gazetteer, 'build', wraps=Gazetteer.build) as mock_build:
+            geocode_locally("Nederlando")
+            geocode_locally("Belgio")
+            self.assertEqual(mock_build.call_count, 1)
+            # A change in the localities is expected to reset the index.
+            WhereaboutsFactory(type=LocationType.CITY, name="GENT", state='', country='BE')
+            self.assertIsNone(gazetteer._gazetteer)
+            self.assertIsNotNone(geocode_locally("Gent"))
+            self.assertEqual(mock_build.call_count, 2)
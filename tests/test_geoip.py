@@ -0,0 +1,95 @@
+import gzip
+import os
+import tempfile
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import SimpleTestCase, override_settings, tag
+
+from maps.geoip import IPLocation, geolocate_ip, reset_database, write_database
+
+from .assertions import AdditionalAsserts
+
+
+@tag('utils', 'geo')
+class GeoIPTests(AdditionalAsserts, SimpleTestCase):
+    ranges = (
+        ("1.0.0.0", "1.0.0.255", "AU", "Queensland", -27.4698, 153.0251),
+        ("1.0.1.0", "1.0.3.255", "CN", "Fujian", 26.0745, 119.2965),
+        ("1.0.4.0", "1.0.7.255", "CN", "Fujian", 26.0745, 119.2965),
+        ("188.166.0.0", "188.166.63.255", "NL", "North Holland", 52.3740, 4.8897),
+        ("2001:4860::", "2001:4860:ffff:ffff:ffff:ffff:ffff:ffff", "US", "", None, None),
+        ("10.0.0.0", "10.255.255.255", "ZZ", "", None, None),
+    )
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.database_path = os.path.join(self.temp_dir.name, 'geodata', 'ip_locations.bin')
+        settings_override = override_settings(GEOIP_DATABASE_PATH=self.database_path)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        reset_database()
+
+    def tearDown(self):
+        reset_database()
+        self.temp_dir.cleanup()
+
+    def test_missing_database(self):
+        self.assertIsNone(geolocate_ip("188.166.58.162"))
+
+    def test_lookup(self):
+        counts = write_database(self.ranges, self.database_path)
+        # Adjacent ranges with the same location are expected to be merged,
+        # and ranges with an unknown country to be ignored.
+        self.assertEqual(counts, (3, 1))
+
+        test_data = (
+            ("1.0.0.0", IPLocation('AU', "Queensland", -27.4698, 153.0251)),
+            ("1.0.0.255", IPLocation('AU', "Queensland", -27.4698, 153.0251)),
+            ("1.0.6.1", IPLocation('CN', "Fujian", 26.0745, 119.2965)),
+            ("188.166.58.162", IPLocation('NL', "North Holland", 52.374, 4.8897)),
+            ("::ffff:188.166.58.162", IPLocation('NL', "North Holland", 52.374, 4.8897)),
+            ("2001:4860:4860::8888", IPLocation('US', "", None, None)),
+            ("1.0.8.0", None),
+            ("0.0.0.1", None),
+            ("10.1.1.1", None),
+            ("2001:4861::1", None),
+            ("not-an-address", None),
+            ("", None),
+        )
+        for address, expected_location in test_data:
+            with self.subTest(ip=address):
+                location = geolocate_ip(address)
+                if expected_location is None:
+                    self.assertIsNone(location)
+                    continue
+                self.assertEqual(location.country, expected_location.country)
+                self.assertEqual(location.state, expected_location.state)
+                if expected_location.latitude is None:
+                    self.assertEqual(location.xy, [])
+                    self.assertIsNone(location.point)
+                else:
+                    self.assertAlmostEqual(location.latitude, expected_location.latitude, places=3)
+                    self.assertAlmostEqual(location.longitude, expected_location.longitude, places=3)
+                    self.assertIsNotNone(location.point)
+
+    def test_update_command(self):
+        source_path = os.path.join(self.temp_dir.name, 'dbip-city-lite.csv.gz')
+        with gzip.open(source_path, 'wt', encoding='utf-8') as f:
+            f.write('188.166.0.0,188.166.63.255,EU,NL,"North Holland",Amsterdam,52.374,4.88969\n')
+            f.write('2a03:b0c0::,2a03:b0c0:ffff:ffff:ffff:ffff:ffff:ffff,EU,DE,Hesse,Frankfurt,50.1109,8.68213\n')
+        out = StringIO()
+        call_command('update_ip_geodata', source_path, stdout=out)
+        self.assertIn("1 IPv4 and 1 IPv6 ranges", out.getvalue())
+        self.assertEqual(geolocate_ip("188.166.58.162").state, "North Holland")
+        self.assertEqual(geolocate_ip("2a03:b0c0:3:d0::1a:1").country, 'DE')
+
+        # A regenerated database is expected to replace the current one.
+        source_path = os.path.join(self.temp_dir.name, 'dbip-country-lite.csv')
+        with open(source_path, 'w', encoding='utf-8') as f:
+            f.write('188.166.0.0,188.166.63.255,BE\n')
+        call_command('update_ip_geodata', source_path, stdout=out)
+        location = geolocate_ip("188.166.58.162")
+        self.assertEqual(location.country, 'BE')
+        self.assertEqual(location.state, "")
+        self.assertIsNone(geolocate_ip("2a03:b0c0:3:d0::1a:1"))
@@ -0,0 +1,88 @@
+import json
+
+from django.contrib.auth.models import Group
+from django.contrib.gis.geos import Point
+from django.test import SimpleTestCase, TestCase, tag
+from django.urls import reverse
+
+from maps import SRID
+from maps.geojson import iter_feature_collection, url_template
+
+from .factories import PlaceFactory, UserFactory
+
+
+@tag('utils', 'geo')
+class FeatureCollectionTests(SimpleTestCase):
+    def test_url_template(self):
+        template = url_template('place_detail')
+        self.assertIn('{pk}', template)
+        self.assertEqual(template.format(pk=4321), reverse('place_detail', kwargs={'pk': 4321}))
+
+    def test_serialization(self):
+        rows = [
+            {'id': i, 'location': Point(i + 0.123456, -i - 0.654321, srid=SRID), 'name': f"Ĉambro {i}"}
+            for i in range(7)
+        ]
+        for chunk_size in (1, 3, 7, 100):
+            with self.subTest(chunk_size=chunk_size):
+                chunks = list(iter_feature_collection(
+                    rows, 'location', lambda row: {'name': row['name']},
+                    precision=2, chunk_size=chunk_size))
+                # The header and the footer are expected to be separate pieces.
+                self.assertEqual(len(chunks), 2 + -(-len(rows) // chunk_size))
+                data = json.loads(b''.join(chunks))
+                self.assertEqual(data['type'], "FeatureCollection")
+                self.assertEqual(len(data['features']), len(rows))
+                self.assertEqual(data['features'][3], {
+                    'type': "Feature",
+                    'id': 3,
+                    'geometry': {'type': "Point", 'coordinates': [3.12, -3.65]},
+                    'properties': {'name': "Ĉambro 3"},
+                })
+
+        data = json.loads(b''.join(iter_feature_collection([], 'location', dict)))
+        self.assertEqual(data['features'], [])
+
+
+@tag('views', 'geo')
+class MapDataViewsTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.place = PlaceFactory(country='NL', available=True)
+        cls.place.visibility['online_public'] = True
+        cls.place.visibility.save()
+
+    def test_world_map_data(self):
+        self.client.force_login(UserFactory(profile=None))
+        response = self.client.get(reverse('world_map_public_data'))
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        data = json.loads(b''.join(response.streaming_content))
+        feature = next(f for f in data['features'] if f['id'] == self.place.pk)
+        owner = self.place.owner
+        self.assertEqual(feature['properties'], {
+            'city': self.place.city,
+            'url': self.place.get_absolute_url(),
+            'owner_name': owner.name or str(owner.INCOGNITO),
+            'owner_avatar': owner.avatar_url,
+            'owner_avatar_params': 'width="100.00%" height="100.00%" data-square',
+        })
+        self.assertEqual(
+            feature['geometry']['coordinates'],
+            [round(self.place.location.x, 2), round(self.place.location.y, 2)])
+
+    def test_country_map_data(self):
+        user = UserFactory(profile=None)
+        Group.objects.get_or_create(name='NL')[0].user_set.add(user)
+        self.client.force_login(user)
+        response = self.client.get(reverse('country_map_data', kwargs={'country_code': 'NL'}))
+        self.assertEqual(response.status_code, 200)
+        data = json.loads(b''.join(response.streaming_content))
+        self.assertEqual(len(data['features']), 1)
+        self.assertEqual(data['features'][0]['id'], self.place.pk)
+        self.assertEqual(data['features'][0]['properties'], {
+            'owner_full_name': self.place.owner.get_fullname_display(non_empty=True),
+            'checked': False,
+            'confirmed': False,
+            'in_book': self.place.in_book,
+        })
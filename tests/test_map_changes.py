@@ -0,0 +1,120 @@
+from datetime import timedelta
+from unittest.mock import patch
+
+from django.contrib.auth.models import Group
+from django.test import TestCase, tag
+from django.urls import reverse
+from django.utils import timezone
+
+from hosting.models import Place, PlaceMapChange, Profile
+from maps.views import CountryChangesView
+
+from .factories import PlaceFactory, UserFactory
+
+
+@tag('views', 'geo')
+@patch.object(CountryChangesView, 'safety_margin', timedelta(0))
+class CountryChangesViewTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.supervisor = UserFactory(profile=None)
+        Group.objects.get_or_create(name='NL')[0].user_set.add(cls.supervisor)
+        cls.url = reverse('country_map_changes', kwargs={'country_code': 'NL'})
+
+    def setUp(self):
+        self.places = [PlaceFactory(country='NL', available=True, in_book=False) for _ in range(3)]
+        for place in self.places:
+            place.visibility['online_public'] = True
+            place.visibility.save()
+        self.client.force_login(self.supervisor)
+
+    def get_changes(self, since=None):
+        response = self.client.get(self.url, {'since': since} if since else {})
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_complete_data(self):
+        data = self.get_changes()
+        self.assertTrue(data['complete'])
+        self.assertEqual(
+            sorted(feature['id'] for feature in data['added']),
+            sorted(place.pk for place in self.places))
+        self.assertEqual(data['updated'], [])
+        self.assertEqual(data['removed'], [])
+
+        # A version preceding the retention period is expected to result in
+        # the complete data.
+        outdated = timezone.now() - PlaceMapChange.RETENTION - timedelta(days=1)
+        data = self.get_changes(since=int(outdated.timestamp() * 10**6))
+        self.assertTrue(data['complete'])
+
+        response = self.client.get(self.url, {'since': 'yesterday'})
+        self.assertEqual(response.status_code, 400)
+
+    def test_changes(self):
+        version = self.get_changes()['version']
+        data = self.get_changes(since=version)
+        self.assertFalse(data['complete'])
+        self.assertEqual((data['added'], data['updated'], data['removed']), ([], [], []))
+
+        checked_place, hidden_place, moved_place = self.places
+        checked_place.set_check_status(self.supervisor)
+        hidden_place.visibility['online_public'] = False
+        hidden_place.visibility.save()
+        moved_place.country = 'BE'
+        moved_place.save()
+        new_place = PlaceFactory(country='NL', available=True, in_book=False)
+        new_place.visibility['online_public'] = True
+        new_place.visibility.save()
+        PlaceFactory(country='FR')
+
+        data = self.get_changes(since=version)
+        self.assertEqual([feature['id'] for feature in data['added']], [new_place.pk])
+        self.assertEqual([feature['id'] for feature in data['updated']], [checked_place.pk])
+        self.assertIs(data['updated'][0]['properties']['checked'], True)
+        self.assertEqual(data['removed'], sorted([hidden_place.pk, moved_place.pk]))
+
+        version = data['version']
+        new_place_pk = new_place.pk
+        new_place.delete()
+        data = self.get_changes(since=version)
+        self.assertEqual(data['removed'], [new_place_pk])
+
+    def test_owner_change(self):
+        version = self.get_changes()['version']
+        owner = self.places[0].owner
+        owner.last_name = "Zamenhof"
+        owner.save()
+        data = self.get_changes(since=version)
+        self.assertEqual([feature['id'] for feature in data['updated']], [self.places[0].pk])
+        self.assertEqual(
+            data['updated'][0]['properties']['owner_full_name'],
+            owner.get_fullname_display(non_empty=True))
+
+    def test_restored_profile(self):
+        place = self.places[0]
+        deleted_on = timezone.now() - timedelta(hours=1)
+        Place.all_objects.filter(pk=place.pk).update(deleted_on=deleted_on)
+        Profile.all_objects.filter(pk=place.owner_id).update(deleted_on=deleted_on)
+        version = self.get_changes()['version']
+        self.client.force_login(UserFactory(profile=None, is_superuser=True))
+        self.client.post(
+            reverse('profile_restore', kwargs={'pk': place.owner_id, 'slug': place.owner.autoslug}))
+        self.client.force_login(self.supervisor)
+        data = self.get_changes(since=version)
+        self.assertEqual([feature['id'] for feature in data['updated']], [place.pk])
+
+    def test_prune(self):
+        PlaceMapChange.objects.all().delete()
+        PlaceMapChange.record([(place.pk, 'NL') for place in self.places])
+        PlaceMapChange.objects.filter(place_id=self.places[0].pk).update(
+            changed_on=timezone.now() - PlaceMapChange.RETENTION - timedelta(days=1))
+        self.assertEqual(PlaceMapChange.prune(), 1)
+        self.assertEqual(
+            set(PlaceMapChange.objects.values_list('place_id', flat=True)),
+            {place.pk for place in self.places[1:]})
+
+    def test_unauthorized_user(self):
+        self.client.force_login(UserFactory(profile=None))
+        response = self.client.get(self.url)
+        self.assertNotEqual(response.status_code, 200)
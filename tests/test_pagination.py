@@ -0,0 +1,115 @@
+import random
+from array import array
+
+from django.contrib.gis.geos import Point as GeoPoint
+from django.db.models import F
+from django.test import TestCase, tag
+from django.utils import timezone
+
+from hosting.models import Place
+from hosting.pagination import KeysetSequence, dump_cursor, load_cursor
+from maps import SRID
+from maps.functions import NearestDistance
+
+from .assertions import AdditionalAsserts
+from .factories import PlaceFactory
+
+
+@tag('utils', 'search')
+class KeysetPaginationTests(AdditionalAsserts, TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        now = timezone.now()
+        for i in range(23):
+            place = PlaceFactory(country=random.choice(['NL', 'BE', 'FR', 'DE']))
+            place.owner.user.last_login = (
+                None if i % 4 == 0
+                else now - timezone.timedelta(days=random.randint(0, 5))
+            )
+            place.owner.user.save(update_fields=['last_login'])
+
+    def paginate(self, queryset, first_page=7, per_page=5, orphans=2):
+        """
+        Emulates the lazy paginator of el_pagination, following the cursors
+        from page to page. Returns the list of IDs and the number of pages.
+        """
+        ids, cursor_token, page_number = [], None, 1
+        while True:
+            sequence = KeysetSequence(queryset, load_cursor(cursor_token, 'test'), orphans=orphans)
+            page_size = first_page if page_number == 1 else per_page
+            # The start of the slice is expected to be ignored when there is a cursor.
+            start = 0 if page_number == 1 else 10_000
+            items = sequence[start:start + page_size + orphans + 1]
+            if len(items) > page_size + orphans:
+                items = items[:page_size]
+            ids.extend(place.pk for place in items)
+            if sequence.next_cursor is None:
+                return ids, page_number
+            cursor_token = dump_cursor(sequence.next_cursor, 'test')
+            page_number += 1
+
+    def test_cursor_token(self):
+        values = [12.5, None, timezone.now(), 42]
+        token = dump_cursor(values, 'abc')
+        self.assertEqual(load_cursor(token, 'abc'), values)
+        self.assertIsNone(load_cursor(token, 'def'))
+        self.assertIsNone(load_cursor(token[:-2], 'abc'))
+        self.assertIsNone(load_cursor(None))
+
+    def test_ordering_by_last_login(self):
+        queryset = Place.objects.order_by(F('owner__user__last_login').desc(nulls_last=True), '-id')
+        ids, pages = self.paginate(queryset)
+        self.assertEqual(ids, list(queryset.values_list('pk', flat=True)))
+        self.assertEqual(pages, 4)
+
+    def test_ordering_by_distance(self):
+        origin = GeoPoint(4.4631727, 51.9228958, srid=SRID)
+        queryset = Place.objects.order_by(NearestDistance('location', origin), 'id')
+        ids, pages = self.paginate(queryset)
+        self.assertEqual(ids, list(queryset.values_list('pk', flat=True)))
+
+    def test_without_cursor(self):
+        queryset = Place.objects.order_by('-id')
+        sequence = KeysetSequence(queryset)
+        self.assertTrue(sequence.exists())
+        self.assertEqual(sequence.count(), 23)
+        self.assertEqual(
+            [place.pk for place in sequence[3:6]],
+            list(queryset.values_list('pk', flat=True)[3:6]))
+        # A cursor not matching the ordering is expected to be ignored.
+        sequence = KeysetSequence(queryset, cursor=[1, 2, 3])
+        self.assertIsNone(sequence.cursor)
+
+    def test_snapshot(self):
+        queryset = Place.objects.order_by('-id')
+        ids = list(queryset.values_list('pk', flat=True))
+        snapshot = array('I', ids)
+        sequence = KeysetSequence(Place.objects.all(), snapshot=snapshot, snapshot_complete=True)
+        with self.assertNumQueries(0):
+            self.assertTrue(sequence.exists())
+            self.assertEqual(sequence.count(), 23)
+        with self.assertNumQueries(1):
+            self.assertEqual([place.pk for place in sequence[5:12]], ids[5:12])
+        # Places removed since the snapshot was taken are expected to be skipped.
+        Place.all_objects.filter(pk=ids[6]).delete()
+        self.assertEqual([place.pk for place in sequence[5:12]], ids[5:6] + ids[7:12])
+
+    def test_loader(self):
+        queryset = Place.objects.order_by('-id')
+        ids = list(queryset.values_list('pk', flat=True))
+        sequence = KeysetSequence(
+            queryset.only('id'), orphans=2, loader=lambda rows: [f"P{row.pk}" for row in rows])
+        # The loaded objects are expected to be returned, while the cursor is
+        # expected to be computed from the rows.
+        self.assertEqual(sequence[0:8], [f"P{pk}" for pk in ids[0:8]])
+        self.assertEqual(sequence.next_cursor, [ids[4]])
+
+    def test_incomplete_snapshot(self):
+        queryset = Place.objects.order_by('-id')
+        ids = list(queryset.values_list('pk', flat=True))
+        sequence = KeysetSequence(queryset, snapshot=array('I', ids[:10]), orphans=2)
+        self.assertEqual([place.pk for place in sequence[0:8]], ids[0:8])
+        self.assertEqual(sequence.next_cursor, [ids[4]])
+        # Beyond the end of the snapshot, the queryset is expected to be used.
+        sequence = KeysetSequence(queryset, load_cursor(dump_cursor([ids[9]])), snapshot=array('I', ids[:10]))
+        self.assertEqual([place.pk for place in sequence[10:15]], ids[10:15])
@@ -0,0 +1,108 @@
+import gzip
+import json
+import os
+import tempfile
+
+from django.test import TestCase, override_settings, tag
+from django.urls import reverse
+
+import brotli
+
+from maps.compact import COMPACT_CONTENT_TYPE, decode_compact_collection
+from maps.snapshots import (
+    MANIFEST_NAME, build_snapshots, get_snapshot, manifest_key,
+)
+from maps.views import PublicDataView
+
+from .factories import PlaceFactory
+
+
+@tag('views', 'geo')
+class MapSnapshotsTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        for _ in range(3):
+            PlaceFactory(available=True)
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.temp_dir.cleanup)
+        settings_override = override_settings(
+            MAP_SNAPSHOTS_ROOT=self.temp_dir.name, MAP_SNAPSHOTS_ACCEL_PREFIX=None)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        self.url = reverse('world_map_public_data')
+
+    def read_snapshot(self, file_name):
+        with open(os.path.join(self.temp_dir.name, file_name), 'rb') as f:
+            return f.read()
+
+    def test_build(self):
+        self.assertIsNone(get_snapshot('anonymous'))
+        manifest = build_snapshots()
+        self.assertEqual(
+            set(manifest.keys()),
+            {'anonymous', 'authenticated', 'anonymous.compact', 'authenticated.compact'})
+        self.assertEqual(
+            json.loads(self.read_snapshot(MANIFEST_NAME)),
+            manifest)
+        for variant, authenticated in (('anonymous', False), ('authenticated', True)):
+            for data_format in ('geojson', 'compact'):
+                with self.subTest(variant=variant, format=data_format):
+                    snapshot = get_snapshot(variant, data_format)
+                    self.assertEqual(snapshot, manifest[manifest_key(variant, data_format)])
+                    content = PublicDataView.render_data(authenticated=authenticated, data_format=data_format)
+                    self.assertEqual(gzip.decompress(self.read_snapshot(snapshot['name'] + '.gz')), content)
+                    self.assertEqual(brotli.decompress(self.read_snapshot(snapshot['name'] + '.br')), content)
+                    self.assertEqual(snapshot['size'], len(content))
+        # Building the snapshots again without changes is expected to result
+        # in the same files.
+        self.assertEqual(
+            {variant: info['name'] for variant, info in build_snapshots().items()},
+            {variant: info['name'] for variant, info in manifest.items()})
+
+    def test_response(self):
+        manifest = build_snapshots()
+        content = PublicDataView.render_data(authenticated=False)
+        test_data = (
+            ('gzip, deflate, br', 'br'),
+            ('gzip, deflate', 'gzip'),
+            ('identity', None),
+        )
+        for accept_encoding, expected_encoding in test_data:
+            with self.subTest(accept_encoding=accept_encoding):
+                response = self.client.get(self.url, HTTP_ACCEPT_ENCODING=accept_encoding)
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(response['ETag'], manifest['anonymous']['etag'])
+                self.assertEqual(response.get('Content-Encoding'), expected_encoding)
+                self.assertIn('Accept-Encoding', response['Vary'])
+                body = b''.join(response.streaming_content) if response.streaming else response.content
+                decompress = {'br': brotli.decompress, 'gzip': gzip.decompress, None: bytes}
+                self.assertEqual(decompress[expected_encoding](body), content)
+
+        response = self.client.get(
+            self.url, HTTP_ACCEPT_ENCODING='gzip', HTTP_IF_NONE_MATCH=manifest['anonymous']['etag'])
+        self.assertEqual(response.status_code, 304)
+
+        with override_settings(MAP_SNAPSHOTS_ACCEL_PREFIX='/internal/maps/'):
+            response = self.client.get(self.url, HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(
+            response['X-Accel-Redirect'],
+            '/internal/maps/' + manifest['anonymous']['name'] + '.gz')
+
+    def test_compact_response(self):
+        manifest = build_snapshots()
+        response = self.client.get(self.url, {'format': 'compact'}, HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], COMPACT_CONTENT_TYPE)
+        self.assertEqual(response['ETag'], manifest['anonymous.compact']['etag'])
+        body = b''.join(response.streaming_content) if response.streaming else response.content
+        self.assertEqual(
+            decode_compact_collection(gzip.decompress(body))['features'],
+            json.loads(PublicDataView.render_data(authenticated=False))['features'])
+
+    def test_authenticated_variant(self):
+        manifest = build_snapshots()
+        self.client.force_login(PlaceFactory().owner.user)
+        response = self.client.get(self.url, HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(response['ETag'], manifest['authenticated']['etag'])
@@ -0,0 +1,77 @@
+import gzip
+import json
+import os
+import tempfile
+
+from django.test import TestCase, override_settings, tag
+from django.urls import reverse
+
+from core.models import SiteConfiguration
+from maps.styles import build_styles, get_style_url, style_names
+
+
+@tag('views', 'geo')
+class MapStylesTests(TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.temp_dir.cleanup)
+        settings_override = override_settings(
+            MAP_STYLES_ROOT=self.temp_dir.name, MAP_STYLES_URL='/static/map-styles/',
+            MAP_STYLES_LANGUAGES=['eo', 'en'])
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+    def read_style(self, file_name):
+        with open(os.path.join(self.temp_dir.name, file_name), 'rb') as f:
+            return f.read()
+
+    def test_build(self):
+        self.assertIsNone(get_style_url('positron', 'eo'))
+        manifest = build_styles(api_key='Test-Key-1')
+        self.assertEqual(
+            set(manifest.keys()),
+            {f'{style}.{lang}' for style in style_names() for lang in ('eo', 'en')})
+        self.assertIn('positron', style_names())
+        for style in style_names():
+            with self.subTest(style=style):
+                content = self.read_style(manifest[f'{style}.eo'])
+                json.loads(content)
+                self.assertEqual(gzip.decompress(self.read_style(manifest[f'{style}.eo'] + '.gz')), content)
+                self.assertTrue(os.path.exists(os.path.join(self.temp_dir.name, manifest[f'{style}.eo'] + '.br')))
+        content = self.read_style(manifest['positron.en']).decode()
+        self.assertIn('key=Test-Key-1', content)
+        self.assertIn('name:en', content)
+        self.assertNotIn('name:eo', content)
+        self.assertEqual(
+            get_style_url('positron', 'eo'),
+            '/static/map-styles/' + manifest['positron.eo'])
+        self.assertIsNone(get_style_url('positron', 'de'))
+
+        # The same content is expected to result in the same files.
+        self.assertEqual(build_styles(api_key='Test-Key-1'), manifest)
+
+    def test_rebuild_on_key_change(self):
+        config = SiteConfiguration.get_solo()
+        config.mapping_services_api_keys = {'openmaptiles': 'Test-Key-1'}
+        config.save()
+        # No styles are expected to be built when not done before.
+        self.assertIsNone(get_style_url('positron', 'eo'))
+
+        manifest = build_styles()
+        self.assertIn('key=Test-Key-1', self.read_style(manifest['positron.eo']).decode())
+        config.mapping_services_api_keys = {'openmaptiles': 'Test-Key-2'}
+        config.save()
+        url = get_style_url('positron', 'eo')
+        self.assertNotEqual(url, '/static/map-styles/' + manifest['positron.eo'])
+        self.assertIn('key=Test-Key-2', self.read_style(url.rsplit('/', 1)[1]).decode())
+
+    def test_endpoints(self):
+        response = self.client.get(reverse('gis_endpoints'), {'type': 'world'})
+        self.assertEqual(
+            response.json()['world_map_style'],
+            reverse('map_style', kwargs={'style': 'positron'}))
+        manifest = build_styles(api_key='Test-Key-1')
+        response = self.client.get(reverse('gis_endpoints'), {'type': 'world'})
+        self.assertEqual(
+            response.json()['world_map_style'],
+            '/static/map-styles/' + manifest['positron.eo'])
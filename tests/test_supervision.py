@@ -0,0 +1,64 @@
+from django.contrib.auth.models import Group
+from django.core.cache import cache
+from django.test import TestCase, tag
+
+from core.supervision import profile_place_countries, supervised_countries
+
+from .factories import PlaceFactory, ProfileFactory, UserFactory
+
+
+@tag('auth')
+class SupervisionCacheTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.group_nl = Group.objects.get_or_create(name='NL')[0]
+        cls.group_fr = Group.objects.get_or_create(name='FR')[0]
+        cls.user = UserFactory(profile=None)
+
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+
+    def test_supervised_countries(self):
+        self.assertEqual(supervised_countries(self.user), frozenset())
+        self.user.groups.add(self.group_nl)
+        with self.assertNumQueries(0):
+            self.assertEqual(supervised_countries(self.user), {'NL'})
+        self.group_fr.user_set.add(self.user)
+        self.assertEqual(supervised_countries(self.user), {'NL', 'FR'})
+        self.user.groups.remove(self.group_nl)
+        self.assertEqual(supervised_countries(self.user), {'FR'})
+        self.group_fr.user_set.clear()
+        self.assertEqual(supervised_countries(self.user), frozenset())
+
+    def test_supervised_countries_superuser(self):
+        self.assertEqual(supervised_countries(self.user), frozenset())
+        self.user.is_superuser = True
+        self.user.save()
+        self.assertEqual(supervised_countries(self.user), {'NL', 'FR'})
+        Group.objects.create(name='DE')
+        self.assertEqual(supervised_countries(self.user), {'NL', 'FR', 'DE'})
+
+    def test_profile_place_countries(self):
+        profile = ProfileFactory()
+        self.assertEqual(profile_place_countries(profile), frozenset())
+        place = PlaceFactory(owner=profile, country='NL')
+        with self.assertNumQueries(0):
+            self.assertEqual(profile_place_countries(profile), {'NL'})
+        place.country = 'FR'
+        place.save()
+        self.assertEqual(profile_place_countries(profile), {'FR'})
+        place.deleted = True
+        place.save()
+        self.assertEqual(profile_place_countries(profile), frozenset())
+
+    def test_profile_place_countries_owner_change(self):
+        profile, other_profile = ProfileFactory(), ProfileFactory()
+        place = PlaceFactory(owner=profile, country='NL')
+        self.assertEqual(profile_place_countries(profile), {'NL'})
+        self.assertEqual(profile_place_countries(other_profile), frozenset())
+        # Both the previous and the new owner are expected to be affected.
+        place.owner = other_profile
+        place.save()
+        self.assertEqual(profile_place_countries(profile), frozenset())
+        self.assertEqual(profile_place_countries(other_profile), {'NL'})
@@ -0,0 +1,265 @@
+import math
+import threading
+
+from django.conf import settings
+from django.contrib.auth.models import Group
+from django.contrib.gis.geos import Point
+from django.test import SimpleTestCase, TestCase, tag
+from django.urls import reverse
+
+from django_countries.fields import Country
+
+from hosting.models import Place, Profile
+from maps import SRID
+from maps.clusters import (
+    CLUSTER_MAX_ZOOM, ClusterIndex, get_cluster_index,
+    reset_cluster_indexes, unproject,
+)
+from maps.tiles import (
+    TILE_CONTENT_TYPE, TILE_MAX_ZOOM, is_valid_tile, tile_bounds,
+)
+from maps.views import CountryTileView, PublicTileView
+
+from .factories import PlaceFactory, ProfileFactory, UserFactory
+
+
+def tile_of(point, z):
+    """
+    Returns the coordinates of the tile at zoom level `z` containing the point.
+    """
+    tiles_count = 2**z
+    x = math.floor((point.x + 180) / 360 * tiles_count)
+    y = math.floor((1 - math.asinh(math.tan(math.radians(point.y))) / math.pi) / 2 * tiles_count)
+    return z, x, y
+
+
+@tag('utils', 'geo')
+class TileGeometryTests(SimpleTestCase):
+    def test_valid_tile(self):
+        self.assertTrue(is_valid_tile(0, 0, 0))
+        self.assertTrue(is_valid_tile(3, 7, 0))
+        self.assertFalse(is_valid_tile(0, 1, 0))
+        self.assertFalse(is_valid_tile(3, 0, 8))
+        self.assertFalse(is_valid_tile(23, 0, 0))
+        # The tiles beyond the maximal zoom level of the maps are not served.
+        self.assertTrue(is_valid_tile(TILE_MAX_ZOOM, 0, 0))
+        self.assertFalse(is_valid_tile(TILE_MAX_ZOOM + 1, 0, 0))
+
+    def test_bounds(self):
+        west, south, east, north = tile_bounds(0, 0, 0, buffer=0).extent
+        self.assertEqual((west, east), (-180.0, 180.0))
+        self.assertAlmostEqual(north, 85.0511, places=4)
+        self.assertAlmostEqual(south, -85.0511, places=4)
+
+        west, south, east, north = tile_bounds(1, 1, 0, buffer=0).extent
+        self.assertEqual((west, south, east), (0.0, 0.0, 180.0))
+
+        paris = Point(2.3522, 48.8566, srid=SRID)
+        for z in (2, 8, 14):
+            with self.subTest(z=z):
+                self.assertTrue(tile_bounds(*tile_of(paris, z), buffer=0).contains(paris))
+        # The buffer is expected to extend the area beyond the tile's edges.
+        self.assertTrue(tile_bounds(1, 0, 0).contains(Point(1, 1, srid=SRID)))
+        self.assertFalse(tile_bounds(1, 0, 0, buffer=0).contains(Point(1, 1, srid=SRID)))
+
+
+@tag('utils', 'geo')
+class ClusterIndexTests(SimpleTestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        # Two groups of places, in Paris and in Lyon, and one place in Tokyo.
+        cls.points = (
+            [(i, 2.35 + i * 0.001, 48.85, {'name': f"P{i}"}) for i in range(5)]
+            + [(10 + i, 4.83, 45.76 + i * 0.001, {'name': f"L{i}"}) for i in range(3)]
+            + [(20, 139.69, 35.68, {'name': "T"})]
+        )
+        cls.index = ClusterIndex(cls.points, version='test')
+
+    def test_clusters(self):
+        for zoom in range(CLUSTER_MAX_ZOOM + 1):
+            with self.subTest(zoom=zoom):
+                nodes = self.index.get_clusters(zoom, -180, -85, 180, 85)
+                # No place is expected to be lost or counted twice.
+                self.assertEqual(sum(node.count for node in nodes), len(self.points))
+
+        nodes = self.index.get_clusters(2, -180, -85, 180, 85)
+        self.assertEqual(sorted(node.count for node in nodes), [1, 8])
+        cluster = next(node for node in nodes if node.is_cluster)
+        self.assertIsNone(cluster.place_id)
+        # The cluster is expected to split into those of Paris and Lyon.
+        self.assertEqual(cluster.expansion_zoom, 3)
+        single = next(node for node in nodes if not node.is_cluster)
+        self.assertEqual(single.place_id, 20)
+        self.assertEqual(single.properties, {'name': "T"})
+        lon, lat = unproject(single.x, single.y)
+        self.assertAlmostEqual(lon, 139.69)
+        self.assertAlmostEqual(lat, 35.68)
+
+        nodes = self.index.get_clusters(8, -180, -85, 180, 85)
+        self.assertEqual(sorted(node.count for node in nodes), [1, 3, 5])
+        nodes = self.index.get_clusters(CLUSTER_MAX_ZOOM, -180, -85, 180, 85)
+        self.assertEqual(len(nodes), len(self.points))
+
+    def test_bounding_box(self):
+        nodes = self.index.get_clusters(8, 0, 40, 10, 50)
+        self.assertEqual(sorted(node.count for node in nodes), [3, 5])
+        nodes = self.index.get_clusters(8, 100, 0, 150, 50)
+        self.assertEqual([node.place_id for node in nodes], [20])
+        self.assertEqual(self.index.get_clusters(8, -100, -50, -50, 0), [])
+
+    def test_rebuild(self):
+        reset_cluster_indexes()
+        self.addCleanup(reset_cluster_indexes)
+        index = get_cluster_index('test', 'v1', lambda: self.points)
+        self.assertIs(get_cluster_index('test', 'v1', lambda: []), index)
+
+        served_indexes = []
+
+        def concurrent_request():
+            served_indexes.append(get_cluster_index('test', 'v2', lambda: []))
+
+        def points():
+            # While the new index is being built, the previous one is expected
+            # to be served to the other threads without waiting.
+            thread = threading.Thread(target=concurrent_request)
+            thread.start()
+            thread.join(timeout=5)
+            return self.points
+
+        new_index = get_cluster_index('test', 'v2', points)
+        self.assertEqual(served_indexes, [index])
+        self.assertEqual(new_index.version, 'v2')
+        self.assertIs(get_cluster_index('test', 'v2', lambda: []), new_index)
+
+
+@tag('views', 'geo')
+class VectorTileViewTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.location = Point(2.3522, 48.8566, srid=SRID)
+        cls.place = PlaceFactory(country='FR', location=cls.location, available=True)
+        cls.place.visibility['online_public'] = True
+        cls.place.visibility.save()
+
+    def setUp(self):
+        reset_cluster_indexes()
+        self.addCleanup(reset_cluster_indexes)
+
+    def test_world_tile(self):
+        self.client.force_login(UserFactory(profile=None))
+        z, x, y = tile_of(self.location, 10)
+        response = self.client.get(reverse('world_map_tile', kwargs={'z': z, 'x': x, 'y': y}))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], TILE_CONTENT_TYPE)
+        self.assertIn('private', response['Cache-Control'])
+        self.assertIn(b'places', response.content)
+        self.assertIn(self.place.city.encode(), response.content)
+
+        # A tile far away from the place is expected to be empty.
+        response = self.client.get(reverse('world_map_tile', kwargs={'z': z, 'x': x + 5, 'y': y}))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.content, b'')
+
+        response = self.client.get(reverse('world_map_tile', kwargs={'z': 1, 'x': 2, 'y': 0}))
+        self.assertEqual(response.status_code, 404)
+
+    def test_world_tile_precision(self):
+        location, rounded_location = Point(2.362, 48.858, srid=SRID), Point(2.36, 48.86, srid=SRID)
+        z, x, y = tile_of(location, TILE_MAX_ZOOM)
+        self.assertEqual(tile_of(rounded_location, TILE_MAX_ZOOM), (z, x, y))
+        place = PlaceFactory(country='FR', location=location, available=True)
+        place.visibility['online_public'] = True
+        place.visibility.save()
+        url = reverse('world_map_tile', kwargs={'z': z, 'x': x, 'y': y})
+        tile = self.client.get(url).content
+        self.assertIn(b'places', tile)
+        # The location of the place is expected to be rounded to 0.01 degree,
+        # that is, encoded the same as the rounded location.
+        Place.all_objects.filter(pk=place.pk).update(location=rounded_location)
+        self.assertEqual(self.client.get(url).content, tile)
+        # A location rounded differently is expected to be encoded differently.
+        Place.all_objects.filter(pk=place.pk).update(location=Point(2.368, 48.858, srid=SRID))
+        self.assertNotEqual(self.client.get(url).content, tile)
+
+    def test_clustered_world_tile_precision(self):
+        self.assertLessEqual(10, CLUSTER_MAX_ZOOM)
+        view = PublicTileView.for_user_type(False)
+        features = list(view.get_features(view.get_queryset().filter(pk=self.place.pk)))
+        # The locations from which the clusters are computed are expected to
+        # be rounded to 0.01 degree, the same as in the unclustered tiles.
+        self.assertEqual([(lon, lat) for _, lon, lat, _ in features], [(2.35, 48.86)])
+
+        z, x, y = tile_of(self.location, 10)
+        url = reverse('world_map_tile', kwargs={'z': z, 'x': x, 'y': y})
+        tile = self.client.get(url).content
+        self.assertIn(self.place.city.encode(), tile)
+        reset_cluster_indexes()
+        Place.all_objects.filter(pk=self.place.pk).update(location=Point(2.35, 48.86, srid=SRID))
+        self.assertEqual(self.client.get(url).content, tile)
+
+    def test_clustered_world_tile(self):
+        self.client.force_login(UserFactory(profile=None))
+        for _ in range(3):
+            place = PlaceFactory(
+                country='FR', available=True,
+                location=Point(self.location.x + 0.01, self.location.y - 0.01, srid=SRID))
+            place.visibility['online_public'] = True
+            place.visibility.save()
+        z, x, y = tile_of(self.location, 5)
+        response = self.client.get(reverse('world_map_tile', kwargs={'z': z, 'x': x, 'y': y}))
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(b'point_count', response.content)
+        self.assertIn(b'expansion_zoom', response.content)
+        # The places are expected to be merged into a cluster.
+        self.assertNotIn(self.place.city.encode(), response.content)
+
+    def test_country_tile(self):
+        z, x, y = tile_of(self.location, 6)
+        url = reverse('country_map_tile', kwargs={'country_code': 'FR', 'z': z, 'x': x, 'y': y})
+        user = UserFactory(profile=None)
+        self.client.force_login(user)
+        response = self.client.get(url)
+        self.assertNotEqual(response.status_code, 200)
+
+        Group.objects.get_or_create(name='FR')[0].user_set.add(user)
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], TILE_CONTENT_TYPE)
+        self.assertIn(b'owner_full_name', response.content)
+
+    def test_property_expressions(self):
+        owners = [
+            ProfileFactory(first_name="  ", last_name="O'Brien & <Co>", names_inversed=True),
+            ProfileFactory(first_name="Zamenhof", last_name="", user__username="ludoviko"),
+            ProfileFactory(first_name="", last_name="", user__username="la.zam"),
+            ProfileFactory(first_name="Ĉefa", last_name="Gastiganto", names_inversed=True),
+        ]
+        owners[1].user.email = settings.INVALID_PREFIX + "Ludoviko@Example.org"
+        owners[1].user.save()
+        for owner in owners:
+            place = PlaceFactory(owner=owner, country='FR', location=self.location, available=True)
+            place.visibility['online_public'] = True
+            place.visibility.save()
+        # The avatar URLs not stored are expected to be computed as well.
+        Profile.all_objects.filter(pk__in=[owners[1].pk, owners[2].pk]).update(stored_avatar_url='')
+
+        country_view = CountryTileView()
+        country_view.country, country_view.in_book_status = Country('FR'), None
+        for view in (PublicTileView.for_user_type(False), PublicTileView.for_user_type(True), country_view):
+            with self.subTest(view=type(view).__name__, properties=view.properties):
+                queryset = view.get_queryset().order_by('id')
+                # The properties computed by the database are expected to be
+                # the same as those computed in Python.
+                self.assertEqual(
+                    list(
+                        queryset.values(**{
+                            f'mvt_{name}': expression
+                            for name, expression in view.get_property_expressions().items()
+                        })
+                    ),
+                    [
+                        {f'mvt_{name}': value for name, value in view.get_row_properties(row).items()}
+                        for row in view.get_rows(queryset)
+                    ]
+                )
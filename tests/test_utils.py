@@ -7,9 +7,12 @@ from unittest import skipUnless
 from unittest.mock import patch
 
 from django.conf import settings
+from django.contrib.gis.db.models.functions import Distance
 from django.contrib.gis.geos import Point as GeoPoint
 from django.core import mail
+from django.db.models import F
 from django.test import TestCase, override_settings, tag
+from django.utils import timezone, translation
 from django.utils.functional import SimpleLazyObject, lazy, lazystr
 
 from anymail.message import AnymailMessage
@@ -26,16 +29,18 @@ from core.utils import (
 )
 from hosting.countries import countries_with_mandatory_region
 from hosting.gravatar import email_to_gravatar
+from hosting.models import GeocodingResult, Place
 from hosting.utils import (
     RenameAndPrefixAvatar, emulate_geocode_country, geocode,
     geocode_city, title_with_particule, value_without_invalid_marker,
 )
 from links.utils import create_unique_url
-from maps import data as geodata
+from maps import SRID, data as geodata
+from maps.functions import NearestDistance
 from maps.utils import bufferize_country_boundaries
 
 from .assertions import AdditionalAsserts
-from .factories import ProfileFactory, ProfileSansAccountFactory
+from .factories import PlaceFactory, ProfileFactory, ProfileSansAccountFactory
 
 
 @tag('utils')
@@ -561,6 +566,129 @@ class GeographicUtilityFunctionsTests(AdditionalAsserts, TestCase):
                 self.assertIsNone(result.point)
         logging.getLogger('geocoder').removeHandler(null_handler)
 
+    @patch('geocoder.base.requests.Session.get')
+    def test_geocode_stored(self, mock_get):
+        mock_get.return_value.json.return_value = {
+            "rate": {"limit": 2500, "remaining": 1800, "reset": 1586908800},
+            "licenses": [{"name": "see attribution guide", "url": "https://opencagedata.com/credits"}],
+            "results": [{
+                "components": {"_type": "city", "city": "Gent", "country_code": "be"},
+                "formatted": "Gent, Belgio",
+                "geometry": {"lat": 51.0538286, "lng": 3.7250121},
+            }],
+            "status": {"code": 200, "message": "OK"}, "total_results": 1
+        }
+        mock_get.return_value.status_code = 200
+        first_result = geocode("Gent", 'BE')
+        self.assertEqual(mock_get.call_count, 1)
+        self.assertTrue(GeocodingResult.objects.filter(query="Gent", negative=False).exists())
+
+        # An identical query (up to letter case and spacing) is expected to be
+        # answered without contacting the geocoding service.
+        for query in ("Gent", " GENT  "):
+            with self.subTest(query=query):
+                result = geocode(query, 'be')
+                self.assertEqual(mock_get.call_count, 1)
+                self.assertEqual(result.status, 'OK')
+                self.assertEqual(result.address, first_result.address)
+                self.assertEqual(result.xy, first_result.xy)
+                self.assertEqual(result.point, first_result.point)
+        # A query in a different language or with different flags is expected
+        # to reach the geocoding service.
+        with translation.override('en'):
+            geocode("Gent", 'BE')
+        geocode("Gent", 'BE', multiple=True)
+        self.assertEqual(mock_get.call_count, 3)
+
+        # A response with no results is expected to be stored as well.
+        mock_get.return_value.json.return_value = {
+            "licenses": [{"name": "see attribution guide", "url": "https://opencagedata.com/credits"}],
+            "results": [], "status": {"code": 200, "message": "OK"}, "total_results": 0
+        }
+        for i in range(2):
+            result = geocode("Gentx", 'BE')
+            self.assertEqual(result.status, 'ERROR - No results found')
+            self.assertIsNone(result.point)
+        self.assertEqual(mock_get.call_count, 4)
+        self.assertTrue(GeocodingResult.objects.filter(query="Gentx", negative=True).exists())
+
+        # An expired response is expected to be ignored.
+        GeocodingResult.objects.filter(query="Gentx").update(expires_on=timezone.now())
+        geocode("Gentx", 'BE')
+        self.assertEqual(mock_get.call_count, 5)
+
+        # A failed request is not expected to be stored.
+        mock_get.return_value.json.return_value = {
+            "licenses": [{"name": "see attribution guide", "url": "https://opencagedata.com/credits"}],
+            "results": [], "status": {"code": 402, "message": "quota exceeded"}, "total_results": 0
+        }
+        for i in range(2):
+            geocode("Brugge", 'BE')
+        self.assertEqual(mock_get.call_count, 7)
+        self.assertFalse(GeocodingResult.objects.filter(query="Brugge").exists())
+
+        # A private query is not expected to be stored.
+        mock_get.return_value.json.return_value = {
+            "licenses": [{"name": "see attribution guide", "url": "https://opencagedata.com/credits"}],
+            "results": [{
+                "components": {"_type": "house", "city": "Gent", "country_code": "be"},
+                "formatted": "Veldstraat 1, Gent, Belgio",
+                "geometry": {"lat": 51.0526, "lng": 3.7219},
+            }],
+            "status": {"code": 200, "message": "OK"}, "total_results": 1
+        }
+        for i in range(2):
+            result = geocode("Veldstraat 1, Gent", 'BE', private=True)
+            self.assertEqual(result.status, 'OK')
+        self.assertEqual(mock_get.call_count, 9)
+        self.assertFalse(GeocodingResult.objects.filter(query="Veldstraat 1, Gent").exists())
+
+    @patch('geocoder.base.requests.Session.get')
+    def test_geocode_renew(self, mock_get):
+        mock_get.return_value.json.return_value = {
+            "licenses": [{"name": "see attribution guide", "url": "https://opencagedata.com/credits"}],
+            "results": [{
+                "components": {"_type": "city", "city": "Gent", "country_code": "be"},
+                "formatted": "Gent, Belgio",
+                "geometry": {"lat": 51.0538286, "lng": 3.7250121},
+            }],
+            "status": {"code": 200, "message": "OK"}, "total_results": 1
+        }
+        mock_get.return_value.status_code = 200
+        geocode("Gent", 'BE')
+        expiry = GeocodingResult.objects.get(query="Gent").expires_on
+
+        # A failed renewal is expected to keep the stored response.
+        mock_get.return_value.json.return_value = {
+            "results": [], "status": {"code": 402, "message": "quota exceeded"}, "total_results": 0
+        }
+        null_handler = logging.NullHandler()
+        logging.getLogger('geocoder').addHandler(null_handler)
+        result = geocode("Gent", 'BE', renew=True)
+        logging.getLogger('geocoder').removeHandler(null_handler)
+        self.assertEqual(mock_get.call_count, 2)
+        self.assertTrue(result.error)
+        self.assertEqual(GeocodingResult.objects.get(query="Gent").expires_on, expiry)
+        result = geocode("Gent", 'BE')
+        self.assertEqual(mock_get.call_count, 2)
+        self.assertEqual(result.status, 'OK')
+
+        # A successful renewal is expected to replace the stored response.
+        mock_get.return_value.json.return_value = {
+            "licenses": [{"name": "see attribution guide", "url": "https://opencagedata.com/credits"}],
+            "results": [{
+                "components": {"_type": "city", "city": "Gent", "country_code": "be"},
+                "formatted": "Gento, Belgio",
+                "geometry": {"lat": 51.0538286, "lng": 3.7250121},
+            }],
+            "status": {"code": 200, "message": "OK"}, "total_results": 1
+        }
+        geocode("Gent", 'BE', renew=True)
+        self.assertEqual(mock_get.call_count, 3)
+        self.assertGreater(GeocodingResult.objects.get(query="Gent").expires_on, expiry)
+        self.assertEqual(geocode("Gent", 'BE').address, "Gento, Belgio")
+        self.assertEqual(mock_get.call_count, 3)
+
     @tag('external')
     @skipUnless(settings.TEST_EXTERNAL_SERVICES, 'External services are tested only explicitly')
     def test_geocode_integration_contract(self):
@@ -813,6 +941,29 @@ class GeographicUtilityFunctionsTests(AdditionalAsserts, TestCase):
             self.assertLength(res['bbox']['southwest'], 2)
             self.assertEqual(res['center'], geodata.COUNTRIES_GEO[country]['center'])
 
+    def test_nearest_distance_ordering(self):
+        for country in ('NL', 'BR', 'JP', 'NZ', 'CA', 'ZA'):
+            PlaceFactory(country=country)
+        PlaceFactory(country='NL', location=None)
+        origin = GeoPoint(4.4631727, 51.9228958, srid=SRID)
+
+        qs = Place.all_objects.order_by(NearestDistance('location', origin))
+        self.assertIn('<->', str(qs.query))
+        expected_order = list(
+            Place.all_objects
+            .annotate(distance=Distance('location', origin))
+            .order_by(F('distance').asc(nulls_last=True))
+            .values_list('pk', flat=True)
+        )
+        self.assertEqual(list(qs.values_list('pk', flat=True)), expected_order)
+        # The distance is expected to be measured in meters.
+        nearest = qs.annotate(
+            distance=Distance('location', origin),
+            knn_distance=NearestDistance('location', origin),
+        ).first()
+        self.assertEqual(nearest.country, 'NL')
+        self.assertAlmostEqual(nearest.knn_distance, nearest.distance.m, delta=nearest.distance.m / 100 + 1)
+
 
 @tag('utils')
 class MassMailTests(AdditionalAsserts, TestCase):